@@ -80,6 +80,10 @@ def main():
         # Only start a simulation node if called with --sim or --detached
         if mode[:3] == 'sim':
             if mode[-8:] != 'detached':
+                # A template process (--zygote) only returns here in
+                # the nodes that are forked from it
+                if '--zygote' in sys.argv:
+                    bs.net.forkserver()
                 bs.net.connect()
             bs.net.run()
         else:
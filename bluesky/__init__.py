@@ -1,4 +1,5 @@
 ''' BlueSky: The open-source ATM simulator.'''
+import time
 from bluesky import settings
 from bluesky.core import Signal
 from bluesky import stack
@@ -26,6 +27,9 @@ sim = None
 scr = None
 server = None
 
+# Duration of each stage of the last call to init() [s]
+startup_times = dict()
+
 
 def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
     ''' Initialize bluesky modules.
@@ -36,6 +40,16 @@ def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
         - pygame: indicate if BlueSky is started with BlueSky_pygame.py
         - discovery: Enable network discovery
     '''
+    # Keep track of the startup time of each initialisation stage
+    startup_times.clear()
+    tstage = time.perf_counter()
+
+    def stagedone(name):
+        nonlocal tstage
+        tnow = time.perf_counter()
+        startup_times[name] = tnow - tstage
+        tstage = tnow
+
     # Is this a server running headless?
     headless = (mode[-8:] == 'headless')
 
@@ -49,6 +63,7 @@ def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
 
     # Initialise tools
     tools.init()
+    stagedone('settings')
 
     # Load navdatabase in all versions of BlueSky
     # Only the headless server doesn't need this
@@ -56,6 +71,7 @@ def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
         from bluesky.navdatabase import Navdatabase
         global navdb
         navdb = Navdatabase()
+        stagedone('navdb')
 
     # If mode is server-gui or server-headless start the networking server
     if mode[:6] == 'server':
@@ -63,6 +79,7 @@ def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
         from bluesky.network.server import Server
         print('SERVERTEST', discovery)
         server = Server(discovery)
+        stagedone('server')
 
     # The remaining objects are only instantiated in the sim nodes
     if mode[:3] == 'sim':
@@ -85,6 +102,7 @@ def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
         # Initialize singletons
         global traf, sim, scr, net
         traf = Traffic()
+        stagedone('traffic')
         sim = Simulation()
         scr = Screen()
         net = Node(settings.simevent_port,
@@ -94,7 +112,14 @@ def init(mode='sim', pygame=False, discovery=True, cfgfile='', scnfile=''):
         varexplorer.init()
         if scnfile:
             stack.stack(f'IC {scnfile}')
+        stagedone('simulation')
 
     from bluesky.core import plugin
     plugin.init(mode)
+    stagedone('plugins')
     stack.init(mode)
+    stagedone('stack')
+
+    print('Startup time: ' + ', '.join(f'{name} {1e3 * dt:.0f} ms' for name, dt in
+                                        startup_times.items()) +
+          f' (total {1e3 * sum(startup_times.values()):.0f} ms)')
@@ -0,0 +1,150 @@
+''' Opt-in wall-time profiling of the simulation update.
+
+    When profiling is on, the call count and wall-time statistics are kept
+    of each timed function (by timer name), and of the phases of the
+    simulation step ('sim.*') and traffic update ('traffic.*'). Phases are
+    timed with tic/toc checkpoints, which do nothing when profiling is off:
+
+        t = profiler.tic()
+        phase1()
+        t = profiler.toc('phase1', t)
+        phase2()
+        profiler.toc('phase2', t)
+'''
+import csv
+import json
+import os
+import time
+import numpy as np
+from bluesky import settings
+
+
+# Number of most recent durations kept per item, for the 95th percentile
+NSAMPLES = 1000
+
+# Profiling switch
+active = False
+
+# Statistics per profiled item
+stats = dict()
+
+
+class Stats:
+    ''' Count, total, maximum and 95th percentile of the values (e.g., the
+        wall times) of one item. '''
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = np.zeros(NSAMPLES)
+
+    def add(self, value):
+        ''' Add the value (e.g., the duration [s] of one call). '''
+        self.samples[self.count % NSAMPLES] = value
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def p95(self):
+        ''' 95th percentile of the most recent values. '''
+        return float(np.percentile(self.samples[:min(self.count, NSAMPLES)], 95))
+
+
+def tic():
+    ''' Start timing: returns the current wall time, or zero when
+        profiling is off. '''
+    return time.perf_counter() if active else 0.0
+
+
+def toc(name, t0):
+    ''' Record the time since t0 (from tic, or a previous toc) under name.
+        Returns the current wall time for the next checkpoint, or zero when
+        profiling is off (or was switched on after t0). '''
+    if not t0:
+        return 0.0
+    t = time.perf_counter()
+    stat = stats.get(name)
+    if stat is None:
+        stat = stats[name] = Stats()
+    stat.add(t - t0)
+    return t
+
+
+def setactive(flag):
+    ''' Switch profiling on or off. '''
+    global active
+    active = flag
+
+
+def reset():
+    ''' Clear all statistics. '''
+    stats.clear()
+
+
+def summary():
+    ''' Statistics of all profiled items, sorted by total time, as a dict
+        with a list per column. Times are in seconds. '''
+    items = sorted(stats.items(), key=lambda item: item[1].total, reverse=True)
+    return dict(name=[name for name, _ in items],
+                count=[stat.count for _, stat in items],
+                total=[stat.total for _, stat in items],
+                mean=[stat.total / stat.count for _, stat in items],
+                p95=[stat.p95() for _, stat in items],
+                max=[stat.max for _, stat in items])
+
+
+def showtext():
+    ''' Table of the statistics for the PROFILE SHOW command. '''
+    data = summary()
+    if not data['name']:
+        return 'No profile data' + ('' if active else ', profiling is off')
+    width = max(12, *(len(name) for name in data['name']))
+    lines = [f'{"name":<{width}} {"count":>8} {"total[s]":>9} {"mean[ms]":>9} '
+             f'{"p95[ms]":>9} {"max[ms]":>9}']
+    for name, count, total, mean, p95, tmax in zip(*data.values()):
+        lines.append(f'{name:<{width}} {count:>8d} {total:>9.3f} {1e3 * mean:>9.3f} '
+                     f'{1e3 * p95:>9.3f} {1e3 * tmax:>9.3f}')
+    return '\n'.join(lines)
+
+
+def dump(fname=''):
+    ''' Write the statistics to a CSV file, or to a JSON file when fname
+        has the .json extension. Without a directory, fname is put in the
+        log path. Returns the name of the written file. '''
+    if not fname:
+        fname = time.strftime('PROFILE_%Y%m%d_%H-%M-%S.csv')
+    if not os.path.dirname(fname):
+        fname = os.path.join(settings.log_path, fname)
+    data = summary()
+    with open(fname, 'w', newline='') as f:
+        if fname.lower().endswith('.json'):
+            json.dump([dict(zip(data, row)) for row in zip(*data.values())], f, indent=1)
+        else:
+            writer = csv.writer(f)
+            writer.writerow(data.keys())
+            writer.writerows(zip(*data.values()))
+    return fname
+
+
+def profilecmd(cmd='SHOW', fname=''):
+    ''' PROFILE [ON/OFF/RESET/SHOW/DUMP] [filename]: Profile the wall time
+        of the timed functions and the phases of the simulation update. '''
+    cmd = cmd.upper()
+    if cmd == 'ON':
+        setactive(True)
+        return True, 'Profiling is on'
+    if cmd == 'OFF':
+        setactive(False)
+        return True, 'Profiling is off'
+    if cmd == 'RESET':
+        reset()
+        return True, 'Profile data cleared'
+    if cmd == 'SHOW':
+        return True, showtext()
+    if cmd == 'DUMP':
+        if not stats:
+            return False, 'No profile data to write'
+        return True, 'Profile written to ' + dump(fname)
+    return False, f'PROFILE: unknown option {cmd}, use ON/OFF/RESET/SHOW/DUMP'
@@ -5,6 +5,7 @@ from inspect import signature
 from types import SimpleNamespace
 from decimal import Decimal
 from bluesky import settings
+from bluesky.core import profiler
 
 
 # Register settings defaults
@@ -201,12 +202,16 @@ class TimedFunction:
     def call_timeddt(self):
         ''' Wrapper method to call timed functions that accept dt as argument. '''
         if self.timer.counter == 0:
+            t0 = profiler.tic()
             self._callback(dt=float(self.timer.dt_act))
+            profiler.toc(self.name, t0)
 
     def call_timed(self):
         ''' Wrapper method to call timed functions. '''
         if self.timer.counter == 0:
+            t0 = profiler.tic()
             self._callback()
+            profiler.toc(self.name, t0)
 
     def notimplemented(self, *args, **kwargs):
         ''' This function is called when a (derived) class is selected that doesn't
@@ -239,11 +244,15 @@ def timed_function(fun=None, name='', dt=0, manual=False, hook='', timer=None):
             if 'dt' in signature(fun).parameters:
                 def wrapper(*args, **kwargs):
                     if manualtimer.counter == 0:
+                        t0 = profiler.tic()
                         fun(*args, **kwargs, dt=float(manualtimer.dt_act))
+                        profiler.toc(manualtimer.name, t0)
             else:
                 def wrapper(*args, **kwargs):
                     if manualtimer.counter == 0:
+                        t0 = profiler.tic()
                         fun(*args, **kwargs)
+                        profiler.toc(manualtimer.name, t0)
             wrapper.__manualtimer__ = manualtimer
             wrapper.__func__ = fun
             return wrapper
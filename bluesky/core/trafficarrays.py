@@ -7,9 +7,21 @@ except ImportError:
     # In python <3.3 collections.abc doesn't exist
     from collections import Collection
 import numpy as np
+from bluesky import settings
+
+
+# Register settings defaults
+settings.set_variable_defaults(trafarray_buffered=False)
 
 defaults = {"float": 0.0, "int": 0, "uint":0, "bool": False, "S": "", "str": ""}
 
+# Minimum capacity of traffic array buffers (in buffered storage mode)
+MIN_CAPACITY = 16
+
+# Maximum number of deleted elements for which buffered arrays are copied
+# slice by slice instead of with a boolean mask
+MAX_SLICEDELETE = 8
+
 
 class RegisterElementParameters:
     """ Class to use in 'with'-syntax. This class automatically
@@ -51,6 +63,8 @@ class TrafficArrays:
         self._children = []
         self._ArrVars  = []
         self._LstVars  = []
+        # Pre-allocated storage of numeric arrays in buffered storage mode
+        self._ArrBufs  = dict()
 
     def reparent(self, newparent):
         ''' Give TrafficArrays object a new parent. '''
@@ -86,10 +100,60 @@ class TrafficArrays:
             vartype = type(lst[0]).__name__ if lst else 'str'
             lst.extend([defaults.get(vartype)] * n)
 
+        buffered = settings.trafarray_buffered
         for v in self._ArrVars:  # Numpy array
+            if buffered and self.__dict__[v].dtype.kind in 'biuf':
+                self._bufcreate(v, n)
+                continue
             # Get type without byte length
             vartype = ''.join(c for c in str(self.__dict__[v].dtype) if c.isalpha())
-            self.__dict__[v] = np.append(self.__dict__[v], [defaults.get(vartype, 0)] * n)
+            self.__dict__[v] = np.append(self.__dict__[v], np.full(n, defaults.get(vartype, 0)))
+
+    def _getbuffer(self, name):
+        ''' Return the storage buffer of traffic array 'name', or None when
+            the array is no longer the view on its buffer, for instance
+            because the array was replaced by a new array. '''
+        buf, view = self._ArrBufs.get(name, (None, None))
+        return buf if self.__dict__[name] is view else None
+
+    def _bufcreate(self, name, n):
+        ''' Append n elements to buffered (numeric) traffic array 'name',
+            growing its buffer with amortised capacity doubling. '''
+        arr = self.__dict__[name]
+        n0 = len(arr)
+        buf = self._getbuffer(name)
+        if buf is None or len(buf) < n0 + n:
+            buf = np.empty(max(MIN_CAPACITY, 2 * (n0 + n)), dtype=arr.dtype)
+            buf[:n0] = arr
+        # Default values of all numeric types are zero
+        buf[n0:n0 + n] = 0
+        view = self.__dict__[name] = buf[:n0 + n]
+        self._ArrBufs[name] = (buf, view)
+
+    def _bufdelete(self, name, didx, keep):
+        ''' Delete the elements with sorted unique indices didx from
+            buffered traffic array 'name'. The kept elements are copied to a
+            new buffer of the same capacity: compacting in place would
+            silently change arrays and views on the old buffer that are held
+            elsewhere. When many elements are deleted, the kept elements are
+            selected with boolean mask keep. '''
+        arr = self.__dict__[name]
+        nkeep = len(arr) - len(didx)
+        buf = self._getbuffer(name)
+        capacity = max(MIN_CAPACITY, 2 * nkeep if buf is None else len(buf))
+        buf = np.empty(capacity, dtype=arr.dtype)
+        view = self.__dict__[name] = buf[:nkeep]
+        if keep is not None:
+            np.compress(keep, arr, out=view)
+        else:
+            # Copy the slices between the deleted elements
+            start = pos = 0
+            for i in didx.tolist():
+                view[pos:pos + i - start] = arr[start:i]
+                pos += i - start
+                start = i + 1
+            view[pos:] = arr[start:]
+        self._ArrBufs[name] = (buf, view)
 
     def istrafarray(self, name):
         ''' Returns true if parameter 'name' is a traffic array. '''
@@ -107,8 +171,27 @@ class TrafficArrays:
         for child in self._children:
             child.delete(idx)
 
+        buffered = settings.trafarray_buffered and self._ArrVars
+        if buffered:
+            # Sorted unique indices of the deleted elements. Like np.delete,
+            # this raises an IndexError for indices out of range
+            n = len(self.__dict__[self._ArrVars[0]])
+            didx = np.atleast_1d(np.asarray(idx))
+            if didx.dtype == bool:
+                didx = np.flatnonzero(didx)
+            if len(didx) and (didx.min() < -n or didx.max() >= n):
+                raise IndexError(f'Index out of bounds for {n} elements')
+            didx = np.unique(np.where(didx < 0, didx + n, didx))
+            keep = None
+            if len(didx) > MAX_SLICEDELETE:
+                keep = np.ones(n, dtype=bool)
+                keep[didx] = False
+
         for v in self._ArrVars:
-            self.__dict__[v] = np.delete(self.__dict__[v], idx)
+            if buffered and self.__dict__[v].dtype.kind in 'biuf':
+                self._bufdelete(v, didx, keep)
+            else:
+                self.__dict__[v] = np.delete(self.__dict__[v], idx)
 
         if self._LstVars:
             if isinstance(idx, Collection):
@@ -126,6 +209,7 @@ class TrafficArrays:
 
         for v in self._ArrVars:
             self.__dict__[v] = np.array([], dtype=self.__dict__[v].dtype)
+        self._ArrBufs.clear()
 
         for v in self._LstVars:
             self.__dict__[v] = []
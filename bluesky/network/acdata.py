@@ -0,0 +1,227 @@
+''' Incremental (delta-encoded) aircraft data stream.
+
+    ACDATA messages are either keyframes, that contain the complete aircraft
+    state, or deltas, that only contain the per-aircraft columns and rows
+    that changed since the previous message, and the deleted/created rows.
+
+    Message layout (a dict, serialised with msgpack):
+    - version:  ACDATA protocol version
+    - seq:      message sequence number
+    - keyframe: True for a complete state
+    - ntraf:    number of aircraft
+    - deleted:  indices (in the previous state) of deleted aircraft
+    - cols:     {name: values} of columns that are sent completely
+    - rows:     {name: [indices, values]} of columns of which only
+                changed rows are sent
+    - other:    {name: value} of changed non-per-aircraft data (all of it
+                in keyframes)
+
+    Created aircraft are always appended at the end, and are included in
+    the rows of all columns. A receiver that misses a message waits for
+    the next keyframe.
+'''
+import numpy as np
+
+
+# ACDATA protocol version
+ACDATA_VERSION = 1
+
+
+def differs(cur, prev):
+    ''' Elementwise comparison that treats equal NaNs as unchanged. '''
+    changed = cur != prev
+    if cur.dtype.kind == 'f' and prev.dtype.kind == 'f':
+        changed &= ~(np.isnan(cur) & np.isnan(prev))
+    return changed
+
+
+class ACDataEncoder:
+    ''' Sim-side encoder of the ACDATA stream. Keeps the last sent state to
+        determine what changed.
+
+        Arguments:
+        - keyframe_interval: number of messages between keyframes. With 1
+          all messages are keyframes. '''
+    def __init__(self, keyframe_interval=25):
+        self.keyframe_interval = keyframe_interval
+        self.reset()
+
+    def reset(self):
+        ''' Forget the sent state. The next message will be a keyframe. '''
+        self.seq = -1
+        self.nsince = 0
+        self.ids = []
+        self.cols = dict()
+        self.islist = dict()
+        self.other = dict()
+        self.keyframe = True
+
+    def request_keyframe(self):
+        ''' Send a keyframe with the next message (e.g., for a new client). '''
+        self.keyframe = True
+
+    def rowchanges(self, ids):
+        ''' Determine the kept and deleted rows of the previous state. Returns
+            None when ids isn't the kept ids (in order) followed by new ids. '''
+        if ids == self.ids:
+            return np.arange(len(ids)), np.array([], dtype=np.int64)
+        previdx = {acid: i for i, acid in enumerate(self.ids)}
+        kept = []
+        for acid in ids:
+            i = previdx.get(acid)
+            if i is None:
+                break
+            kept.append(i)
+        nkept = len(kept)
+        if any(acid in previdx for acid in ids[nkept:]) or \
+                any(i1 <= i0 for i0, i1 in zip(kept, kept[1:])):
+            return None
+        kept = np.array(kept, dtype=np.int64)
+        return kept, np.setdiff1d(np.arange(len(self.ids)), kept)
+
+    def encode(self, ids, cols, other=None):
+        ''' Encode the current aircraft state.
+
+            Arguments:
+            - ids: list of aircraft ids
+            - cols: {name: list/array} per-aircraft data. Columns that are
+              left out are unchanged, which is only possible when no
+              aircraft were created since the previous message.
+            - other: {name: value} other (e.g., scalar) data. Values that
+              are left out are unchanged. '''
+        ids = list(ids)
+        cols = dict(cols)
+        other = other or dict()
+        self.seq += 1
+        self.nsince += 1
+
+        changes = self.rowchanges(ids)
+        kept, deleted = changes or (None, None)
+        nkept = 0 if kept is None else len(kept)
+
+        # Columns that are left out are unchanged, apart from deleted rows
+        for name in self.cols.keys() - cols.keys():
+            if nkept < len(ids):
+                del self.cols[name]
+            elif len(deleted):
+                self.cols[name] = self.cols[name][kept]
+
+        keyframe = self.keyframe or changes is None or \
+            self.nsince >= self.keyframe_interval
+        msg = dict(version=ACDATA_VERSION, seq=self.seq, keyframe=keyframe,
+                   ntraf=len(ids), cols=dict(), rows=dict(), other=dict())
+        if keyframe:
+            self.keyframe = False
+            self.nsince = 0
+            msg['cols']['id'] = ids
+            for name in self.cols.keys() - cols.keys():
+                value = self.cols.pop(name)
+                cols[name] = value.tolist() if self.islist[name] else value
+        else:
+            msg['deleted'] = deleted
+            if nkept < len(ids):
+                msg['rows']['id'] = [np.arange(nkept, len(ids)), ids[nkept:]]
+
+        for name, value in cols.items():
+            cur = np.array(value)
+            prev = self.cols.get(name)
+            self.cols[name] = cur
+            self.islist[name] = isinstance(value, list)
+            if keyframe or prev is None or len(cur) != len(ids) or \
+                    len(prev) != len(self.ids) or cur.shape[1:] != prev.shape[1:]:
+                # Arrays are sent as the encoder's own copy, which is never
+                # modified in-place, so that they can be sent without copying
+                msg['cols'][name] = value if isinstance(value, list) else cur
+                continue
+            changed = np.flatnonzero(differs(cur[:nkept], prev[kept]))
+            if nkept < len(ids):
+                changed = np.append(changed, np.arange(nkept, len(ids)))
+            if 2 * len(changed) > len(ids):
+                msg['cols'][name] = value if isinstance(value, list) else cur
+            elif len(changed):
+                values = [value[i] for i in changed] if isinstance(value, list) \
+                    else cur[changed]
+                msg['rows'][name] = [changed, values]
+
+        for name, value in other.items():
+            prev = self.other.get(name, None)
+            if name not in self.other or not np.array_equal(prev, value):
+                # Arrays are stored (and sent) as the encoder's own copy
+                self.other[name] = value.copy() if isinstance(value, np.ndarray) else value
+            elif not keyframe:
+                continue
+            msg['other'][name] = self.other[name]
+        if keyframe:
+            # Other data that is left out is unchanged, and is resent
+            for name in self.other.keys() - other.keys():
+                msg['other'][name] = self.other[name]
+
+        self.ids = ids
+        return msg
+
+
+class ACDataDecoder:
+    ''' Client-side decoder of the ACDATA stream. '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        ''' Forget the received state, and wait for the next keyframe. '''
+        self.seq = None
+        self.data = dict()
+        self.rowcols = set()
+
+    def decode(self, msg):
+        ''' Apply a received ACDATA message, and return the complete aircraft
+            data dict. Returns None when no (complete) state is available. '''
+        # Complete data dict from a sim without delta encoding
+        if 'version' not in msg:
+            return msg
+        if msg['version'] != ACDATA_VERSION:
+            print(f'ACDATA: unsupported protocol version {msg["version"]}')
+            return None
+
+        if msg['keyframe']:
+            self.reset()
+        elif self.seq is None or msg['seq'] != self.seq + 1:
+            # Missed a message: wait for the next keyframe
+            self.reset()
+            return None
+        self.seq = msg['seq']
+
+        # New data dict: changed columns are replaced, never changed in place
+        data = dict(self.data)
+        ntraf = msg['ntraf']
+        deleted = msg.get('deleted', [])
+        nprev = len(data.get('id', []))
+        if len(deleted) or ntraf != nprev:
+            keep = np.delete(np.arange(nprev), deleted)
+            ncreate = ntraf - len(keep)
+            for name in self.rowcols:
+                col = data[name]
+                if len(col) != nprev:
+                    continue
+                if isinstance(col, list):
+                    data[name] = [col[i] for i in keep] + [None] * ncreate
+                else:
+                    data[name] = np.concatenate(
+                        (col[keep], np.zeros((ncreate,) + col.shape[1:], dtype=col.dtype)))
+
+        for name, value in msg['cols'].items():
+            data[name] = value
+            self.rowcols.add(name)
+
+        for name, (idx, values) in msg['rows'].items():
+            col = data[name]
+            if isinstance(col, list):
+                col = list(col)
+                for i, value in zip(idx, values):
+                    col[i] = value
+            else:
+                col = col.copy()
+                col[idx] = values
+            data[name] = col
+
+        data.update(msg['other'])
+        self.data = data
+        return data
@@ -6,7 +6,7 @@ import bluesky
 from bluesky.core import Signal
 from bluesky.stack.clientstack import stack, process
 from bluesky.network.discovery import Discovery
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, decode_frames
 
 
 class Client:
@@ -170,11 +170,12 @@ class Client:
                     self.event(eventname, pydata, self.sender_id)
 
             if socks.get(self.stream_in) == zmq.POLLIN:
-                msg = self.stream_in.recv_multipart()
+                # Numpy arrays are received in separate frames, without copying
+                msg = self.stream_in.recv_multipart(copy=False)
 
-                strmname = msg[0][:-5]
-                sender_id = msg[0][-5:]
-                pydata = msgpack.unpackb(msg[1], object_hook=decode_ndarray, raw=False)
+                strmname = msg[0].bytes[:-5]
+                sender_id = msg[0].bytes[-5:]
+                pydata = decode_frames(msg[1:])
                 self.stream(strmname, pydata, sender_id)
 
             # If we are in discovery mode, parse this message
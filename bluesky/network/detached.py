@@ -34,6 +34,9 @@ class Node:
     def addnodes(self, count=1):
         pass
 
+    def eventstats(self, cmd=''):
+        return True, 'No event statistics: this node is detached'
+
     def send_event(self, eventname, data=None, target=None):
         pass
 
@@ -1,11 +1,21 @@
 """ Node encapsulates the sim process, and manages process I/O. """
 import os
+import random
+import sys
+import time
+from collections import deque
+import numpy as np
 import zmq
 import msgpack
 import bluesky as bs
-from bluesky import stack
+from bluesky import settings, stack
+from bluesky.core.profiler import Stats
 from bluesky.core.walltime import Timer
-from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, encode_frames
+
+
+# Register settings defaults
+settings.set_variable_defaults(event_budget=0.01)
 
 
 class Node:
@@ -19,23 +29,103 @@ class Node:
         self.event_port = event_port
         self.stream_port = stream_port
 
+        # Received events that are left for the next step
+        self.pending = deque()
+
+        # Event processing statistics: the number of events processed per
+        # step, the number of events left when the time budget is used, and
+        # the latency of stack commands from their receipt until the end of
+        # the simulation step in which they were processed [s]
+        self.nevents = Stats()
+        self.npending = Stats()
+        self.latency = Stats()
+        self.noverrun = 0
+        self.trecv = []
+
     def step(self):
         ''' Perform one iteration step. Reimplemented in Simulation. '''
         # Process timers
         Timer.update_timers()
-        # Get new events from the I/O thread
-        # while self.event_io.poll(0):
-        if self.event_io.getsockopt(zmq.EVENTS) & zmq.POLLIN:
-            msg = self.event_io.recv_multipart()
+        # Process pending events, until the time budget is used. At least
+        # one event is processed per step. Consecutive stack commands are
+        # stacked together. Stack commands only take effect in the next
+        # simulation step, so an event of another type that follows them is
+        # kept for the next node step, to keep the order of events.
+        tend = time.perf_counter() + settings.event_budget
+        nevents = 0
+        stackcmds, stackroute = [], None
+        while self.pending or self.event_io.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+            if nevents and time.perf_counter() > tend:
+                # Register the number of events left when the budget is used
+                while self.event_io.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                    self.pending.append(self.event_io.recv_multipart())
+                self.noverrun += 1
+                self.npending.add(len(self.pending))
+                break
+            msg = self.pending.popleft() if self.pending else \
+                self.event_io.recv_multipart()
             route, eventname, data = msg[:-2], msg[-2], msg[-1]
+            if stackcmds and eventname != b'STACK':
+                self.pending.appendleft(msg)
+                break
+            nevents += 1
             # route back to sender is acquired by reversing the incoming route
             route.reverse()
             if eventname == b'QUIT':
                 self.quit()
+                break
+            pydata = msgpack.unpackb(
+                data, object_hook=decode_ndarray, raw=False)
+            if eventname == b'STACK':
+                if stackcmds and route != stackroute:
+                    self.stackevent(stackcmds, stackroute)
+                    stackcmds = []
+                stackcmds.append(pydata)
+                stackroute = route
+                self.trecv.append(time.perf_counter())
             else:
-                pydata = msgpack.unpackb(
-                    data, object_hook=decode_ndarray, raw=False)
                 bs.sim.event(eventname, pydata, route)
+        if stackcmds:
+            self.stackevent(stackcmds, stackroute)
+        self.nevents.add(nevents)
+
+    @staticmethod
+    def stackevent(cmds, route):
+        ''' Pass the stack commands of consecutive STACK events of one
+            sender to the simulation as a single STACK event. '''
+        bs.sim.event(b'STACK', cmds[0] if len(cmds) == 1 else cmds, route)
+
+    def update_latency(self):
+        ''' Register the latency of the stack commands received in this
+            step, after they are processed by the simulation. '''
+        if self.trecv:
+            t = time.perf_counter()
+            for trecv in self.trecv:
+                self.latency.add(t - trecv)
+            self.trecv.clear()
+
+    def eventstats(self, cmd=''):
+        ''' EVENTSTATS [RESET]: Show (or reset) the statistics of the
+            event processing of this node. '''
+        if cmd.upper() == 'RESET':
+            self.nevents, self.npending, self.latency = Stats(), Stats(), Stats()
+            self.noverrun = 0
+            return True, 'Event statistics cleared'
+        if not self.nevents.count:
+            return True, 'No event statistics'
+        text = f'Events per step: mean {self.nevents.total / self.nevents.count:.2f}, ' + \
+            f'p95 {self.nevents.p95():.0f}, max {self.nevents.max:.0f}, ' + \
+            f'budget exceeded in {self.noverrun} of {self.nevents.count} steps'
+        if self.npending.count:
+            text += '\nEvents left when the budget was exceeded: mean ' + \
+                f'{self.npending.total / self.npending.count:.2f}, ' + \
+                f'p95 {self.npending.p95():.0f}, max {self.npending.max:.0f}'
+        if self.latency.count:
+            text += '\nStack command latency [ms]: mean ' + \
+                f'{1e3 * self.latency.total / self.latency.count:.2f}, ' + \
+                f'p95 {1e3 * self.latency.p95():.2f}, max {1e3 * self.latency.max:.2f} ' + \
+                f'({self.latency.count} commands)'
+        return True, text
 
     def connect(self):
         ''' Connect node to the BlueSky server. '''
@@ -49,6 +139,43 @@ class Node:
         self.host_id = self.event_io.recv_multipart()[0]
         # print('Node connected, id={}'.format(self.node_id))
 
+    def forkserver(self):
+        ''' Run as the template process from which the server forks new
+            nodes. Each line that the server writes to stdin gives the number
+            of nodes to fork. Returns in each forked node. When the server
+            closes stdin, the template process waits for all forked nodes to
+            finish, and exits. '''
+        children = set()
+        while True:
+            line = sys.stdin.readline()
+            # Reap the nodes that have finished
+            for pid in list(children):
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    children.discard(pid)
+            if not line:
+                for pid in children:
+                    os.waitpid(pid, 0)
+                sys.exit()
+            for _ in range(int(line)):
+                pid = os.fork()
+                if pid == 0:
+                    sys.stdin.close()
+                    self.reset_forked()
+                    return
+                children.add(pid)
+
+    def reset_forked(self):
+        ''' Give a node that is forked from the template process its own id,
+            sockets and random state. '''
+        self.node_id = b'\x00' + os.urandom(4)
+        # The zmq context of the template process can't be used after a
+        # fork: Context.instance() creates a new one in this process
+        ctx = zmq.Context.instance()
+        self.event_io = ctx.socket(zmq.DEALER)
+        self.stream_out = ctx.socket(zmq.PUB)
+        random.seed()
+        np.random.seed()
+
     def quit(self):
         ''' Quit the simulation process. '''
         self.running = False
@@ -65,6 +192,7 @@ class Node:
             # Perform a simulation step
             self.step()
             bs.sim.step()
+            self.update_latency()
             # Update screen logic
             bs.scr.step()
 
@@ -78,4 +206,5 @@ class Node:
         self.event_io.send_multipart(target + [eventname, pydata])
 
     def send_stream(self, name, data):
-        self.stream_out.send_multipart([name + self.node_id, msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
+        # Numpy arrays are sent as separate frames, without copying
+        self.stream_out.send_multipart([name + self.node_id] + encode_frames(data), copy=False)
@@ -1,5 +1,9 @@
+import msgpack
 import numpy as np
 
+# Arrays smaller than this (in bytes) are packed into the msgpack frame
+FRAME_THRESHOLD = 16384
+
 def encode_ndarray(o):
     '''Msgpack encoder for numpy arrays.'''
     if isinstance(o, np.ndarray):
@@ -12,5 +16,42 @@ def encode_ndarray(o):
 def decode_ndarray(o):
     '''Msgpack decoder for numpy arrays.'''
     if o.get(b'numpy'):
-        return np.fromstring(o[b'data'], dtype=np.dtype(o[b'type'])).reshape(o[b'shape'])
+        # Copy, as arrays over the (immutable) message data are read-only
+        return np.frombuffer(o[b'data'], dtype=np.dtype(o[b'type'])).reshape(o[b'shape']).copy()
     return o
+
+def encode_frames(data):
+    ''' Serialise data to a list of message frames: a msgpack frame with
+        all data except the contents of numpy arrays, followed by one frame
+        per array that holds the array memory itself. The array frames can
+        be sent without copying (copy=False), so arrays shouldn't be
+        modified in-place after sending them. Small arrays, for which an
+        extra frame costs more than copying, are packed in the msgpack
+        frame. '''
+    buffers = []
+
+    def encode(o):
+        if isinstance(o, np.ndarray) and o.nbytes >= FRAME_THRESHOLD and \
+                not o.dtype.hasobject:
+            buffers.append(np.ascontiguousarray(o))
+            return {b'numpy': True,
+                    b'type': o.dtype.str,
+                    b'shape': o.shape,
+                    b'frame': len(buffers) - 1}
+        return encode_ndarray(o)
+
+    return [msgpack.packb(data, default=encode, use_bin_type=True)] + buffers
+
+def decode_frames(frames):
+    ''' Deserialise a list of message frames created with encode_frames.
+        Frames can be bytes, or zmq Frames (when received with copy=False).
+        Arrays are created over the received frame buffers without copying. '''
+    buffers = [getattr(frame, 'buffer', frame) for frame in frames]
+
+    def decode(o):
+        if o.get(b'numpy') and b'frame' in o:
+            return np.frombuffer(buffers[o[b'frame'] + 1],
+                dtype=np.dtype(o[b'type'])).reshape(o[b'shape'])
+        return decode_ndarray(o)
+
+    return msgpack.unpackb(buffers[0], object_hook=decode, raw=False)
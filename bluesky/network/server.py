@@ -3,12 +3,14 @@ import os
 from multiprocessing import cpu_count
 from threading import Thread
 import sys
-from subprocess import Popen
+import time
+from subprocess import Popen, PIPE
 import zmq
 import msgpack
 
 # Local imports
 import bluesky as bs
+from bluesky.core.profiler import Stats
 from .discovery import Discovery
 
 
@@ -19,7 +21,7 @@ childargs = [a for a in sys.argv[1:] if 'headless' not in a]
 bs.settings.set_variable_defaults(max_nnodes=cpu_count(),
                                   event_port=9000, stream_port=9001,
                                   simevent_port=10000, simstream_port=10001,
-                                  enable_discovery=True)
+                                  enable_discovery=True, forkserver=False)
 
 def split_scenarios(scentime, scencmd):
     ''' Split the contents of a batch file into individual scenarios. '''
@@ -46,6 +48,19 @@ class Server(Thread):
         self.servers = {self.host_id : dict(route=[], nodes=self.workers)}
         self.avail_workers = dict()
 
+        # Start nodes by forking them from an initialised template process,
+        # where available
+        self.forkserver = bs.settings.forkserver and hasattr(os, 'fork')
+        self.zygote = None
+        # Number of nodes requested from the template process that haven't
+        # registered yet
+        self.nforked = 0
+
+        # Node startup latency: from the request to start a node until
+        # the node registers [s]
+        self.tnoderequest = []
+        self.nodestartup = Stats()
+
         if bs.settings.enable_discovery or discovery:
             self.discovery = Discovery(self.host_id, is_client=False)
         else:
@@ -59,10 +74,45 @@ class Server(Thread):
 
     def addnodes(self, count=1):
         ''' Add [count] nodes to this server. '''
+        if count < 1:
+            return
+        self.tnoderequest.extend([time.perf_counter()] * count)
+        if self.forkserver:
+            # Fork the nodes from the template process, which is started
+            # when the first node is requested. The template process waits
+            # for the nodes forked from it before it exits.
+            if self.zygote is None:
+                self.zygote = Popen([sys.executable, 'BlueSky.py', '--sim', '--zygote',
+                                     *childargs], stdin=PIPE)
+                self.spawned_processes.append(self.zygote)
+            self.nforked += count
+            try:
+                self.zygote.stdin.write(b'%d\n' % count)
+                self.zygote.stdin.flush()
+            except OSError:
+                self.forkfailed()
+            return
         for _ in range(count):
             p = Popen([sys.executable, 'BlueSky.py', '--sim', *childargs])
             self.spawned_processes.append(p)
 
+    def checkzygote(self):
+        ''' Check if the template process is still running while nodes that
+            are requested from it haven't registered yet. '''
+        if self.nforked and self.zygote.poll() is not None:
+            self.forkfailed()
+
+    def forkfailed(self):
+        ''' The template process has stopped (e.g., on an error during
+            initialisation): start the nodes that were requested from it,
+            and all later nodes, as new processes. '''
+        print('Node template process stopped: starting nodes as new processes')
+        count, self.nforked = self.nforked, 0
+        self.forkserver = False
+        # These requests are replaced by new ones
+        del self.tnoderequest[len(self.tnoderequest) - count:]
+        self.addnodes(count)
+
     def run(self):
         ''' The main loop of this server. '''
         # Get ZMQ context
@@ -100,7 +150,10 @@ class Server(Thread):
 
         while self.running:
             try:
-                events = dict(poller.poll(None))
+                # Check the template process regularly while nodes that
+                # are requested from it haven't registered yet
+                events = dict(poller.poll(1000 if self.nforked else None))
+                self.checkzygote()
             except zmq.ZMQError:
                 print('ERROR while polling')
                 break  # interrupted
@@ -154,6 +207,14 @@ class Server(Thread):
                             src.send_multipart([sender_id, self.host_id, b'NODESCHANGED', data])
                         else:
                             self.workers.append(sender_id)
+                            self.nforked = max(0, self.nforked - 1)
+                            if self.tnoderequest:
+                                dt = time.perf_counter() - self.tnoderequest.pop(0)
+                                stats = self.nodestartup
+                                stats.add(dt)
+                                print(f'Node started in {1e3 * dt:.0f} ms (mean '
+                                      f'{1e3 * stats.total / stats.count:.0f} ms, '
+                                      f'max {1e3 * stats.max:.0f} ms over {stats.count} nodes)')
                             data = msgpack.packb({self.host_id : self.servers[self.host_id]}, use_bin_type=True)
                             for client_id in self.clients:
                                 dest.send_multipart([client_id, self.host_id, b'NODESCHANGED', data])
@@ -239,6 +300,11 @@ class Server(Thread):
                     else:
                         dest.send_multipart(msg)
 
-        # Wait for all nodes to finish
+        # Stop the template process, and wait for all nodes to finish
+        if self.zygote is not None:
+            try:
+                self.zygote.stdin.close()
+            except OSError:
+                pass
         for n in self.spawned_processes:
             n.wait()
@@ -1,16 +1,18 @@
 """ ScreenIO is a screen proxy on the simulation side for the QTGL implementation of BlueSky."""
 import time
-import copy
 import numpy as np
 
 # Local imports
 import bluesky as bs
 from bluesky import stack
-from bluesky.tools import areafilter, geo, misc
+from bluesky.tools import areafilter, geo
+from bluesky.core import profiler
 from bluesky.core.walltime import Timer
+from bluesky.network.acdata import ACDataEncoder
 
 bs.settings.set_variable_defaults(screendt=0.2,
-                                  atc_mode='BLUESKY')
+                                  atc_mode='BLUESKY',
+                                  acdata_keyframe=25)
 
 class ScreenIO:
     """Class within sim task which sends/receives data to/from GUI task"""
@@ -52,13 +54,14 @@ class ScreenIO:
         # Timing send aircraft data
         self.acdt = max(bs.settings.screendt, 1/self.acupdate_rate)
         self.prevactime = 0.
-        self.prevacdata = dict()
+        self.acencoder = ACDataEncoder(bs.settings.acdata_keyframe)
 
         # Output event timers
         self.slow_timer = Timer()
         self.slow_timer.timeout.connect(self.send_siminfo)
         self.slow_timer.timeout.connect(self.send_route_data)
         self.slow_timer.timeout.connect(self.send_trails)
+        self.slow_timer.timeout.connect(self.send_profile)
         self.slow_timer.start(int(1000 / self.siminfo_rate))
 
         self.fast_timer = Timer()
@@ -77,7 +80,7 @@ class ScreenIO:
         self.prevtime    = 0.0
 
         self.prevactime = 0.
-        self.prevacdata = dict()
+        self.acencoder.reset()
 
         # Communicate reset to gui
         bs.net.send_event(b'RESET', b'ALL')
@@ -294,100 +297,75 @@ class ScreenIO:
             bs.traf.trails.clearnew()
             bs.net.send_stream(b'TRAILS', data)
 
+    def send_profile(self):
+        # Profile statistics, only when profiling is on
+        if profiler.active and profiler.stats:
+            bs.net.send_stream(b'PROFILE', profiler.summary())
+
     def send_aircraft_data(self):
-        # Interval update data
-        if bs.sim.simt - self.prevactime >= self.acdt or bs.sim.simt <= 0.2:
-            data = dict()
-
-            data['simt']        = bs.sim.simt
-            data['id']          = bs.traf.id
-            data['lat']         = bs.traf.lat
-            data['lon']         = bs.traf.lon
-            data['alt']         = bs.traf.alt
-            data['tas']         = bs.traf.tas
-            data['cas']         = bs.traf.cas
-            data['gs']          = bs.traf.gs
-            data['ingroup']     = bs.traf.groups.ingroup
-            data['inconf']      = bs.traf.cd.inconf
-            data['type']        = bs.traf.type
-            data['tcpamax']     = bs.traf.cd.tcpamax
-            data['rpz']         = bs.traf.cd.rpz
-            data['nconf_cur']   = len(bs.traf.cd.confpairs_unique)
-            data['nconf_tot']   = len(bs.traf.cd.confpairs_all)
-            data['nlos_cur']    = len(bs.traf.cd.lospairs_unique)
-            data['nlos_tot']    = len(bs.traf.cd.lospairs_all)
-            data['trk']         = bs.traf.trk
-            data['vs']          = bs.traf.vs
-            data['vmin']        = bs.traf.perf.vmin
-            data['vmax']        = bs.traf.perf.vmax
+        # Interval update data, also when aircraft are created or deleted
+        cols = dict()
+        other = dict()
+        if bs.sim.simt - self.prevactime >= self.acdt or bs.sim.simt <= 0.2 \
+                or bs.traf.id != self.acencoder.ids:
+            cols['lat']         = bs.traf.lat
+            cols['lon']         = bs.traf.lon
+            cols['alt']         = bs.traf.alt
+            cols['tas']         = bs.traf.tas
+            cols['cas']         = bs.traf.cas
+            cols['gs']          = bs.traf.gs
+            cols['ingroup']     = bs.traf.groups.ingroup
+            cols['inconf']      = bs.traf.cd.inconf
+            cols['type']        = bs.traf.type
+            cols['tcpamax']     = bs.traf.cd.tcpamax
+            cols['rpz']         = bs.traf.cd.rpz
+            cols['trk']         = bs.traf.trk
+            cols['vs']          = bs.traf.vs
+            cols['vmin']        = bs.traf.perf.vmin
+            cols['vmax']        = bs.traf.perf.vmax
 
             # LVNL Variables
-            data['flighttype']  = bs.traf.lvnlvars.flighttype
-            data['wtc']         = bs.traf.lvnlvars.wtc
-            data['dtg']         = bs.traf.lvnlvars.dtg_tbar
-            data['trackmiles']  = bs.traf.lvnlvars.trackmiles
-
-            # Transition level as defined in traf
-            data['translvl']    = bs.traf.translvl
+            cols['flighttype']  = bs.traf.lvnlvars.flighttype
+            cols['wtc']         = bs.traf.lvnlvars.wtc
+            cols['dtg']         = bs.traf.lvnlvars.dtg_tbar
+            cols['trackmiles']  = bs.traf.lvnlvars.trackmiles
 
             # ASAS resolutions for visualization. Only send when evaluated
-            data['asastas']     = bs.traf.cr.tas
-            data['asastrk']     = bs.traf.cr.trk
+            cols['asastas']     = bs.traf.cr.tas
+            cols['asastrk']     = bs.traf.cr.trk
+
+            other['simt']        = bs.sim.simt
+            other['nconf_cur']   = len(bs.traf.cd.confpairs_unique)
+            other['nconf_tot']   = len(bs.traf.cd.confpairs_all)
+            other['nlos_cur']    = len(bs.traf.cd.lospairs_unique)
+            other['nlos_tot']    = len(bs.traf.cd.lospairs_all)
+
+            # Transition level as defined in traf
+            other['translvl']    = bs.traf.translvl
 
             # History symbols
-            data['histsymblat'] = bs.traf.histsymb.histlat
-            data['histsymblon'] = bs.traf.histsymb.histlon
-
-            # Always update data
-            data['arr']         = np.array(bs.traf.lvnlvars.arr)
-            data['mlbl']        = np.array(bs.traf.lvnlvars.mlbl)
-            data['rel']         = bs.traf.lvnlvars.rel
-            data['rwy']         = np.array(bs.traf.lvnlvars.rwy)
-            data['selhdg']      = bs.traf.selhdg
-            data['selalt']      = bs.traf.selalt
-            data['selspd']      = bs.traf.selspd
-            data['sid']         = np.array(bs.traf.lvnlvars.sid)
-            data['ssr']         = bs.traf.lvnlvars.ssr
-            data['ssrlbl']      = np.array(bs.traf.lvnlvars.ssrlbl)
-            data['tracklbl']    = bs.traf.lvnlvars.tracklbl
-            data['uco']         = bs.traf.lvnlvars.uco
+            other['histsymblat'] = bs.traf.histsymb.histlat
+            other['histsymblon'] = bs.traf.histsymb.histlon
 
             self.prevactime = bs.sim.simt
-            self.prevacdata = copy.deepcopy(data)
-        else:
-            data = copy.deepcopy(self.prevacdata)
-
-        # Check if data is created
-        if 'id' in data:
-            # Index for traffic arrays in data dict
-            idata = misc.get_indices(data['id'], bs.traf.id)
-            # Index for traffic arrays
-            itraf = misc.get_indices(bs.traf.id, data['id'])
-        else:
-            idata = []
-            itraf = []
-
-        # Always update data (take aircraft create/delete into account)
-        data['arr'][idata]      = np.array(bs.traf.lvnlvars.arr)[itraf]
-        data['arr']             = data['arr'].tolist()
-        data['mlbl'][idata]     = np.array(bs.traf.lvnlvars.mlbl)[itraf]
-        data['mlbl']            = data['mlbl'].tolist()
-        data['rel'][idata]      = bs.traf.lvnlvars.rel[itraf]
-        data['rwy'][idata]      = np.array(bs.traf.lvnlvars.rwy)[itraf]
-        data['rwy']             = data['rwy'].tolist()
-        data['selhdg'][idata]   = bs.traf.selhdg[itraf]
-        data['selalt'][idata]   = bs.traf.selalt[itraf]
-        data['selspd'][idata]   = bs.traf.selspd[itraf]
-        data['sid'][idata]      = np.array(bs.traf.lvnlvars.sid)[itraf]
-        data['sid']             = data['sid'].tolist()
-        data['ssr'][idata]      = bs.traf.lvnlvars.ssr[itraf]
-        data['ssrlbl'][idata]   = np.array(bs.traf.lvnlvars.ssrlbl)[itraf]
-        data['ssrlbl']          = data['ssrlbl'].tolist()
-        data['tracklbl'][idata] = bs.traf.lvnlvars.tracklbl[itraf]
-        data['uco'][idata]      = bs.traf.lvnlvars.uco[itraf]
 
-        # Send data
-        bs.net.send_stream(b'ACDATA', data)
+        # Always update data
+        cols['arr']         = bs.traf.lvnlvars.arr
+        cols['mlbl']        = bs.traf.lvnlvars.mlbl.tolist()
+        cols['rel']         = bs.traf.lvnlvars.rel
+        cols['rwy']         = bs.traf.lvnlvars.rwy
+        cols['selhdg']      = bs.traf.selhdg
+        cols['selalt']      = bs.traf.selalt
+        cols['selspd']      = bs.traf.selspd
+        cols['sid']         = bs.traf.lvnlvars.sid
+        cols['ssr']         = bs.traf.lvnlvars.ssr
+        cols['ssrlbl']      = bs.traf.lvnlvars.ssrlbl
+        cols['tracklbl']    = bs.traf.lvnlvars.tracklbl
+        cols['uco']         = bs.traf.lvnlvars.uco
+
+        # Send only the changes since the previous message, and periodically
+        # the complete state (see bluesky.network.acdata)
+        bs.net.send_stream(b'ACDATA', self.acencoder.encode(bs.traf.id, cols, other))
 
     def send_route_data(self):
         for sender, acid in self.route_acid.items():
@@ -402,12 +380,14 @@ class ScreenIO:
                 data['aclat']  = bs.traf.lat[idx]
                 data['aclon']  = bs.traf.lon[idx]
 
-                data['wplat']  = route.wplat
-                data['wplon']  = route.wplon
+                # Copies of the waypoint arrays in the route store, as
+                # stream data is sent without copying
+                data['wplat']  = route.data('lat').copy()
+                data['wplon']  = route.data('lon').copy()
 
-                data['wpalt']  = route.wpalt
-                data['wpspd']  = route.wpspd
+                data['wpalt']  = route.data('alt').copy()
+                data['wpspd']  = route.data('spd').copy()
 
-                data['wpname'] = route.wpname
+                data['wpname'] = route.data('name').tolist()
 
             bs.net.send_stream(b'ROUTEDATA' + (sender or b'*'), data)  # Send route data to GUI
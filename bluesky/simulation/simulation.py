@@ -7,7 +7,7 @@ from random import seed
 # Local imports
 import bluesky as bs
 import bluesky.core as core
-from bluesky.core import plugin, simtime
+from bluesky.core import plugin, profiler, simtime
 from bluesky.stack import simstack, recorder
 from bluesky.tools import datalog, areafilter, plotter
 
@@ -70,13 +70,18 @@ class Simulation:
             time.sleep(remainder)
 
         # Always update stack
+        tstep = t = profiler.tic()
         simstack.process()
+        t = profiler.toc('sim.stack', t)
 
         if self.state == bs.OP:
             # Plot/log the current timestep, and call preupdate functions
             plotter.update()
+            t = profiler.toc('sim.plotter', t)
             datalog.update()
+            t = profiler.toc('sim.datalog', t)
             simtime.preupdate()
+            t = profiler.toc('sim.preupdate', t)
 
             # Determine interval towards next timestep
             if remainder < 0.0 and self.rtmode:
@@ -93,7 +98,10 @@ class Simulation:
 
             # Update traffic and other update functions for the next timestep
             bs.traf.update()
+            t = profiler.toc('sim.traffic', t)
             simtime.update()
+            profiler.toc('sim.update', t)
+            profiler.toc('sim.step', tstep)
 
         # Always update syst
         self.syst += self.simdt / self.dtmult
@@ -192,8 +200,8 @@ class Simulation:
         # send to server and clear stack
         self.reset()
         try:
-            scentime, scencmd = zip(*[tc for tc in simstack.readscn(fname)])
-            bs.net.send_event(b'BATCH', (scentime, scencmd))
+            scentime, scencmd, _ = simstack.loadscn(fname)
+            bs.net.send_event(b'BATCH', (scentime.tolist(), scencmd))
         except FileNotFoundError:
             return False, f'BATCH: File not found: {fname}'
 
@@ -205,8 +213,12 @@ class Simulation:
         event_processed = False
 
         if eventname == b'STACK':
-            # We received a single stack command. Add it to the existing stack
-            bs.stack.stack(eventdata, sender_id=sender_rte)
+            # We received a stack command, or a list of stack commands of
+            # consecutive STACK events. Add them to the existing stack
+            if isinstance(eventdata, list):
+                bs.stack.stack(*eventdata, sender_id=sender_rte)
+            else:
+                bs.stack.stack(eventdata, sender_id=sender_rte)
             event_processed = True
 
         elif eventname == b'BATCH':
@@ -216,6 +228,11 @@ class Simulation:
             self.op()
             event_processed = True
 
+        elif eventname == b'CREBATCH':
+            # We received a batch of aircraft as column arrays. Create them in one go.
+            bs.traf.crebatch(**eventdata)
+            event_processed = True
+
         elif eventname == b'GETSIMSTATE':
             # Send list of stack functions available in this sim to gui at start
             stackdict = {cmd : val.brief[len(cmd) + 1:] for cmd, val in bs.stack.get_commands().items()}
@@ -225,6 +242,8 @@ class Simulation:
                 custgrclr=bs.scr.custgrclr, settings=bs.settings._settings_hierarchy,
                 plugins=list(plugin.Plugin.plugins.keys()))
             bs.net.send_event(b'SIMSTATE', simstate, target=sender_rte)
+            # Start the new client off with the complete aircraft state
+            bs.scr.acencoder.request_keyframe()
         else:
             # This is either an unknown event or a gui event.
             event_processed = bs.scr.event(eventname, eventdata, sender_rte)
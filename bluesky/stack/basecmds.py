@@ -4,7 +4,7 @@ import os
 
 import bluesky as bs
 from bluesky import settings
-from bluesky.core import select_implementation, simtime, varexplorer as ve
+from bluesky.core import select_implementation, simtime, profiler, varexplorer as ve
 from bluesky.tools import geo, aero, areafilter, plotter, printer
 from bluesky.tools.calculator import calculator
 from bluesky.stack.cmdparser import append_commands
@@ -57,6 +57,18 @@ def initbasecmds():
             bs.net.addnodes,
             "Add a simulation instance/node",
         ],
+        "ADSBDROP": [
+            "ADSBDROP acid,probability",
+            "acid,float",
+            bs.traf.adsb.setdropout,
+            "Set the probability that ADS-B messages of an aircraft are lost",
+        ],
+        "ADSBRATE": [
+            "ADSBRATE acid,[interval]",
+            "acid,[float]",
+            bs.traf.adsb.setrate,
+            "Set the ADS-B update interval [s] of an aircraft (0 = default)",
+        ],
         "AIRWAY": [
             "AIRWAY wp/airway",
             "txt",
@@ -154,6 +166,12 @@ def initbasecmds():
             bs.traf.cre,
             "Create an aircraft",
         ],
+        "CREBATCH": [
+            "CREBATCH batchname",
+            "txt",
+            bs.traf.crestaged,
+            "Create a batch of aircraft staged by a data source",
+        ],
         "CRECONFS": [
             "CRECONFS id, type, targetid, dpsi, cpa, tlos_hor, dH, tlos_ver, spd",
             "txt,txt,acid,hdg,float,time,[alt,time,spd]",
@@ -227,6 +245,12 @@ def initbasecmds():
             bs.scr.echo,
             "Show a text in command window for user to read",
         ],
+        "EVENTSTATS": [
+            "EVENTSTATS [RESET]",
+            "[txt]",
+            bs.net.eventstats,
+            "Show the number of network events processed and left per step, and the stack command latency"
+        ],
         "FF": [
             "FF [timeinsec]",
             "[time]",
@@ -256,10 +280,10 @@ def initbasecmds():
             + "A group is created when a group with the given name doesn't exist yet.",
         ],
         "HIGHRES": [
-            "HIGHRES db_Name, [ON/OFF]",
+            "HIGHRES db_Name/file.npz, [ON/OFF]",
             "word, [onoff]",
             bs.traf.activate_HighRes,
-            "Manuel Switch per aircraft (using ADSB data)",
+            "Switch high resolution meteo on/off, using a meteo database or .npz table file",
         ],
         "HISTORY": [
             "HISTORY SYMBOLS",
@@ -408,6 +432,12 @@ def initbasecmds():
             printer.printing,
             "Print something"
         ],
+        "PROFILE": [
+            "PROFILE [ON/OFF/RESET/SHOW/DUMP],[filename]",
+            "[txt,word]",
+            profiler.profilecmd,
+            "Profile the wall time of the simulation update"
+        ],
         "QUIT": ["QUIT", "", bs.sim.stop, "Quit program/Stop simulation"],
         "REALTIME": [
             "REALTIME [ON/OFF]",
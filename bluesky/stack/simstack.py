@@ -1,15 +1,20 @@
 ''' Main simulation-side stack functions. '''
+import hashlib
 import math
 import os
+import pickle
+import re
 import traceback
+import numpy as np
 import bluesky as bs
-from bluesky.stack.stackbase import Stack, stack, checkscen, forward
+from bluesky.stack.stackbase import Stack, stack, checkscen, forward, add_scencmds, scenacids
 from bluesky.stack.cmdparser import Command, command
 from bluesky.stack.basecmds import initbasecmds
 from bluesky.stack import recorder
 from bluesky.stack import argparser, ArgumentError
 from bluesky import settings
-from bluesky.tools import vemmisread
+from bluesky.tools import vemmisread, cachefile
+from bluesky.tools.cachefile import filestamp
 
 
 # Register settings defaults
@@ -20,6 +25,12 @@ tmxlist = ("BGPASAS", "DFFLEVEL", "FFLEVEL", "FILTCONF", "FILTTRED", "FILTTAMB",
            "GRAB", "HDGREF", "MOVIE", "NAVDB", "PREDASAS", "RENAME", "RETYPE",
            "SWNLRPASAS", "TRAFRECDT", "TRAFLOGDT", "TREACT", "WINDGRID")
 
+# Version of the compiled scenario cache files
+scncache_version = '2'
+
+# Argument placeholders (%0, %1, ...) in scenario files
+re_scnarg = re.compile(r'%(\d+)')
+
 tbar_lst = ['NIRSI', 'SOKS2', 'GALIS', 'RANGEBAR']
 maps_loaded = []
 
@@ -136,8 +147,8 @@ def process():
     Stack.clear()
 
 
-def readscn(fname):
-    ''' Read a scenario file. '''
+def scnpath(fname):
+    ''' Return the full path of a scenario file. '''
     # Split the incoming filename into a path + filename and an extension
     base, ext = os.path.splitext(fname.replace("\\", "/"))
     if not os.path.isabs(base):
@@ -145,7 +156,12 @@ def readscn(fname):
     ext = ext or ".scn"
 
     # The entire filename, possibly with added path and extension
-    fname_full = os.path.normpath(base + ext)
+    return os.path.normpath(base + ext)
+
+
+def readscn(fname):
+    ''' Read a scenario file. '''
+    fname_full = scnpath(fname)
 
     with open(fname_full, "r") as fscen:
         prevline = ''
@@ -179,6 +195,89 @@ def readscn(fname):
                     print("except this:" + line)
 
 
+def compilescn(fname, parents=()):
+    ''' Parse a scenario file into its compiled form. Relative PCALLs of
+        existing scenario files are expanded, with their timestamps relative
+        to the time of the PCALL, and their arguments (%0, %1, ...) replaced
+        by the arguments on the PCALL line. PCALLs of files that use more
+        arguments than are passed to them are left to the PCALL command.
+
+        Returns:
+        - cmdtimes: command times (float64 array)
+        - cmdlines: command lines
+        - cmdacids: {acid: command indices} of the possible aircraft ids of
+          the commands (see scenacids)
+        - deps: (fname, filestamp) of this and all expanded files '''
+    fname_full = scnpath(fname)
+    parents += (fname_full,)
+    deps = [(fname_full, filestamp(fname_full))]
+    cmdtimes, cmdlines = [], []
+    for cmdtime, cmdline in readscn(fname_full):
+        cmd, argstring = argparser.getnextarg(cmdline)
+        if cmd.upper() in ('PCALL', 'CALL'):
+            args = []
+            while argstring:
+                arg, argstring = argparser.getnextarg(argstring)
+                args.append(arg)
+            if args and args[1:2] != ['ABS']:
+                pcallname = scnpath(args[0])
+                # Files that don't exist (yet), or that would result in
+                # recursion, are left to the PCALL command
+                if os.path.isfile(pcallname) and pcallname not in parents:
+                    pcall_arglst = args[2:] if args[1:2] == ['REL'] else args[1:]
+                    subtimes, sublines, _, subdeps = compilescn(pcallname, parents)
+                    nargs = max((int(i) for subline in sublines
+                                 for i in re_scnarg.findall(subline)), default=-1) + 1
+                    if nargs <= len(pcall_arglst):
+                        for subline in sublines:
+                            # Replace %0, %1 with pcall_arglst[0], pcall_arglst[1], etc.
+                            for i, argtxt in enumerate(pcall_arglst):
+                                subline = subline.replace(f"%{i}", argtxt)
+                            cmdlines.append(subline)
+                        cmdtimes.extend((subtimes + cmdtime).tolist())
+                        deps.extend(subdeps)
+                        continue
+        cmdtimes.append(cmdtime)
+        cmdlines.append(cmdline)
+
+    cmdacids = dict()
+    for i, cmdline in enumerate(cmdlines):
+        for acid in scenacids(cmdline):
+            cmdacids.setdefault(acid, []).append(i)
+    cmdacids = {acid: np.array(idx, dtype=np.int64) for acid, idx in cmdacids.items()}
+    return np.array(cmdtimes, dtype=np.float64), cmdlines, cmdacids, deps
+
+
+def loadscn(fname):
+    ''' Load a compiled scenario file (see compilescn). The compiled
+        scenario is taken from the cache when this and all expanded
+        scenario files are unchanged, and compiled and cached otherwise. '''
+    fname_full = scnpath(fname)
+    cachename = 'scn_' + hashlib.sha1(fname_full.encode()).hexdigest()[:16] + '.p'
+    with cachefile.openfile(cachename, (scncache_version, fname_full,
+                                        filestamp(fname_full))) as cache:
+        try:
+            deps = cache.load()
+            for depname, stamp in deps:
+                if not os.path.isfile(depname) or filestamp(depname) != stamp:
+                    raise cachefile.CacheError('Cache file out of date: ' + cache.fname)
+            cmdtimes = cache.load()
+            cmdlines = cache.load()
+            cmdacids = cache.load()
+        except (pickle.PickleError, EOFError, cachefile.CacheError) as e:
+            print(e.args[0] if e.args else e)
+            cmdtimes, cmdlines, cmdacids, deps = compilescn(fname_full)
+            try:
+                cache.dump(deps)
+                cache.dump(cmdtimes)
+                cache.dump(cmdlines)
+                cache.dump(cmdacids)
+            except OSError as e:
+                print(f'Could not write scenario cache: {e}')
+
+    return cmdtimes, cmdlines, cmdacids
+
+
 @command(aliases=('CALL',), brief="PCALL filename [REL/ABS/args]")
 def pcall(fname, *pcall_arglst):
     """ PCALL: Import another scenario file into the current scenario.
@@ -208,34 +307,18 @@ def pcall(fname, *pcall_arglst):
     # the current simtime to every timestamp
     t_offset = bs.sim.simt if absrel == "REL" else 0.0
 
-    # Read the scenario file
-    # readscn(fname, pcall_arglst, t_offset)
-    insidx = 0
-    instime = bs.sim.simt
-
+    # Read the (compiled) scenario file
     try:
-        for (cmdtime, cmdline) in readscn(fname):
+        cmdtimes, cmdlines, cmdacids = loadscn(fname)
 
-            # Time offset correction
-            cmdtime += t_offset
+        # Replace %0, %1 with pcall_arglst[0], pcall_arglst[1], etc.
+        if pcall_arglst:
+            cmdacids = None
+            for i, argtxt in enumerate(pcall_arglst):
+                cmdlines = [cmdline.replace(f"%{i}", argtxt) for cmdline in cmdlines]
 
-            # Replace %0, %1 with pcall_arglst[0], pcall_arglst[1], etc.
-            if pcall_arglst:
-                for i, argtxt in enumerate(pcall_arglst):
-                    cmdline = cmdline.replace(f"%{i}", argtxt)
-
-            if not Stack.scentime or cmdtime >= Stack.scentime[-1]:
-                Stack.scentime.append(cmdtime)
-                Stack.scencmd.append(cmdline)
-            else:
-                if cmdtime > instime:
-                    insidx, instime = next(
-                        ((j, t) for j, t in enumerate(Stack.scentime) if t >= cmdtime),
-                        (len(Stack.scentime), Stack.scentime[-1]),
-                    )
-                Stack.scentime.insert(insidx, cmdtime)
-                Stack.scencmd.insert(insidx, cmdline)
-                insidx += 1
+        # Time offset correction
+        add_scencmds(cmdtimes + t_offset, cmdlines, cmdacids)
 
         # stack any commands that are already due
         checkscen()
@@ -259,25 +342,7 @@ def stack_commands(cmdstime, cmds):
         raise IndexError('stack_commands(): length of commands time and commands does not match')
 
     t_offset = bs.sim.simt
-    insidx = 0
-    instime = bs.sim.simt
-
-    for i in range(len(cmdstime)):
-        cmdtime = cmdstime[i] + t_offset
-        cmdline = cmds[i]
-
-        if not Stack.scentime or cmdtime >= Stack.scentime[-1]:
-            Stack.scentime.append(cmdtime)
-            Stack.scencmd.append(cmdline)
-        else:
-            if cmdtime > instime:
-                insidx, instime = next(
-                    ((j, t) for j, t in enumerate(Stack.scentime) if t >= cmdtime),
-                    (len(Stack.scentime), Stack.scentime[-1]),
-                )
-            Stack.scentime.insert(insidx, cmdtime)
-            Stack.scencmd.insert(insidx, cmdline)
-            insidx += 1
+    add_scencmds((cmdtime + t_offset for cmdtime in cmdstime), cmds)
 
     # stack any commands that are already due
     checkscen()
@@ -292,27 +357,10 @@ def maptoggle_func(fname):
         fname = 'LVNL/Maps/T-bar/'+fname
     else:
         fname = 'LVNL/Maps/mapid/'+fname
-    insidx = 0
-    instime = bs.sim.simt
-
     try:
-        for (cmdtime, cmdline) in readscn(fname):
-
-            # Time offset correction
-            cmdtime += t_offset
-
-            if not Stack.scentime or cmdtime >= Stack.scentime[-1]:
-                Stack.scentime.append(cmdtime)
-                Stack.scencmd.append(cmdline)
-            else:
-                if cmdtime > instime:
-                    insidx, instime = next(
-                        ((j, t) for j, t in enumerate(Stack.scentime) if t >= cmdtime),
-                        (len(Stack.scentime), Stack.scentime[-1]),
-                    )
-                Stack.scentime.insert(insidx, cmdtime)
-                Stack.scencmd.insert(insidx, cmdline)
-                insidx += 1
+        cmdtimes, cmdlines, cmdacids = loadscn(fname)
+        # Time offset correction
+        add_scencmds(cmdtimes + t_offset, cmdlines, cmdacids)
 
         # stack any commands that are already due
         checkscen()
@@ -357,9 +405,8 @@ def ic(filename : 'string' = ''):
     # Reset sim and open new scenario file
     if filename:
         try:
-            for (cmdtime, cmd) in readscn(filename):
-                Stack.scentime.append(cmdtime)
-                Stack.scencmd.append(cmd)
+            cmdtimes, cmdlines, cmdacids = loadscn(filename)
+            add_scencmds(cmdtimes, cmdlines, cmdacids)
             Stack.scenname, _ = os.path.splitext(os.path.basename(filename))
 
             # Remember this filename in IC.scn in scenario folder
@@ -394,10 +441,8 @@ def schedule(time: 'time', cmdline: 'string'):
         Arguments:
         - time: the time at which the command should be executed
         - cmdline: the command line to be executed """
-    # Get index of first scentime greater than 'time' as insert position
-    idx = next((i for i, t in enumerate(Stack.scentime) if t > time), len(Stack.scentime))
-    Stack.scentime.insert(idx, time)
-    Stack.scencmd.insert(idx, cmdline)
+    # Insert after the scenario commands with the same time
+    add_scencmds([time], [cmdline])
     return True
 
 
@@ -408,11 +453,8 @@ def delay(time: 'time', cmdline: 'string'):
         Arguments:
         - time: the time with which the command should be delayed
         - cmdline: the command line to be executed after the delay """
-    # Get index of first scentime greater than 'time' as insert position
-    time += bs.sim.simt
-    idx = next((i for i, t in enumerate(Stack.scentime) if t > time), len(Stack.scentime))
-    Stack.scentime.insert(idx, time)
-    Stack.scencmd.insert(idx, cmdline)
+    # Insert after the scenario commands with the same time
+    add_scencmds([time + bs.sim.simt], [cmdline])
     return True
 
 
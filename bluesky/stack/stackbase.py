@@ -1,7 +1,14 @@
 ''' BlueSky Stack base data and functions. '''
+import bisect
+import re
+import numpy as np
 import bluesky as bs
 
 
+# Separators of the arguments in scenario command lines
+re_scensep = re.compile(r'[\s,]+')
+
+
 class Stack:
     ''' Stack static-only namespace. '''
 
@@ -13,6 +20,11 @@ class Stack:
     scenname = ""  # Currently used scenario name (for reading)
     scentime = []  # Times of the commands from the read scenario file
     scencmd = []  # Commands from the scenario file
+    scenkey = []  # Unique keys of the scenario commands
+    scenidx = 0  # Index of the first scenario command that is not stacked yet
+    scenacid = dict()  # Keys of the scenario commands of each aircraft id
+    scendel = set()  # Keys of deleted scenario commands
+    scennextkey = 0  # Key of the next added scenario command
 
     # Current command details
     sender_rte = None  # bs net route to sender
@@ -22,9 +34,18 @@ class Stack:
         ''' Reset stack variables. '''
         cls.cmdstack = []
         cls.scenname = ""
+        cls.clearscen()
+        cls.sender_rte = None
+
+    @classmethod
+    def clearscen(cls):
+        ''' Clear the scenario buffer. '''
         cls.scentime = []
         cls.scencmd = []
-        cls.sender_rte = None
+        cls.scenkey = []
+        cls.scenidx = 0
+        cls.scenacid = dict()
+        cls.scendel = set()
 
     @classmethod
     def commands(cls):
@@ -37,16 +58,100 @@ class Stack:
         cls.cmdstack.clear()
 
 
+def scenacids(cmdline):
+    ''' Return the possible aircraft ids of a scenario command line: all
+        arguments of its commands, so that also wrapped commands (e.g.,
+        DELAY 10 ACID ALT ..., SCHEDULE t ACID ...) are found. '''
+    return set(re_scensep.split(cmdline.replace(';', ' ').strip().upper()))
+
+
+def add_scencmds(cmdtimes, cmdlines, cmdacids=None):
+    ''' Add commands to the scenario buffer, which is sorted by time.
+        Commands with equal times are stacked in the order in which they
+        were added.
+
+        The possible aircraft ids of the commands can be passed when they
+        are already known (e.g., from a compiled scenario file), as a dict
+        with for each id an array of the indices of its commands in cmdlines. '''
+    cmdtimes = np.asarray(cmdtimes, dtype=np.float64)
+    cmdlines = list(cmdlines)
+    if not len(cmdtimes):
+        return
+    keys = range(Stack.scennextkey, Stack.scennextkey + len(cmdtimes))
+    Stack.scennextkey += len(cmdtimes)
+    scenacid = Stack.scenacid
+    if cmdacids is None:
+        for key, cmdline in zip(keys, cmdlines):
+            for acid in scenacids(cmdline):
+                if acid in scenacid:
+                    scenacid[acid].append(key)
+                else:
+                    scenacid[acid] = [key]
+    else:
+        for acid, idx in cmdacids.items():
+            acidkeys = (idx + keys.start).tolist()
+            if acid in scenacid:
+                scenacid[acid].extend(acidkeys)
+            else:
+                scenacid[acid] = acidkeys
+
+    start = Stack.scenidx
+    if len(cmdtimes) == 1:
+        idx = bisect.bisect_right(Stack.scentime, cmdtimes[0], lo=start)
+        Stack.scentime.insert(idx, float(cmdtimes[0]))
+        Stack.scencmd.insert(idx, cmdlines[0])
+        Stack.scenkey.insert(idx, keys[0])
+    elif np.all(cmdtimes[1:] >= cmdtimes[:-1]) and \
+            (start == len(Stack.scentime) or cmdtimes[0] >= Stack.scentime[-1]):
+        # Commands after the end of the current scenario are appended
+        Stack.scentime.extend(cmdtimes.tolist())
+        Stack.scencmd.extend(cmdlines)
+        Stack.scenkey.extend(keys)
+    else:
+        # Merge with the remaining scenario with a (stable) sort
+        scentime = np.concatenate((Stack.scentime[start:], cmdtimes))
+        scenkey = np.concatenate((Stack.scenkey[start:], keys)).astype(np.int64)
+        scencmd = Stack.scencmd[start:] + cmdlines
+        order = np.argsort(scentime, kind='stable')
+        Stack.scentime = scentime[order].tolist()
+        Stack.scenkey = scenkey[order].tolist()
+        Stack.scencmd = [scencmd[i] for i in order.tolist()]
+        Stack.scenidx = 0
+
+
 def checkscen():
     """ Check if commands from the scenario buffer need to be stacked. """
-    if Stack.scencmd:
+    start = Stack.scenidx
+    if start < len(Stack.scentime):
         # Find index of first timestamp exceeding bs.sim.simt
-        idx = next((i for i, t in enumerate(
-            Stack.scentime) if t > bs.sim.simt), None)
-        # Stack all commands before that time, and remove from scenario
-        stack(*Stack.scencmd[:idx])
-        del Stack.scencmd[:idx]
-        del Stack.scentime[:idx]
+        end = bisect.bisect_right(Stack.scentime, bs.sim.simt, lo=start)
+        if end == start:
+            return
+        Stack.scenidx = end
+        # Stack all commands before that time, except deleted commands
+        if Stack.scendel:
+            stack(*(cmdline for cmdline, key in zip(Stack.scencmd[start:end],
+                                                    Stack.scenkey[start:end])
+                    if key not in Stack.scendel))
+        else:
+            stack(*Stack.scencmd[start:end])
+
+        # Remove stacked commands from the scenario once they make up
+        # half of the scenario buffer
+        if 2 * end >= len(Stack.scentime):
+            del Stack.scentime[:end]
+            del Stack.scencmd[:end]
+            del Stack.scenkey[:end]
+            Stack.scenidx = 0
+            if Stack.scendel:
+                Stack.scendel.intersection_update(Stack.scenkey)
+
+
+def del_acidcmds(acid):
+    ''' Delete the remaining scenario commands of aircraft acid. '''
+    keys = Stack.scenacid.pop(acid, None)
+    if keys:
+        Stack.scendel.update(keys)
 
 
 def del_scencmds(idx):
@@ -60,32 +165,20 @@ def del_scencmds(idx):
     Created by: Bob van Dillen
     Date: 13-12-2021
     """
-    if Stack.scencmd:
-        line = 0
-        while line < (len(Stack.scencmd)):
-            if str(bs.traf.id[idx]) in Stack.scencmd[line]:
-                del Stack.scencmd[line]
-            else:
-                line += 1
+    del_acidcmds(str(bs.traf.id[idx]))
 
 
 def manual_del():
     """ deletes the scenario lines for aircraft when they enter manual mode (usefull on ADSB data)"""
-    if Stack.scencmd:
-        for ac_idx in range(len(bs.traf.id)):
-            if bs.traf.manual[ac_idx]:
-                line = 0
-                while line < (len(Stack.scencmd)):
-                    if str(bs.traf.id[ac_idx]) in Stack.scencmd[line]:
-                        del Stack.scencmd[line]
-                    else:
-                        line += 1
+    if Stack.scenacid:
+        for acid, manual in zip(bs.traf.id, bs.traf.manual):
+            if manual:
+                del_acidcmds(str(acid))
 
 
 def all_manual():
     """ Deletes the whole scenario, so all aircraft go manual (usefull on ADSB data)"""
-    if Stack.scencmd:
-        del Stack.scencmd[:]
+    Stack.clearscen()
 
 
 def stack(*cmdlines, sender_id=None):
@@ -130,11 +223,15 @@ def get_scenname():
 
 
 def get_scendata():
-    """ Return the scenario data that was loaded from a scenario file. """
-    return Stack.scentime, Stack.scencmd
+    """ Return the scenario data that was loaded from a scenario file,
+        and is not stacked yet. """
+    entries = [(t, cmdline) for t, cmdline, key in zip(
+        Stack.scentime[Stack.scenidx:], Stack.scencmd[Stack.scenidx:],
+        Stack.scenkey[Stack.scenidx:]) if key not in Stack.scendel]
+    return [t for t, _ in entries], [cmdline for _, cmdline in entries]
 
 
 def set_scendata(newtime, newcmd):
     """ Set the scenario data. This is used by the batch logic. """
-    Stack.scentime = newtime
-    Stack.scencmd = newcmd
+    Stack.clearscen()
+    add_scencmds(newtime, newcmd)
@@ -0,0 +1,79 @@
+"""
+Tests the opt-in profiler: nothing is recorded when it is off, and timed
+functions and tic/toc phases are profiled when it is on.
+"""
+import csv
+import json
+import pytest
+from bluesky import settings
+from bluesky.core import profiler, simtime
+
+
+@pytest.fixture
+def profiling():
+    """ Switch profiling on, with empty statistics. """
+    profiler.reset()
+    profiler.setactive(True)
+    yield profiler
+    profiler.setactive(False)
+    profiler.reset()
+
+
+def test_off():
+    """ Test that nothing is recorded when profiling is off. """
+    profiler.reset()
+    t = profiler.tic()
+    assert t == 0.0
+    assert profiler.toc('phase', t) == 0.0
+    assert not profiler.stats
+
+
+def test_phases(profiling):
+    """ Test chained tic/toc checkpoints. """
+    for _ in range(5):
+        t = profiler.tic()
+        sum(range(1000))
+        t = profiler.toc('phase1', t)
+        sum(range(10000))
+        profiler.toc('phase2', t)
+
+    data = profiler.summary()
+    assert data['name'] == ['phase2', 'phase1']
+    assert data['count'] == [5, 5]
+    for total, mean, p95, tmax in zip(data['total'], data['mean'], data['p95'], data['max']):
+        assert 0.0 < mean <= p95 <= tmax <= total
+    assert 'phase1' in profiler.showtext()
+
+
+def test_timed_function(profiling):
+    """ Test profiling a manually triggered timed function, under its timer name. """
+    calls = []
+
+    @simtime.timed_function(name='PROFILETEST', manual=True)
+    def fun(dt):
+        calls.append(dt)
+
+    for _ in range(2):
+        simtime.step()
+        fun()
+    assert profiler.stats['PROFILETEST'].count == len(calls) == 2
+
+
+def test_dump(profiling, tmp_path, monkeypatch):
+    """ Test writing the statistics to CSV and JSON files in the log path. """
+    monkeypatch.setattr(settings, 'log_path', str(tmp_path), raising=False)
+    t = profiler.tic()
+    profiler.toc('phase', t)
+
+    ok, _ = profiler.profilecmd('DUMP', 'profile.csv')
+    assert ok
+    with open(tmp_path / 'profile.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['name'] for row in rows] == ['phase']
+    assert int(rows[0]['count']) == 1
+
+    ok, _ = profiler.profilecmd('DUMP', str(tmp_path / 'profile.json'))
+    assert ok
+    with open(tmp_path / 'profile.json') as f:
+        rows = json.load(f)
+    assert rows[0]['name'] == 'phase' and rows[0]['count'] == 1
@@ -0,0 +1,146 @@
+"""
+Tests the delta-encoded ACDATA stream: decoding each encoded message
+should always give the complete aircraft state that was encoded.
+"""
+import msgpack
+import numpy as np
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray
+from bluesky.network.acdata import ACDataEncoder, ACDataDecoder
+
+
+def transmit(msg):
+    """ Serialise and deserialise a message like the network does. """
+    return msgpack.unpackb(msgpack.packb(msg, default=encode_ndarray, use_bin_type=True),
+                           object_hook=decode_ndarray, raw=False)
+
+
+def assert_state(data, ids, cols, other):
+    """ Assert that decoded data equals the encoded state. """
+    assert data['id'] == ids
+    for name, value in cols.items():
+        if isinstance(value, list):
+            assert data[name] == value
+        else:
+            np.testing.assert_array_equal(data[name], value)
+            assert data[name].dtype == value.dtype
+    for name, value in other.items():
+        np.testing.assert_array_equal(data[name], value)
+
+
+def test_acdata_roundtrip():
+    """
+    Test a sequence of states with changed rows, created and deleted
+    aircraft, missing columns, and NaN values.
+    """
+    rng = np.random.default_rng(1)
+    encoder = ACDataEncoder(keyframe_interval=10)
+    decoder = ACDataDecoder()
+    ids = [f'AC{i}' for i in range(20)]
+    cols = dict(lat=rng.uniform(50, 54, 20),
+                alt=np.full(20, np.nan),
+                rel=np.zeros(20, dtype=bool),
+                sid=['' for _ in range(20)])
+    other = dict(simt=0.0, histsymblat=np.array([]))
+    nextid = 20
+    nkeyframes = 0
+    for step in range(40):
+        # Sometimes only part of the columns is updated (not allowed when
+        # aircraft are created)
+        partial = step % 5 == 4 and step % 4 != 2
+
+        # Change a few rows
+        idx = rng.integers(0, len(ids), 2)
+        if not partial:
+            cols['lat'] = cols['lat'].copy()
+            cols['lat'][idx] += 0.01
+        cols['rel'] = cols['rel'].copy()
+        cols['rel'][idx] = ~cols['rel'][idx]
+        cols['sid'] = list(cols['sid'])
+        cols['sid'][idx[0]] = f'SID{step}'
+        other['simt'] = step * 0.2
+
+        # Create and delete aircraft now and then
+        if step % 3 == 1:
+            keep = np.sort(rng.choice(len(ids), len(ids) - 2, replace=False))
+            ids = [ids[i] for i in keep]
+            cols = {name: [value[i] for i in keep] if isinstance(value, list)
+                    else value[keep] for name, value in cols.items()}
+        if step % 4 == 2:
+            ids = ids + [f'AC{nextid}']
+            nextid += 1
+            cols = dict(lat=np.append(cols['lat'], 52.0),
+                        alt=np.append(cols['alt'], 1000.0),
+                        rel=np.append(cols['rel'], True),
+                        sid=cols['sid'] + ['NEW'])
+
+        sent = dict(rel=cols['rel'], sid=cols['sid']) if partial else cols
+        msg = encoder.encode(ids, sent, other)
+        nkeyframes += msg['keyframe']
+        data = decoder.decode(transmit(msg))
+        assert_state(data, ids, cols, other)
+
+    assert 1 < nkeyframes < 40
+
+
+def test_acdata_resync():
+    """
+    Test that a decoder that misses a message (or joins late) waits for
+    the next keyframe, and that unencoded data is passed through.
+    """
+    encoder = ACDataEncoder(keyframe_interval=5)
+    decoder = ACDataDecoder()
+    ids = ['A', 'B']
+    lat = np.array([52.0, 53.0])
+    msgs = []
+    for step in range(8):
+        lat = lat + 0.1
+        msgs.append(transmit(encoder.encode(ids, dict(lat=lat))))
+
+    assert decoder.decode(msgs[0]) is not None
+    # Message 1 is lost
+    for msg in msgs[2:5]:
+        assert decoder.decode(msg) is None
+    # Message 5 is the next keyframe
+    assert msgs[5]['keyframe']
+    np.testing.assert_allclose(decoder.decode(msgs[5])['lat'], [52.6, 53.6])
+    np.testing.assert_allclose(decoder.decode(msgs[6])['lat'], [52.7, 53.7])
+
+    # After a request, the next message is a keyframe
+    encoder.request_keyframe()
+    assert encoder.encode(ids, dict(lat=lat))['keyframe']
+
+    olddata = dict(id=ids, lat=lat)
+    assert decoder.decode(olddata) is olddata
+
+
+def test_acdata_keyframe_other():
+    """
+    Test that a keyframe on a message without other data resends the
+    stored other data, and that other arrays that are changed in place
+    are sent as changed.
+    """
+    encoder = ACDataEncoder(keyframe_interval=2)
+    decoder = ACDataDecoder()
+    ids = ['A', 'B']
+    lat = np.array([52.0, 53.0])
+    histlat = np.array([51.0, 52.0])
+    other = dict(simt=1.0, translvl=1500.0, histsymblat=histlat)
+    data = decoder.decode(transmit(encoder.encode(ids, dict(lat=lat), other)))
+    assert_state(data, ids, dict(lat=lat), other)
+
+    # Unchanged other data is not sent again
+    msg = encoder.encode(ids, dict(lat=lat), dict(simt=1.2, translvl=1500.0))
+    assert not msg['keyframe'] and msg['other'] == dict(simt=1.2)
+    decoder.decode(transmit(msg))
+
+    # A keyframe without other data
+    histlat[0] = 50.0
+    msg = encoder.encode(ids, dict(lat=lat))
+    assert msg['keyframe']
+    data = decoder.decode(transmit(msg))
+    assert_state(data, ids, dict(lat=lat), dict(simt=1.2, translvl=1500.0,
+                                                histsymblat=[51.0, 52.0]))
+
+    # A buffer that is changed in place is detected as changed
+    msg = encoder.encode(ids, dict(lat=lat), dict(histsymblat=histlat))
+    np.testing.assert_array_equal(msg['other']['histsymblat'], [50.0, 52.0])
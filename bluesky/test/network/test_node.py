@@ -0,0 +1,152 @@
+"""
+Tests the event processing of a simulation node: pending events are
+processed in one step within the time budget, consecutive stack commands
+are stacked together, and events take effect in the order in which they
+are received. Also tests forking nodes from a template process.
+"""
+import io
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+import msgpack
+import numpy as np
+import pytest
+import zmq
+import bluesky as bs
+from bluesky import settings
+from bluesky.network.node import Node
+
+
+@pytest.fixture
+def node(monkeypatch):
+    """ Node connected to a router socket, with a recording sim. """
+    node = Node(0, 0)
+    address = f'inproc://test_node{node.node_id.hex()}'
+    router = zmq.Context.instance().socket(zmq.ROUTER)
+    router.bind(address)
+    node.event_io.setsockopt(zmq.IDENTITY, node.node_id)
+    node.event_io.connect(address)
+
+    events = []
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(
+        event=lambda name, data, route: events.append((name, data, route))), raising=False)
+
+    def send(eventname, data, sender=b'CLIENT'):
+        router.send_multipart([node.node_id, sender, eventname, msgpack.packb(data)])
+
+    yield SimpleNamespace(node=node, send=send, events=events)
+    node.event_io.close(linger=0)
+    node.stream_out.close(linger=0)
+    router.close(linger=0)
+
+
+def test_drain(node):
+    """ Test processing pending events in one step, in order. Other events
+        that follow stack commands are left for the next step. """
+    node.send(b'STACK', 'CRE KL204')
+    node.send(b'STACK', 'HDG KL204 90')
+    node.send(b'STACK', 'ECHO OTHER', sender=b'OTHER')
+    node.send(b'CREBATCH', dict(acid=['AC1']))
+    node.send(b'STACK', 'OP')
+    # Wait until all events arrived at the node
+    time.sleep(0.05)
+    node.node.step()
+    assert node.events == [(b'STACK', ['CRE KL204', 'HDG KL204 90'], [b'CLIENT']),
+                           (b'STACK', 'ECHO OTHER', [b'OTHER'])]
+    node.node.update_latency()
+    assert node.node.latency.count == 3
+
+    node.node.step()
+    assert node.events[2:] == [(b'CREBATCH', dict(acid=['AC1']), [b'CLIENT']),
+                               (b'STACK', 'OP', [b'CLIENT'])]
+    assert node.node.nevents.count == 2 and node.node.nevents.max == 3
+    assert not node.node.pending
+    assert node.node.eventstats()[0]
+
+
+def test_stack_batch(node):
+    """ Test that a BATCH after stack commands is processed after the
+        simulation step in which the stack commands are processed. """
+    node.send(b'STACK', 'CRE KL204')
+    node.send(b'BATCH', dict(scentime=[0.0], scencmd=['OP']))
+    time.sleep(0.05)
+    node.node.step()
+    assert node.events == [(b'STACK', 'CRE KL204', [b'CLIENT'])]
+    node.node.step()
+    assert node.events[1:] == [(b'BATCH', dict(scentime=[0.0], scencmd=['OP']), [b'CLIENT'])]
+
+
+def test_budget(node, monkeypatch):
+    """ Test that at least one event is processed when the budget is used. """
+    monkeypatch.setattr(settings, 'event_budget', -1.0, raising=False)
+    for i in range(3):
+        node.send(b'STACK', f'ECHO {i}')
+    time.sleep(0.05)
+    node.node.step()
+    assert node.events == [(b'STACK', 'ECHO 0', [b'CLIENT'])]
+    assert node.node.noverrun == 1
+    assert node.node.npending.count == 1 and node.node.npending.max == 2
+    node.node.step()
+    assert node.events[1:] == [(b'STACK', 'ECHO 1', [b'CLIENT'])]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is not available')
+def test_forkserver(node, monkeypatch):
+    """ Test that forked nodes get their own id and random state. """
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('2\n'))
+    rfd, wfd = os.pipe()
+    template_id = node.node.node_id
+    try:
+        node.node.forkserver()
+    except SystemExit:
+        # The template process exits when stdin is closed, after the
+        # forked nodes have finished
+        os.close(wfd)
+        with os.fdopen(rfd) as f:
+            lines = f.read().split()
+    else:
+        # A forked node: report its id and a random number
+        os.write(wfd, f'{node.node.node_id.hex()},{np.random.random()}\n'.encode())
+        os._exit(0)
+
+    assert len(lines) == 2 and len(set(lines)) == 2
+    assert template_id.hex() not in (line.split(',')[0] for line in lines)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is not available')
+def test_forkserver_process():
+    """ Test that a template process forks nodes on request, and waits for
+        them to finish before it exits. """
+    script = (
+        'import os, time\n'
+        'from bluesky.network.node import Node\n'
+        'node = Node(0, 0)\n'
+        'node.forkserver()\n'
+        'os.write(1, f"node {os.getpid()} {node.node_id.hex()}\\n".encode())\n'
+        'time.sleep(0.5)\n'
+        'os.write(1, b"exit\\n")\n')
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__)))))
+    zygote = subprocess.Popen([sys.executable, '-c', script], cwd=root,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        zygote.stdin.write(b'2\n')
+        zygote.stdin.flush()
+        nodes = []
+        while len(nodes) < 2:
+            line = zygote.stdout.readline()
+            assert line, 'Template process stopped'
+            if line.startswith(b'node'):
+                nodes.append(line.split()[1:])
+        zygote.stdin.close()
+        assert zygote.wait(timeout=30) == 0
+    finally:
+        zygote.kill()
+    assert len({node_id for _, node_id in nodes}) == 2
+    # Both nodes finished before the template process exited
+    for pid, _ in nodes:
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pid), 0)
+    assert zygote.stdout.read().split() == [b'exit', b'exit']
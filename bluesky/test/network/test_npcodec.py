@@ -0,0 +1,52 @@
+"""
+Tests the multi-frame stream codec, which sends numpy arrays as separate
+(zero-copy) message frames.
+"""
+import numpy as np
+import zmq
+from bluesky.network.npcodec import encode_frames, decode_frames
+
+
+def assert_equal(data, expected):
+    """ Assert that decoded data equals the encoded data. """
+    assert data.keys() == expected.keys()
+    for name, value in expected.items():
+        if isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(data[name], value)
+            assert data[name].dtype == value.dtype
+            assert data[name].shape == value.shape
+        else:
+            assert data[name] == value
+
+
+def test_frames_roundtrip():
+    """ Test encoding and decoding of large and small arrays of several
+        types and shapes, mixed with other data, both directly and over a
+        zmq socket. """
+    rng = np.random.default_rng(1)
+    data = dict(lat=rng.uniform(-90.0, 90.0, 4000),
+                alt=rng.uniform(0.0, 12000.0, (100, 100))[:, ::2],
+                ids=np.array(['KL204', 'AF1234']),
+                inconf=rng.random(4000) > 0.5,
+                empty=np.array([], dtype=np.int64),
+                ntraf=4000, simt=12.5, name='ACDATA', rows=[1, 2, 3])
+
+    # Only lat and alt are large enough to be sent in separate frames
+    frames = encode_frames(data)
+    assert len(frames) == 3
+    decoded = decode_frames(frames)
+    assert_equal(decoded, data)
+    # Small arrays, packed in the msgpack frame, are decoded as writable arrays
+    assert decoded['ids'].flags.writeable and decoded['inconf'].flags.writeable
+
+    ctx = zmq.Context.instance()
+    sender, receiver = ctx.socket(zmq.PAIR), ctx.socket(zmq.PAIR)
+    try:
+        receiver.bind('inproc://test_npcodec')
+        sender.connect('inproc://test_npcodec')
+        sender.send_multipart(encode_frames(data), copy=False)
+        received = decode_frames(receiver.recv_multipart(copy=False))
+    finally:
+        sender.close()
+        receiver.close()
+    assert_equal(received, data)
@@ -0,0 +1,61 @@
+"""
+Tests starting simulation nodes from the server when the template process
+from which nodes are forked is no longer running.
+"""
+import subprocess
+import sys
+from types import SimpleNamespace
+import pytest
+import bluesky as bs
+from bluesky.network import server
+
+
+@pytest.fixture
+def srv(monkeypatch):
+    """ Server with a template process that stops on initialisation, and
+        a record of the nodes that are started as new processes. """
+    monkeypatch.setattr(bs.settings, 'enable_discovery', False, raising=False)
+    started = []
+
+    def popen(args, **kwargs):
+        if '--zygote' in args:
+            return subprocess.Popen([sys.executable, '-c', 'import sys; sys.exit(1)'],
+                                    **kwargs)
+        started.append(args)
+        return SimpleNamespace()
+
+    monkeypatch.setattr(server, 'Popen', popen)
+    srv = server.Server(False)
+    srv.forkserver = True
+    yield SimpleNamespace(server=srv, started=started)
+    try:
+        srv.zygote.stdin.close()
+    except BrokenPipeError:
+        pass
+    srv.zygote.wait()
+
+
+def test_zygote_stopped(srv):
+    """ Test that the nodes requested from a template process that stops
+        are started as new processes. """
+    srv.server.addnodes(2)
+    srv.server.zygote.wait()
+    srv.server.checkzygote()
+    assert not srv.server.forkserver and srv.server.nforked == 0
+    assert len(srv.started) == 2 and all('--zygote' not in args for args in srv.started)
+    # Only the replacing requests are waiting for registration
+    assert len(srv.server.tnoderequest) == 2
+
+    # Later nodes are also started as new processes
+    srv.server.addnodes(1)
+    assert len(srv.started) == 3 and len(srv.server.tnoderequest) == 3
+
+
+def test_zygote_write_fails(srv):
+    """ Test the fallback when the request can't be written to the stopped
+        template process. """
+    srv.server.addnodes(1)
+    srv.server.zygote.wait()
+    srv.server.addnodes(2)
+    assert not srv.server.forkserver
+    assert len(srv.started) == 3 and len(srv.server.tnoderequest) == 3
@@ -0,0 +1,78 @@
+"""
+Tests the time-sorted scenario buffer of the stack: commands should be
+stacked in time order (and in order of addition for equal times), and
+per-aircraft deletion should remove only the commands of that aircraft.
+"""
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import bluesky as bs
+from bluesky.stack import stackbase
+from bluesky.stack.stackbase import Stack, add_scencmds, checkscen
+
+
+@pytest.fixture
+def scen(monkeypatch):
+    """ Empty stack with a dummy simulation time and traffic. """
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    monkeypatch.setattr(bs, 'traf', SimpleNamespace(id=[], manual=[]), raising=False)
+    Stack.reset()
+    yield
+    Stack.reset()
+
+
+def run(until, dt=1.0):
+    """ Step the simulation time, and return the stacked commands. """
+    stacked = []
+    while bs.sim.simt <= until:
+        checkscen()
+        stacked.extend(cmd for cmd, _ in Stack.cmdstack)
+        Stack.clear()
+        bs.sim.simt += dt
+    return stacked
+
+
+def test_order(scen):
+    """ Test that commands added in any order are stacked in time order. """
+    rng = np.random.default_rng(1)
+    ref = []
+    add_scencmds(range(0, 100, 2), [f'CMD {i}' for i in range(0, 100, 2)])
+    ref.extend((float(i), n, f'CMD {i}') for n, i in enumerate(range(0, 100, 2)))
+    stacked = run(9.0)
+    for n in range(50, 250):
+        # Single (SCHEDULE/DELAY) and multiple (PCALL) additions
+        times = np.round(rng.uniform(bs.sim.simt, bs.sim.simt + 30.0, rng.integers(1, 4)))
+        cmds = [f'ADD {n}.{j}' for j in range(len(times))]
+        add_scencmds(times.tolist(), cmds)
+        ref.extend((t, n + 0.01 * j, cmd) for j, (t, cmd) in enumerate(zip(times, cmds)))
+        stacked += run(bs.sim.simt + rng.integers(0, 2))
+    stacked += run(bs.sim.simt + 31.0)
+    assert stacked == [cmd for _, _, cmd in sorted(ref)]
+    assert not Stack.scentime and not Stack.scencmd
+
+
+def test_delete(scen):
+    """ Test deletion of the scenario commands of an aircraft. """
+    add_scencmds([0.0, 10.0, 10.0, 20.0, 20.0, 30.0],
+                 ['CRE KL1,A320', 'KL1 ALT FL100', 'KL12 ALT FL200',
+                  'ADDWPT KL1,SPY', 'DEL KL12', 'ECHO DONE'])
+    bs.traf.id = ['KL1', 'KL12']
+    bs.traf.manual = [False, True]
+    assert run(5.0) == ['CRE KL1,A320']
+    stackbase.manual_del()
+    assert stackbase.get_scendata() == ([10.0, 20.0, 30.0],
+                                        ['KL1 ALT FL100', 'ADDWPT KL1,SPY', 'ECHO DONE'])
+    stackbase.del_scencmds(0)
+    assert run(40.0) == ['ECHO DONE']
+
+
+def test_delete_wrapped(scen):
+    """ Test deletion of aircraft commands wrapped in other commands. """
+    add_scencmds([10.0, 20.0, 30.0, 40.0, 50.0],
+                 ['DELAY 10 KL204 ALT FL100', 'SCHEDULE 00:01:00 KL204 SPD 250',
+                  'AFTER SPY ADDWPT KL204 SUGOL', 'ECHO KL2041; KL2041 ALT FL80',
+                  'ECHO DONE; DEL KL204'])
+    bs.traf.id = ['KL204']
+    stackbase.del_scencmds(0)
+    assert stackbase.get_scendata() == ([40.0],
+                                        ['ECHO KL2041; KL2041 ALT FL80'])
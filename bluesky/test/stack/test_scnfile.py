@@ -0,0 +1,88 @@
+"""
+Tests compiling scenario files (with expanded PCALLs), and the cache of
+compiled scenario files.
+"""
+import os
+import numpy as np
+import pytest
+from bluesky import settings
+from bluesky.stack import simstack
+
+
+@pytest.fixture
+def scnfiles(tmp_path, monkeypatch):
+    """ Scenario folder with a main scenario that PCALLs other files. """
+    monkeypatch.setattr(settings, 'scenario_path', str(tmp_path), raising=False)
+    monkeypatch.setattr(settings, 'cache_path', str(tmp_path), raising=False)
+    (tmp_path / 'main.scn').write_text(
+        '# Main scenario\n'
+        '00:00:00.00>CRE KL1,A320,52,4,0,FL100,250\n'
+        '00:01:00.00>PCALL proc KL1 FL200\n'
+        '00:02:00.00>PCALL proc.scn ABS KL2 FL300\n'
+        '00:03:00.00>PCALL missing.scn\n'
+        '00:04:00.00>PCALL main\n'
+        '00:05:00.00>DEL KL1\n')
+    (tmp_path / 'proc.scn').write_text(
+        '00:00:00.00>%0 ALT %1\n'
+        '00:00:30.00>%0 SPD 200\n')
+    return tmp_path
+
+
+def test_compile(scnfiles):
+    """ Test that relative PCALLs of existing files are expanded, and that
+        other PCALLs are left to the PCALL command. """
+    cmdtimes, cmdlines, cmdacids, deps = simstack.compilescn('main')
+    assert cmdtimes.dtype == np.float64
+    np.testing.assert_array_equal(cmdtimes, [0.0, 60.0, 90.0, 120.0, 180.0, 240.0, 300.0])
+    assert cmdlines == ['CRE KL1,A320,52,4,0,FL100,250', 'KL1 ALT FL200', 'KL1 SPD 200',
+                        'PCALL proc.scn ABS KL2 FL300', 'PCALL missing.scn',
+                        'PCALL main', 'DEL KL1']
+    np.testing.assert_array_equal(cmdacids['KL1'], [0, 1, 2, 6])
+    np.testing.assert_array_equal(cmdacids['PCALL'], [3, 4, 5])
+    assert [os.path.basename(fname) for fname, _ in deps] == ['main.scn', 'proc.scn']
+
+
+def test_cache(scnfiles, monkeypatch):
+    """ Test that compiled scenarios are cached, and recompiled when one of
+        the files they depend on changes. """
+    compiled = simstack.loadscn('main')
+    compilescn = simstack.compilescn
+
+    def nocompile(fname, parents=()):
+        raise AssertionError('Unexpected compilation')
+
+    # Unchanged: loaded from the cache
+    monkeypatch.setattr(simstack, 'compilescn', nocompile)
+    cached = simstack.loadscn('main.scn')
+    np.testing.assert_array_equal(cached[0], compiled[0])
+    assert cached[1] == compiled[1] and cached[2].keys() == compiled[2].keys()
+
+    # A changed PCALLed file results in recompilation
+    (scnfiles / 'proc.scn').write_text('00:00:10.00>%0 HDG 90\n')
+    with pytest.raises(AssertionError):
+        simstack.loadscn('main')
+    monkeypatch.setattr(simstack, 'compilescn', compilescn)
+    cmdtimes, cmdlines, _ = simstack.loadscn('main')
+    assert cmdlines[1] == 'KL1 HDG 90' and cmdtimes[1] == 70.0
+
+
+def test_compile_nested(scnfiles):
+    """ Test that nested PCALLs only pass on their own arguments, and that
+        PCALLs without all arguments of the called file are left to the
+        PCALL command. """
+    (scnfiles / 'outer.scn').write_text(
+        '00:01:00.00>PCALL sub KL1\n'
+        '00:02:00.00>PCALL inner\n')
+    (scnfiles / 'sub.scn').write_text(
+        '00:00:10.00>PCALL inner KL9\n'
+        '00:00:20.00>%0 ALT FL100\n'
+        '00:00:30.00>PCALL inner\n'
+        '00:00:40.00>PCALL inner ABS KL8\n'
+        '00:00:50.00>PCALL inner REL %0\n')
+    (scnfiles / 'inner.scn').write_text('00:00:05.00>%0 SPD 200\n')
+    cmdtimes, cmdlines, _, deps = simstack.compilescn('outer')
+    np.testing.assert_array_equal(cmdtimes, [75.0, 80.0, 90.0, 100.0, 115.0, 120.0])
+    assert cmdlines == ['KL9 SPD 200', 'KL1 ALT FL100', 'PCALL inner',
+                        'PCALL inner ABS KL8', 'KL1 SPD 200', 'PCALL inner']
+    assert [os.path.basename(fname) for fname, _ in deps] == \
+        ['outer.scn', 'sub.scn', 'inner.scn', 'inner.scn']
@@ -0,0 +1,27 @@
+"""
+Tests that passing an AtmosState instead of the altitude to the vectorized
+aero functions gives identical results.
+"""
+import numpy as np
+from bluesky.tools import aero
+
+
+def test_atmosstate():
+    """ Test conversions with an AtmosState, and with a selection of one. """
+    rng = np.random.default_rng(1)
+    alt = rng.uniform(0.0, 15000.0, 100)
+    spd = rng.uniform(0.3, 250.0, 100)
+    atmos = aero.AtmosState(alt)
+
+    p, rho, T = aero.vatmos(alt)
+    np.testing.assert_array_equal(atmos.delta, p / aero.p0)
+    np.testing.assert_array_equal(atmos.a, aero.vvsound(alt))
+    for fun in (aero.vtas2cas, aero.vcas2tas, aero.vtas2mach, aero.vmach2tas,
+                aero.vtas2eas, aero.vcasormach2tas):
+        np.testing.assert_array_equal(fun(spd, atmos), fun(spd, alt))
+
+    idx = np.flatnonzero(alt > 5000.0)
+    sel = atmos[idx]
+    assert len(sel) == len(idx)
+    np.testing.assert_array_equal(aero.vcasormach(spd[idx], sel),
+                                  aero.vcasormach(spd[idx], alt[idx]))
@@ -0,0 +1,88 @@
+"""
+Tests the binary (FORMAT=BIN) logger format: converting a binary log
+should give the same file as logging the same data in CSV format.
+"""
+from types import SimpleNamespace
+import numpy as np
+import bluesky as bs
+from bluesky import settings
+from bluesky.tools import datalog
+
+
+def run_logger(logger, fname):
+    """ Log a varying number of aircraft at each timestep. """
+    logger.open(fname)
+    for i in range(10):
+        bs.sim.simt = float(i)
+        n = i % 4
+        logger.log([f'AC{j}' for j in range(n)], np.arange(n) * 0.5,
+                   np.arange(n, dtype=int), np.arange(n) % 2 == 0)
+    logger.reset()
+
+
+def test_bin2csv(tmp_path, monkeypatch):
+    """ Test that a converted binary log is identical to a CSV log. """
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    monkeypatch.setattr(settings, 'log_binbatch', 4, raising=False)
+    logger = datalog.CSVLogger('TESTLOG', 0.0, 'Test log\nwith two lines')
+
+    run_logger(logger, tmp_path / 'csv.log')
+    logger.fmt = 'BIN'
+    run_logger(logger, tmp_path / 'test.bin')
+    # Reset closes the binary log, and restores the default format
+    assert logger.fmt == 'CSV' and logger.writer is None
+
+    csvname = datalog.bin2csv(str(tmp_path / 'test.bin'))
+    assert csvname == str(tmp_path / 'test.log')
+    assert (tmp_path / 'test.log').read_bytes() == (tmp_path / 'csv.log').read_bytes()
+
+
+def test_format_stackio(tmp_path, monkeypatch):
+    """ Test selecting the binary format with the logger stack command. """
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    monkeypatch.setattr(settings, 'log_path', str(tmp_path), raising=False)
+    logger = datalog.CSVLogger('TESTLOG2', 0.0, '')
+    assert logger.stackio('ON', 1.0, 'format=bin')
+    assert logger.dt == 1.0 and logger.writer is not None
+    fname = logger.fname
+    assert fname.endswith('.bin')
+    logger.log(['AC0'], np.array([1.0]))
+    assert logger.stackio('OFF')
+    header, columns, chunks = datalog.readbin(fname)
+    assert columns == ['simt'] and len(chunks) == 1 and len(chunks[0]) == 3
+    assert not logger.stackio('ON', 'FORMAT=XML')[0]
+
+    # A plain ON gives a CSV log again, also when switched on repeatedly
+    for args in (('ON', 'FORMAT=BIN'), ('OFF',), ('ON',)):
+        assert logger.stackio(*args)
+    assert logger.fname.endswith('.log') and logger.writer is None
+    assert logger.stackio('ON', 'FORMAT=BIN') and logger.fname.endswith('.bin')
+    assert logger.stackio('ON') and logger.fname.endswith('.log')
+    logger.reset()
+
+
+def test_writer_error(tmp_path, monkeypatch):
+    """ Test that an error in the writer thread stops the log, and is
+        reported on the console. """
+    def writebinchunks(file, batch):
+        raise OSError('No space left on device')
+
+    echoed = []
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    monkeypatch.setattr(bs, 'scr', SimpleNamespace(echo=echoed.append), raising=False)
+    monkeypatch.setattr(settings, 'log_binbatch', 1, raising=False)
+    monkeypatch.setattr(datalog, 'writebinchunks', writebinchunks)
+    logger = datalog.CSVLogger('TESTLOG3', 0.0, '')
+    logger.fmt = 'BIN'
+    logger.fname = str(tmp_path / 'test.bin')
+    logger.open(logger.fname)
+    logger.log(['AC0'], np.array([1.0]))
+    logger.writer.batches.put(None)
+    logger.writer.join()
+
+    # The next log call closes the log and reports the error
+    logger.log(['AC0'], np.array([1.0]))
+    assert not logger.isopen() and logger.writer is None
+    assert len(echoed) == 1 and 'No space left on device' in echoed[0]
+    logger.reset()
+    assert len(echoed) == 1
@@ -0,0 +1,110 @@
+"""
+Tests the spatial grid broad phase conflict detection (StateBasedGrid)
+against the full-matrix StateBased implementation.
+"""
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from bluesky.tools.aero import nm, ft
+from bluesky.traffic.asas import StateBased, StateBasedGrid
+
+
+def make_traffic(n, rng, lat0=52.0, lon0=4.0, size=2.0):
+    """
+    Generate a random traffic state object with the attributes used
+    by conflict detection.
+    """
+    return SimpleNamespace(
+        ntraf=n,
+        id=[f'AC{i:05d}' for i in range(n)],
+        lat=lat0 + rng.uniform(-size, size, n),
+        lon=((lon0 + rng.uniform(-size, size, n)) + 180.0) % 360.0 - 180.0,
+        trk=rng.uniform(0.0, 360.0, n),
+        gs=rng.uniform(50.0, 250.0, n),
+        alt=rng.uniform(0.0, 3000.0, n),
+        vs=rng.choice([-10.0, 0.0, 0.0, 10.0], n))
+
+
+def detect_both(own, intruder, rpz, hpz, dtlookahead):
+    """ Run both detection implementations on the same input. """
+    ref = StateBased.detect(None, own, intruder, rpz, hpz, dtlookahead)
+    res = StateBasedGrid.detect(None, own, intruder, rpz, hpz, dtlookahead)
+    return ref, res
+
+
+def assert_identical(ref, res):
+    """ Assert that the grid-based detection output matches StateBased. """
+    confpairs, lospairs, inconf, tcpamax = ref[:4]
+    assert res[0] == confpairs
+    assert res[1] == lospairs
+    np.testing.assert_array_equal(res[2], inconf)
+    np.testing.assert_allclose(res[3], tcpamax)
+    for refarr, resarr in zip(ref[4:], res[4:]):
+        assert len(refarr) == len(resarr) == len(confpairs)
+        np.testing.assert_allclose(resarr, refarr)
+
+
+@pytest.mark.parametrize('n, lat0, lon0, size', [
+    (300, 52.0, 4.0, 2.0),      # Dense regional traffic
+    (300, 0.0, 179.5, 1.0),     # Around the date line
+    (200, 70.0, 20.0, 5.0),     # High latitude
+    (150, 88.0, 0.0, 1.5),      # Near the pole: single grid column
+])
+def test_grid_matches_statebased(n, lat0, lon0, size):
+    """
+    Test that conflict and LoS pairs and all per-conflict output match
+    the full-matrix state-based detection.
+    """
+    rng = np.random.default_rng(n)
+    traf = make_traffic(n, rng, lat0, lon0, size)
+    rpz = np.full(n, 5.0 * nm)
+    hpz = np.full(n, 1000.0 * ft)
+    dtlookahead = np.full(n, 300.0)
+
+    ref, res = detect_both(traf, traf, rpz, hpz, dtlookahead)
+    assert ref[0], 'test scenario should contain conflicts'
+    assert_identical(ref, res)
+
+
+def test_grid_per_aircraft_zones():
+    """
+    Test that per-aircraft protected zones and lookahead times, and
+    a separate intruder state (e.g., from ADS-B) give identical results.
+    """
+    rng = np.random.default_rng(42)
+    n = 250
+    traf = make_traffic(n, rng)
+    adsb = SimpleNamespace(**vars(traf))
+    adsb.lat = traf.lat + rng.normal(0.0, 1e-3, n)
+    adsb.lon = traf.lon + rng.normal(0.0, 1e-3, n)
+    rpz = rng.uniform(3.0, 8.0, n) * nm
+    hpz = rng.uniform(500.0, 1500.0, n) * ft
+    dtlookahead = rng.uniform(60.0, 600.0, n)
+
+    ref, res = detect_both(traf, adsb, rpz, hpz, dtlookahead)
+    assert ref[1], 'test scenario should contain losses of separation'
+    assert_identical(ref, res)
+
+
+@pytest.mark.parametrize('n', [0, 1, 2])
+def test_grid_small_traffic(n):
+    """
+    Test detection with zero, one, and two aircraft.
+    """
+    traf = SimpleNamespace(
+        ntraf=n, id=['A', 'B'][:n],
+        lat=np.array([52.0, 52.05])[:n], lon=np.array([4.0, 4.0])[:n],
+        trk=np.array([0.0, 180.0])[:n], gs=np.array([100.0, 100.0])[:n],
+        alt=np.array([1000.0, 1000.0])[:n], vs=np.zeros(n))
+    rpz = np.full(n, 5.0 * nm)
+    hpz = np.full(n, 1000.0 * ft)
+    dtlookahead = np.full(n, 300.0)
+
+    res = StateBasedGrid.detect(None, traf, traf, rpz, hpz, dtlookahead)
+    assert len(res[2]) == n
+    if n == 2:
+        ref = StateBased.detect(None, traf, traf, rpz, hpz, dtlookahead)
+        assert res[0] == [('A', 'B'), ('B', 'A')]
+        assert_identical(ref, res)
+    else:
+        assert not res[0] and not res[1]
@@ -0,0 +1,94 @@
+"""
+Tests the vectorised MVP conflict resolution (VMVP) against the
+pairwise MVP implementation.
+"""
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from bluesky.tools.aero import nm, ft
+from bluesky.traffic.asas import StateBased, MVP, VMVP
+
+
+def make_traffic(n, rng):
+    """
+    Generate a random traffic state object with the attributes used
+    by conflict detection and MVP resolution.
+    """
+    trk = rng.uniform(0.0, 360.0, n)
+    gs = rng.uniform(50.0, 250.0, n)
+    alt = rng.uniform(0.0, 3000.0, n)
+    return SimpleNamespace(
+        ntraf=n,
+        id=[f'AC{i:05d}' for i in range(n)],
+        lat=52.0 + rng.uniform(-1.0, 1.0, n),
+        lon=4.0 + rng.uniform(-1.0, 1.0, n),
+        trk=trk, gs=gs, alt=alt,
+        gseast=gs * np.sin(np.radians(trk)),
+        gsnorth=gs * np.cos(np.radians(trk)),
+        vs=rng.choice([-10.0, 0.0, 0.0, 10.0], n),
+        selalt=alt + rng.choice([-1000.0, 0.0, 1000.0], n),
+        ap=SimpleNamespace(vs=np.full(n, 10.0)),
+        perf=SimpleNamespace(vmin=np.full(n, 50.0), vmax=np.full(n, 250.0),
+                             vsmin=np.full(n, -20.0), vsmax=np.full(n, 20.0)))
+
+
+def make_reso(cls, n, rng, swprio, priocode):
+    """ Create a bare resolution object of class cls, without the simulation. """
+    reso = object.__new__(cls)
+    reso.swprio = swprio
+    reso.priocode = priocode
+    reso.resofach = 1.05
+    reso.resofacv = 1.0
+    reso.noresoac = rng.random(n) < 0.1
+    reso.resooffac = rng.random(n) < 0.1
+    reso.swresohoriz = False
+    reso.swresospd = False
+    reso.swresohdg = False
+    reso.swresovert = False
+    return reso
+
+
+@pytest.mark.parametrize('swprio, priocode', [
+    (False, ''), (True, 'FF1'), (True, 'FF2'), (True, 'FF3'),
+    (True, 'LAY1'), (True, 'LAY2')])
+def test_vmvp_matches_mvp(swprio, priocode):
+    """
+    Test that the resolution vectors and resulting commands of VMVP
+    match MVP, with and without priority rules.
+    """
+    n = 300
+    rng = np.random.default_rng(3)
+    traf = make_traffic(n, rng)
+    rpz = np.full(n, 5.0 * nm)
+    hpz = np.full(n, 1000.0 * ft)
+    dtlookahead = np.full(n, 300.0)
+    confpairs, _, _, _, qdr, dist, _, tcpa, tLOS = \
+        StateBased.detect(None, traf, traf, rpz, hpz, dtlookahead)
+    assert confpairs, 'test scenario should contain conflicts'
+    conf = SimpleNamespace(confpairs=confpairs, qdr=qdr, dist=dist, tcpa=tcpa,
+                           tLOS=tLOS, rpz=rpz, hpz=hpz, dtlookahead=dtlookahead)
+
+    ref = make_reso(MVP, n, np.random.default_rng(4), swprio, priocode)
+    res = make_reso(VMVP, n, np.random.default_rng(4), swprio, priocode)
+    dvref, tsolref = ref.calcdv(conf, traf, traf)
+    dvres, tsolres = res.calcdv(conf, traf, traf)
+    np.testing.assert_allclose(dvres, dvref, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(tsolres, tsolref, rtol=1e-9)
+
+    for refcmd, rescmd in zip(ref.resolve(conf, traf, traf),
+                              res.resolve(conf, traf, traf)):
+        np.testing.assert_allclose(rescmd, refcmd, rtol=1e-9, atol=1e-9)
+
+
+def test_vmvp_no_conflicts():
+    """ Test VMVP without any conflicts. """
+    n = 3
+    traf = make_traffic(n, np.random.default_rng(5))
+    conf = SimpleNamespace(confpairs=[], qdr=np.array([]), dist=np.array([]),
+                           tcpa=np.array([]), tLOS=np.array([]),
+                           rpz=np.full(n, 5.0 * nm), hpz=np.full(n, 1000.0 * ft),
+                           dtlookahead=np.full(n, 300.0))
+    reso = make_reso(VMVP, n, np.random.default_rng(6), False, '')
+    dv, timesolveV = reso.calcdv(conf, traf, traf)
+    np.testing.assert_array_equal(dv, np.zeros((n, 3)))
+    np.testing.assert_array_equal(timesolveV, np.full(n, 1e9))
@@ -0,0 +1,135 @@
+"""
+Tests the waypoint switching of the FMS, which is done at once for all
+aircraft that reach their active waypoint.
+"""
+from math import sqrt
+import numpy as np
+import bluesky as bs
+from bluesky.tools import geo
+from bluesky.tools.aero import kts
+from bluesky.traffic.autopilot import calcvrta
+from bluesky.traffic.route import Route
+
+
+def make_route(nwp, iactwp=0):
+    """ Route with waypoints to the north-east, and some altitude constraints. """
+    route = Route('TEST')
+    route.wpname = [f'WP{i}' for i in range(nwp)]
+    route.wplat = [52.0 + 0.1 * i for i in range(nwp)]
+    route.wplon = [4.0 + 0.2 * i for i in range(nwp)]
+    route.wpalt = [3000. if i % 2 else -999. for i in range(nwp)]
+    route.calcfp()
+    route.iactwp = iactwp
+    return route
+
+
+def test_getnextwps():
+    """ Test switching the active waypoint of several routes at once. """
+    routes = [make_route(1), make_route(2), make_route(5), make_route(5, 3)]
+    lat, lon, alt, spd, xtoalt, toalt, xtorta, torta, lnavon, flyby, \
+        flyturn, turnrad, turnspd, nextqdr, swlastwp = Route.getnextwps(routes)
+
+    assert [route.iactwp for route in routes] == [0, 1, 1, 4]
+    assert lnavon.tolist() == [False, True, True, True]
+    assert swlastwp.tolist() == [True, True, False, True]
+    for i, route in enumerate(routes):
+        assert lat[i] == route.wplat[route.iactwp]
+        assert lon[i] == route.wplon[route.iactwp]
+        assert alt[i] == route.wpalt[route.iactwp]
+        assert xtoalt[i] == route.wpxtoalt[route.iactwp]
+        assert toalt[i] == route.wptoalt[route.iactwp]
+
+    # Direction of the next leg, only when there is one
+    qdr, _ = geo.qdrdist(52.1, 4.2, 52.2, 4.4)
+    np.testing.assert_allclose(nextqdr, [-999., -999., qdr, -999.])
+
+
+def calcvrta_ref(v0, dx, deltime, trafax):
+    """ Scalar calculation of the required ground speed to meet an RTA. """
+    ax = max(0.01, abs(trafax)) if v0 * deltime < dx else -max(0.01, abs(trafax))
+    a = -0.5 / ax
+    b = v0 / ax + deltime
+    c = -0.5 * v0 * v0 / ax - dx
+    D = b * b - 4. * a * c
+    vlst = []
+    if D >= 0.:
+        for v1 in ((-b - sqrt(D)) / (2. * a), (-b + sqrt(D)) / (2. * a)):
+            dtacc = (v1 - v0) / ax
+            if dtacc >= 0 and deltime - dtacc >= 0.:
+                vlst.append(v1)
+    if not vlst:
+        return dx / deltime
+    if len(vlst) == 2:
+        return vlst[int(abs(vlst[1] - v0) < abs(vlst[0] - v0))]
+    return vlst[0]
+
+
+def test_calcvrta():
+    """ Test the vectorized RTA speed calculation against the scalar one. """
+    rng = np.random.default_rng(1)
+    n = 1000
+    v0 = rng.uniform(50., 250., n)
+    dx = rng.uniform(1e3, 2e5, n)
+    deltime = rng.uniform(1., 1500., n)
+    ax = rng.uniform(0., 1., n)
+    ref = [calcvrta_ref(*args) for args in zip(v0, dx, deltime, ax)]
+    np.testing.assert_allclose(calcvrta(v0, dx, deltime, ax), ref, rtol=1e-12)
+
+
+def fly_routes(traf, nsteps, simdt=0.5):
+    """
+    Fly six aircraft along random routes with altitude and speed
+    constraints, flyturn waypoints and RTAs, and return their final state.
+    """
+    rng = np.random.default_rng(7)
+    ids = [f'FMS{i}' for i in range(6)]
+    traf.cre(ids, 'B744', 52.0 + 0.5 * np.arange(6), 4.0, 45.,
+             rng.uniform(3000., 8000., 6), rng.uniform(220., 280., 6) * kts)
+    idx = [traf.id2idx(acid) for acid in ids]
+    for n, (i, acid) in enumerate(zip(idx, ids)):
+        route = traf.ap.route[i]
+        lat, lon = traf.lat[i], traf.lon[i]
+        for j in range(12):
+            lat += rng.uniform(0.02, 0.06)
+            lon += rng.uniform(-0.02, 0.06)
+            alt = float(rng.choice([-999., rng.uniform(2000., 9000.)]))
+            spd = float(rng.choice([-999., rng.uniform(160., 250.) * kts]))
+            route.addwpt(i, acid, Route.wplatlon, lat, lon, alt, spd)
+        if n % 2 == 0:
+            route.wprta[8] = bs.sim.simt + 600.
+        if n % 3 == 1:
+            route.wpflyturn[4] = True
+            route.wpturnrad[4] = 1.0
+            route.wpturnspd[4] = 180. * kts
+        route.direct(i, route.wpname[0])
+        traf.swvnav[i] = traf.swvnavspd[i] = True
+
+    simt0, simdt0 = bs.sim.simt, bs.sim.simdt
+    bs.sim.simdt = simdt
+    for _ in range(nsteps):
+        bs.sim.simt += simdt
+        traf.update()
+    bs.sim.simt, bs.sim.simdt = simt0, simdt0
+
+    state = (traf.lat[idx].tolist(), traf.lon[idx].tolist(), traf.alt[idx].tolist(),
+             [traf.ap.route[i].iactwp for i in idx])
+    traf.delete([traf.id2idx(acid) for acid in ids])
+    return state
+
+
+def test_fms_trajectories(traffic_):
+    """
+    Test the flown routes against the trajectories that were flown when the
+    waypoint switching was done per aircraft.
+    """
+    lat, lon, alt, iactwp = fly_routes(traffic_, 600)
+    np.testing.assert_allclose(lat, [52.34766701640689, 52.92684843747967, 52.98871565353278,
+                                     53.802319228091044, 54.08187976209761, 54.88517069389457],
+                               rtol=0.0, atol=1e-5)
+    np.testing.assert_allclose(lon, [4.211029452971181, 4.182560368930458, 4.002792351674407,
+                                     4.204001664106577, 3.956638582932675, 4.107150890188862],
+                               rtol=0.0, atol=1e-5)
+    np.testing.assert_allclose(alt, [7592.553796, 7706.79394596532, 8275.783666012005,
+                                     5936.23695, 4500.831424556127, 5046.345227],
+                               rtol=0.0, atol=1.0)
+    assert iactwp == [10, 10, 0, 7, 0, 9]
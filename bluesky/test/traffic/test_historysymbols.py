@@ -0,0 +1,139 @@
+"""
+Tests the history symbol ring buffers against the original implementation,
+which shifted a separate traffic array per history location.
+"""
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import bluesky as bs
+from bluesky.core import TrafficArrays
+from bluesky.tools import misc
+from bluesky.traffic.historysymbols import HistorySymbols
+
+
+class OldHistorySymbols(TrafficArrays):
+    """ Reference: the history symbols with lat1..lat8 and lon1..lon8. """
+    def __init__(self):
+        super().__init__()
+        self.nsymb = 4
+        self.histlat = np.array([])
+        self.histlon = np.array([])
+        self.t_prev = 0.
+        self.maxdeltat = 3.
+        with self.settrafarrays():
+            self.swhistory = np.array([], dtype=bool)
+            for i in range(1, 9):
+                setattr(self, f'lat{i}', np.array([]))
+                setattr(self, f'lon{i}', np.array([]))
+
+    def update(self):
+        if self.nsymb > 0:
+            self.histlat = np.concatenate([getattr(self, f'lat{i}') for i in range(1, self.nsymb + 1)])
+            self.histlon = np.concatenate([getattr(self, f'lon{i}') for i in range(1, self.nsymb + 1)])
+            self.histlat = self.histlat[self.histlat != 0.]
+            self.histlon = self.histlon[self.histlon != 0.]
+
+            itrafdatafeed = misc.get_indices(bs.traf.id, bs.traf.trafdatafeed.datafeedids)
+            itrafnew = np.nonzero(bs.traf.trafdatafeed.lastupdate <= 0.2)[0]
+            itrafdatafeed_new = np.intersect1d(itrafdatafeed, itrafnew, assume_unique=True)
+
+            if bs.sim.simt - self.t_prev >= self.maxdeltat:
+                itraf_new = np.setdiff1d(np.arange(bs.traf.ntraf), itrafdatafeed)
+                self.t_prev = bs.sim.simt
+            else:
+                itraf_new = np.array([])
+
+            i_new = np.append(itrafdatafeed_new, itraf_new).astype(np.int32)
+            i_update = np.intersect1d(i_new, np.nonzero(self.swhistory)[0])
+            self.swhistory[i_new] = ~self.swhistory[i_new]
+            iopensky = misc.get_indices(bs.traf.trafdatafeed.source, 'OPENSKY')
+            i_update = np.union1d(i_update, np.intersect1d(i_new, iopensky))
+
+            for i in range(8, 1, -1):
+                getattr(self, f'lat{i}')[i_update] = getattr(self, f'lat{i - 1}')[i_update]
+                getattr(self, f'lon{i}')[i_update] = getattr(self, f'lon{i - 1}')[i_update]
+            self.lat1[i_update] = bs.traf.lat[i_update]
+            self.lon1[i_update] = bs.traf.lon[i_update]
+        else:
+            self.histlat = np.array([])
+            self.histlon = np.array([])
+
+
+class DataFeed(TrafficArrays):
+    """ Dummy data feed traffic. """
+    def __init__(self):
+        super().__init__()
+        self.datafeedids = []
+        with self.settrafarrays():
+            self.lastupdate = np.array([])
+            self.source = []
+
+
+class Root(TrafficArrays):
+    """ Dummy traffic with both history symbol implementations. """
+    def __init__(self):
+        super().__init__()
+        TrafficArrays.setroot(self)
+        with self.settrafarrays():
+            self.id = []
+            self.lat = np.array([])
+            self.lon = np.array([])
+        self.trafdatafeed = DataFeed()
+        self.old = OldHistorySymbols()
+        self.new = HistorySymbols()
+
+    @property
+    def ntraf(self):
+        return len(self.lat)
+
+    @property
+    def idmap(self):
+        return {acid: i for i, acid in enumerate(self.id)}
+
+
+@pytest.fixture
+def traf(monkeypatch):
+    """ Dummy traffic and simulation time. """
+    monkeypatch.setattr(TrafficArrays, 'root', None)
+    monkeypatch.setattr(HistorySymbols, '_instance', None)
+    monkeypatch.setattr(bs.settings, 'histsymb_max', 8, raising=False)
+    monkeypatch.setattr(bs.settings, 'screendt', 1.0, raising=False)
+    monkeypatch.setattr(bs, 'sim', SimpleNamespace(simt=0.0), raising=False)
+    root = Root()
+    monkeypatch.setattr(bs, 'traf', root, raising=False)
+    return root
+
+
+def test_symbols(traf):
+    """ Test that the symbols are identical to those of the original
+        implementation, also after wrap-around of the ring buffers and
+        deletion of aircraft. """
+    rng = np.random.default_rng(17)
+    nacid = 0
+    wrapped = False
+    for step in range(600):
+        if step % 10 == 0 or traf.ntraf == 0:
+            n = rng.integers(1, 5)
+            traf.create(n)
+            traf.create_children(n)
+            traf.id[-n:] = [f'AC{nacid + i}' for i in range(n)]
+            traf.trafdatafeed.source[-n:] = rng.choice(['', 'OPENSKY'], n).tolist()
+            nacid += n
+        if step % 25 == 24 and traf.ntraf > 1:
+            traf.delete(np.sort(rng.choice(traf.ntraf, rng.integers(1, 3), replace=False)))
+        if step % 100 == 50:
+            traf.old.nsymb = traf.new.nsymb = int(rng.integers(0, 9))
+        traf.trafdatafeed.datafeedids = traf.id[::3]
+        traf.trafdatafeed.lastupdate = rng.uniform(0.0, 1.0, traf.ntraf)
+        traf.lat = rng.uniform(1.0, 2.0, traf.ntraf)
+        traf.lon = rng.uniform(1.0, 2.0, traf.ntraf)
+
+        traf.old.update()
+        traf.new.update()
+        np.testing.assert_array_equal(traf.new.histlat, traf.old.histlat)
+        np.testing.assert_array_equal(traf.new.histlon, traf.old.histlon)
+        wrapped |= np.any(traf.new.head < traf.new.nhist - 1)
+        bs.sim.simt += 0.2
+
+    # The ring buffers have wrapped around
+    assert wrapped
@@ -0,0 +1,71 @@
+"""
+Tests the per-type coefficient table of the OpenAP performance model.
+"""
+import numpy as np
+import pytest
+from bluesky import settings
+from bluesky.tools import cachefile
+from bluesky.traffic.performance.openap import coeff
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    """ Write the coefficient cache to a temporary folder. """
+    monkeypatch.setattr(settings, 'cache_path', str(tmp_path), raising=False)
+    return tmp_path
+
+
+def test_typecodes(cache_path):
+    """ Test the type codes and coefficients of known, synonym and unknown
+        aircraft types. """
+    c = coeff.Coefficient()
+    synonym = next(name for name, actype in c.synodict.items()
+                   if name not in c.typename and actype in c.actypes_fixwing)
+    codes, warns = c.get_typecodes(['A320', synonym, 'XXXX', 'A320', 'XXXX'])
+
+    assert codes[0] == codes[3] == c.typecode['A320']
+    assert codes[2] == codes[4] == c.typecode[coeff.DEFAULT_ACTYPE]
+    assert c.typename[codes[1]] == c.synodict[synonym]
+    assert warns == [f'Warning: {synonym} replaced by {c.synodict[synonym]}',
+                     f'Warning: XXXX replaced by {coeff.DEFAULT_ACTYPE}']
+
+    row = c.table[codes[0]]
+    assert row['lifttype'] == coeff.LIFT_FIXWING
+    assert row['Sref'] == c.acs_fixwing['A320']['wa']
+    assert row['mmo'] == c.limits_fixwing['A320']['mmo']
+    assert row['cd0_clean'] == c.dragpolar_fixwing['A320']['cd0_clean']
+
+    rotor = c.table[c.typecode[c.actypes_rotor[0]]]
+    assert rotor['lifttype'] == coeff.LIFT_ROTOR
+    assert np.isnan(rotor['cd0_clean'])
+
+
+def test_coeff_cache(cache_path, monkeypatch):
+    """ Test that the coefficients are cached, and that the cache is
+        rebuilt when it is out of date. """
+    parsed = coeff.Coefficient()
+    assert (cache_path / 'openap_coeff.p').is_file()
+
+    monkeypatch.setattr(coeff.Coefficient, '_load_database', None)
+    cached = coeff.Coefficient()
+    assert cached.typecode == parsed.typecode
+    assert cached.table.tobytes() == parsed.table.tobytes()
+
+    monkeypatch.setattr(coeff, 'coeff_cache_version', 'outdated')
+    with pytest.raises(TypeError):
+        coeff.Coefficient()
+
+
+def test_coeff_cache_incomplete(cache_path):
+    """ Test that a cache with fewer entries than expected is rebuilt. """
+    parsed = coeff.Coefficient()
+    version = (coeff.coeff_cache_version, coeff.cache_attrs,
+               cachefile.filestamps(coeff.source_files()))
+    with cachefile.openfile('openap_coeff.p', version) as cache:
+        cache.dump(tuple(getattr(parsed, attr) for attr in coeff.cache_attrs[:-2]))
+
+    rebuilt = coeff.Coefficient()
+    assert rebuilt.typewarn == parsed.typewarn
+    assert rebuilt.table.tobytes() == parsed.table.tobytes()
+    with cachefile.openfile('openap_coeff.p', version) as cache:
+        assert len(cache.load()) == len(coeff.cache_attrs)
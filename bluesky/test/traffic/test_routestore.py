@@ -0,0 +1,65 @@
+"""
+Tests the fleet-wide route store, and the list-like waypoint data of routes
+that are views on it.
+"""
+import gc
+import numpy as np
+from bluesky.traffic.route import Route
+
+
+def test_route_columns():
+    """ Test editing routes through their waypoint lists, while other
+        routes are created, grown and deleted. """
+    rng = np.random.default_rng(1)
+    routes = [Route(f'TEST{i}') for i in range(20)]
+    expected = [[] for _ in routes]
+    for _ in range(2000):
+        i = int(rng.integers(0, len(routes)))
+        route, names = routes[i], expected[i]
+        if names and rng.random() < 0.3:
+            j = int(rng.integers(0, len(names)))
+            route.store.delete(route.row, j)
+            del names[j]
+        elif rng.random() < 0.05:
+            # Replace a route by a new one
+            routes[i] = Route(f'TEST{i}')
+            expected[i] = []
+            gc.collect()
+        else:
+            j = int(rng.integers(0, len(names) + 1))
+            route.addwpt_data(False, j, f'WP{j}', 52.0 + j, 4.0, 0, -999., -999.)
+            names.insert(j, f'WP{j}')
+
+        assert route.wpname == names
+        assert route.nwp == len(names)
+
+    # Unused parts of the store are reused or removed
+    store = Route.store
+    assert len(store.freerows) + len(routes) >= store.nrows
+    assert store.nunused <= store.size // 2
+
+    for route, names in zip(routes, expected):
+        assert route.wpname == names
+        assert route.wpstack == [()] * len(names)
+        np.testing.assert_array_equal(route.data('lat'), [52.0 + int(name[2:]) for name in names])
+
+
+def test_route_calcfp():
+    """ Test the altitude constraint data of the flight plan calculation. """
+    route = Route('TEST')
+    route.wpname = ['A', 'B', 'C', 'D', 'E']
+    route.wplat = [52.0, 52.1, 52.2, 52.3, 52.4]
+    route.wplon = [4.0] * 5
+    route.wpalt = [-999., -999., 3000., -999., -999.]
+    route.wptype = [0, 0, 0, 0, Route.dest]
+    route.calcfp()
+
+    dist = np.array(route.wpdistto) * 1852.
+    assert route.wpialt == [2, 2, 2, 4, 4]
+    assert route.wptoalt == [3000., 3000., 3000., 0., 0.]
+    np.testing.assert_allclose(route.wpxtoalt, [dist[1] + dist[2], dist[2], 0.0, dist[4], 0.0])
+
+    # Editing the route changes its version
+    version = route.version
+    route.wpalt[1] = 2000.
+    assert route.version != version
@@ -0,0 +1,57 @@
+"""
+Tests the cached remaining route distances used for the trackmiles, which
+should equal the distances summed per waypoint along the route.
+"""
+import numpy as np
+from bluesky.traffic.route import Route
+from bluesky.traffic import trackmiles_calc
+
+
+def make_route(nwp, seed=1):
+    """ Route with random waypoints and speed/altitude constraints. """
+    rng = np.random.default_rng(seed)
+    route = Route('TEST')
+    route.wpname = [f'WP{i % 5}' for i in range(nwp)]
+    route.wplat = rng.uniform(52.0, 53.0, nwp).tolist()
+    route.wplon = rng.uniform(4.0, 5.0, nwp).tolist()
+    route.wpalt = np.where(rng.random(nwp) < 0.5, -999., 2000.).tolist()
+    route.wpspd = np.where(rng.random(nwp) < 0.5, -999., 120.).tolist()
+    route.nwp = nwp
+    return route
+
+
+def remaining_ref(route):
+    """ Remaining distance, calculated the original way: with the (last)
+        waypoint with the name of the active waypoint. """
+    j = None
+    for i in range(0, len(route.wpname) - 1):
+        if route.wpname[i] == route.wpname[route.iactwp]:
+            j = i
+    return 0.0 if j is None else \
+        trackmiles_calc.get_remaining_route_dist_curve(route, j)
+
+
+def test_route_distances():
+    """ Test the cached distances for each active waypoint, and that they
+        are recalculated when the route is edited. """
+    route = make_route(12)
+    routedist = trackmiles_calc.RouteDistances()
+    for iactwp in range(-1, route.nwp):
+        route.iactwp = iactwp
+        assert np.isclose(routedist.get(route), remaining_ref(route), rtol=1e-12)
+
+    remaining = routedist.remaining
+    route.iactwp = 0
+    routedist.get(route)
+    assert routedist.remaining is remaining
+
+    # Edit the route
+    route.wplat[3] += 0.1
+    route.wpspd[4] = 150.
+    assert np.isclose(routedist.get(route), remaining_ref(route), rtol=1e-12)
+    assert routedist.remaining is not remaining
+
+    for nwp in (0, 1, 2):
+        route = make_route(nwp)
+        route.iactwp = nwp - 1
+        assert routedist.get(route) == remaining_ref(route)
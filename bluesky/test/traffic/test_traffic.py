@@ -9,6 +9,7 @@ Tests traffic module
 """
 
 from bluesky.tools.aero import casormach
+from bluesky.tools.misc import get_indices
 
 
 def test_traffic_create_missingarg_fail(traffic_):
@@ -144,6 +145,104 @@ def test_traffic_reset(traffic_):
     """
     traffic_.reset()
     validate_lengths(traffic_, 0)
+    assert not traffic_.idmap
+
+
+def test_traffic_idmap(traffic_):
+    """
+    Test the id index after creating and deleting aircraft.
+
+    Expects id2idx and get_indices to give the current index of each id.
+    """
+    traffic_.cre(['ID%d' % i for i in range(10)], 'A320', 52.0, 4.0, 90.0, 3000.0, 150.0)
+    traffic_.delete([2, 5])
+    traffic_.delete(0)
+    traffic_.cre('ID10', 'A320', 52.0, 4.0, 90.0, 3000.0, 150.0)
+    assert traffic_.idmap == {acid: i for i, acid in enumerate(traffic_.id)}
+    assert traffic_.id2idx('id6') == traffic_.id.index('ID6')
+    assert traffic_.id2idx(['ID10', 'ID2']) == [traffic_.ntraf - 1, -1]
+    assert list(get_indices(traffic_.id, ['ID9', 'ID0', 'ID1'])) == \
+        [traffic_.id.index('ID9'), traffic_.id.index('ID1')]
+
+
+
+def test_traffic_crebatch(traffic_):
+    """
+    Test batch creation of aircraft with data feed source and SSR code.
+
+    Expects existing and duplicate callsigns to be skipped, and the data
+    feed and SSR code to be set per aircraft.
+    """
+    traffic_.reset()
+    traffic_.cre('BA1', 'A320', 52.0, 4.0, 90.0, 3000.0, 150.0)
+    n = traffic_.crebatch(['ba1', 'kl1', 'kl2', 'KL1'], ['A320', 'b738', 'A320', 'A320'],
+                          [52.0, 52.1, 52.2, 52.3], [4.0, 4.1, 4.2, 4.3],
+                          [90.0, 180.0, 270.0, 0.0], [3000.0, 4000.0, 5000.0, 6000.0],
+                          [150.0, 160.0, 170.0, 180.0], source=['', 'OPENSKY', '', ''],
+                          ssr=[1000, 1234, float('nan'), 0])
+    assert n == 2
+    assert traffic_.ntraf == 3
+    assert traffic_.id == ['BA1', 'KL1', 'KL2']
+    assert traffic_.type[1:] == ['B738', 'A320']
+    assert list(traffic_.lat[1:]) == [52.1, 52.2]
+    assert list(traffic_.trafdatafeed.datafeed) == [False, True, False]
+    assert traffic_.trafdatafeed.datafeedids == ['KL1']
+    assert traffic_.lvnlvars.ssr[1] == 1234
+
+    # A staged batch is created with the CREBATCH command
+    name = traffic_.stagebatch(['KL3'], ['A320'], [52.0], [4.0], [90.0], [3000.0], [150.0])
+    assert traffic_.crestaged(name)
+    assert not traffic_.crestaged(name)[0]
+    assert traffic_.id[-1] == 'KL3'
+
+
+def test_traffic_conditional(traffic_):
+    """
+    Test conditional commands when aircraft are deleted.
+
+    Expects the conditions of deleted aircraft to be removed, and the
+    conditions of the other aircraft to follow their aircraft.
+    """
+    traffic_.reset()
+    traffic_.cre(['KL1', 'KL2', 'KL3'], 'A320', 52.0, 4.0, 90.0, 3000.0, 150.0)
+    traffic_.cond.ataltcmd(0, 4000.0, 'KL1 SPD 200')
+    traffic_.cond.ataltcmd(1, 4000.0, 'KL2 SPD 200')
+    traffic_.cond.atdistcmd(2, 52.0, 5.0, 10.0, 'KL3 SPD 200')
+    traffic_.cond.atspdcmd(2, 200.0, 'KL3 ALT 4000')
+    assert traffic_.cond.ncond == 4
+
+    traffic_.delete(1)
+    assert traffic_.cond.id == ['KL1', 'KL3', 'KL3']
+    assert traffic_.cond.cmd == ['KL1 SPD 200', 'KL3 SPD 200', 'KL3 ALT 4000']
+
+    traffic_.reset()
+    assert traffic_.cond.ncond == 0
+
+
+def test_traffic_adsb(traffic_):
+    """
+    Test the ADS-B model with and without its limitations.
+
+    Expects the broadcast data to be the traffic arrays when there are no
+    limitations, and aircraft with a lost message to keep their old data.
+    """
+    traffic_.reset()
+    traffic_.cre(['KL1', 'KL2', 'KL3'], 'A320', 52.0, 4.0, 90.0, 3000.0, 150.0)
+    traffic_.adsb.update()
+    assert traffic_.adsb.lat is traffic_.lat
+    assert traffic_.adsb.ntraf == 3
+
+    traffic_.setnoise(True)
+    traffic_.adsb.update()
+    assert traffic_.adsb.lat is not traffic_.lat
+    assert all(traffic_.adsb.alt != traffic_.alt)
+    traffic_.setnoise(False)
+
+    assert not traffic_.adsb.setdropout(1, 2.0)[0]
+    traffic_.adsb.setdropout(1, 1.0)
+    traffic_.alt = traffic_.alt + 100.0
+    traffic_.adsb.update()
+    assert list(traffic_.adsb.alt == traffic_.alt) == [True, False, True]
 
 
 # test remaining traffic functions
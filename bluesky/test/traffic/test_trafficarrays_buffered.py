@@ -0,0 +1,129 @@
+"""
+Tests the buffered storage mode of TrafficArrays, and checks that it
+behaves identically to the default (np.append/np.delete) storage.
+"""
+import numpy as np
+import pytest
+from bluesky import settings
+from bluesky.core import TrafficArrays
+from bluesky.core.trafficarrays import MAX_SLICEDELETE
+
+
+class BufChild(TrafficArrays):
+    """ Child with a float and a boolean traffic array. """
+    def __init__(self):
+        super().__init__()
+        with self.settrafarrays():
+            self.flt = np.array([])
+            self.flag = np.array([], dtype=bool)
+
+
+class BufRoot(TrafficArrays):
+    """ Root with int and float traffic arrays, a list, and a child. """
+    def __init__(self):
+        super().__init__()
+        TrafficArrays.setroot(self)
+        self.ntraf = 0
+        with self.settrafarrays():
+            self.ids = []
+            self.num = np.array([], dtype=np.int32)
+            self.val = np.array([])
+            self.child = BufChild()
+
+    def cre(self, n):
+        """ Create n elements, and number them. """
+        self.create(n)
+        self.create_children(n)
+        self.num[-n:] = np.arange(self.ntraf, self.ntraf + n)
+        self.val[-n:] = self.num[-n:] * 0.5
+        self.child.flt[-n:] = self.num[-n:] * 2.0
+        self.child.flag[-n:] = self.num[-n:] % 2 == 0
+        self.ids[-n:] = [str(i) for i in self.num[-n:]]
+        self.ntraf += n
+
+    def delete(self, idx):
+        super().delete(idx)
+        self.ntraf = len(self.num)
+
+
+def churn(buffered):
+    """ Perform a sequence of creates and deletes, and return the state. """
+    settings.trafarray_buffered = buffered
+    root = BufRoot()
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        root.cre(int(rng.integers(1, 20)))
+        # Few deletes are copied slice by slice, many with a mask
+        ndel = int(rng.integers(0, min(2 * MAX_SLICEDELETE, root.ntraf)))
+        if ndel == 1:
+            root.delete(int(rng.integers(0, root.ntraf)))
+        elif ndel > 1:
+            root.delete(np.sort(rng.choice(root.ntraf, ndel, replace=False)))
+        # Replacing an array disconnects it from its buffer
+        root.val = root.val + 0.0
+    return root
+
+
+@pytest.fixture
+def restore_mode():
+    """ Restore the storage mode setting after a test. """
+    mode = settings.trafarray_buffered
+    yield
+    settings.trafarray_buffered = mode
+
+
+def test_buffered_matches_default(restore_mode):
+    """
+    Test that a create/delete churn gives identical results
+    in buffered and default storage mode.
+    """
+    ref = churn(False)
+    res = churn(True)
+    assert res.ids == ref.ids
+    np.testing.assert_array_equal(res.num, ref.num)
+    np.testing.assert_array_equal(res.val, ref.val)
+    np.testing.assert_array_equal(res.child.flt, ref.child.flt)
+    np.testing.assert_array_equal(res.child.flag, ref.child.flag)
+    assert res.child.flag.dtype == bool
+    assert res.num.dtype == np.int32
+
+
+def test_buffered_views(restore_mode):
+    """
+    Test that buffered arrays are views on a buffer with spare capacity,
+    and that external references are not modified by a delete.
+    """
+    settings.trafarray_buffered = True
+    root = BufRoot()
+    root.cre(10)
+    buf = root._ArrBufs['val'][0]
+    assert root.val.base is buf and len(buf) >= 20
+    # Creating more elements within capacity doesn't reallocate
+    root.cre(5)
+    assert root._ArrBufs['val'][0] is buf
+
+    # Delete copies to a new buffer of the same capacity
+    held = root.val
+    root.delete([0, 3, 14])
+    assert root.val.base is root._ArrBufs['val'][0]
+    assert root._ArrBufs['val'][0] is not buf and len(root._ArrBufs['val'][0]) == len(buf)
+    assert root.child.flt.base is root.child._ArrBufs['flt'][0]
+    np.testing.assert_array_equal(root.num, [1, 2, 4, 5, 6, 7, 8, 9, 10,
+                                             11, 12, 13])
+
+    # Arrays and views held elsewhere are left intact by deletes and creates
+    view = root.num[2:]
+    root.delete(-1)
+    root.cre(3)
+    np.testing.assert_array_equal(held, np.arange(15) * 0.5)
+    np.testing.assert_array_equal(view, [4, 5, 6, 7, 8, 9, 10, 11, 12, 13])
+    assert len(root.val) == 14
+
+    # Like np.delete, indices out of range raise an IndexError
+    with pytest.raises(IndexError):
+        root.delete(14)
+    with pytest.raises(IndexError):
+        root.delete([1, 20])
+
+    root.reset()
+    assert len(root.val) == 0 and not root._ArrBufs
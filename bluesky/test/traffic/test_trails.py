@@ -0,0 +1,34 @@
+"""
+Tests the circular trail segment store.
+"""
+import numpy as np
+from bluesky.traffic.trails import TrailSegments
+
+
+def test_segments_eviction():
+    """ Test that the oldest segments are overwritten when the store is full,
+        and that ranges of segments are selected by sequence number. """
+    store = TrailSegments(maxsegments=2500)
+    lat = np.arange(4000.0)
+    for i0 in range(0, 4000, 700):
+        i1 = min(4000, i0 + 700)
+        store.append(lat0=lat[i0:i1], lon0=lat[i0:i1], lat1=lat[i0:i1],
+                     lon1=lat[i0:i1], time=float(i0), colidx=1)
+
+    assert store.capacity == 2500
+    assert store.first == 1500
+    np.testing.assert_array_equal(store.get('lat0'), lat[1500:])
+    np.testing.assert_array_equal(store.get('lat0', 3000, 3500), lat[3000:3500])
+    np.testing.assert_array_equal(store.get('lat0', stop=1000), [])
+    np.testing.assert_array_equal(store.get('time', 3400, 3600), [2800.0] * 100 + [3500.0] * 100)
+    assert np.all(store.get('colidx') == 1)
+
+    # Only the last segments of a too large append are stored
+    store.append(lat0=lat, lon0=lat, lat1=lat, lon1=lat, time=0.0, colidx=0)
+    assert store.nadded == 8000
+    np.testing.assert_array_equal(store.get('lat0'), lat[1500:])
+
+    # Keep a range of segments, which are renumbered
+    assert store.keep(7000, 7500) == 7000
+    assert store.nadded == 500
+    np.testing.assert_array_equal(store.get('lat0'), lat[3000:3500])
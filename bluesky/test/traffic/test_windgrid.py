@@ -0,0 +1,71 @@
+"""
+Tests the gridded high-resolution wind interpolation against the
+per-aircraft dataframe implementation in bluesky.tools.Functions.
+"""
+import numpy as np
+import pandas as pd
+from bluesky.tools import Functions, windgrid
+
+
+def make_table(rng, levels):
+    """
+    Generate a meteo table on a 0.1 degree grid, with the height levels
+    of each column given by levels(lat, lon), in descending order like
+    the database.
+    """
+    rows = []
+    for lat in np.round(np.arange(51.0, 51.55, 0.1), 1):
+        for lon in np.round(np.arange(3.0, 3.45, 0.1), 1):
+            for alt in levels(lat, lon):
+                rows.append((2110010030, 2110010030, lon, lat, alt,
+                             rng.uniform(-20, 20), rng.uniform(-20, 20)))
+    return pd.DataFrame(rows, columns=['timestamp_data', 'timestamp_prediction',
+                                       'lon', 'lat', 'alt', 'uwind', 'vwind'])
+
+
+def test_windgrid_matches_dataframe():
+    """
+    Test that the grid interpolation matches the dataframe implementation
+    when all columns have the same height levels.
+    """
+    rng = np.random.default_rng(1)
+    df = make_table(rng, lambda lat, lon: [30000.0, 20000.0, 10000.0, 3000.0, 1000.0])
+    grid = windgrid.WindGrid.fromdataframe(df)
+
+    n = 50
+    lat = rng.uniform(51.0, 51.5, n)
+    lon = rng.uniform(3.0, 3.4, n)
+    alt = rng.uniform(0.0, 35000.0, n)
+    inside, uwind, vwind = grid.interpolate(lat, lon, alt)
+    assert np.all(inside)
+    for i in range(n):
+        ref = Functions.find_datapoint_timeframe(df, [0, alt[i], lat[i], lon[i]])
+        np.testing.assert_allclose([uwind[i], vwind[i]], ref[4:], atol=1e-4)
+
+
+def test_windgrid_column_levels(tmp_path):
+    """
+    Test interpolation with different height levels per column, positions
+    outside the grid, and loading from a local .npz table file.
+    """
+    rng = np.random.default_rng(2)
+    df = make_table(rng, lambda lat, lon: [10000.0 + 1000.0 * lat, 500.0 * (lon - 2.0)])
+    fname = str(tmp_path / 'meteo.npz')
+    windgrid.savetable(fname, df)
+    grid = windgrid.load(fname, '2110010030')
+
+    # Halfway between the levels of the column at 51.2N 3.1E
+    col = df[(df.lat == 51.2) & (df.lon == 3.1)].sort_values('alt')
+    alt = col.alt.mean()
+    inside, uwind, vwind = grid.interpolate([51.2, 51.2, 50.0], [3.1, 3.1, 3.1],
+                                            [alt, 100.0, alt])
+    np.testing.assert_array_equal(inside, [True, True, False])
+    np.testing.assert_allclose(uwind[0], col.uwind.mean())
+    np.testing.assert_allclose(vwind[0], col.vwind.mean())
+    # Below the lowest level there is no wind, just as outside the grid
+    np.testing.assert_array_equal(uwind[1:], 0.0)
+    np.testing.assert_array_equal(vwind[1:], 0.0)
+
+    # A timestamp without data gives an empty grid
+    inside, _, _ = windgrid.load(fname, '2110010040').interpolate(51.2, 3.1, alt)
+    assert not np.any(inside)
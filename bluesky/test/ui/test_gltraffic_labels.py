@@ -0,0 +1,192 @@
+"""
+Tests that the radar labels, which are built column-wise for all aircraft,
+are identical to the labels built per aircraft with string formatting.
+"""
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from bluesky.tools.aero import ft, kts
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('OpenGL')
+from bluesky.ui.qtgl import gltraffic
+
+
+def leading_zeros(number):
+    """ Reference: number with leading zeros (e.g. 005). """
+    if number < 0:
+        number = 0
+    if number < 10:
+        return '00' + str(round(number))
+    elif number < 100:
+        return '0' + str(round(number))
+    return str(round(number))
+
+
+def baselabel(actdata, data, i):
+    """ Reference: base label of one aircraft. """
+    label = '%-8s' % data.id[i][:8]
+    if actdata.show_lbl == 2:
+        if data.alt[i] <= data.translvl:
+            label += '%-5d' % int(data.alt[i] / ft + 0.5)
+        else:
+            label += 'FL%03d' % int(data.alt[i] / ft / 100. + 0.5)
+        vsarrow = 30 if data.vs[i] > 0.25 else 31 if data.vs[i] < -0.25 else 32
+        label += '%1s  %-8d' % (chr(vsarrow), int(data.cas[i] / kts + 0.5))
+    else:
+        label += 2 * 8 * ' '
+    return label
+
+
+def ssrlabel(actdata, data, i, items):
+    """ Reference: SSR label of one aircraft, with the items in order. """
+    ssrlbl = data.ssrlbl[i].split(';')
+    label = ''
+    for item in items:
+        if item == 'A':
+            show = 'A' in ssrlbl and data.ssr[i] != 0
+            label += '%-7s' % str(data.ssr[i])[:7] if show else 7 * ' '
+        elif item == 'C':
+            if 'C' in ssrlbl:
+                label += '%-3s' % leading_zeros(data.alt[i] / ft / 100)[:3]
+                label += 'A   ' if data.alt[i] < actdata.translvl else 4 * ' '
+            else:
+                label += 7 * ' '
+        else:
+            label += '%-7s' % data.id[i][:7] if 'ACID' in ssrlbl else 7 * ' '
+    return label
+
+
+def applabel(actdata, data, i):
+    """ Reference: approach labels of one aircraft. """
+    label = ''
+    if data.tracklbl[i]:
+        label += '%-8s' % data.id[i][:8]
+        label += '%-3s' % leading_zeros(data.alt[i] / ft / 100)[-3:]
+        label += 'A' if data.alt[i] < actdata.translvl else ' '
+        if data.uco[i] and data.selalt[i] != 0:
+            label += '%-3s' % leading_zeros(data.selalt[i] / ft / 100)[-3:]
+        else:
+            label += 3 * ' '
+        label += ' '
+        label += '%-4s' % str(data.type[i])[:4]
+        if data.uco[i] and data.selhdg[i] != 0:
+            label += '%-3s' % leading_zeros(data.selhdg[i])[:3]
+        elif data.flighttype[i] == 'INBOUND':
+            label += '%-3s' % data.arr[i].replace('ARTIP', 'ATP')[:3]
+        elif data.flighttype[i] == 'OUTBOUND':
+            label += '%-3s' % data.sid[i][:3]
+        else:
+            label += 3 * ' '
+        label += ' '
+        label += '%-3s' % leading_zeros(data.gs[i] / kts)[:3]
+        label += str(data.wtc[i])[:1] if data.wtc[i].upper() in 'HJABCDEF' and \
+            len(data.wtc[i]) == 1 else ' '
+        if data.uco[i] and data.selspd[i] != 0:
+            label += '%-3s' % leading_zeros(data.selspd[i] / kts)[:3]
+        else:
+            label += 'SPD'
+        label += ' '
+    else:
+        label += 8 * 4 * ' '
+
+    if data.mlbl[i]:
+        mlabel = '  ' + chr(30) if data.flighttype[i].upper() == 'OUTBOUND' else \
+            '%-3s' % data.rwy[i][:3]
+    else:
+        mlabel = 3 * ' '
+    return label, mlabel, ssrlabel(actdata, data, i, ('A', 'C', 'ACID'))
+
+
+def acclabel(actdata, data, i):
+    """ Reference: area control labels of one aircraft. """
+    label = ''
+    if data.tracklbl[i]:
+        label += '%-8s' % data.id[i][:8]
+        label += '%-3s' % leading_zeros(data.alt[i] / ft / 100)[-3:]
+        label += 'A' if data.alt[i] < actdata.translvl else ' '
+        if data.uco[i] and data.selalt[i] != 0:
+            label += '%-3s' % leading_zeros(data.selalt[i] / ft / 100)[-3:]
+        else:
+            label += 3 * ' '
+        label += ' ... '
+        label += '%-3s' % leading_zeros(data.gs[i] / kts)[:3]
+        label += str(data.wtc[i])[:1] if data.wtc[i].upper() in ('H', 'J') else ' '
+        if data.uco[i] and data.selspd[i] != 0:
+            label += 'I' + '%-3s' % leading_zeros(data.selspd[i] / kts)[:3]
+        else:
+            label += 4 * ' '
+        label += '%-4s' % data.type[i][:4]
+    else:
+        label += 8 * 4 * ' '
+
+    mlabel = '  ' + chr(31) if data.mlbl[i] and data.flighttype[i].upper() == 'INBOUND' \
+        else 3 * ' '
+    return label, mlabel, ssrlabel(actdata, data, i, ('ACID', 'A', 'C'))
+
+
+def twrlabel(actdata, data, i):
+    """ Reference: tower labels of one aircraft. """
+    label = '%-8s' % data.id[i][:8]
+    if actdata.show_lbl == 2:
+        if data.flighttype[i] == 'INBOUND':
+            label += 8 * ' '
+        else:
+            label += '%-5s' % data.sid[i][:5] + ' ' + '%-2s' % data.rwy[i][-2:]
+        label += '%-8s' % data.type[i][:8]
+        label += 8 * ' '
+    else:
+        label += 8 * 4 * ' '
+    return label, 3 * ' ', 7 * 3 * ' '
+
+
+def random_data(n, rng):
+    """ Aircraft data with edge cases: altitudes from negative to above
+        FL1000, rounding to 10 or 100, and non-ASCII callsigns. """
+    alt = rng.choice([rng.uniform(-500., 40000., n), np.round(rng.uniform(-5., 1200., n)) * 100.,
+                      rng.uniform(95000., 150000., n), rng.uniform(-3000., 0., n)]) * ft
+    names = ['KL204', 'AF1234', 'XYZABCDEFG', 'ÄÖÜ123', 'A', '']
+    return SimpleNamespace(
+        id=[names[i % len(names)] + str(i) for i in range(n)],
+        alt=alt.tolist(), translvl=5000. * ft,
+        vs=rng.choice([-1., 0., 0.25, 1.], n).tolist(),
+        cas=(rng.choice([0., 99.5, 250.4, 1e5], n) * kts).tolist(),
+        gs=(rng.choice([-5., 9.5, 99.5, 99.4, 250., 1234.], n) * kts).tolist(),
+        selalt=(rng.choice([0., 3000., 95000., 123456.], n) * ft).tolist(),
+        selhdg=rng.choice([0., 5., 45.5, 359.6], n).tolist(),
+        selspd=(rng.choice([0., 9.6, 180., 2000.], n) * kts).tolist(),
+        uco=(rng.random(n) > 0.3).tolist(),
+        tracklbl=(rng.random(n) > 0.2).tolist(),
+        mlbl=(rng.random(n) > 0.3).tolist(),
+        type=rng.choice(['B744', 'A320', 'C172XX', 'E'], n).tolist(),
+        wtc=rng.choice(['H', 'j', 'M', 'L', 'B', 'HJ', ''], n).tolist(),
+        flighttype=rng.choice(['INBOUND', 'OUTBOUND', 'outbound', 'inbound', ''], n).tolist(),
+        arr=rng.choice(['ARTIP', 'SUGOL', 'RI'], n).tolist(),
+        sid=rng.choice(['ANDIK1E', 'LEK', ''], n).tolist(),
+        rwy=rng.choice(['18R', '06', '9', ''], n).tolist(),
+        ssr=rng.choice([0, 1234, 7700, 12345678, -5], n).tolist(),
+        ssrlbl=rng.choice(['A;C;ACID', 'C', 'ACID;A', ''], n).tolist())
+
+
+@pytest.mark.parametrize('atcmode', ['BLUESKY', 'APP', 'ACC', 'TWR'])
+@pytest.mark.parametrize('show_lbl', [1, 2])
+def test_labels(atcmode, show_lbl):
+    """ Test that the label buffers are identical to the reference labels. """
+    rng = np.random.default_rng(1)
+    n = 500
+    data = random_data(n, rng)
+    actdata = SimpleNamespace(show_lbl=show_lbl, translvl=data.translvl, atcmode=atcmode)
+
+    if atcmode == 'BLUESKY':
+        ref = ''.join(baselabel(actdata, data, i) for i in range(n))
+        label = gltraffic.baselabels(actdata, data, n)
+        assert gltraffic.lblbuffer(label).tobytes() == ref.encode('utf8')
+        return
+
+    labelfun = dict(APP=applabel, ACC=acclabel, TWR=twrlabel)[atcmode]
+    labelsfun = dict(APP=gltraffic.applabels, ACC=gltraffic.acclabels,
+                     TWR=gltraffic.twrlabels)[atcmode]
+    ref = [labelfun(actdata, data, i) for i in range(n)]
+    for k, label in enumerate(labelsfun(actdata, data, n)):
+        assert gltraffic.lblbuffer(label).tobytes() == \
+            ''.join(r[k] for r in ref).encode('utf8')
@@ -64,6 +64,8 @@ def casmachthr(threshold:float=None):
 #   p = vpressure(h)       # calls atmos but retruns only pressure [Pa]
 #   T = vtemperature(h)    # calculates temperature [K] (saves time rel to atmos)
 #   rho = vdensity(h)      # calls atmos but retruns only pressure [Pa]
+#   atm = AtmosState(h)    # p, rho, T, a and p/p0 at once, can be passed
+#                          # instead of h to all vectorized functions below
 #
 #  Speed conversion at altitude h[m] in ISA:
 #
@@ -93,6 +95,9 @@ def vatmos(h):
         - rho: Density [kg / m3]
         - T: Temperature [K]
     """
+    if isinstance(h, AtmosState):
+        return h.p, h.rho, h.T
+
     # Temp
     T = vtemp(h)
 
@@ -116,6 +121,8 @@ def vtemp(h):
         Returns:
         - T: Temperature [K]
     """
+    if isinstance(h, AtmosState):
+        return h.T
     T = np.maximum(288.15 - 0.0065 * h, Tstrat)
     return T
 
@@ -156,11 +163,50 @@ def vvsound(h):
         Returns:
         - a: Speed of sound [m/s]
     """
+    if isinstance(h, AtmosState):
+        return h.a
     T = vtemp(h)
     a = np.sqrt(gamma * R * T)
     return a
 
 
+class AtmosState:
+    """ Atmospheric state at a set of altitudes.
+
+        An AtmosState can be passed instead of the altitude to all vectorized
+        functions in this module, which then use the stored state instead of
+        recomputing temperature, density, and pressure.
+
+        Arguments:
+        - h: Altitude [m]
+
+        Attributes:
+        - h: Altitude [m]
+        - p: Pressure [Pa]
+        - rho: Density [kg / m3]
+        - T: Temperature [K]
+        - a: Speed of sound [m/s]
+        - delta: Pressure ratio p / p0 [-]
+    """
+    __slots__ = ('h', 'p', 'rho', 'T', 'a', 'delta')
+
+    def __init__(self, h):
+        self.h = h
+        self.p, self.rho, self.T = vatmos(h)
+        self.a = np.sqrt(gamma * R * self.T)
+        self.delta = self.p / p0
+
+    def __len__(self):
+        return np.size(self.h)
+
+    def __getitem__(self, idx):
+        """ Return the atmospheric state of a selection of the altitudes. """
+        state = AtmosState.__new__(AtmosState)
+        for name in AtmosState.__slots__:
+            setattr(state, name, getattr(self, name)[idx])
+        return state
+
+
 # ---------Speed conversions---h in [m]------------------
 def vtas2mach(tas, h):
     """ True airspeed (tas) to mach number conversion for numpy arrays.
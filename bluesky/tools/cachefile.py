@@ -1,3 +1,4 @@
+import os
 from os import path
 import pickle
 
@@ -11,6 +12,18 @@ def openfile(*args):
     return CacheFile(*args)
 
 
+def filestamp(fname):
+    ''' Modification time and size of a file, to check if it has changed. '''
+    stat = os.stat(fname)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def filestamps(fnames):
+    ''' Names and stamps of a list of source files, to use in the version
+        reference of a cache that is invalidated when a source changes. '''
+    return tuple((fname, filestamp(fname)) for fname in fnames)
+
+
 class CacheError(Exception):
     ''' Exception class for CacheFile errors. '''
     pass
@@ -47,6 +60,10 @@ class CacheFile():
 
     def dump(self, var):
         ''' Dump a variable to the cache file. '''
+        if self.file is not None and self.file.mode == 'rb':
+            # An outdated or invalid cache file was read: replace it
+            self.file.close()
+            self.file = None
         if self.file is None:
             self.file = open(self.fname, 'wb')
             pickle.dump(self.version_ref, self.file, pickle.HIGHEST_PROTOCOL)
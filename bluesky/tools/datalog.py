@@ -2,8 +2,11 @@
 
 # ToDo: Add description in comments
 
+import os
 import numbers
 import itertools
+import queue
+import threading
 from datetime import datetime
 import numpy as np
 from bluesky import settings, stack
@@ -12,7 +15,7 @@ import bluesky as bs
 from bluesky.stack import command
 
 # Register settings defaults
-settings.set_variable_defaults(log_path='output')
+settings.set_variable_defaults(log_path='output', log_binbatch=50000)
 
 logprecision = '%.8f'
 
@@ -67,12 +70,12 @@ def reset():
         log.reset()
 
 
-def makeLogfileName(logname, prefix: str = ''):
+def makeLogfileName(logname, prefix: str = '', ext: str = '.log'):
     timestamp = datetime.now().strftime('%Y%m%d_%H-%M-%S')
     if prefix == '' or prefix.lower() == stack.get_scenname().lower():
-        fname = "%s_%s_%s.log" % (logname, stack.get_scenname(), timestamp)
+        fname = "%s_%s_%s%s" % (logname, stack.get_scenname(), timestamp, ext)
     else:
-        fname = "%s_%s_%s_%s.log" % (logname, stack.get_scenname(), prefix, timestamp)
+        fname = "%s_%s_%s_%s%s" % (logname, stack.get_scenname(), prefix, timestamp, ext)
     return settings.log_path + '/' + fname
 
 
@@ -98,6 +101,105 @@ def col2txt(col, nrows):
         yield nrows * [col]
 
 
+def writecsvheader(file, header, columns):
+    """ Write the header lines and column names of a CSV log. """
+    for line in header:
+        file.write(bytearray('# ' + line + '\n', 'ascii'))
+    file.write(bytearray('# ' + str.join(', ', columns) + '\n', 'ascii'))
+
+
+def writecsvrows(file, varlist, nrows):
+    """ Write the rows of one set of logged variables to a CSV log. """
+    # Convert (numeric) arrays to text, leave text arrays untouched
+    txtdata = [txtcol for col in varlist for txtcol in col2txt(col, nrows)]
+    np.savetxt(file, np.vstack(txtdata).T, delimiter=',', newline='\n', fmt='%s')
+
+
+# Binary logs are a sequence of .npy records: an array with the header lines,
+# an array with the column names, and then for each chunk an array with the
+# number of rows and columns, followed by the column arrays.
+def writebinchunks(file, batch):
+    """ Write a batch of logged data, a list of (nrows, varlist) tuples,
+        to a binary log. Consecutive entries with the same columns are
+        concatenated into one chunk. """
+    def signature(varlist):
+        return tuple(np.shape(v)[1:] if isinstance(v, np.ndarray) else None
+                     for v in varlist)
+
+    while batch:
+        sig = signature(batch[0][1])
+        n = 1
+        while n < len(batch) and signature(batch[n][1]) == sig:
+            n += 1
+        entries, batch = batch[:n], batch[n:]
+        nrows = sum(entry[0] for entry in entries)
+        np.lib.format.write_array(file, np.array([nrows, len(sig)]))
+        for i, shape in enumerate(sig):
+            if shape is None:
+                # Scalars (like simt) are repeated for each row
+                col = np.concatenate([np.full(nrows, varlist[i]) for nrows, varlist in entries])
+            else:
+                col = np.concatenate([varlist[i] for _, varlist in entries])
+            np.lib.format.write_array(file, col, allow_pickle=False)
+    file.flush()
+
+
+def readbin(fname):
+    """ Read a binary log. Returns the header lines, the column names, and
+        a list of chunks, each a list of column arrays. """
+    with open(fname, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        header = np.lib.format.read_array(file).tolist()
+        columns = np.lib.format.read_array(file).tolist()
+        chunks = []
+        while file.tell() < size:
+            _, ncols = np.lib.format.read_array(file)
+            chunks.append([np.lib.format.read_array(file) for _ in range(ncols)])
+    return header, columns, chunks
+
+
+def bin2csv(fname, csvname=None):
+    """ Convert a binary log to the CSV log layout. When no csvname is
+        given, the extension of fname is replaced by .log. """
+    header, columns, chunks = readbin(fname)
+    csvname = csvname or os.path.splitext(fname)[0] + '.log'
+    with open(csvname, 'wb') as file:
+        writecsvheader(file, header, columns)
+        for chunk in chunks:
+            nrows = len(chunk[0]) if chunk else 0
+            if nrows:
+                writecsvrows(file, chunk, nrows)
+    return csvname
+
+
+class BinWriter(threading.Thread):
+    """ Background thread that writes batches of logged data to a binary log.
+        When writing fails, the error is stored, and reported by the logger. """
+    def __init__(self, file):
+        super().__init__(daemon=True)
+        self.file = file
+        self.error = None
+        self.batches = queue.Queue()
+        self.start()
+
+    def run(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                break
+            if self.error is None:
+                try:
+                    writebinchunks(self.file, batch)
+                except Exception as e:
+                    self.error = e
+
+    def close(self):
+        """ Write all remaining batches, stop the thread and close the file. """
+        self.batches.put(None)
+        self.join()
+        self.file.close()
+
+
 class CSVLogger:
     def __init__(self, name, dt, header):
         self.name = name
@@ -112,9 +214,17 @@ class CSVLogger:
         self.dt = dt
         self.default_dt = dt
 
+        # Log file format (CSV or BIN). Binary logs are written in batches
+        # by a background writer thread
+        self.fmt = 'CSV'
+        self.default_fmt = 'CSV'
+        self.writer = None
+        self.batch = []
+        self.batchrows = 0
+
         # Register a command for this logger in the stack
         stackcmd = {name: [
-            name + ' ON/OFF,[dt] or ADD [FROM parent] var1,...,varn',
+            name + ' ON/OFF,[dt],[FORMAT=CSV/BIN] or ADD [FROM parent] var1,...,varn',
             '[txt,float/word,...]', self.stackio, name + " data logging on"]
         }
         stack.append_commands(stackcmd)
@@ -150,18 +260,36 @@ class CSVLogger:
         return True
 
     def open(self, fname):
-        if self.file:
-            self.file.close()
+        self.close()
         self.file = open(fname, 'wb')
-        # Write the header
-        for line in self.header:
-            self.file.write(bytearray('# ' + line + '\n', 'ascii'))
-        # Write the column contents
         columns = ['simt']
         for v in self.selvars:
             columns.append(v.varname)
-        self.file.write(
-            bytearray('# ' + str.join(', ', columns) + '\n', 'ascii'))
+        if self.fmt == 'BIN':
+            np.lib.format.write_array(self.file, np.array(self.header))
+            np.lib.format.write_array(self.file, np.array(columns))
+            self.writer = BinWriter(self.file)
+        else:
+            writecsvheader(self.file, self.header, columns)
+
+    def flush(self):
+        """ Hand the current batch of a binary log to the writer thread. """
+        if self.batch:
+            self.writer.batches.put(self.batch)
+            self.batch = []
+            self.batchrows = 0
+
+    def close(self):
+        if self.writer:
+            self.flush()
+            # Closing the writer also closes the file
+            self.writer.close()
+            error, self.writer = self.writer.error, None
+            if error:
+                bs.scr.echo(f'{self.name}: writing {self.fname} failed ({error}), logging stopped')
+        elif self.file:
+            self.file.close()
+        self.file = None
 
     def isopen(self):
         return self.file is not None
@@ -184,27 +312,33 @@ class CSVLogger:
                     break
             if nrows == 0:
                 return
-            # Convert (numeric) arrays to text, leave text arrays untouched
-            txtdata = [
-                txtcol for col in varlist for txtcol in col2txt(col, nrows)]
-
-            # log the data to file
-            np.savetxt(self.file, np.vstack(txtdata).T,
-                       delimiter=',', newline='\n', fmt='%s')
+            if self.writer:
+                if self.writer.error:
+                    # Writing failed in the writer thread: stop this log
+                    self.close()
+                    return
+                # Store copies of the arrays, as they can change in-place
+                self.batch.append((nrows, [np.array(v) if isinstance(v, (list, np.ndarray))
+                                           else v for v in varlist]))
+                self.batchrows += nrows
+                if self.batchrows >= settings.log_binbatch:
+                    self.flush()
+            else:
+                writecsvrows(self.file, varlist, nrows)
 
     def start(self, prefix: str = ''):
         """ Start this logger. """
         self.tlog = bs.sim.simt
-        self.fname = makeLogfileName(self.name, prefix)
+        self.fname = makeLogfileName(self.name, prefix,
+                                     '.bin' if self.fmt == 'BIN' else '.log')
         self.open(self.fname)
 
     def reset(self):
         self.dt = self.default_dt
+        self.fmt = self.default_fmt
         self.tlog = 0.0
         self.fname = None
-        if self.file:
-            self.file.close()
-            self.file = None
+        self.close()
 
     def listallvarnames(self):
         return str.join(', ', (v.varname for v in self.selvars))
@@ -220,15 +354,21 @@ class CSVLogger:
             text += 'with variables: ' + self.listallvarnames() + '\n'
             text += self.name + ' is ' + ('ON' if self.isopen() else 'OFF') + \
                 '\nUsage: ' + self.name + \
-                ' ON/OFF,[dt] or ADD [FROM parent] var1,...,varn'
+                ' ON/OFF,[dt],[FORMAT=CSV/BIN] or ADD [FROM parent] var1,...,varn'
             return True, text
             # TODO: add list of logging vars
         elif args[0] == 'ON':
-            if len(args) > 1:
-                if isinstance(args[1], float):
-                    self.dt = args[1]
+            # The format applies to this log only: without FORMAT, ON always
+            # gives a log in the default format
+            self.fmt = self.default_fmt
+            for arg in args[1:]:
+                if isinstance(arg, float):
+                    self.dt = arg
+                elif arg.upper() in ('FORMAT=CSV', 'FORMAT=BIN'):
+                    self.fmt = arg.upper()[7:]
                 else:
-                    return False, 'Turn ' + self.name + ' on with optional dt'
+                    return False, 'Turn ' + self.name + \
+                        ' on with optional dt and FORMAT=CSV/BIN'
             self.start()
 
         elif args[0] == 'OFF':
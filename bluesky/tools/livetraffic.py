@@ -165,35 +165,14 @@ class OpenSkySource:
             data.drop(data[(data['baro_altitude'] <= 50.) | (data['baro_altitude'] >= 7467.6)].index, inplace=True)
 
             # Get aircraft data
-            acid           = data['callsign'].str.strip()
-            data['actype'] = [self.actypes.get(str(icao24), 'B738') for icao24 in data['icao24']]
-            actype         = data['actype']
-            aclat          = data['lat'].astype(str)
-            aclon          = data['lon'].astype(str)
-            achdg          = data['true_track'].astype(str)
-            acalt          = (data['baro_altitude']/aero.ft).astype(str)
-            data['cas']    = aero.vtas2cas(data['velocity'], data['baro_altitude'])/aero.kts  # Assume GS = TAS
-            acspd          = data['cas'].astype(str)
-
-            # Get commands
-            # Create
-            cmds  += list("CRE "+acid+", "+actype+", "+aclat+" "+aclon+" "+achdg+" "+acalt+" "+acspd)
-            cmdst += [0.]*len(data)
-
-            # Data feed
-            cmds  += list("SETDATAFEED "+acid+", OPENSKY")
-            cmdst += [0.01]*len(data)
-
-            # SSR Code
-            ssrdata = data.dropna(subset=['squawk'])
-            cmds   += list("SSRCODE "+ssrdata['callsign']+", "+ssrdata['squawk'])
-            cmdst  += [0.01]*len(ssrdata)
-
-            # Sort
-            cmds_df = pd.DataFrame({'COMMAND': cmds, 'TIME': cmdst})
-            cmds_df = cmds_df.sort_values(by=['TIME'])
-            cmds    = list(cmds_df['COMMAND'])
-            cmdst   = list(cmds_df['TIME'])
+            acid   = data['callsign'].str.strip()
+            actype = [self.actypes.get(str(icao24), 'B738') for icao24 in data['icao24']]
+            cas    = aero.vtas2cas(data['velocity'], data['baro_altitude'])  # Assume GS = TAS
+            ssr    = data['squawk'].astype(float)
+
+            # Create the aircraft, with data feed and SSR code
+            bs.traf.crebatch(acid, actype, data['lat'], data['lon'], data['true_track'],
+                             data['baro_altitude'], cas, source=['OPENSKY']*len(data), ssr=ssr)
 
         else:
             bs.scr.echo("LIVE: Initializing live traffic failed. Reset and try again.")
@@ -292,24 +271,14 @@ class OpenSkySource:
         alt    = np.array(data['baro_altitude'])
         gs     = np.array(data['velocity'])
 
-        # Loop over new aircraft
-        for i in inew:
-            # Aircraft data
-            acid   = ids[i]
-            actype = self.actypes.get(icao24[i], 'B738')
-            aclat  = str(lat[i])
-            aclon  = str(lon[i])
-            achdg  = str(hdg[i])
-            acalt  = str(alt[i]/aero.ft)
-            acspd  = str(aero.tas2cas(gs[i], alt[i])/aero.kts)  # Assume GS = TAS
-
-            # Create commands
-            cmds.append("CRE "+acid+", "+actype+", "+aclat+", "+aclon+", "+achdg+", "+acalt+", "+acspd)
-            cmds.append("SETDATAFEED "+acid+" OPENSKY")
-
-            # Remove aircraft from track data
-            idrop = data.index[data['callsign'] == acid]
-            data.drop(idrop, inplace=True)
+        # Create the new aircraft, with data feed
+        actype = [self.actypes.get(icao24[i], 'B738') for i in inew]
+        cas    = aero.vtas2cas(gs[inew], alt[inew])  # Assume GS = TAS
+        bs.traf.crebatch([ids[i] for i in inew], actype, lat[inew], lon[inew], hdg[inew], alt[inew], cas,
+                         source=['OPENSKY']*len(inew))
+
+        # Remove aircraft from track data
+        data = data.loc[~data['callsign'].isin(new_ids)]
 
         return cmds, data
 
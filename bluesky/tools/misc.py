@@ -450,10 +450,23 @@ def get_indices(arr, items):
     Date: 1-12-2021
     """
 
+    if isinstance(items, str):
+        items = [items] if items else []
+    elif isinstance(items, (int, float)):
+        items = [items]
     if len(items) == 0 or len(arr) == 0:
-        i = np.array([]).astype(int)
-    elif isinstance(items, (str, int, float)):
-        i = np.nonzero(np.array([items])[:, None] == arr)[1].astype(int)
-    else:
-        i = np.nonzero(np.array(items)[:, None] == arr)[1].astype(int)
-    return i
+        return np.array([], dtype=int)
+
+    # Aircraft ids: use the id index maintained by traffic
+    if bs.traf is not None and arr is bs.traf.id:
+        i = np.fromiter((bs.traf.idmap.get(item, -1) for item in items), dtype=int, count=len(items))
+        return i[i >= 0]
+
+    # Other arrays: find all occurrences of each item in a sorted copy of arr
+    arr = np.asarray(arr)
+    sorter = np.argsort(arr, kind='stable')
+    items = np.asarray(items)
+    lo = np.searchsorted(arr, items, 'left', sorter=sorter)
+    cnt = np.searchsorted(arr, items, 'right', sorter=sorter) - lo
+    offsets = np.arange(np.sum(cnt)) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+    return sorter[np.repeat(lo, cnt) + offsets]
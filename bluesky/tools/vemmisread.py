@@ -36,6 +36,7 @@ class VEMMISRead:
             get_simtime():      Determine the simulation time and optionally apply the fixed update rate
             get_datetime():     Get the date and time for the simulation
             get_initial():      Get the initial commands
+            stage_creation():   Stage the creation of the flights for CREBATCH commands
             get_trackdata():    Get the track data for the simulation
 
     Created by: Bob van Dillen
@@ -419,22 +420,20 @@ class VEMMISRead:
 
         # Flight data
         acid         = self.flightdata['CALLSIGN']
-        actype       = self.flightdata['ICAO_ACTYPE']
-        aclat        = self.flightdata['LATITUDE'].astype(str)
-        aclon        = self.flightdata['LONGITUDE'].astype(str)
-        achdg        = self.flightdata['HEADING'].astype(str)
-        acalt        = self.flightdata['ALTITUDE'].astype(str)
-        acspd        = self.flightdata['CAS'].astype(str)
         acorig       = self.flightdata['ADEP']
         acdest       = self.flightdata['DEST']
         acflighttype = self.flightdata['FLIGHT_TYPE']
         acwtc        = self.flightdata['WTC']
-        acssr        = self.flightdata['SSR'].astype(str)
+
+        # Data feed source (flights that need to be simulated have none)
+        source = pd.Series('VEMMIS' if swdatafeed else '', index=self.flightdata.index)
+        source[acflighttype.isin(typesim)] = ''
 
         # Commands
-        # Create
-        cmds  += list("CRE "+acid+", "+actype+", " + aclat+", "+aclon+", "+achdg+", "+acalt+", "+acspd)
-        cmdst += list(self.flightdata['SIM_START'])
+        # Create (with data feed and SSR code)
+        crecmds, crecmdst = self.stage_creation(self.flightdata, source)
+        cmds  += crecmds
+        cmdst += crecmdst
 
         # Origin
         cmds  += list("ORIG "+acid+", "+acorig)
@@ -452,10 +451,6 @@ class VEMMISRead:
         cmds  += list("WTC "+acid+", "+acwtc)
         cmdst += list(self.flightdata['SIM_START'] + 0.01)
 
-        # SSR Code
-        cmds  += list("SSRCODE "+acid+", "+acssr)
-        cmdst += list(self.flightdata['SIM_START'] + 0.01)
-
         # SID
         outbound = self.flightdata.dropna(subset=['SID'])
         cmds    += list("SID "+outbound['CALLSIGN']+", "+outbound['SID']+", OFF")
@@ -483,10 +478,6 @@ class VEMMISRead:
                 datafeed = datafeed.loc[datafeed['FLIGHT_TYPE'] != 'REGIONAL']
 
             # Create commands for data feed flights
-            # Set data feed
-            cmds        += list("SETDATAFEED "+datafeed['CALLSIGN']+", VEMMIS")
-            cmdst       += list(datafeed['SIM_START'] + 0.01)
-
             # Delete
             cmds   += list("DEL "+datafeed['CALLSIGN'])
             cmdst  += list(datafeed['SIM_END'])
@@ -520,22 +511,20 @@ class VEMMISRead:
         # Flight data
         self.flightdata = self.flightdata.loc[self.flightdata['RUNWAY_OUT'] != '36L']  # No 36L departure
         acid         = self.flightdata['CALLSIGN']
-        actype       = self.flightdata['ICAO_ACTYPE']
-        aclat        = self.flightdata['LATITUDE'].astype(str)
-        aclon        = self.flightdata['LONGITUDE'].astype(str)
-        achdg        = self.flightdata['HEADING'].astype(str)
-        acalt        = self.flightdata['ALTITUDE'].astype(str)
-        acspd        = self.flightdata['CAS'].astype(str)
         acorig       = self.flightdata['ADEP']
         acdest       = self.flightdata['DEST']
         acflighttype = self.flightdata['FLIGHT_TYPE']
         acwtc        = self.flightdata['WTC']
-        acssr        = self.flightdata['SSR'].astype(str)
+
+        # Data feed source (inbound flights are simulated)
+        source = pd.Series('VEMMIS', index=self.flightdata.index)
+        source[acflighttype == 'INBOUND'] = ''
 
         # Commands
-        # Create
-        cmds  += list("CRE "+acid+", "+actype+", "+aclat+", "+aclon+", "+achdg+", "+acalt+", "+acspd)
-        cmdst += list(self.flightdata['SIM_START'])
+        # Create (with data feed and SSR code)
+        crecmds, crecmdst = self.stage_creation(self.flightdata, source)
+        cmds  += crecmds
+        cmdst += crecmdst
 
         # Origin
         cmds  += list("ORIG "+acid+", "+acorig)
@@ -553,10 +542,6 @@ class VEMMISRead:
         cmds  += list("WTC "+acid+", "+acwtc)
         cmdst += list(self.flightdata['SIM_START'] + 0.01)
 
-        # SSR Code
-        cmds  += list("SSRCODE "+acid+", "+acssr)
-        cmdst += list(self.flightdata['SIM_START'] + 0.01)
-
         # SID
         outbound = self.flightdata.dropna(subset=['SID'])
         cmds    += list("SID "+outbound['CALLSIGN']+", "+outbound['SID']+", OFF")
@@ -619,9 +604,6 @@ class VEMMISRead:
         cmdst  += list(inother['SIM_START'] + 0.01)
 
         # Data feed dependent commands
-        cmds  += list("SETDATAFEED "+other['CALLSIGN']+", VEMMIS")
-        cmdst += list(other['SIM_START'] + 0.01)
-
         # Track label
         cmds  += list("TRACKLABEL "+other['CALLSIGN']+", OFF")
         cmdst += list(other['SIM_START'] + 0.01)
@@ -646,6 +628,31 @@ class VEMMISRead:
 
         return cmds, cmdst
 
+    @staticmethod
+    def stage_creation(flightdata, source):
+        """
+        Function: Stage the creation of the flights, in one batch per start time
+        Args:
+            flightdata:     flight data [DataFrame]
+            source:         data feed source of the flights, '' if simulated [Series]
+        Returns:
+            cmds:           CREBATCH commands [list]
+            cmdst:          simulation time of the CREBATCH commands [list]
+        """
+
+        cmds = []
+        cmdst = []
+        for simstart, flights in flightdata.groupby('SIM_START'):
+            name = bs.traf.stagebatch(flights['CALLSIGN'].tolist(), flights['ICAO_ACTYPE'].tolist(),
+                                      flights['LATITUDE'].to_numpy(), flights['LONGITUDE'].to_numpy(),
+                                      flights['HEADING'].to_numpy(), flights['ALTITUDE'].to_numpy()*ft,
+                                      flights['CAS'].to_numpy()*kts, source=source[flights.index].tolist(),
+                                      ssr=flights['SSR'].to_numpy())
+            cmds.append("CREBATCH "+name)
+            cmdst.append(simstart)
+
+        return cmds, cmdst
+
     def get_trackdata(self):
         """
         Function: Get the track data for the simulation
@@ -0,0 +1,161 @@
+''' High-resolution wind snapshots on a regular lat/lon grid.
+
+    A snapshot is one timestamp_data of the high-resolution meteo table
+    (columns timestamp_data, timestamp_prediction, lon, lat, alt, uwind, vwind),
+    loaded from the Postgres database, or from a local .npz file with the
+    same columns. The height levels of the data differ per lat/lon column,
+    so each grid column stores its own sorted list of levels. '''
+import numpy as np
+
+from bluesky.tools import Functions
+
+
+def load(source, timestamp):
+    ''' Load the wind snapshot of timestamp_data 'timestamp' from source,
+        which is either a .npz file, or the name of a database (and table). '''
+    if source.lower().endswith('.npz'):
+        return WindGrid.fromfile(source, timestamp)
+    return WindGrid.fromdatabase(source, timestamp)
+
+
+def savetable(fname, df):
+    ''' Save a meteo table (e.g., queried from the database) to a .npz file
+        that can be used as local wind source. '''
+    np.savez_compressed(fname, **{col: df[col].to_numpy() for col in
+                                  ('timestamp_data', 'lon', 'lat', 'alt', 'uwind', 'vwind')})
+
+
+class WindGrid:
+    ''' Wind snapshot on a regular lat/lon grid with per-column altitude levels.
+
+        Arguments:
+        - lat, lon: position of each datapoint [deg]
+        - alt: altitude of each datapoint [ft]
+        - uwind, vwind: wind components of each datapoint '''
+    def __init__(self, lat, lon, alt, uwind, vwind):
+        lat, lon, alt, uwind, vwind = (np.asarray(arr, dtype=float)
+                                       for arr in (lat, lon, alt, uwind, vwind))
+        self.lat0, self.dlat, self.nlat, ilat = self.axis(lat)
+        self.lon0, self.dlon, self.nlon, ilon = self.axis(lon)
+
+        # Sort datapoints per column, and by altitude within each column
+        col = ilat * self.nlon + ilon
+        order = np.lexsort((alt, col))
+        col = col[order]
+        ncol = self.nlat * self.nlon
+        self.nlevels = np.bincount(col, minlength=ncol)
+        nlev = max(1, np.max(self.nlevels, initial=0))
+        lev = np.arange(len(col)) - (np.cumsum(self.nlevels) - self.nlevels)[col]
+
+        # Unused levels are padded with inf, which keeps the levels sorted
+        self.alt = np.full((ncol, nlev), np.inf)
+        self.uwind = np.zeros((ncol, nlev))
+        self.vwind = np.zeros((ncol, nlev))
+        self.alt[col, lev] = alt[order]
+        self.uwind[col, lev] = uwind[order]
+        self.vwind[col, lev] = vwind[order]
+
+    @staticmethod
+    def axis(values):
+        ''' Determine origin, spacing, size and datapoint indices of a grid axis. '''
+        if len(values) == 0:
+            return 0.0, 1.0, 0, np.array([], dtype=int)
+        unique = np.unique(np.round(values, 6))
+        origin = unique[0]
+        spacing = np.min(np.diff(unique)) if len(unique) > 1 else 1.0
+        idx = np.round((values - origin) / spacing).astype(int)
+        return origin, spacing, int(np.max(idx)) + 1, idx
+
+    @classmethod
+    def fromdataframe(cls, df):
+        ''' Create a wind grid from a meteo table dataframe. '''
+        return cls(df['lat'].to_numpy(), df['lon'].to_numpy(), df['alt'].to_numpy(),
+                   df['uwind'].to_numpy(), df['vwind'].to_numpy())
+
+    @classmethod
+    def fromdatabase(cls, dbname, timestamp):
+        ''' Create a wind grid from a timestamp in the meteo database. '''
+        df = Functions.query_DB_to_DF(dbname, "SELECT * FROM " + dbname +
+                                      " WHERE timestamp_data = " + str(timestamp))
+        return cls.fromdataframe(df)
+
+    @classmethod
+    def fromfile(cls, fname, timestamp):
+        ''' Create a wind grid from a timestamp in a .npz meteo table file. '''
+        with np.load(fname) as data:
+            sel = data['timestamp_data'] == int(timestamp)
+            return cls(data['lat'][sel], data['lon'][sel], data['alt'][sel],
+                       data['uwind'][sel], data['vwind'][sel])
+
+    def interpolate(self, lat, lon, alt):
+        ''' Interpolate the wind at the given positions, linearly in altitude
+            within each of the four surrounding grid columns, and bilinearly
+            between the columns.
+
+            Arguments:
+            - lat, lon: position [deg]
+            - alt: altitude [ft]
+
+            Returns:
+            - inside: True for positions within the lat/lon extent of the grid
+            - uwind, vwind: interpolated wind. Zero inside the grid when
+              below the lowest level of one of the surrounding columns. '''
+        lat, lon, alt = np.atleast_1d(lat, lon, alt)
+        uwind = np.zeros(len(lat))
+        vwind = np.zeros(len(lat))
+
+        # Fractional grid indices of the positions
+        fi = (lat - self.lat0) / self.dlat
+        fj = (lon - self.lon0) / self.dlon
+        eps = 1e-9
+        inside = (fi >= -eps) & (fi <= self.nlat - 1 + eps) & \
+                 (fj >= -eps) & (fj <= self.nlon - 1 + eps)
+        if not np.any(inside):
+            return inside, uwind, vwind
+        pos = np.flatnonzero(inside)
+        fi, fj, alt = fi[pos], fj[pos], alt[pos]
+        i0 = np.clip(np.floor(fi + eps).astype(int), 0, self.nlat - 1)
+        j0 = np.clip(np.floor(fj + eps).astype(int), 0, self.nlon - 1)
+        i1 = np.minimum(i0 + 1, self.nlat - 1)
+        j1 = np.minimum(j0 + 1, self.nlon - 1)
+        wi = np.clip(fi - i0, 0.0, 1.0)
+        wj = np.clip(fj - j0, 0.0, 1.0)
+
+        # Vertical interpolation in each of the four surrounding columns
+        valid = np.ones(len(pos), dtype=bool)
+        ucol, vcol = [], []
+        for i, j in ((i0, j0), (i0, j1), (i1, j0), (i1, j1)):
+            col = i * self.nlon + j
+            u, v, ok = self.column(col, alt)
+            ucol.append(u)
+            vcol.append(v)
+            valid &= ok
+
+        # Bilinear interpolation between the columns
+        u0 = ucol[0] + wj * (ucol[1] - ucol[0])
+        u1 = ucol[2] + wj * (ucol[3] - ucol[2])
+        v0 = vcol[0] + wj * (vcol[1] - vcol[0])
+        v1 = vcol[2] + wj * (vcol[3] - vcol[2])
+        uwind[pos] = np.where(valid, u0 + wi * (u1 - u0), 0.0)
+        vwind[pos] = np.where(valid, v0 + wi * (v1 - v0), 0.0)
+        return inside, uwind, vwind
+
+    def column(self, col, alt):
+        ''' Linear interpolation in altitude within grid columns col. Above
+            the highest level, the two highest levels are extrapolated. '''
+        nlevels = self.nlevels[col]
+        levels = self.alt[col]
+        # Number of levels below alt, and the levels to interpolate between
+        nbelow = np.sum(levels < alt[:, np.newaxis], axis=1)
+        ok = (nbelow > 0) & (nlevels > 1)
+        lo = np.maximum(0, np.where(nbelow < nlevels, nbelow - 1, nlevels - 2))
+        hi = np.minimum(lo + 1, self.alt.shape[1] - 1)
+
+        altlo, althi = self.alt[col, lo], self.alt[col, hi]
+        with np.errstate(invalid='ignore'):
+            # Padded (inf) levels only occur where ok is False
+            dalt = np.where(ok & (althi != altlo), althi - altlo, 1.0)
+            frac = np.where(ok, (alt - altlo) / dalt, 0.0)
+        u = self.uwind[col, lo] + frac * (self.uwind[col, hi] - self.uwind[col, lo])
+        v = self.vwind[col, lo] + frac * (self.vwind[col, hi] - self.vwind[col, lo])
+        return u, v, ok
@@ -6,14 +6,29 @@ from bluesky.core import Entity
 
 
 class ADSB(Entity, replaceable=True):
-    """ ADS-B model. Implements real-life limitations of ADS-B communication."""
+    """ ADS-B model. Implements real-life limitations of ADS-B communication.
+
+        When none of the limitations (noise, truncation, per-aircraft update
+        intervals or message dropout) are active, the broadcast data are
+        the traffic arrays themselves, without copying. Otherwise each
+        aircraft has a next transmission time, and only the aircraft that
+        are due are updated. """
+
+    # Broadcast data
+    fields = ('lat', 'lon', 'alt', 'trk', 'tas', 'gs', 'vs')
 
     def __init__(self):
         super().__init__()
         # From here, define object arrays
         with self.settrafarrays():
+            # Next transmission time [s]
+            self.nexttx     = np.array([])
+            # Per-aircraft update interval [s] (0 = trunctime)
+            self.txdt       = np.array([])
+            # Per-aircraft probability of a lost message [-]
+            self.dropout    = np.array([])
+
             # Most recent broadcast data
-            self.lastupdate = np.array([])
             self.lat        = np.array([])
             self.lon        = np.array([])
             self.alt        = np.array([])
@@ -22,27 +37,82 @@ class ADSB(Entity, replaceable=True):
             self.gs         = np.array([])
             self.vs         = np.array([])
 
+        # Whether per-aircraft update intervals or dropout are set
+        self.peraircraft = False
+        # Whether the broadcast data are copies of the traffic arrays
+        self.copied = False
         self.setnoise(False)
 
+    def reset(self):
+        super().reset()
+        self.peraircraft = False
+        self.copied = False
+
+    @property
+    def ntraf(self):
+        return bs.traf.ntraf
+
+    @property
+    def active(self):
+        ''' True when the broadcast data differ from the traffic data. '''
+        return self.transnoise or self.truncated or self.peraircraft
+
     def setnoise(self, n):
         self.transnoise = n
         self.truncated  = n
         self.transerror = [1e-4, 100 * ft]  # [degree,m] standard lat/lon distance, altitude error
         self.trunctime  = 0  # [s]
 
+    def setrate(self, idx, dt=0.0):
+        ''' Set the ADS-B update interval [s] of aircraft idx,
+            0 uses the default interval. '''
+        self.txdt[idx] = max(0.0, dt)
+        self.peraircraft = np.any(self.txdt > 0.0) or np.any(self.dropout > 0.0)
+        return True
+
+    def setdropout(self, idx, prob=0.0):
+        ''' Set the probability [-] that an ADS-B message of aircraft idx
+            is lost. '''
+        if not 0.0 <= prob <= 1.0:
+            return False, 'ADSBDROP: Probability should be between 0 and 1'
+        self.dropout[idx] = prob
+        self.peraircraft = np.any(self.txdt > 0.0) or np.any(self.dropout > 0.0)
+        return True
+
     def create(self, n=1):
         super().create(n)
 
-        self.lastupdate[-n:] = -self.trunctime * np.random.rand(n)
-        self.lat[-n:] = bs.traf.lat[-n:]
-        self.lon[-n:] = bs.traf.lon[-n:]
-        self.alt[-n:] = bs.traf.alt[-n:]
-        self.trk[-n:] = bs.traf.trk[-n:]
-        self.tas[-n:] = bs.traf.tas[-n:]
-        self.gs[-n:]  = bs.traf.gs[-n:]
+        # Random phase of the first transmission
+        self.nexttx[-n:] = bs.sim.simt + self.trunctime * np.random.rand(n)
+        for name in self.fields:
+            getattr(self, name)[-n:] = getattr(bs.traf, name)[-n:]
 
     def update(self):
-        up = np.where(self.lastupdate + self.trunctime < bs.sim.simt)
+        if not self.active:
+            # Broadcast data are the (current) traffic arrays
+            for name in self.fields:
+                setattr(self, name, getattr(bs.traf, name))
+            self.copied = False
+            return
+
+        if not self.copied:
+            # Don't write into the traffic arrays
+            for name in self.fields:
+                setattr(self, name, getattr(self, name).copy())
+            self.copied = True
+
+        # Aircraft that transmit, and next transmission times
+        simt = bs.sim.simt
+        up = np.flatnonzero(self.nexttx <= simt)
+        txdt = self.txdt[up]
+        interval = np.where(txdt > 0.0, txdt, self.trunctime)
+        nexttx = self.nexttx[up] + interval
+        self.nexttx[up] = np.where(nexttx <= simt, simt + interval, nexttx)
+
+        # Messages that are received
+        if self.peraircraft:
+            up = up[np.random.rand(len(up)) >= self.dropout[up]]
+
         nup = len(up)
         if self.transnoise:
             self.lat[up] = bs.traf.lat[up] + np.random.normal(0, self.transerror[0], nup)
@@ -56,4 +126,3 @@ class ADSB(Entity, replaceable=True):
         self.tas[up] = bs.traf.tas[up]
         self.gs[up]  = bs.traf.gs[up]
         self.vs[up]  = bs.traf.vs[up]
-        self.lastupdate[up] = self.lastupdate[up] + self.trunctime
@@ -1,4 +1,5 @@
 from .detection import ConflictDetection
 from .resolution import ConflictResolution
 from .statebased import StateBased
-from .mvp import MVP
\ No newline at end of file
+from .gridbased import StateBasedGrid
+from .mvp import MVP, VMVP
\ No newline at end of file
@@ -0,0 +1,190 @@
+''' State-based conflict detection with a spatial grid broad phase. '''
+import numpy as np
+from bluesky.tools import geo
+from bluesky.tools.aero import nm
+from bluesky.traffic.asas import StateBased
+
+
+# Earth radius used by the kwik (flat-earth) distance functions [m]
+Rearth = 6371000.
+
+
+def candidatepairs(ownlat, ownlon, intlat, intlon, radius):
+    ''' Find all ownship/intruder index pairs (i, j), i != j, that can be
+        within 'radius' [m] of each other, using a regular lat/lon grid
+        with cells of at least 'radius' in size.
+
+        Returns two (unsorted) index arrays of candidate pairs. '''
+    nown, nint = len(ownlat), len(intlat)
+    if nown == 0 or nint == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    # Cell size in latitude direction [deg]
+    dlatcell = np.degrees(radius / Rearth)
+    # Cell size in longitude direction, sized for the highest latitude in the
+    # grid, where a degree of longitude is shortest
+    latmax = min(89.9, max(np.max(np.abs(ownlat)), np.max(np.abs(intlat))) + dlatcell)
+    dloncell = dlatcell / np.cos(np.radians(latmax))
+    # Wrap columns around the date line. With less than three columns all
+    # longitudes are neighbours, and a single column is used.
+    ncol = int(360.0 / dloncell) if dloncell > 0.0 else 1
+    ncol = ncol if ncol >= 3 else 1
+    dloncell = 360.0 / ncol
+    dcols = (-1, 0, 1) if ncol > 1 else (0,)
+
+    def cells(lat, lon):
+        row = np.floor((lat + 90.0) / dlatcell).astype(np.int64)
+        col = np.floor(((lon + 180.0) % 360.0) / dloncell).astype(np.int64) % ncol
+        return row, col
+
+    # Sort intruders by cell key
+    introw, intcol = cells(intlat, intlon)
+    order = np.argsort(introw * ncol + intcol, kind='stable')
+    sortedkeys = (introw * ncol + intcol)[order]
+
+    # Look up intruders in the nine cells surrounding each ownship
+    ownrow, owncol = cells(ownlat, ownlon)
+    ownidx = np.arange(nown)
+    ilst, jlst = [], []
+    for drow in (-1, 0, 1):
+        for dcol in dcols:
+            keys = (ownrow + drow) * ncol + (owncol + dcol) % ncol
+            lo = np.searchsorted(sortedkeys, keys, 'left')
+            cnt = np.searchsorted(sortedkeys, keys, 'right') - lo
+            ncand = np.sum(cnt)
+            if ncand == 0:
+                continue
+            # Expand [lo, lo + cnt) ranges into a flat list of sorted positions
+            offsets = np.arange(ncand) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+            ilst.append(np.repeat(ownidx, cnt))
+            jlst.append(order[np.repeat(lo, cnt) + offsets])
+
+    if not ilst:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    i = np.concatenate(ilst)
+    j = np.concatenate(jlst)
+    # Skip ownship-ownship pairs
+    notself = i != j
+    return i[notself], j[notself]
+
+
+class StateBasedGrid(StateBased):
+    ''' State-based conflict detection that only evaluates those aircraft pairs
+        that can come within the protected zone within the lookahead time.
+
+        Candidate pairs are found by binning intruders in a lat/lon grid with
+        cells sized by lookahead time x max closing speed + protected zone
+        radius, after which the state-based CPA calculation of StateBased
+        is performed on the surviving pairs only. '''
+    def detect(self, ownship, intruder, rpz, hpz, dtlookahead):
+        ''' Conflict detection between ownship (traf) and intruder (traf/adsb).'''
+        ntraf = ownship.ntraf
+        inconf = np.zeros(ntraf, dtype=bool)
+        tcpamax = np.zeros(ntraf)
+        if ntraf < 2:
+            return [], [], inconf, tcpamax, np.array([]), np.array([]), \
+                np.array([]), np.array([]), np.array([])
+
+        # Broad phase -------------------------------------------------------------
+        # Largest distance [m] at which a pair can still get into conflict:
+        # protected zone radius plus maximum closing distance within lookahead.
+        # The small extra speed accounts for the lower limit on relative speed.
+        vclose = np.max(np.abs(ownship.gs)) + np.max(np.abs(intruder.gs)) + 1e-3
+        radius = 1.001 * (np.max(rpz) + vclose * max(0.0, np.max(dtlookahead)))
+        radius = max(radius, 1.0)
+        i, j = candidatepairs(ownship.lat, ownship.lon,
+                              intruder.lat, intruder.lon, radius)
+
+        # Narrow phase: the StateBased calculation, per pair ----------------------
+        # Note that index i corresponds to matrix rows, and j to matrix columns
+        # in StateBased.detect.
+        qdr, dist = geo.kwikqdrdist(ownship.lat[i], ownship.lon[i],
+                                    intruder.lat[j], intruder.lon[j])
+        dist = dist * nm
+
+        # Only keep pairs within conflict range, and sort them in the same
+        # order as np.where would return them for a full ntraf x ntraf matrix
+        near = np.where(dist <= radius)[0]
+        near = near[np.argsort(i[near] * intruder.ntraf + j[near], kind='stable')]
+        i, j, qdr, dist = i[near], j[near], qdr[near], dist[near]
+
+        # Calculate horizontal closest point of approach (CPA)
+        qdrrad = np.radians(qdr)
+        dx = dist * np.sin(qdrrad)  # is pos j rel to i
+        dy = dist * np.cos(qdrrad)  # is pos j rel to i
+
+        # Ownship track angle and speed
+        owntrkrad = np.radians(ownship.trk)
+        ownu = ownship.gs * np.sin(owntrkrad)  # m/s
+        ownv = ownship.gs * np.cos(owntrkrad)  # m/s
+
+        # Intruder track angle and speed
+        inttrkrad = np.radians(intruder.trk)
+        intu = intruder.gs * np.sin(inttrkrad)  # m/s
+        intv = intruder.gs * np.cos(inttrkrad)  # m/s
+
+        du = ownu[j] - intu[i]
+        dv = ownv[j] - intv[i]
+
+        dv2 = du * du + dv * dv
+        dv2 = np.where(np.abs(dv2) < 1e-6, 1e-6, dv2)  # limit lower absolute value
+        vrel = np.sqrt(dv2)
+
+        tcpa = -(du * dx + dv * dy) / dv2
+
+        # Calculate distance^2 at CPA (minimum distance^2)
+        dcpa2 = np.abs(dist * dist - tcpa * tcpa * dv2)
+
+        # Check for horizontal conflict
+        # RPZ can differ per aircraft, get the largest value per aircraft pair
+        rpzpair = np.maximum(rpz[j], rpz[i])
+        R2 = rpzpair * rpzpair
+        swhorconf = dcpa2 < R2  # conflict or not
+
+        # Calculate times of entering and leaving horizontal conflict
+        dxinhor = np.sqrt(np.maximum(0., R2 - dcpa2))  # half the distance travelled inzide zone
+        dtinhor = dxinhor / vrel
+
+        tinhor = np.where(swhorconf, tcpa - dtinhor, 1e8)  # Set very large if no conf
+        touthor = np.where(swhorconf, tcpa + dtinhor, -1e8)  # set very large if no conf
+
+        # Vertical conflict --------------------------------------------------------
+
+        # Vertical crossing of disk (-dh,+dh)
+        dalt = ownship.alt[j] - intruder.alt[i]
+
+        dvs = ownship.vs[j] - intruder.vs[i]
+        dvs = np.where(np.abs(dvs) < 1e-6, 1e-6, dvs)  # prevent division by zero
+
+        # Check for passing through each others zone
+        # hPZ can differ per aircraft, get the largest value per aircraft pair
+        hpzpair = np.maximum(hpz[j], hpz[i])
+        tcrosshi = (dalt + hpzpair) / -dvs
+        tcrosslo = (dalt - hpzpair) / -dvs
+        tinver = np.minimum(tcrosshi, tcrosslo)
+        toutver = np.maximum(tcrosshi, tcrosslo)
+
+        # Combine vertical and horizontal conflict----------------------------------
+        tinconf = np.maximum(tinver, tinhor)
+        toutconf = np.minimum(toutver, touthor)
+
+        swconfl = swhorconf & (tinconf <= toutconf) & (toutconf > 0.0) & \
+            (tinconf < dtlookahead[i])
+
+        # --------------------------------------------------------------------------
+        # Update conflict lists
+        # --------------------------------------------------------------------------
+        # Ownship conflict flag and max tCPA
+        iconf, jconf = i[swconfl], j[swconfl]
+        inconf[iconf] = True
+        np.maximum.at(tcpamax, iconf, tcpa[swconfl])
+
+        # Select conflicting pairs: each a/c gets their own record
+        confpairs = [(ownship.id[a], ownship.id[b]) for a, b in zip(iconf, jconf)]
+        swlos = (dist < rpzpair) * (np.abs(dalt) < hpzpair)
+        lospairs = [(ownship.id[a], ownship.id[b]) for a, b in zip(i[swlos], j[swlos])]
+
+        return confpairs, lospairs, inconf, tcpamax, \
+            qdr[swconfl], dist[swconfl], np.sqrt(dcpa2[swconfl]), \
+                tcpa[swconfl], tinconf[swconfl]
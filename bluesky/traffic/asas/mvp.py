@@ -161,6 +161,12 @@ class MVP(ConflictResolution):
 
     def resolve(self, conf, ownship, intruder):
         ''' Resolve all current conflicts '''
+        dv, timesolveV = self.calcdv(conf, ownship, intruder)
+        return self.applydv(conf, ownship, dv, timesolveV)
+
+    def calcdv(self, conf, ownship, intruder):
+        ''' Calculate the resolution velocity vector and the time needed to
+            resolve vertically for all aircraft. '''
         # Initialize an array to store the resolution velocity vector for all A/C
         dv = np.zeros((ownship.ntraf, 3))
 
@@ -196,7 +202,11 @@ class MVP(ConflictResolution):
                 if self.resooffac[idx1]:
                     dv[idx1] = 0.0
 
+        return dv, timesolveV
 
+    def applydv(self, conf, ownship, dv, timesolveV):
+        ''' Determine the new track, ground speed, vertical speed and altitude
+            of all aircraft from their resolution velocity vectors. '''
         # Determine new speed and limit resolution direction for all aicraft-------
 
         # Resolution vector for all aircraft, cartesian coordinates
@@ -349,3 +359,156 @@ class MVP(ConflictResolution):
         dv = np.array([dv1, dv2, dv3])
 
         return dv, tsolV
+
+
+class VMVP(MVP):
+    ''' Vectorised conflict resolution using the Modified Voltage Potential
+        Method. All conflict pairs are resolved at once, with the same
+        results as MVP. '''
+    def calcdv(self, conf, ownship, intruder):
+        ''' Calculate the resolution velocity vector and the time needed to
+            resolve vertically for all aircraft. '''
+        # Ownship and intruder index of each conflict pair
+        ownidx = {acid: i for i, acid in enumerate(ownship.id)}
+        intidx = ownidx if intruder.id is ownship.id else \
+            {acid: i for i, acid in enumerate(intruder.id)}
+        idx1 = np.array([ownidx[ac1] for ac1, _ in conf.confpairs], dtype=int)
+        idx2 = np.array([intidx[ac2] for _, ac2 in conf.confpairs], dtype=int)
+
+        # Call MVP function to resolve all conflicts at once
+        dv_mvp, tsolV = self.MVP(ownship, intruder, conf, conf.qdr, conf.dist,
+                                 conf.tcpa, conf.tLOS, idx1, idx2)
+
+        # Time needed to resolve vertically, per aircraft
+        timesolveV = np.ones(ownship.ntraf) * 1e9
+        np.minimum.at(timesolveV, idx1, tsolV)
+
+        # Use priority rules if activated
+        if self.swprio:
+            vertfac, solves = self.priofactors(ownship.vs[idx1], intruder.vs[idx2])
+        else:
+            # since cooperative, the vertical resolution component can be halved, and then dv_mvp can be added
+            vertfac, solves = 0.5, np.ones(len(idx1), dtype=bool)
+        dv_mvp[:, 2] = np.where(vertfac == 0.0, 0.0, vertfac * dv_mvp[:, 2])
+
+        # Ownship resolution, followed by its cancellation when the intruder
+        # is a noreso aircraft (nobody avoids noreso aircraft, but noreso
+        # aircraft will avoid other aircraft). Both are interleaved to sum
+        # in the same order as MVP.
+        dvpair = np.empty((2 * len(idx1), 3))
+        dvpair[0::2] = np.where(solves[:, np.newaxis], -dv_mvp, 0.0)
+        dvpair[1::2] = np.where(self.noresoac[idx2, np.newaxis], dv_mvp, 0.0)
+
+        # Sum the resolutions of all conflicts per aircraft
+        dv = np.zeros((ownship.ntraf, 3))
+        np.add.at(dv, np.repeat(idx1, 2), dvpair)
+
+        # Check the resooff aircraft. These aircraft will not do resolutions.
+        dv[self.resooffac] = 0.0
+
+        return dv, timesolveV
+
+    def priofactors(self, vs1, vs2):
+        ''' Vectorised version of applyprio. Returns the factor on the vertical
+            resolution component, and whether the ownship resolves, for all
+            conflict pairs. '''
+        # Aircraft 1 is cruising, and aircraft 2 is climbing/descending
+        cruise1 = (np.abs(vs1) < 0.1) & (np.abs(vs2) > 0.1)
+        # Aircraft 2 is cruising, and aircraft 1 is climbing/descending
+        cruise2 = (np.abs(vs2) < 0.1) & (np.abs(vs1) > 0.1)
+
+        # Primary Free Flight prio rules (no priority)
+        if self.priocode == 'FF1':
+            return 0.5, np.ones(len(vs1), dtype=bool)
+        # Secondary Free Flight (Cruising aircraft has priority, combined resolutions)
+        if self.priocode == 'FF2':
+            return 0.5, ~cruise1
+        # Tertiary Free Flight (Climbing/descending aircraft have priority and crusing solves with horizontal resolutions)
+        if self.priocode == 'FF3':
+            return np.where(cruise1 | cruise2, 0.0, 0.5), ~cruise2
+        # Primary Layers (Cruising aircraft has priority and clmibing/descending solves. All conflicts solved horizontally)
+        if self.priocode == 'LAY1':
+            return 0.0, ~cruise1
+        # Secondary Layers (Climbing/descending aircraft has priority and cruising solves. All conflicts solved horizontally)
+        if self.priocode == 'LAY2':
+            return 0.0, ~cruise2
+        # Unknown priority code: no resolution
+        return 1.0, np.zeros(len(vs1), dtype=bool)
+
+    def MVP(self, ownship, intruder, conf, qdr, dist, tcpa, tLOS, idx1, idx2):
+        """Modified Voltage Potential (MVP) resolution method, for arrays of
+           conflict pairs."""
+        # Preliminary calculations-------------------------------------------------
+        # Determine largest RPZ and HPZ of the conflict pair, use lookahead of ownship
+        rpz_m = np.maximum(conf.rpz[idx1] * self.resofach, conf.rpz[idx2] * self.resofach)
+        hpz_m = np.maximum(conf.hpz[idx1] * self.resofacv, conf.hpz[idx2] * self.resofacv)
+        dtlook = conf.dtlookahead[idx1]
+        # Convert qdr from degrees to radians
+        qdr = np.radians(qdr)
+
+        # Relative position vector between id1 and id2
+        drel = np.array([np.sin(qdr) * dist, \
+                        np.cos(qdr) * dist, \
+                        intruder.alt[idx2] - ownship.alt[idx1]])
+
+        # Write velocities as vectors and find relative velocity vector
+        v1 = np.array([ownship.gseast[idx1], ownship.gsnorth[idx1], ownship.vs[idx1]])
+        v2 = np.array([intruder.gseast[idx2], intruder.gsnorth[idx2], intruder.vs[idx2]])
+        vrel = v2 - v1
+
+        # Both branches of each selection below are calculated for all pairs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Horizontal resolution------------------------------------------------
+
+            # Find horizontal distance at the tcpa (min horizontal distance)
+            dcpa  = drel + vrel*tcpa
+            dabsH = np.sqrt(dcpa[0] * dcpa[0] + dcpa[1] * dcpa[1])
+
+            # Compute horizontal intrusion
+            iH = rpz_m - dabsH
+
+            # Exception handlers for head-on conflicts
+            # This is done to prevent division by zero in the next step
+            headon = dabsH <= 10.
+            dabsH = np.where(headon, 10., dabsH)
+            dcpa[0] = np.where(headon, drel[1] / dist * dabsH, dcpa[0])
+            dcpa[1] = np.where(headon, -drel[0] / dist * dabsH, dcpa[1])
+
+            # If intruder is outside the ownship PZ, then apply extra factor
+            # to make sure that resolution does not graze IPZ
+            outside = (rpz_m < dist) & (dabsH < dist)
+            erratum = np.cos(np.arcsin(rpz_m / dist)-np.arcsin(dabsH / dist))
+            iH = np.where(outside, rpz_m / erratum - dabsH, iH)
+            # Compute the resolution velocity vector in horizontal direction.
+            # abs(tcpa) because it bcomes negative during intrusion.
+            dv1 = (iH * dcpa[0]) / (np.abs(tcpa) * dabsH)
+            dv2 = (iH * dcpa[1]) / (np.abs(tcpa) * dabsH)
+
+            # Vertical resolution--------------------------------------------------
+
+            # Compute the  vertical intrusion
+            # Amount of vertical intrusion dependent on vertical relative velocity
+            swvrel = np.abs(vrel[2]) > 0.0
+            iV = np.where(swvrel, hpz_m, hpz_m - np.abs(drel[2]))
+
+            # Get the time to solve the conflict vertically - tsolveV
+            tsolV = np.where(swvrel, np.abs(drel[2] / vrel[2]), tLOS)
+
+            # If the time to solve the conflict vertically is longer than the look-ahead time,
+            # because the the relative vertical speed is very small, then solve the intrusion
+            # within tinconf
+            swslow = tsolV > dtlook
+            tsolV = np.where(swslow, tLOS, tsolV)
+            iV = np.where(swslow, hpz_m, iV)
+
+            # Compute the resolution velocity vector in the vertical direction
+            # The direction of the vertical resolution is such that the aircraft with
+            # higher climb/decent rate reduces their climb/decent rate
+            dv3 = np.where(swvrel, (iV / tsolV) * (-vrel[2] / np.abs(vrel[2])), (iV / tsolV))
+
+        # Combine resolutions------------------------------------------------------
+
+        # combine the dv components
+        dv = np.array([dv1, dv2, dv3]).T
+
+        return dv, tsolV
@@ -1,5 +1,4 @@
 """ Autopilot Implementation."""
-from math import sin, cos, radians, sqrt, atan
 import numpy as np
 try:
     from collections.abc import Collection
@@ -11,7 +10,7 @@ from bluesky import stack
 from bluesky.tools import geo
 from bluesky.tools.misc import degto180, angleFromCoordinate
 from bluesky.tools.position import txt2pos
-from bluesky.tools.aero import ft, nm, fpm, vcasormach2tas, vcas2tas, tas2cas, cas2tas, g0
+from bluesky.tools.aero import ft, nm, fpm, vcasormach2tas, vcas2tas, vtas2cas, g0
 from bluesky.core import Entity, timed_function
 from .route import Route
 
@@ -95,8 +94,13 @@ class Autopilot(Entity, replaceable=True):
         # Check which aircraft i have reached their active waypoint
         # Shift waypoints for aircraft i where necessary
         # Reached function return list of indices where reached logic is True
-        for i in bs.traf.actwp.Reached(qdr, dist, bs.traf.actwp.flyby,
-                                       bs.traf.actwp.flyturn,bs.traf.actwp.turnrad,bs.traf.actwp.swlastwp):
+        iacs = bs.traf.actwp.Reached(qdr, dist, bs.traf.actwp.flyby,
+                                     bs.traf.actwp.flyturn,bs.traf.actwp.turnrad,bs.traf.actwp.swlastwp)
+
+        # The waypoint switch is done at once for all aircraft that reached
+        # their active waypoint, only waypoint stack commands are per aircraft
+        if len(iacs) > 0:
+            actwp = bs.traf.actwp
 
             # Save current wp speed for use on next leg when we pass this waypoint
             # VNAV speeds are always FROM-speeds, so we accelerate/decellerate at the waypoint
@@ -104,142 +108,136 @@ class Autopilot(Entity, replaceable=True):
             # before getting the new data for the next waypoint
 
             # Get speed for next leg from the waypoint we pass now
-            bs.traf.actwp.spd[i]    = bs.traf.actwp.nextspd[i]
-            bs.traf.actwp.spdcon[i] = bs.traf.actwp.nextspd[i]
+            actwp.spd[iacs]    = actwp.nextspd[iacs]
+            actwp.spdcon[iacs] = actwp.nextspd[iacs]
 
             # Execute stack commands for the still active waypoint, which we pass
-            self.route[i].runactwpstack()
+            routes = [self.route[i] for i in iacs]
+            for route in routes:
+                route.runactwpstack()
 
             # If specified, use the given turn radius of passing wp for bank angle
-            if bs.traf.actwp.flyturn[i]:
-                if bs.traf.actwp.turnspd[i]>=0.:
-                    turnspd = bs.traf.actwp.turnspd[i]
-                else:
-                    turnspd = bs.traf.tas[i]
-
-                if bs.traf.actwp.turnrad[i] > 0.:
-                    self.turnphi[i] = atan(turnspd*turnspd/(bs.traf.actwp.turnrad[i]*nm*g0)) # [rad]
-                else:
-                    self.turnphi[i] = 0.0  # [rad] or leave untouched???
-
-            else:
-                self.turnphi[i] = 0.0  #[rad] or leave untouched???
-
-            # Get next wp, if there still is one
-            if not bs.traf.actwp.swlastwp[i]:
-                lat, lon, alt, bs.traf.actwp.nextspd[i], bs.traf.actwp.xtoalt[i], toalt, \
-                    bs.traf.actwp.xtorta[i], bs.traf.actwp.torta[i], \
-                    lnavon, flyby, flyturn, turnrad, turnspd,\
-                    bs.traf.actwp.next_qdr[i], bs.traf.actwp.swlastwp[i] =      \
-                    self.route[i].getnextwp()  # note: xtoalt,toalt in [m]
+            turnspd = np.where(actwp.turnspd[iacs] >= 0., actwp.turnspd[iacs], bs.traf.tas[iacs])
+            turnrad = actwp.turnrad[iacs]
+            useturnrad = np.logical_and(actwp.flyturn[iacs], turnrad > 0.)
+            self.turnphi[iacs] = 0.0  # [rad] or leave untouched???
+            self.turnphi[iacs[useturnrad]] = np.arctan(turnspd[useturnrad] * turnspd[useturnrad] /
+                                                       (turnrad[useturnrad] * nm * g0))  # [rad]
 
             # Prevent trying to activate the next waypoint when it was already the last waypoint
-            else:
-                bs.traf.swlnav[i] = False
-                bs.traf.swvnav[i] = False
-                bs.traf.swvnavspd[i] = False
-                continue # Go to next a/c which reached its active waypoint
+            swlastwp = actwp.swlastwp[iacs]
+            ilast = iacs[swlastwp]
+            bs.traf.swlnav[ilast] = False
+            bs.traf.swvnav[ilast] = False
+            bs.traf.swvnavspd[ilast] = False
+
+            # Get next wp for the other aircraft, as there still is one
+            iacs = iacs[~swlastwp]
+            routes = [route for route, islast in zip(routes, swlastwp) if not islast]
+            lat, lon, alt, actwp.nextspd[iacs], actwp.xtoalt[iacs], toalt, \
+                actwp.xtorta[iacs], actwp.torta[iacs], \
+                lnavon, flyby, flyturn, turnrad, turnspd, \
+                actwp.next_qdr[iacs], actwp.swlastwp[iacs] = \
+                Route.getnextwps(routes)  # note: xtoalt,toalt in [m]
 
             # End of route/no more waypoints: switch off LNAV using the lnavon
             # switch returned by getnextwp
-            if not lnavon and bs.traf.swlnav[i]:
-                bs.traf.swlnav[i] = False
-                # Last wp: copy last wp values for alt and speed in autopilot
-                if bs.traf.swvnavspd[i] and bs.traf.actwp.nextspd[i]>= 0.0:
-                    bs.traf.selspd[i] = bs.traf.actwp.nextspd[i]
+            ioff = iacs[~lnavon * bs.traf.swlnav[iacs]]
+            bs.traf.swlnav[ioff] = False
+            # Last wp: copy last wp values for alt and speed in autopilot
+            ioff = ioff[bs.traf.swvnavspd[ioff] * (actwp.nextspd[ioff] >= 0.0)]
+            bs.traf.selspd[ioff] = actwp.nextspd[ioff]
 
             # In case of no LNAV, do not allow VNAV mode on its own
-            bs.traf.swvnav[i] = bs.traf.swvnav[i] and bs.traf.swlnav[i]
+            bs.traf.swvnav[iacs] = bs.traf.swvnav[iacs] * bs.traf.swlnav[iacs]
 
-            bs.traf.actwp.lat[i] = lat  # [deg]
-            bs.traf.actwp.lon[i] = lon  # [deg]
+            actwp.lat[iacs] = lat  # [deg]
+            actwp.lon[iacs] = lon  # [deg]
             # 1.0 in case of fly by, else fly over
-            bs.traf.actwp.flyby[i] = int(flyby)
+            actwp.flyby[iacs] = flyby
 
             # User has entered an altitude for this waypoint
-            if alt >= -0.01:
-                bs.traf.actwp.nextaltco[i] = alt  # [m]
-
-            #if not bs.traf.swlnav[i]:
-            #    bs.traf.actwp.spd[i] = -997.
+            hasalt = alt >= -0.01
+            actwp.nextaltco[iacs[hasalt]] = alt[hasalt]  # [m]
 
             # VNAV spd mode: use speed of this waypoint as commanded speed
             # while passing waypoint and save next speed for passing next wp
             # Speed is now from speed! Next speed is ready in wpdata
-            if bs.traf.swvnavspd[i] and bs.traf.actwp.spd[i]>= 0.0:
-                    bs.traf.selspd[i] = bs.traf.actwp.spd[i]
+            ispd = iacs[bs.traf.swvnavspd[iacs] * (actwp.spd[iacs] >= 0.0)]
+            bs.traf.selspd[ispd] = actwp.spd[ispd]
 
             # Update qdr and turndist for this new waypoint for ComputeVNAV
-            qdr[i], distnmi = geo.qdrdist(bs.traf.lat[i], bs.traf.lon[i],
-                                        bs.traf.actwp.lat[i], bs.traf.actwp.lon[i])
+            qdr[iacs], distnmi = geo.qdrdist(bs.traf.lat[iacs], bs.traf.lon[iacs],
+                                             actwp.lat[iacs], actwp.lon[iacs])
 
-            dist[i] = distnmi*nm
-            self.dist2wp[i] = distnmi
+            dist[iacs] = distnmi*nm
+            self.dist2wp[iacs] = distnmi
 
-            bs.traf.actwp.curlegdir[i] = qdr[i]
-            bs.traf.actwp.curleglen[i] = distnmi
+            actwp.curlegdir[iacs] = qdr[iacs]
+            actwp.curleglen[iacs] = distnmi
 
             # Update turndist so ComputeVNAV works, is there a next leg direction or not?
-            if bs.traf.actwp.next_qdr[i] < -900.:
-                local_next_qdr = qdr[i]
-            else:
-                local_next_qdr = bs.traf.actwp.next_qdr[i]
+            local_next_qdr = np.where(actwp.next_qdr[iacs] < -900., qdr[iacs], actwp.next_qdr[iacs])
 
             # Get flyturn switches and data
-            bs.traf.actwp.flyturn[i]     = flyturn
-            bs.traf.actwp.turnrad[i]     = turnrad
+            actwp.flyturn[iacs] = flyturn
+            actwp.turnrad[iacs] = turnrad
 
             # Pass on whether currently flyturn mode:
             # at beginning of leg,c copy tonextwp to lastwp
             # set next turn False
-            bs.traf.actwp.turnfromlastwp[i] = bs.traf.actwp.turntonextwp[i]
-            bs.traf.actwp.turntonextwp[i]   = False
+            actwp.turnfromlastwp[iacs] = actwp.turntonextwp[iacs]
+            actwp.turntonextwp[iacs]   = False
 
             # Keep both turning speeds: turn to leg and turn from leg
-            bs.traf.actwp.oldturnspd[i]  = bs.traf.actwp.turnspd[i] # old turnspd, turning by this waypoint
-            if bs.traf.actwp.flyturn[i]:
-                bs.traf.actwp.turnspd[i] = turnspd                  # new turnspd, turning by next waypoint
-            else:
-                bs.traf.actwp.turnspd[i] = -990.
+            actwp.oldturnspd[iacs] = actwp.turnspd[iacs]  # old turnspd, turning by this waypoint
+            actwp.turnspd[iacs]    = np.where(flyturn, turnspd, -990.)  # new turnspd, turning by next waypoint
 
-            # Calculate turn dist (and radius which we do not use) now for scalar variable [i]
-            bs.traf.actwp.turndist[i], dummy = \
-                bs.traf.actwp.calcturn(bs.traf.tas[i], self.bankdef[i],
-                                        qdr[i], local_next_qdr,turnrad)  # update turn distance for VNAV
+            # Calculate turn dist (and radius which we do not use) now for these aircraft
+            actwp.turndist[iacs], dummy = \
+                actwp.calcturn(bs.traf.tas[iacs], self.bankdef[iacs],
+                               qdr[iacs], local_next_qdr, turnrad)  # update turn distance for VNAV
 
             # Reduce turn dist for reduced turnspd
-            if bs.traf.actwp.flyturn[i] and bs.traf.actwp.turnrad[i]<0.0 and bs.traf.actwp.turnspd[i]>=0.:
-                turntas = cas2tas(bs.traf.actwp.turnspd[i], bs.traf.alt[i])
-                bs.traf.actwp.turndist[i] = bs.traf.actwp.turndist[i]*turntas*turntas/(bs.traf.tas[i]*bs.traf.tas[i])
+            iturn = iacs[np.logical_and(actwp.flyturn[iacs],
+                                        (actwp.turnrad[iacs] < 0.0) * (actwp.turnspd[iacs] >= 0.))]
+            if len(iturn) > 0:
+                turntas = vcas2tas(actwp.turnspd[iturn], bs.traf.alt[iturn])
+                actwp.turndist[iturn] = actwp.turndist[iturn]*turntas*turntas/(bs.traf.tas[iturn]*bs.traf.tas[iturn])
 
             # VNAV = FMS ALT/SPD mode incl. RTA
-            self.ComputeVNAV(i, toalt, bs.traf.actwp.xtoalt[i], bs.traf.actwp.torta[i],
-                             bs.traf.actwp.xtorta[i])
+            self.ComputeVNAV(iacs, toalt, actwp.xtoalt[iacs], actwp.torta[iacs],
+                             actwp.xtorta[iacs])
 
-        
-
-        # End of per waypoint i switching loop
+        # End of waypoint switching
         # Update qdr2wp with up-to-date qdr, now that we have checked passing wp
         self.qdr2wp = qdr%360.
 
         # Continuous guidance when speed constraint on active leg is in update-method
 
         # If still an RTA in the route and currently no speed constraint
-        for iac in np.where((bs.traf.actwp.torta > -99.)*(bs.traf.actwp.spdcon<0.0))[0]:
-            iwp = bs.traf.ap.route[iac].iactwp
-            if bs.traf.ap.route[iac].wprta[iwp]>-99.:
-
-                 # For all a/c flying to an RTA waypoint, recalculate speed more often
-                dist2go4rta = geo.kwikdist(bs.traf.lat[iac],bs.traf.lon[iac], \
-                                           bs.traf.actwp.lat[iac],bs.traf.actwp.lon[iac])*nm \
-                               + bs.traf.ap.route[iac].wpxtorta[iwp] # last term zero for active wp rta
-
-                # Set bs.traf.actwp.spd to rta speed, if necessary
-                self.setspeedforRTA(iac,bs.traf.actwp.torta[iac],dist2go4rta)
-
-                # If VNAV speed is on (by default coupled to VNAV), use it for speed guidance
-                if bs.traf.swvnavspd[iac] and bs.traf.actwp.spd[iac]>=0.0:
-                     bs.traf.selspd[iac] = bs.traf.actwp.spd[iac]
+        iacs = np.flatnonzero((bs.traf.actwp.torta > -99.)*(bs.traf.actwp.spdcon<0.0))
+        if len(iacs) > 0:
+            # Active waypoints in the route store, of the aircraft flying to an RTA waypoint
+            store = Route.store
+            rows  = np.array([self.route[iac].row for iac in iacs])
+            isrta = (store.iactwp[rows] >= 0) * (store.iactwp[rows] < store.length[rows])
+            iacs, rows = iacs[isrta], rows[isrta]
+            iwps  = store.index(rows)
+            isrta = store.data['rta'][iwps] > -99.
+            iacs, iwps = iacs[isrta], iwps[isrta]
+
+            # For all a/c flying to an RTA waypoint, recalculate speed more often
+            dist2go4rta = geo.kwikdist(bs.traf.lat[iacs],bs.traf.lon[iacs], \
+                                       bs.traf.actwp.lat[iacs],bs.traf.actwp.lon[iacs])*nm \
+                           + store.data['xtorta'][iwps] # last term zero for active wp rta
+
+            # Set bs.traf.actwp.spd to rta speed, if necessary
+            self.setspeedforRTA(iacs, bs.traf.actwp.torta[iacs], dist2go4rta)
+
+            # If VNAV speed is on (by default coupled to VNAV), use it for speed guidance
+            iacs = iacs[bs.traf.swvnavspd[iacs] * (bs.traf.actwp.spd[iacs] >= 0.0)]
+            bs.traf.selspd[iacs] = bs.traf.actwp.spd[iacs]
 
     def update(self):
         # FMS LNAV mode:
@@ -306,7 +304,7 @@ class Autopilot(Entity, replaceable=True):
         # use the turn speed
 
         # Is turn speed specified and are we not already slow enough? We only decelerate for turns, not accel.
-        turntas       = np.where(bs.traf.actwp.turnspd>0.0, vcas2tas(bs.traf.actwp.turnspd, bs.traf.alt),
+        turntas       = np.where(bs.traf.actwp.turnspd>0.0, vcas2tas(bs.traf.actwp.turnspd, bs.traf.atmos),
                                  -1.0+0.*bs.traf.tas)
         swturnspd     = bs.traf.actwp.flyturn*(turntas>0.0)*(bs.traf.actwp.turnspd>0.0)
         turntasdiff   = np.maximum(0.,(bs.traf.tas - turntas)*(turntas>0.0))
@@ -321,7 +319,7 @@ class Autopilot(Entity, replaceable=True):
         # Note that because nextspd comes from the stack, and can be either a mach number or
         # a calibrated airspeed, it can only be converted from Mach / CAS [kts] to TAS [m/s]
         # once the altitude is known.
-        nexttas = vcasormach2tas(bs.traf.actwp.nextspd, bs.traf.alt)
+        nexttas = vcasormach2tas(bs.traf.actwp.nextspd, bs.traf.atmos)
 
 #        tasdiff   = (nexttas - bs.traf.tas)*(bs.traf.actwp.spd>=0.) # [m/s]
 
@@ -376,15 +374,21 @@ class Autopilot(Entity, replaceable=True):
         #debug     print("no speed given")
 
         # Below crossover altitude: CAS=const, above crossover altitude: Mach = const
-        self.tas = vcasormach2tas(bs.traf.selspd, bs.traf.alt)
+        self.tas = vcasormach2tas(bs.traf.selspd, bs.traf.atmos)
 
     def ComputeVNAV(self, idx, toalt, xtoalt, torta, xtorta):
-        # debug print ("ComputeVNAV for",bs.traf.id[idx],":",toalt/ft,"ft  ",xtoalt/nm,"nm")
-
-        # Check if there is a target altitude and VNAV is on, else return doing nothing
-        if toalt < 0 or not bs.traf.swvnav[idx]:
-            self.dist2vs[idx] = -999. #dist to next wp will never be less than this, so VNAV will do nothing
+        # Vectorized: idx can be one aircraft index or an array of indices,
+        # the other arguments then are scalars or arrays with a value per aircraft
+        idx, toalt, xtoalt, torta, xtorta = \
+            np.broadcast_arrays(*np.atleast_1d(idx, toalt, xtoalt, torta, xtorta))
+
+        # Check if there is a target altitude and VNAV is on, else do nothing for this aircraft
+        novnav = np.logical_or(toalt < 0, ~bs.traf.swvnav[idx])
+        self.dist2vs[idx[novnav]] = -999. #dist to next wp will never be less than this, so VNAV will do nothing
+        if novnav.all():
             return
+        idx, toalt, xtoalt, torta, xtorta = \
+            idx[~novnav], toalt[~novnav], xtoalt[~novnav], torta[~novnav], xtorta[~novnav]
 
         # Flat earth distance to next wp
         dy = (bs.traf.actwp.lat[idx] - bs.traf.lat[idx])  # [deg lat = 60. nm]
@@ -393,8 +397,7 @@ class Autopilot(Entity, replaceable=True):
 
         # Check  whether active waypoint speed needs to be adjusted for RTA
         # sets bs.traf.actwp.spd, if necessary
-        #debug print("xtorta+legdist =",(xtorta+legdist)/nm)
-        self.setspeedforRTA(idx, torta, xtorta+legdist) # all scalar
+        self.setspeedforRTA(idx, torta, xtorta+legdist)
 
         # So: somewhere there is an altitude constraint ahead
         # Compute proper values for bs.traf.actwp.nextaltco, self.dist2vs, self.alt, bs.traf.actwp.vs
@@ -432,96 +435,75 @@ class Autopilot(Entity, replaceable=True):
         # - Descend at the latest when necessary for next altitude constraint
         #   which can be many waypoints beyond current actual waypoint
 
+        descent = bs.traf.alt[idx] > toalt + 10. * ft
+        climb   = bs.traf.alt[idx] < toalt - 10. * ft
 
         # VNAV Descent mode
-        if bs.traf.alt[idx] > toalt + 10. * ft:
-
-
-            #Calculate max allowed altitude at next wp (above toalt)
-            bs.traf.actwp.nextaltco[idx] = min(bs.traf.alt[idx],toalt + xtoalt * self.steepness) # [m] next alt constraint
-            bs.traf.actwp.xtoalt[idx]    = xtoalt # [m] distance to next alt constraint measured from next waypoint
+        ides, xtoaltdes, legdistdes = idx[descent], xtoalt[descent], legdist[descent]
 
+        #Calculate max allowed altitude at next wp (above toalt)
+        bs.traf.actwp.nextaltco[ides] = np.minimum(bs.traf.alt[ides], toalt[descent] + xtoaltdes * self.steepness) # [m] next alt constraint
+        bs.traf.actwp.xtoalt[ides]    = xtoaltdes # [m] distance to next alt constraint measured from next waypoint
 
-            # Dist to waypoint where descent should start [m]
-            self.dist2vs[idx] = bs.traf.actwp.turndist[idx] + \
-                               np.abs(bs.traf.alt[idx] - bs.traf.actwp.nextaltco[idx]) / self.steepness
-            #print("self.dist2vs=",self.dist2vs)
+        # Dist to waypoint where descent should start [m]
+        self.dist2vs[ides] = bs.traf.actwp.turndist[ides] + \
+                             np.abs(bs.traf.alt[ides] - bs.traf.actwp.nextaltco[ides]) / self.steepness
 
-            # Flat earth distance to next wp
-            dy = (bs.traf.actwp.lat[idx] - bs.traf.lat[idx])   # [deg lat = 60. nm]
-            dx = (bs.traf.actwp.lon[idx] - bs.traf.lon[idx]) * bs.traf.coslat[idx] # [corrected deg lon = 60. nm]
-            legdist = 60. * nm * np.sqrt(dx * dx + dy * dy)  # [m]
+        # If the descent is urgent, descend with maximum steepness
+        urgent = legdistdes < self.dist2vs[ides] # [m]
+        iurg = ides[urgent]
+        self.alt[iurg] = bs.traf.actwp.nextaltco[iurg]  # dial in altitude of next waypoint as calculated
 
+        t2go = np.maximum(0.1, legdistdes[urgent] + xtoaltdes[urgent]) / np.maximum(0.01, bs.traf.gs[iurg])
+        bs.traf.actwp.vs[iurg] = (bs.traf.actwp.nextaltco[iurg] - bs.traf.alt[iurg]) / t2go
 
-            # If the descent is urgent, descend with maximum steepness
-            if legdist < self.dist2vs[idx]: # [m]
-                self.alt[idx] = bs.traf.actwp.nextaltco[idx]  # dial in altitude of next waypoint as calculated
+        # Else calculate V/S using self.steepness,
+        # protect against zero/invalid ground speed value
+        inorm = ides[~urgent]
+        bs.traf.actwp.vs[inorm] = -self.steepness * (bs.traf.gs[inorm] +
+              (bs.traf.gs[inorm] < 0.2 * bs.traf.tas[inorm]) * bs.traf.tas[inorm])
 
-                t2go         = max(0.1, legdist + xtoalt) / max(0.01, bs.traf.gs[idx])
-                bs.traf.actwp.vs[idx]  = (bs.traf.actwp.nextaltco[idx] - bs.traf.alt[idx]) / t2go
+        # VNAV climb mode: climb as soon as possible (T/C logic)
+        icl = idx[climb]
 
-            else:
-                # Calculate V/S using self.steepness,
-                # protect against zero/invalid ground speed value
-#                if bs.sim.simt>11.99:
-#                    print("bs.traf.tas.shape =",bs.traf.tas.shape)
-#                    print("bs.traf.gs.shape =", bs.traf.gs.shape)
-#                    print("bs.traf.actwp.vs.shape =", bs.traf.actwp.vs.shape)
+        # Altitude we want to climb to: next alt constraint in our route (could be further down the route)
+        bs.traf.actwp.nextaltco[icl] = toalt[climb]   # [m]
+        bs.traf.actwp.xtoalt[icl]    = xtoalt[climb]  # [m] distance to next alt constraint measured from next waypoint
+        self.alt[icl]          = bs.traf.actwp.nextaltco[icl]  # dial in altitude of next waypoint as calculated
+        self.dist2vs[icl]      = 99999.*nm #[m] Forces immediate climb as current distance to next wp will be less
 
-                bs.traf.actwp.vs[idx] = -self.steepness * (bs.traf.gs[idx] +
-                      (bs.traf.gs[idx] < 0.2 * bs.traf.tas[idx]) * bs.traf.tas[idx])
+        t2go = np.maximum(0.1, legdist[climb] + xtoalt[climb]) / np.maximum(0.01, bs.traf.gs[icl])
+        bs.traf.actwp.vs[icl]  = np.maximum(self.steepness*bs.traf.gs[icl], \
+                        (bs.traf.actwp.nextaltco[icl] - bs.traf.alt[icl])/ t2go) # [m/s]
 
-        # VNAV climb mode: climb as soon as possible (T/C logic)
-        elif bs.traf.alt[idx] < toalt - 10. * ft:
-
-            # Altitude we want to climb to: next alt constraint in our route (could be further down the route)
-            bs.traf.actwp.nextaltco[idx] = toalt   # [m]
-            bs.traf.actwp.xtoalt[idx]    = xtoalt  # [m] distance to next alt constraint measured from next waypoint
-            self.alt[idx]          = bs.traf.actwp.nextaltco[idx]  # dial in altitude of next waypoint as calculated
-            self.dist2vs[idx]      = 99999.*nm #[m] Forces immediate climb as current distance to next wp will be less
-
-            # Flat earth distance to next wp
-            dy = (bs.traf.actwp.lat[idx] - bs.traf.lat[idx])
-            dx = (bs.traf.actwp.lon[idx] - bs.traf.lon[idx]) * bs.traf.coslat[idx]
-            legdist = 60. * nm * np.sqrt(dx * dx + dy * dy) # [m]
-            t2go = max(0.1, legdist+xtoalt) / max(0.01, bs.traf.gs[idx])
-            bs.traf.actwp.vs[idx]  = np.maximum(self.steepness*bs.traf.gs[idx], \
-                            (bs.traf.actwp.nextaltco[idx] - bs.traf.alt[idx])/ t2go) # [m/s]
         # Level leg: never start V/S
-        else:
-            self.dist2vs[idx] = -999. # [m]
-
-
-        return
+        self.dist2vs[idx[~(descent | climb)]] = -999. # [m]
 
     def setspeedforRTA(self, idx, torta, xtorta):
-        #debug print("setspeedforRTA called, torta,xtorta =",torta,xtorta/nm)
-
         # Calculate required CAS to meet RTA
-        # for aircraft nr. idx (scalar)
-        if torta < -90. : # -999 signals there is no RTA defined in remainder of route
-            return False
+        # for aircraft idx (array), torta and xtorta are arrays with a value per aircraft
+        # -999 signals there is no RTA defined in remainder of route
+        deltime = torta - bs.sim.simt # Remaining time to next RTA [s] in simtime
 
-        deltime = torta-bs.sim.simt # Remaining time to next RTA [s] in simtime
-        if deltime>0: # Still possible?
-            gsrta = calcvrta(bs.traf.gs[idx], xtorta,
-                             deltime, bs.traf.perf.axmax[idx])
+        # Still possible?
+        isrta = (torta >= -90.) * (deltime > 0.)
+        if not isrta.any():
+            return
+        idx, xtorta, deltime = idx[isrta], xtorta[isrta], deltime[isrta]
 
-            # Subtract tail wind speed vector
-            tailwind = (bs.traf.windnorth[idx]*bs.traf.gsnorth[idx] + bs.traf.windeast[idx]*bs.traf.gseast[idx]) / \
-                        bs.traf.gs[idx]
+        gsrta = calcvrta(bs.traf.gs[idx], xtorta,
+                         deltime, bs.traf.perf.axmax[idx])
 
-            # Convert to CAS
-            rtacas = tas2cas(gsrta-tailwind,bs.traf.alt[idx])
+        # Subtract tail wind speed vector
+        tailwind = (bs.traf.windnorth[idx]*bs.traf.gsnorth[idx] + bs.traf.windeast[idx]*bs.traf.gseast[idx]) / \
+                    bs.traf.gs[idx]
 
-            # Performance limits on speed will be applied in traf.update
-            if bs.traf.actwp.spdcon[idx]<0. and bs.traf.swvnavspd[idx]:
-                bs.traf.actwp.spd[idx] = rtacas
-                #print("setspeedforRTA: xtorta =",xtorta)
+        # Convert to CAS
+        rtacas = vtas2cas(gsrta-tailwind,bs.traf.alt[idx])
 
-            return rtacas
-        else:
-            return False
+        # Performance limits on speed will be applied in traf.update
+        usecas = (bs.traf.actwp.spdcon[idx]<0.) * bs.traf.swvnavspd[idx]
+        bs.traf.actwp.spd[idx[usecas]] = rtacas[usecas]
 
     @stack.command(name='ALT')
     def selaltcmd(self, idx: 'acid', alt: 'alt', vspd: 'vspd' = None):
@@ -767,7 +749,7 @@ def calcvrta(v0, dx, deltime, trafax):
     # Calculate required target ground speed v1 [m/s]
     # to meet an RTA at this leg
     #
-    # Arguments are scalar
+    # Arguments are arrays (or scalars)
     #
     #   v0      = current ground speed [m/s]
     #   dx      = leg distance [m]
@@ -778,10 +760,7 @@ def calcvrta(v0, dx, deltime, trafax):
     dt = deltime
 
     # Do we need decelerate or accelerate
-    if v0 * dt < dx:
-        ax = max(0.01,abs(trafax))
-    else:
-        ax = -max(0.01,abs(trafax))
+    ax = np.where(v0 * dt < dx, 1.0, -1.0) * np.maximum(0.01, np.abs(trafax))
 
     # Solve 2nd order equation for v1 which results from:
     #
@@ -800,31 +779,23 @@ def calcvrta(v0, dx, deltime, trafax):
     D = b * b - 4. * a * c
 
     # Possibly two v1 solutions
-    vlst = []
-
-    if D >= 0.:
-        x1 = (-b - sqrt(D)) / (2. * a)
-        x2 = (-b + sqrt(D)) / (2. * a)
-
-        # Check solutions for v1
-        for v1 in (x1, x2):
-            dtacc = (v1 - v0) / ax
-            dtconst = dt - dtacc
+    sqrtD = np.sqrt(np.maximum(0., D))
+    x1 = (-b - sqrtD) / (2. * a)
+    x2 = (-b + sqrtD) / (2. * a)
 
-            # Physically possible: both dtacc and dtconst >0
-            if dtacc >= 0 and dtconst >= 0.:
-                vlst.append(v1)
-
-    if len(vlst) == 0:  # Not possible? Maybe borderline, so then simple calculation
-        vtarg = dx/dt
-
-    # Just in case both would be valid, take closest to v0
-    elif len(vlst) == 2:
-        vtarg = vlst[int(abs(vlst[1] - v0) < abs(vlst[0] - v0))]
+    # Check solutions for v1
+    # Physically possible: both dtacc and dtconst >0
+    dtacc1 = (x1 - v0) / ax
+    dtacc2 = (x2 - v0) / ax
+    valid1 = (D >= 0.) * (dtacc1 >= 0.) * (dt - dtacc1 >= 0.)
+    valid2 = (D >= 0.) * (dtacc2 >= 0.) * (dt - dtacc2 >= 0.)
 
     # Normal case is one solution
-    else:
-        vtarg = vlst[0]
+    # Just in case both would be valid, take closest to v0
+    # Not possible? Maybe borderline, so then simple calculation
+    vtarg = np.where(valid1 * valid2,
+                     np.where(np.abs(x2 - v0) < np.abs(x1 - v0), x2, x1),
+                     np.where(valid1, x1, np.where(valid2, x2, dx / dt)))
 
     return vtarg
 
@@ -12,86 +12,88 @@ alttype, spdtype, postype = 0, 1, 2
 
 
 class Condition():
+    ''' Conditional commands, stored as columns with one row per condition.
+        Conditions are linked to the index of their aircraft, which is
+        remapped when aircraft are deleted (see delac). '''
     def __init__(self):
+        self.reset()
 
+    def reset(self):
+        ''' Remove all conditions. '''
         self.ncond = 0  # Number of conditions
 
-        self.id       = []                         # Id of aircraft of condition
-        self.condtype = np.array([],dtype=int)     # Condition type (0=alt,1=spd)
+        self.acidx    = np.array([],dtype=int)     # Index of aircraft of condition
+        self.condtype = np.array([],dtype=int)     # Condition type (0=alt,1=spd,2=pos)
         self.target   = np.array([],dtype=float)   # Target value (alt,speed,distance[nm])
         self.lastdif  = np.array([],dtype=float)   # Difference during last update
-        self.posdata  = []                         # Data for postype: tuples lat[deg],lon[deg] of ref position
+        self.reflat   = np.array([],dtype=float)   # Postype: lat[deg] of ref position
+        self.reflon   = np.array([],dtype=float)   # Postype: lon[deg] of ref position
         self.cmd      = []                         # Commands to be issued
+        self.actual   = np.array([],dtype=float)   # Actual value during last update
+
+    @property
+    def id(self):
+        ''' Ids of the aircraft of the conditions. '''
+        return [bs.traf.id[i] for i in self.acidx]
 
     def update(self):
         if self.ncond==0:
             return
 
-        # Update indices based on list of id's
-        acidxlst = np.array(bs.traf.id2idx(self.id))
-        if len(acidxlst)>0:
-            idelcond = sorted(list(np.where(acidxlst<0)[0]))
-            for i in idelcond[::-1]:
-                del (self.id[i])
-                self.condtype = np.delete(self.condtype, i)
-                self.target = np.delete(self.target, i)
-                self.lastdif = np.delete(self.lastdif, i)
-                del self.posdata[i]
-                del self.cmd[i]
-
-            self.ncond = len(self.id)
-            if self.ncond==0:
-                return
-            acidxlst = np.array(bs.traf.id2idx(self.id))
-
-        # Check condition types
-        actdist = np.ones(self.ncond)*999e9  # Invalid number which never triggers anything is extremely large
-        for j in range(self.ncond):
-            if self.condtype[j] == postype:
-                qdr,dist = qdrdist(bs.traf.lat[acidxlst[j]],bs.traf.lon[acidxlst[j]],self.posdata[j][0],self.posdata[j][1])
-                actdist[j] = dist # [nm]
-
-        # Get relevant actual value using index list as index to numpy arrays
-        self.actual = (self.condtype == alttype) * bs.traf.alt[acidxlst] + \
-                      (self.condtype == spdtype) * bs.traf.cas[acidxlst] + \
-                      (self.condtype == postype) * actdist
+        # Get relevant actual value per condition type, using the aircraft
+        # indices as index to the traffic arrays
+        self.actual = np.empty(self.ncond)
+        for condtype, values in ((alttype, bs.traf.alt), (spdtype, bs.traf.cas)):
+            icond = np.flatnonzero(self.condtype == condtype)
+            self.actual[icond] = values[self.acidx[icond]]
+
+        icond = np.flatnonzero(self.condtype == postype)
+        if len(icond):
+            acidx = self.acidx[icond]
+            self.actual[icond] = qdrdist(bs.traf.lat[acidx], bs.traf.lon[acidx],
+                                         self.reflat[icond], self.reflon[icond])[1]  # [nm]
 
         # Compare sign of actual difference with sign of last difference
         actdif       = self.target - self.actual
-
-        # Make sorted arrya of indices of true conditions and their conditional commands
-        idxtrue      = sorted(list(np.where(actdif*self.lastdif <= 0.0)[0]))# Sign changed
+        istrue       = actdif*self.lastdif <= 0.0  # Sign changed
         self.lastdif = actdif
-        if idxtrue==None or len(idxtrue)==0:
+        if not istrue.any():
             return
 
-
         # Execute commands found to have true condition
-        for i in idxtrue:
-            if i>=0:
-                stack.stack(self.cmd[i])
-                # debug
-                # stack.stack(" ECHO Conditional command issued: "+self.cmd[i])
+        for i in np.flatnonzero(istrue):
+            stack.stack(self.cmd[i])
+            # debug
+            # stack.stack(" ECHO Conditional command issued: "+self.cmd[i])
 
         # Delete executed commands to clean up arrays and lists
-        # from highest index to lowest for consistency
-        for i in idxtrue[::-1]:
-            if i>=0:
-                del self.id[i]
-                self.condtype = np.delete(self.condtype,i)
-                self.target   = np.delete(self.target,i)
-                self.lastdif  = np.delete(self.lastdif,i)
-                del self.posdata[i]
-                del self.cmd[i]
+        self.keep(~istrue)
+        return
+
+    def keep(self, mask):
+        ''' Only keep the conditions for which mask is True. '''
+        self.acidx    = self.acidx[mask]
+        self.condtype = self.condtype[mask]
+        self.target   = self.target[mask]
+        self.lastdif  = self.lastdif[mask]
+        self.reflat   = self.reflat[mask]
+        self.reflon   = self.reflon[mask]
+        self.cmd      = [cmd for cmd, keep in zip(self.cmd, mask) if keep]
 
         # Adjust number of conditions
-        self.ncond = len(self.id)
+        self.ncond = len(self.cmd)
 
-        if self.ncond!=len(self.cmd):
-            print ("self.ncond=",self.ncond)
-            print ("self.cmd=",self.cmd)
-            print ("traffic/conditional.py: self.delcondition: invalid condition array size")
-        return
+    def delac(self, delidx):
+        ''' Remove the conditions of deleted aircraft, and remap the aircraft
+            indices of the other conditions. '''
+        delidx = np.unique(delidx)
+        if self.ncond==0 or len(delidx)==0:
+            return
+        # Shift indices by the number of deleted aircraft before them
+        pos = np.searchsorted(delidx, self.acidx)
+        isdel = delidx[np.minimum(pos, len(delidx) - 1)] == self.acidx
+        self.acidx = self.acidx - pos
+        self.keep(~isdel)
 
     def ataltcmd(self,acidx,targalt,cmdtxt):
         actalt = bs.traf.alt[acidx]
@@ -112,13 +114,14 @@ class Condition():
         #print ("addcondition:", acidx, icondtype, target, actual, cmdtxt, latlon)
 
         # Add condition to arrays
-        self.id.append(bs.traf.id[acidx])
-
+        lat, lon = latlon or (np.nan, np.nan)
+        self.acidx    = np.append(self.acidx,acidx)
         self.condtype = np.append(self.condtype,icondtype)
         self.target   = np.append(self.target,target)
         self.lastdif  = np.append(self.lastdif,target - actual)
+        self.reflat   = np.append(self.reflat,lat)
+        self.reflon   = np.append(self.reflon,lon)
 
-        self.posdata.append(latlon)
         self.cmd.append(cmdtxt)
 
         self.ncond = self.ncond+1
@@ -126,18 +129,6 @@ class Condition():
         return
 
     def renameac(self,oldid,newid):
-        # Continonal commands are stored per id (ac name)
-        # When renamed, call this method to update list
-        # rename ids in list of ids
-        # Call this if RENAME command is implemented
-        if self.id.count(old.id) == 0:
-            return
-        for i in range(len(self.id)):
-            if self.id[i] == oldid:
-                self.id[i] = newid
+        # Conditional commands are stored per aircraft index, so they
+        # don't have to be updated when an aircraft is renamed
         return
-
-
-
-
-
@@ -11,15 +11,26 @@ from bluesky.core import Entity, timed_function
 from bluesky.tools import misc
 
 
+# Register settings defaults
+bs.settings.set_variable_defaults(histsymb_max=8)
+
+
 class HistorySymbols(Entity):
     """
     Class definition: Histroy symbols for aircraft
     Methods:
         clear():    Reset variables
+        create():   Create history buffers for new aircraft
+        delete():   Delete history buffers of aircraft
         update():   Update the history symbols
         update_history():   Update the history locations
+        update_symbols():   Update the history symbol positions
         setHistory():       Enable/Disable history symbols
 
+    The history locations are stored in (ntraf x histsymb_max) ring buffers,
+    with per aircraft the column of the latest location (head) and the number
+    of stored locations (nhist).
+
     Created by: Bob van Dillen
     Date: 17-12-2021
     """
@@ -28,9 +39,17 @@ class HistorySymbols(Entity):
         super().__init__()
 
         self.nsymb = 4
+        self.maxsymb = bs.settings.histsymb_max
 
-        self.histlat = np.array([])
-        self.histlon = np.array([])
+        # Ring buffers of the history locations
+        self.latbuf = np.zeros((0, self.maxsymb))
+        self.lonbuf = np.zeros((0, self.maxsymb))
+
+        # Output buffers, histlat and histlon are views on these
+        self.histlatbuf = np.zeros(0)
+        self.histlonbuf = np.zeros(0)
+        self.histlat = self.histlatbuf[:0]
+        self.histlon = self.histlonbuf[:0]
 
         self.t_prev = 0.
 
@@ -42,29 +61,8 @@ class HistorySymbols(Entity):
         with self.settrafarrays():
             self.swhistory = np.array([], dtype=np.bool)
 
-            self.lat1 = np.array([])
-            self.lon1 = np.array([])
-
-            self.lat2 = np.array([])
-            self.lon2 = np.array([])
-
-            self.lat3 = np.array([])
-            self.lon3 = np.array([])
-
-            self.lat4 = np.array([])
-            self.lon4 = np.array([])
-
-            self.lat5 = np.array([])
-            self.lon5 = np.array([])
-
-            self.lat6 = np.array([])
-            self.lon6 = np.array([])
-
-            self.lat7 = np.array([])
-            self.lon7 = np.array([])
-
-            self.lat8 = np.array([])
-            self.lon8 = np.array([])
+            self.head = np.array([], dtype=int)
+            self.nhist = np.array([], dtype=int)
 
     def reset(self):
         """
@@ -80,11 +78,49 @@ class HistorySymbols(Entity):
 
         self.nsymb = 4
 
-        self.histlat = np.array([])
-        self.histlon = np.array([])
+        self.latbuf = np.zeros((0, self.maxsymb))
+        self.lonbuf = np.zeros((0, self.maxsymb))
+        self.histlat = self.histlatbuf[:0]
+        self.histlon = self.histlonbuf[:0]
 
         self.t_prev = 0.
 
+    def create(self, n=1):
+        """
+        Function: Create history buffers for new aircraft
+        Args:
+            n:  number of aircraft
+        Returns: -
+        """
+
+        super().create(n)
+
+        self.latbuf = np.vstack((self.latbuf, np.zeros((n, self.maxsymb))))
+        self.lonbuf = np.vstack((self.lonbuf, np.zeros((n, self.maxsymb))))
+
+        # Grow the output buffers, so that they can hold all symbols
+        if len(self.histlatbuf) < self.latbuf.size:
+            nout = len(self.histlat)
+            self.histlatbuf = np.zeros(2 * self.latbuf.size)
+            self.histlonbuf = np.zeros(2 * self.lonbuf.size)
+            self.histlatbuf[:nout] = self.histlat
+            self.histlonbuf[:nout] = self.histlon
+            self.histlat = self.histlatbuf[:nout]
+            self.histlon = self.histlonbuf[:nout]
+
+    def delete(self, idx):
+        """
+        Function: Delete history buffers of aircraft
+        Args:
+            idx:    indices for traffic arrays
+        Returns: -
+        """
+
+        super().delete(idx)
+
+        self.latbuf = np.delete(self.latbuf, idx, axis=0)
+        self.lonbuf = np.delete(self.lonbuf, idx, axis=0)
+
     @timed_function(name='historysymbols', dt=0.2)
     def update(self):
         """
@@ -96,35 +132,10 @@ class HistorySymbols(Entity):
         Date: 20-12-2021
         """
 
-        if self.nsymb > 0:
-            # Get latitudes and longitudes for all history symbols
-            if self.nsymb >= 1:
-                self.histlat = self.lat1
-                self.histlon = self.lon1
-            if self.nsymb >= 2:
-                self.histlat = np.append(self.histlat, self.lat2)
-                self.histlon = np.append(self.histlon, self.lon2)
-            if self.nsymb >= 3:
-                self.histlat = np.append(self.histlat, self.lat3)
-                self.histlon = np.append(self.histlon, self.lon3)
-            if self.nsymb >= 4:
-                self.histlat = np.append(self.histlat, self.lat4)
-                self.histlon = np.append(self.histlon, self.lon4)
-            if self.nsymb >= 5:
-                self.histlat = np.append(self.histlat, self.lat5)
-                self.histlon = np.append(self.histlon, self.lon5)
-            if self.nsymb >= 6:
-                self.histlat = np.append(self.histlat, self.lat6)
-                self.histlon = np.append(self.histlon, self.lon6)
-            if self.nsymb >= 7:
-                self.histlat = np.append(self.histlat, self.lat7)
-                self.histlon = np.append(self.histlon, self.lon7)
-            if self.nsymb == 8:
-                self.histlat = np.append(self.histlat, self.lat8)
-                self.histlon = np.append(self.histlon, self.lon8)
-            self.histlat = self.histlat[self.histlat != 0.]
-            self.histlon = self.histlon[self.histlon != 0.]
+        # The symbols show the history locations up to the previous update
+        self.update_symbols()
 
+        if self.nsymb > 0:
             # Data feed traffic
             if len(bs.traf.trafdatafeed.datafeedids) > 0:
                 itrafdatafeed = misc.get_indices(bs.traf.id, bs.traf.trafdatafeed.datafeedids)
@@ -159,9 +170,6 @@ class HistorySymbols(Entity):
 
             # Update the history symbols
             self.update_history(i_update)
-        else:
-            self.histlat = np.array([])
-            self.histlon = np.array([])
 
     def update_history(self, indices):
         """
@@ -174,29 +182,39 @@ class HistorySymbols(Entity):
         Date: 20-12-2021
         """
 
-        self.lat8[indices] = self.lat7[indices]
-        self.lon8[indices] = self.lon7[indices]
-
-        self.lat7[indices] = self.lat6[indices]
-        self.lon7[indices] = self.lon6[indices]
-
-        self.lat6[indices] = self.lat5[indices]
-        self.lon6[indices] = self.lon5[indices]
-
-        self.lat5[indices] = self.lat4[indices]
-        self.lon5[indices] = self.lon4[indices]
-
-        self.lat4[indices] = self.lat3[indices]
-        self.lon4[indices] = self.lon3[indices]
+        # Overwrite the oldest location in the ring buffer
+        head = (self.head[indices] + 1) % self.maxsymb
+        self.head[indices] = head
+        self.nhist[indices] = np.minimum(self.nhist[indices] + 1, self.maxsymb)
 
-        self.lat3[indices] = self.lat2[indices]
-        self.lon3[indices] = self.lon2[indices]
+        self.latbuf[indices, head] = bs.traf.lat[indices]
+        self.lonbuf[indices, head] = bs.traf.lon[indices]
 
-        self.lat2[indices] = self.lat1[indices]
-        self.lon2[indices] = self.lon1[indices]
+    def update_symbols(self):
+        """
+        Function: Update the history symbol positions (histlat, histlon): for
+                  the latest nsymb locations (newest first), the locations of
+                  all aircraft that have them. histlat and histlon are views
+                  on the output buffers, which are reused every update.
+        Args: -
+        Returns: -
+        """
 
-        self.lat1[indices] = bs.traf.lat[indices]
-        self.lon1[indices] = bs.traf.lon[indices]
+        nout = 0
+        for age in range(min(self.nsymb, self.maxsymb)):
+            # Aircraft with a location of this age
+            iac = np.flatnonzero(self.nhist > age)
+            if len(iac) == 0:
+                break
+            # Flat indices of these locations in the ring buffers
+            iflat = iac * self.maxsymb + (self.head[iac] - age) % self.maxsymb
+            n = len(iac)
+            np.take(self.latbuf.ravel(), iflat, out=self.histlatbuf[nout:nout + n])
+            np.take(self.lonbuf.ravel(), iflat, out=self.histlonbuf[nout:nout + n])
+            nout += n
+
+        self.histlat = self.histlatbuf[:nout]
+        self.histlon = self.histlonbuf[:nout]
 
     def setHistory(self, nsymbols):
         """
@@ -209,9 +227,9 @@ class HistorySymbols(Entity):
         Date: 23-12-2021
         """
 
-        if 0 <= nsymbols <= 8:
+        if 0 <= nsymbols <= self.maxsymb:
             self.nsymb = nsymbols
         else:
-            return False, 'HISTORY: Number of symbols should be between 0 and 8'
+            return False, f'HISTORY: Number of symbols should be between 0 and {self.maxsymb}'
 
         return True
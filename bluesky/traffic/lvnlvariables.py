@@ -69,6 +69,7 @@ class LVNLVariables(Entity):
             self.uco        = np.array([], dtype=np.bool)  # Under Control
             self.wtc        = []                           # Wake Turbulence Category
             self.trackmiles = np.array([])                 # Distance to go along route
+            self.routedist  = []                           # Cached remaining route distances
             self.man_intervention = np.array([], dtype=np.bool) # Manual intervention for VNR
 
     def create(self, n=1):
@@ -87,57 +88,37 @@ class LVNLVariables(Entity):
         self.autolabel[-n:] = True
         self.tracklbl[-n:]  = True
         self.mlbl[-n:]      = False
+        self.routedist[-n:] = [trackmiles_calc.RouteDistances() for _ in range(n)]
 
-    def get_trackmiles(self, idx):
-        own_lat = bs.traf.lat[idx]
-        own_lon = bs.traf.lon[idx]
-        own_tas = bs.traf.tas[idx]
-        own_hdg = bs.traf.hdg[idx]
-        wpt_lat = bs.traf.actwp.lat[idx]
-        wpt_lon = bs.traf.actwp.lon[idx]
-        route = bs.traf.ap.route
-        tm_remaining_curve = 0.0
-        tm_remaining_straight = 0.0
-
-        dist_to_next_curve = trackmiles_calc.get_dist_to_next_wpt_curve(bs.traf, idx)
-        dist_to_next_straight = trackmiles_calc.get_dist_to_next_wpt_straight(bs.traf, idx)
-        if len(route[idx].wpname) > 1:
-            for i in range(0, len(route[idx].wpname) - 1):
-                # Determine the next waypoint so we can loop around the remaining waypoints for data
-                if route[idx].wpname[i] == route[idx].wpname[route[idx].iactwp]:
-                    j = i
-                    tm_remaining_straight = trackmiles_calc.get_remaining_route_dist_straight(route[idx], j)
-                    tm_remaining_curve = trackmiles_calc.get_remaining_route_dist_curve(route[idx], j)
-
-        dist_to_next_curve = trackmiles_calc.get_dist_to_next_wpt_curve(bs.traf, idx)
+    def get_trackmiles(self):
+        """
+        Function: Calculate the distance to go along the route for all aircraft
+        Args: -
+        Returns:
+            distance_to_go: trackmiles [nm]
+        """
+        # Remaining route distance from the next waypoint (cached per route)
+        tm_remaining_curve = np.array([routedist.get(route) for routedist, route in
+                                       zip(self.routedist, bs.traf.ap.route)], dtype=float)
+        dist_to_next_curve = trackmiles_calc.get_dist_to_next_wpt_curve(bs.traf, slice(None))
 
         #building blocks for total distance to go
-        hdg = np.radians(own_hdg)
-        brg = np.radians(geo.kwikqdrdist(own_lat, own_lon, wpt_lat, wpt_lon)[0])
-        lnav = bs.traf.swlnav[idx]
-
-        #dist_straight = np.sqrt((np.square(dtg)) - 2.*r*dtg*np.cos(1.57-delta_hdg)) #D dubbel accent
-        #gamma_acc = np.arctan(r/dist_straight)
+        hdg = np.radians(bs.traf.hdg)
+        brg = np.radians(geo.kwikqdrdist(bs.traf.lat, bs.traf.lon, bs.traf.actwp.lat, bs.traf.actwp.lon)[0])
+        lnav = bs.traf.swlnav
+        ontrack = np.abs(degto180(np.degrees(hdg)%360. - np.degrees(brg)%360.)) < 1.0
 
         # When on the route between wpts, calculate trackmiles the classic way
-
-        if np.abs(degto180(np.degrees(hdg)%360. - np.degrees(brg)%360.)) < 1.0 or not lnav or self.man_intervention[idx]:
-            distance_to_go = dist_to_next_curve + tm_remaining_curve
-            #distance_to_go = dist_to_next_straight + tm_remaining_straight
-
-            bs.traf.dist_ref[idx] = bs.traf.distflown[idx] / 1852
-            bs.traf.dtg_ref[idx] = distance_to_go
-
-            if not lnav:
-                self.man_intervention[idx] = True
-
-            if np.abs(degto180(np.degrees(hdg)%360. - np.degrees(brg)%360.)) < 1.0:
-                self.man_intervention[idx] = False
-
+        classic = ontrack | ~lnav | self.man_intervention
         # When in a flyby turn, estimate dtg by using the subtracting the flown distance from
         # a reference dtg, until the a/c is on the straight line to the new wpt
-        else:
-            distance_to_go = bs.traf.dtg_ref[idx] + bs.traf.dist_ref[idx] - bs.traf.distflown[idx]/1852
+        distance_to_go = np.where(classic, dist_to_next_curve + tm_remaining_curve,
+                                  bs.traf.dtg_ref + bs.traf.dist_ref - bs.traf.distflown/1852)
+
+        bs.traf.dist_ref[classic] = bs.traf.distflown[classic] / 1852
+        bs.traf.dtg_ref[classic] = distance_to_go[classic]
+        self.man_intervention[classic & ~lnav] = True
+        self.man_intervention[classic & ontrack] = False
 
         return distance_to_go
 
@@ -237,11 +218,7 @@ class LVNLVariables(Entity):
         # print(self.dtg_tbar[inirsi_gal1])
         # print(self.dtg_tbar[inirsi_603])
 
-        self.trackmiles = np.ones(len(self.arr))
-        bla = bs.traf.ap.route
-        for i in range(0, len(self.trackmiles)):
-           self.trackmiles[i] = self.get_trackmiles(i)
-        #print ("bla: ", bla[1].wpname)
+        self.trackmiles = self.get_trackmiles()
 
         return
 
@@ -9,7 +9,10 @@
 '''
 from glob import glob
 from os import path
+import hashlib
+import pickle
 import re
+from bluesky.tools import cachefile
 from .fwparser import FixedWidthParser, ParseError
 
 # File formats of BADA data files. Uses fortran-like notation
@@ -60,6 +63,9 @@ apt_format = [
               'CD, 25X, 3I, 1X, 3I, 1X, 2I, 10X, 3I, 1X, 3I, 1X, 2I, 2X, 2I, 1X, 3I, 1X, 3I']
 apf_parser = FixedWidthParser(apt_format)
 
+# Version of the BADA cache files
+badacache_version = '1'
+
 # The available aircraft are stored by type id in synonyms. The actual coefficient data are stored in accoeffs
 synonyms     = dict()
 accoeffs     = dict()
@@ -98,10 +104,43 @@ def check(bada_path=''):
 
 
 def init(bada_path=''):
-    ''' init() loads the available BADA datafiles in the provided directory.'''
+    ''' init() loads the available BADA datafiles in the provided directory.
+        The parsed data is cached, and taken from the cache as long as the
+        BADA files are unchanged. '''
+    global release_date, bada_version
     if accoeffs:
         return True
 
+    bada_path = path.normpath(bada_path)
+    sources = sorted(glob(path.join(bada_path, '*.OPF')) + glob(path.join(bada_path, '*.APF')) +
+                     glob(path.join(bada_path, 'SYNONYM.NEW')) + glob(path.join(bada_path, 'ReleaseSummary')))
+    cachename = 'bada_' + hashlib.sha1(path.abspath(bada_path).encode()).hexdigest()[:16] + '.p'
+    with cachefile.openfile(cachename, (badacache_version, cachefile.filestamps(sources))) as cache:
+        try:
+            values = cache.load()
+            if not isinstance(values, tuple) or len(values) != 4:
+                raise cachefile.CacheError('Cache file out of date: ' + cache.fname)
+            release_date, bada_version, syns, coeffs = values
+            synonyms.update(syns)
+            accoeffs.update(coeffs)
+            print('Found BADA version %s (release date %s)' % (bada_version, release_date))
+            print('%d aircraft entries and %d unique aircraft coefficient sets loaded'
+                  % (len(synonyms), len(accoeffs)))
+            return True
+        except (pickle.PickleError, EOFError, cachefile.CacheError) as e:
+            print(e.args[0] if e.args else e)
+
+        if not parse(bada_path):
+            return False
+        try:
+            cache.dump((release_date, bada_version, synonyms, accoeffs))
+        except OSError as e:
+            print(f'Could not write BADA cache: {e}')
+    return True
+
+
+def parse(bada_path=''):
+    ''' Parse the available BADA datafiles in the provided directory.'''
     releasefile = path.join(path.normpath(bada_path), 'ReleaseSummary')
     if path.isfile(releasefile):
         global release_date, bada_version
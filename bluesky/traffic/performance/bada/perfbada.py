@@ -580,7 +580,7 @@ class BADA(PerfBase):
         # forwarding to tools
         self.limspd, self.limspd_flag, self.limalt, \
             self.limalt_flag, self.limvs, self.limvs_flag = calclimits(
-                vtas2cas(intent_v, bs.traf.alt), bs.traf.gs,
+                vtas2cas(intent_v, bs.traf.atmos), bs.traf.gs,
                 self.vmto, self.vmin, self.vmo, self.mmo,
                 bs.traf.M, bs.traf.alt, self.hmaxact,
                 intent_h, intent_vs, self.maxthr,
@@ -590,7 +590,7 @@ class BADA(PerfBase):
         # Update desired sates with values within the flight envelope
         # When CAS is limited, it needs to be converted to TAS as only this TAS is used later on!
         allowed_tas = np.where(self.limspd_flag, vcas2tas(
-            self.limspd, bs.traf.alt), intent_v)
+            self.limspd, bs.traf.atmos), intent_v)
 
         # Autopilot selected altitude [m]
         allowed_alt = np.where(self.limalt_flag, self.limalt, intent_h)
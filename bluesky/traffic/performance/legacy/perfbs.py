@@ -336,15 +336,15 @@ class Legacy(PerfBase):
 
         # summarize and convert to cas
         # note: aircraft on ground may be pushed back
-        self.vmin = (self.phase==1)*vtas2cas(self.vmto, bs.traf.alt) + \
-                        ((self.phase==2) + (self.phase==3) + (self.phase==4))*vtas2cas(self.vmcr, bs.traf.alt) + \
-                            (self.phase==5)*vtas2cas(self.vmld, bs.traf.alt) + (self.phase==6)*-10.0
+        self.vmin = (self.phase==1)*vtas2cas(self.vmto, bs.traf.atmos) + \
+                        ((self.phase==2) + (self.phase==3) + (self.phase==4))*vtas2cas(self.vmcr, bs.traf.atmos) + \
+                            (self.phase==5)*vtas2cas(self.vmld, bs.traf.atmos) + (self.phase==6)*-10.0
 
 
         # forwarding to tools
         self.limspd, self.limspd_flag, self.limalt, \
             self.limalt_flag, self.limvs, self.limvs_flag  =  calclimits(
-                vtas2cas(intent_v, bs.traf.alt), bs.traf.gs, \
+                vtas2cas(intent_v, bs.traf.atmos), bs.traf.gs, \
                 self.vmto, self.vmin, self.vmo, self.mmo, \
                 bs.traf.M, bs.traf.alt, self.hmaxact, \
                 intent_h, intent_vs, self.maxthr, \
@@ -353,7 +353,7 @@ class Legacy(PerfBase):
 
         # Update desired sates with values within the flight envelope
         # When CAS is limited, it needs to be converted to TAS as only this TAS is used later on!
-        allowed_tas = np.where(self.limspd_flag, vcas2tas(self.limspd, bs.traf.alt), intent_v)
+        allowed_tas = np.where(self.limspd_flag, vcas2tas(self.limspd, bs.traf.atmos), intent_v)
 
         # Autopilot selected altitude [m]
         allowed_alt = np.where(self.limalt_flag, self.limalt, intent_h)
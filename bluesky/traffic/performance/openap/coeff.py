@@ -1,11 +1,15 @@
 """ OpenAP performance library. """
 import os
 import json
+import pickle
+from glob import glob
 import numpy as np
 import pandas as pd
 import bluesky as bs
 from bluesky import settings
 from bluesky.settings import get_project_root
+from bluesky.tools import cachefile
+from bluesky.traffic.performance.openap import thrust
 
 
 settings.set_variable_defaults(perf_path_openap=
@@ -28,10 +32,58 @@ fixwing_dragpolar_db = settings.perf_path_openap + "/fixwing/dragpolar.csv"
 
 rotor_aircraft_db = settings.perf_path_openap + "/rotor/aircraft.json"
 
+# Fields of the per-type coefficient table, named as the OpenAP traffic arrays
+table_dtype = np.dtype(
+    [("lifttype", float), ("mass", float), ("engnum", int), ("engpower", float),
+     ("Sref", float), ("ff_coeff_a", float), ("ff_coeff_b", float), ("ff_coeff_c", float),
+     ("engthrmax", float), ("engbpr", float), ("vmin", float), ("vmax", float),
+     ("vminic", float), ("vminer", float), ("vminap", float), ("vmaxic", float),
+     ("vmaxer", float), ("vmaxap", float), ("vsmin", float), ("vsmax", float),
+     ("hmax", float), ("axmax", float), ("vminto", float), ("hcross", float), ("mmo", float),
+     ("cd0_clean", float), ("k_clean", float), ("cd0_to", float), ("k_to", float),
+     ("cd0_ld", float), ("k_ld", float), ("delta_cd_gear", float)]
+)
+
+# Aircraft type used for unknown types
+DEFAULT_ACTYPE = "B744"
+
+
+# Version of the coefficient cache file
+coeff_cache_version = "1"
+
+# Attributes of Coefficient that are stored in the cache
+cache_attrs = ("synodict", "acs_fixwing", "engines_fixwing", "limits_fixwing",
+               "acs_rotor", "limits_rotor", "actypes_fixwing", "actypes_rotor",
+               "dragpolar_fixwing", "typecode", "table", "typename", "typewarn")
+
+
+def source_files():
+    """All OpenAP database files, to check whether the cache is up to date."""
+    return [synonyms_db, fixwing_aircraft_db, fixwing_engine_db, fixwing_dragpolar_db,
+            rotor_aircraft_db] + sorted(glob(fixwing_envelops_dir + "*.csv"))
+
 
 class Coefficient:
     def __init__(self):
-
+        # Take the coefficients from the cache when the database is unchanged
+        version = (coeff_cache_version, cache_attrs, cachefile.filestamps(source_files()))
+        with cachefile.openfile("openap_coeff.p", version) as cache:
+            try:
+                values = cache.load()
+                if not isinstance(values, tuple) or len(values) != len(cache_attrs):
+                    raise cachefile.CacheError("Cache file out of date: " + cache.fname)
+                for attr, value in zip(cache_attrs, values):
+                    setattr(self, attr, value)
+            except (pickle.PickleError, EOFError, cachefile.CacheError) as e:
+                print(e.args[0] if e.args else e)
+                self._load_database()
+                try:
+                    cache.dump(tuple(getattr(self, attr) for attr in cache_attrs))
+                except OSError as e:
+                    print(f"Could not write OpenAP coefficient cache: {e}")
+
+    def _load_database(self):
+        """Parse the OpenAP database files, and build the type table."""
         # Load synonyms.dat text file into dictionary
         self.synodict = {}
         with open(synonyms_db, "r") as f_syno:
@@ -63,6 +115,124 @@ class Coefficient:
         self.dragpolar_fixwing = df.to_dict(orient="index")
         self.dragpolar_fixwing["NA"] = df.mean().to_dict()
 
+        self._build_table()
+
+    def _build_table(self):
+        """Precompile the coefficients of all known aircraft types and
+        synonyms into a structured array, indexed by an integer type code."""
+        names = list(dict.fromkeys(self.actypes_fixwing + self.actypes_rotor
+                                   + list(self.synodict.keys())))
+        self.typecode = {name: code for code, name in enumerate(names)}
+        self.table = np.zeros(len(names), dtype=table_dtype)
+        self.table["axmax"] = 2.0  # default acceleration limit of PerfBase
+        self.typename = []  # Type used for the coefficients of each code
+        self.typewarn = []  # Replacement warnings of each code
+        for code, name in enumerate(names):
+            actype, values, warns = self._get_type_coeffs(name)
+            for field, value in values.items():
+                self.table[field][code] = value
+            self.typename.append(actype)
+            self.typewarn.append(warns)
+
+    def _get_type_coeffs(self, actype):
+        """Get the coefficients of one aircraft type, after replacing
+        it by its synonym, or by the default type when it is unknown.
+
+        Returns:
+            actype: the type used for the coefficients
+            values: dict with the table fields set for this type
+            warns:  list of replacement warnings
+        """
+        values = {}
+        warns = []
+
+        # Check synonym file if not in open ap actypes
+        if (actype not in self.actypes_rotor) and (
+                actype not in self.actypes_fixwing):
+
+            if actype in self.synodict.keys():
+                warns.append(f"Warning: {actype} replaced by {self.synodict[actype]}")
+                actype = self.synodict[actype]
+
+        # initialize aircraft / engine performance parameters
+        # check fixwing or rotor, default to fixwing
+        if actype in self.actypes_rotor:
+            ac = self.acs_rotor[actype]
+            values["lifttype"] = LIFT_ROTOR
+            values["mass"] = 0.5 * (ac["oew"] + ac["mtow"])
+            values["engnum"] = int(ac["n_engines"])
+            values["engpower"] = ac["engines"][0][1]
+
+        else:
+            # convert to known aircraft type
+            if actype not in self.actypes_fixwing:
+                warns.append(f"Warning: {actype} replaced by {DEFAULT_ACTYPE}")
+                actype = DEFAULT_ACTYPE
+
+            # populate fuel flow model
+            ac = self.acs_fixwing[actype]
+            e = next(iter(ac["engines"].values()))
+            coeff_a, coeff_b, coeff_c = thrust.compute_eng_ff_coeff(
+                e["ff_idl"], e["ff_app"], e["ff_co"], e["ff_to"]
+            )
+
+            values["lifttype"] = LIFT_FIXWING
+            values["Sref"] = ac["wa"]
+            values["mass"] = 0.5 * (ac["oew"] + ac["mtow"])
+            values["engnum"] = int(ac["n_engines"])
+            values["ff_coeff_a"] = coeff_a
+            values["ff_coeff_b"] = coeff_b
+            values["ff_coeff_c"] = coeff_c
+            values["engthrmax"] = e["thr"]
+            values["engbpr"] = e["bpr"]
+
+        # init type specific coefficients for flight envelops
+        if actype in self.limits_rotor.keys():  # rotorcraft
+            limits = self.limits_rotor[actype]
+            for field in ("vmin", "vmax", "vsmin", "vsmax", "hmax"):
+                values[field] = limits[field]
+            for field in ("cd0_clean", "k_clean", "cd0_to", "k_to",
+                          "cd0_ld", "k_ld", "delta_cd_gear"):
+                values[field] = np.nan
+
+        else:
+            if actype not in self.limits_fixwing.keys() or actype not in self.dragpolar_fixwing.keys():
+                actype = DEFAULT_ACTYPE
+
+            limits = self.limits_fixwing[actype]
+            for field in ("vminic", "vminer", "vminap", "vmaxic", "vmaxer", "vmaxap",
+                          "vsmin", "vsmax", "hmax", "axmax", "vminto", "mmo"):
+                values[field] = limits[field]
+            values["hcross"] = limits["crosscl"]
+
+            dragpolar = self.dragpolar_fixwing[actype]
+            for field in ("cd0_clean", "k_clean", "cd0_to", "k_to",
+                          "cd0_ld", "k_ld", "delta_cd_gear"):
+                values[field] = dragpolar[field]
+
+        return actype, values, warns
+
+    def get_typecodes(self, actypes):
+        """Get the type codes of a list of aircraft types.
+
+        Returns:
+            codes: array with the type code of each aircraft
+            warns: replacement warnings of the distinct types
+        """
+        default = self.typecode[DEFAULT_ACTYPE]
+        typecodes = {}
+        warns = []
+        for actype in dict.fromkeys(actypes):
+            code = self.typecode.get(actype)
+            if code is None:
+                code = default
+                warns.append(f"Warning: {actype} replaced by {DEFAULT_ACTYPE}")
+            else:
+                warns.extend(self.typewarn[code])
+            typecodes[actype] = code
+
+        return np.array([typecodes[actype] for actype in actypes], dtype=int), warns
+
     def _load_all_fixwing_flavor(self):
         import warnings
 
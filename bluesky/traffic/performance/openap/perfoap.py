@@ -59,128 +59,23 @@ class OpenAP(PerfBase):
             self.mmo = np.array([])
 
     def create(self, n=1):
-        # cautious! considering multiple created aircraft with same type
         super().create(n)
 
-        actype = bs.traf.type[-1].upper()
-        # print(self.coeff.dragpolar_fixwing)
-        # print(self.coeff.actypes_fixwing)
-        # Check synonym file if not in open ap actypes
-        # if (actype not in self.coeff.actypes_rotor) and (
-        #     actype not in self.coeff.dragpolar_fixwing):
-        if (actype not in self.coeff.actypes_rotor) and (
-                actype not in self.coeff.actypes_fixwing):
-
-            if actype in self.coeff.synodict.keys():
-                warn = f"Warning: {actype} replaced by {self.coeff.synodict[actype]}"
-                print(warn)
-                bs.scr.echo(warn)
-                actype = self.coeff.synodict[actype]
-
-        # initialize aircraft / engine performance parameters
-        # check fixwing or rotor, default to fixwing
-        if actype in self.coeff.actypes_rotor:
-            self.lifttype[-n:] = coeff.LIFT_ROTOR
-            self.mass[-n:] = 0.5 * (
-                self.coeff.acs_rotor[actype]["oew"]
-                + self.coeff.acs_rotor[actype]["mtow"]
-            )
-            self.engnum[-n:] = int(self.coeff.acs_rotor[actype]["n_engines"])
-            self.engpower[-n:] = self.coeff.acs_rotor[actype]["engines"][0][1]
+        # Gather the type coefficients of all new aircraft by type code
+        codes, warns = self.coeff.get_typecodes([actype.upper() for actype in bs.traf.type[-n:]])
+        for warn in warns:
+            print(warn)
+            bs.scr.echo(warn)
 
-        else:
-            # convert to known aircraft type
-            if actype not in self.coeff.actypes_fixwing:
-                warn = f"Warning: {actype} replaced by B744"
-                print(warn)
-                bs.scr.echo(warn)
-                actype = "B744"
-
-            # populate fuel flow model
-            es = self.coeff.acs_fixwing[actype]["engines"]
-            if len(list(es.keys())) == 0:
-                print(es)
-            e = es[list(es.keys())[0]]
-            coeff_a, coeff_b, coeff_c = thrust.compute_eng_ff_coeff(
-                e["ff_idl"], e["ff_app"], e["ff_co"], e["ff_to"]
-            )
-
-            self.lifttype[-n:] = coeff.LIFT_FIXWING
-
-            self.Sref[-n:] = self.coeff.acs_fixwing[actype]["wa"]
-            self.mass[-n:] = 0.5 * (
-                self.coeff.acs_fixwing[actype]["oew"]
-                + self.coeff.acs_fixwing[actype]["mtow"]
-            )
-
-            self.engnum[-n:] = int(self.coeff.acs_fixwing[actype]["n_engines"])
-
-            self.ff_coeff_a[-n:] = coeff_a
-            self.ff_coeff_b[-n:] = coeff_b
-            self.ff_coeff_c[-n:] = coeff_c
-
-            all_ac_engs = list(self.coeff.acs_fixwing[actype]["engines"].keys())
-            self.engthrmax[-n:] = self.coeff.acs_fixwing[actype]["engines"][
-                all_ac_engs[0]
-            ]["thr"]
-            self.engbpr[-n:] = self.coeff.acs_fixwing[actype]["engines"][
-                all_ac_engs[0]
-            ]["bpr"]
-
-        # init type specific coefficients for flight envelops
-        if actype in self.coeff.limits_rotor.keys():  # rotorcraft
-            self.vmin[-n:] = self.coeff.limits_rotor[actype]["vmin"]
-            self.vmax[-n:] = self.coeff.limits_rotor[actype]["vmax"]
-            self.vsmin[-n:] = self.coeff.limits_rotor[actype]["vsmin"]
-            self.vsmax[-n:] = self.coeff.limits_rotor[actype]["vsmax"]
-            self.hmax[-n:] = self.coeff.limits_rotor[actype]["hmax"]
-
-            self.vsmin[-n:] = self.coeff.limits_rotor[actype]["vsmin"]
-            self.vsmax[-n:] = self.coeff.limits_rotor[actype]["vsmax"]
-            self.hmax[-n:] = self.coeff.limits_rotor[actype]["hmax"]
-
-            self.cd0_clean[-n:] = np.nan
-            self.k_clean[-n:] = np.nan
-            self.cd0_to[-n:] = np.nan
-            self.k_to[-n:] = np.nan
-            self.cd0_ld[-n:] = np.nan
-            self.k_ld[-n:] = np.nan
-            self.delta_cd_gear[-n:] = np.nan
-
-        else:
-            if actype not in self.coeff.limits_fixwing.keys() or actype not in self.coeff.dragpolar_fixwing.keys():
-                actype = "B744"
-
-            self.vminic[-n:] = self.coeff.limits_fixwing[actype]["vminic"]
-            self.vminer[-n:] = self.coeff.limits_fixwing[actype]["vminer"]
-            self.vminap[-n:] = self.coeff.limits_fixwing[actype]["vminap"]
-            self.vmaxic[-n:] = self.coeff.limits_fixwing[actype]["vmaxic"]
-            self.vmaxer[-n:] = self.coeff.limits_fixwing[actype]["vmaxer"]
-            self.vmaxap[-n:] = self.coeff.limits_fixwing[actype]["vmaxap"]
-
-            self.vsmin[-n:] = self.coeff.limits_fixwing[actype]["vsmin"]
-            self.vsmax[-n:] = self.coeff.limits_fixwing[actype]["vsmax"]
-            self.hmax[-n:] = self.coeff.limits_fixwing[actype]["hmax"]
-            self.axmax[-n:] = self.coeff.limits_fixwing[actype]["axmax"]
-            self.vminto[-n:] = self.coeff.limits_fixwing[actype]["vminto"]
-            self.hcross[-n:] = self.coeff.limits_fixwing[actype]["crosscl"]
-            self.mmo[-n:] = self.coeff.limits_fixwing[actype]["mmo"]
-
-            self.cd0_clean[-n:] = self.coeff.dragpolar_fixwing[actype]["cd0_clean"]
-            self.k_clean[-n:] = self.coeff.dragpolar_fixwing[actype]["k_clean"]
-            self.cd0_to[-n:] = self.coeff.dragpolar_fixwing[actype]["cd0_to"]
-            self.k_to[-n:] = self.coeff.dragpolar_fixwing[actype]["k_to"]
-            self.cd0_ld[-n:] = self.coeff.dragpolar_fixwing[actype]["cd0_ld"]
-            self.k_ld[-n:] = self.coeff.dragpolar_fixwing[actype]["k_ld"]
-            self.delta_cd_gear[-n:] = self.coeff.dragpolar_fixwing[actype][
-                "delta_cd_gear"
-            ]
+        coeffs = self.coeff.table[codes]
+        for field in coeffs.dtype.names:
+            getattr(self, field)[-n:] = coeffs[field]
 
         # append update actypes, after removing unknown types
-        self.actype[-n:] = [actype] * n
+        self.actype[-n:] = [self.coeff.typename[code] for code in codes]
 
         # Update envelope speed limits
-        mask = np.zeros_like(self.actype, dtype=bool)
+        mask = np.zeros(len(self.actype), dtype=bool)
         mask[-n:] = True
         self.vmin[-n:], self.vmax[-n:] = self._construct_v_limits(mask)
 
@@ -217,7 +112,8 @@ class OpenAP(PerfBase):
         self.k[self.phase == ph.DE] = self.k_clean[self.phase == ph.DE]
         self.k[self.phase == ph.NA] = self.k_clean[self.phase == ph.NA]
 
-        rho = aero.vdensity(bs.traf.alt[idx_fixwing])
+        atmos = bs.traf.atmos[idx_fixwing]
+        rho = atmos.rho
         vtas = bs.traf.tas[idx_fixwing]
         rhovs = 0.5 * rho * vtas ** 2 * self.Sref[idx_fixwing]
         cl = self.mass[idx_fixwing] * aero.g0 / rhovs
@@ -230,7 +126,7 @@ class OpenAP(PerfBase):
             self.phase[idx_fixwing],
             self.engbpr[idx_fixwing],
             bs.traf.tas[idx_fixwing],
-            bs.traf.alt[idx_fixwing],
+            atmos,
             bs.traf.vs[idx_fixwing],
             self.engnum[idx_fixwing] * self.engthrmax[idx_fixwing],
         )
@@ -291,14 +187,15 @@ class OpenAP(PerfBase):
             floats or 1D-arrays: Allowed TAS, Allowed vetical rate, Allowed altitude
         """
         allow_h = np.where(intent_h > self.hmax, self.hmax, intent_h)
+        atmos = aero.AtmosState(allow_h)
 
-        intent_v_cas = aero.vtas2cas(intent_v_tas, allow_h)
+        intent_v_cas = aero.vtas2cas(intent_v_tas, atmos)
         allow_v_cas = np.where((intent_v_cas < self.vmin), self.vmin, intent_v_cas)
         allow_v_cas = np.where(intent_v_cas > self.vmax, self.vmax, allow_v_cas)
-        allow_v_tas = aero.vcas2tas(allow_v_cas, allow_h)
+        allow_v_tas = aero.vcas2tas(allow_v_cas, atmos)
         allow_v_tas = np.where(
-            aero.vtas2mach(allow_v_tas, allow_h) > self.mmo,
-            aero.vmach2tas(self.mmo, allow_h),
+            aero.vtas2mach(allow_v_tas, atmos) > self.mmo,
+            aero.vmach2tas(self.mmo, atmos),
             allow_v_tas,
         )  # maximum cannot exceed MMO
 
@@ -340,10 +237,11 @@ class OpenAP(PerfBase):
             floats or 1D-arrays: Min TAS, Max TAS, Min VS, Max VS
 
         """
-        vtasmin = aero.vcas2tas(self.vmin, bs.traf.alt)
+        atmos = aero.AtmosState(bs.traf.alt)
+        vtasmin = aero.vcas2tas(self.vmin, atmos)
 
         vtasmax = np.minimum(
-            aero.vcas2tas(self.vmax, bs.traf.alt), aero.vmach2tas(self.mmo, bs.traf.alt)
+            aero.vcas2tas(self.vmax, atmos), aero.vmach2tas(self.mmo, atmos)
         )
 
         if id is not None:
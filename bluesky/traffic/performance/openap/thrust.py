@@ -3,6 +3,13 @@ from bluesky.tools import aero
 from bluesky.traffic.performance.openap import phase as ph
 
 
+# Reference pressures and CAS of the inflight thrust model
+P10 = aero.vpressure(10000 * aero.ft)
+P35 = aero.vpressure(35000 * aero.ft)
+MACH_REF = 0.8
+VCAS_REF = aero.vmach2cas(MACH_REF, 35000 * aero.ft)
+
+
 def compute_max_thr_ratio(phase, bpr, v, h, vs, thr0):
     """Computer the dynamic thrust based on engine bypass-ratio, static maximum
     thrust, aircraft true airspeed, and aircraft altitude
@@ -12,7 +19,8 @@ def compute_max_thr_ratio(phase, bpr, v, h, vs, thr0):
             CR, DE, FA, LD, GD]
         bpr (int or 1D-array): engine bypass ratio
         v (int or 1D-array): aircraft true airspeed
-        h (int or 1D-array): aircraft altitude
+        h (int or 1D-array or AtmosState): aircraft altitude, or the
+            atmospheric state at the aircraft altitude
 
     Returns:
         int or 1D-array: thust in N
@@ -47,9 +55,10 @@ def tr_takeoff(bpr, v, h):
     """Compute thrust ration at take-off"""
     G0 = 0.0606 * bpr + 0.6337
     Mach = aero.vtas2mach(v, h)
-    P0 = aero.p0
-    P = aero.vpressure(h)
-    PP = P / P0
+    if isinstance(h, aero.AtmosState):
+        PP = h.delta
+    else:
+        PP = aero.vpressure(h) / aero.p0
 
     A = -0.4327 * PP ** 2 + 1.3855 * PP + 0.0472
     Z = 0.9106 * PP ** 3 - 1.7736 * PP ** 2 + 1.8697 * PP
@@ -86,13 +95,13 @@ def inflight(v, h, vs, thr0):
     vcas = aero.vtas2cas(v, h)
 
     p = aero.vpressure(h)
-    p10 = aero.vpressure(10000 * aero.ft)
-    p35 = aero.vpressure(35000 * aero.ft)
+    p10, p35 = P10, P35
+    alt = h.h if isinstance(h, aero.AtmosState) else h
 
     # approximate thrust at top of climb (REF 2)
     F35 = (200 + 0.2 * thr0 / 4.448) * 4.448
-    mach_ref = 0.8
-    vcas_ref = aero.vmach2cas(mach_ref, 35000 * aero.ft)
+    mach_ref = MACH_REF
+    vcas_ref = VCAS_REF
 
     # segment 3: alt > 35000:
     d = dfunc(mach / mach_ref)
@@ -110,9 +119,9 @@ def inflight(v, h, vs, thr0):
     ratio_seg1 = m * (p / p35) + (F10 / F35 - m * (p10 / p35))
 
     ratio = np.where(
-        h > 35000 * aero.ft,
+        alt > 35000 * aero.ft,
         ratio_seg3,
-        np.where(h > 10000 * aero.ft, ratio_seg2, ratio_seg1),
+        np.where(alt > 10000 * aero.ft, ratio_seg2, ratio_seg1),
     )
 
     # convert to maximum static thrust ratio
@@ -1,6 +1,6 @@
 """ Route implementation for the BlueSky FMS."""
 from os import path
-from weakref import WeakValueDictionary
+from weakref import WeakValueDictionary, finalize
 from numpy import *
 import bluesky as bs
 from bluesky.tools import geo
@@ -10,6 +10,7 @@ from bluesky.tools.misc import degto180, get_indices, txt2tim, txt2alt, txt2spd
 from bluesky.tools.position import txt2pos
 from bluesky import stack
 from bluesky.stack.cmdparser import Command, command, commandgroup
+from .routestore import RouteStore, column
 
 
 
@@ -23,6 +24,10 @@ class Route(Replaceable):
 
     For lat/lon waypoints: use call sign as wpname, number will be added
 
+    The waypoint data of all routes is kept in one RouteStore. The wp...
+    attributes of a route are list-like views on its waypoints in the store,
+    data() gives numpy views for vectorized calculations.
+
     Created by  : Jacco M. Hoekstra
     """
 
@@ -37,33 +42,52 @@ class Route(Replaceable):
     # Aircraft route objects
     _routes = WeakValueDictionary()
 
+    # Waypoint data of all routes
+    store = RouteStore()
+
+    # Waypoint data
+    wpname    = column('name')     # List of waypoint names for this flight plan
+    wptype    = column('type')     # List of waypoint types
+    wplat     = column('lat')      # List of waypoint latitudes
+    wplon     = column('lon')      # List of waypoint longitudes
+    wpalt     = column('alt')      # [m] negative value means not specified
+    wpspd     = column('spd')      # [m/s] negative value means not specified
+    wprta     = column('rta')      # [s] negative value means not specified
+    wpflyby   = column('flyby')    # Flyby (True)/flyover(False) switch
+    wpstack   = column('stack')    # Stack (tuple) with commands executed when passing this waypoint
+
+    # Made for drones: fly turn mode, means use specified turn radius and optionally turn speed
+    wpflyturn = column('flyturn')  # Flyturn (True) or flyover/flyby (False) switch
+    wpturnrad = column('turnrad')  # [nm] Turn radius per waypoint (<0 = not specified)
+    wpturnspd = column('turnspd')  # [kts] Turn speed (IAS/CAS) per waypoint (<0 = not specified)
+
+    # Flight plan calculations (see calcfp)
+    wpdirfrom = column('dirfrom')
+    wpdistto  = column('distto')
+    wpialt    = column('ialt')
+    wptoalt   = column('toalt')
+    wpxtoalt  = column('xtoalt')
+    wpirta    = column('irta')
+    wptorta   = column('torta')
+    wpxtorta  = column('xtorta')
+
     def __init__(self, acid):
         # Add self to dictionary of all aircraft routes
         Route._routes[acid] = self
         # Aircraft id (callsign) of the aircraft to which this route belongs
         self.acid = acid
-        self.nwp = 0
+
+        # Row of this route in the store, an existing route is emptied
+        if getattr(self, 'row', None) is None:
+            self.row = self.store.alloc()
+            finalize(self, self.store.free, self.row).atexit = False
+        else:
+            self.store.resize(self.row, 0)
 
         #Vertical fms logc: enable Top of CLimb & Top of Descent logic
         self.swtoc = True
         self.swtod = True
 
-        # Waypoint data
-        self.wpname = []    # List of waypoint names for this flight plan
-        self.wptype = []    # List of waypoint types
-        self.wplat  = []    # List of waypoint latitudes
-        self.wplon  = []    # List of waypoint longitudes
-        self.wpalt  = []    # [m] negative value means not specified
-        self.wpspd  = []    # [m/s] negative value means not specified
-        self.wprta  = []    # [m/s] negative value means not specified
-        self.wpflyby = []   # Flyby (True)/flyover(False) switch
-        self.wpstack = []   # Stack with command execured when passing this waypoint
-
-        # Made for drones: fly turn mode, means use specified turn radius and optionally turn speed
-        self.wpflyturn = []   # Flyturn (True) or flyover/flyby (False) switch
-        self.wpturnrad = []   # [nm] Turn radius per waypoint (<0 = not specified)
-        self.wpturnspd = []   # [kts] Turn speed (IAS/CAS) per waypoint (<0 = not specified)
-
         # Current actual waypoint
         self.iactwp = -1
 
@@ -81,13 +105,34 @@ class Route(Replaceable):
         # default: False
         self.flag_landed_runway = False
 
-        self.wpdirfrom = []
-        self.wpdistto  = []
-        self.wpialt    = []
-        self.wptoalt   = []
-        self.wpxtoalt  = []
-        self.wptorta   = []
-        self.wpxtorta  = []
+    @property
+    def nwp(self):
+        """ Number of waypoints, setting it truncates or extends the route. """
+        return int(self.store.length[self.row])
+
+    @nwp.setter
+    def nwp(self, n):
+        if n != self.nwp:
+            self.store.resize(self.row, n)
+
+    @property
+    def iactwp(self):
+        """ Index of the active waypoint. """
+        return int(self.store.iactwp[self.row])
+
+    @iactwp.setter
+    def iactwp(self, iwp):
+        self.store.iactwp[self.row] = iwp
+
+    @property
+    def version(self):
+        """ Version of the waypoint data, which changes with each edit. """
+        return int(self.store.version[self.row])
+
+    def data(self, name):
+        """ Numpy view on field name (see RouteStore.fields) of the
+            waypoints, valid until the next edit of a route. """
+        return self.store.get(self.row, name)
 
     @staticmethod
     def get_available_name(data, name_, len_=2):
@@ -533,15 +578,15 @@ class Route(Replaceable):
 
                             if argtypes[0]=="acid" and not (args[2].upper() in bs.traf.id):
                                 # missing acid, so add ownship acid
-                                acrte.wpstack[wpidx].append(acid+" "+" ".join(args[1:]))
+                                acrte.wpstack[wpidx] += (acid+" "+" ".join(args[1:]),)
                             else:
                                 # This command does not need an acid or it is already first argument
-                                acrte.wpstack[wpidx].append(" ".join(args[1:]))
+                                acrte.wpstack[wpidx] += (" ".join(args[1:]),)
                         except:
                             return False, "Stacked command "+cmd+"unknown"
                     else:
                         # Command line starts with an aircraft id at the beginning of the command line, stack it
-                        acrte.wpstack[wpidx].append(" ".join(args[1:]))
+                        acrte.wpstack[wpidx] += (" ".join(args[1:]),)
 
                 # Delete a constraint (or both) at this waypoint
                 elif args[0]=="DEL" or args[0]=="DELETE" or args[0]=="CLR" or args[0]=="CLEAR" :
@@ -557,7 +602,7 @@ class Route(Replaceable):
                         acrte.wpalt[wpidx]  = -999.
 
                     if swall:
-                        acrte.wpstack[wpidx]=[]
+                        acrte.wpstack[wpidx]=()
 
                 else:
                     return False,"No "+args[0]+" at ",atwp
@@ -599,33 +644,16 @@ class Route(Replaceable):
         wplat = (wplat + 90.) % 180. - 90.
         wplon = (wplon + 180.) % 360. - 180.
 
+        values = dict(name=wpname, lat=wplat, lon=wplon, alt=wpalt,
+                      spd=wpspd, type=wptype, flyby=self.swflyby,
+                      flyturn=self.swflyturn, turnrad=self.turnrad,
+                      turnspd=self.turnspd,
+                      rta=-999.0,  # initially no RTA
+                      stack=())
         if overwrt:
-            self.wpname[wpidx]  = wpname
-            self.wplat[wpidx]   = wplat
-            self.wplon[wpidx]   = wplon
-            self.wpalt[wpidx]   = wpalt
-            self.wpspd[wpidx]   = wpspd
-            self.wptype[wpidx]  = wptype
-            self.wpflyby[wpidx] = self.swflyby
-            self.wpflyturn[wpidx] = self.swflyturn
-            self.wpturnrad[wpidx] = self.turnrad
-            self.wpturnspd[wpidx] = self.turnspd
-            self.wprta[wpidx]   = -999.0 # initially no RTA
-            self.wpstack[wpidx] = []
-
+            self.store.set(self.row, wpidx, **values)
         else:
-            self.wpname.insert(wpidx, wpname)
-            self.wplat.insert(wpidx, wplat)
-            self.wplon.insert(wpidx, wplon)
-            self.wpalt.insert(wpidx, wpalt)
-            self.wpspd.insert(wpidx, wpspd)
-            self.wptype.insert(wpidx, wptype)
-            self.wpflyby.insert(wpidx, self.swflyby)
-            self.wpflyturn.insert(wpidx, self.swflyturn)
-            self.wpturnrad.insert(wpidx, self.turnrad)
-            self.wpturnspd.insert(wpidx, self.turnspd)
-            self.wprta.insert(wpidx,-999.0)       # initially no RTA
-            self.wpstack.insert(wpidx,[])
+            self.store.insert(self.row, wpidx, **values)
 
 
     def addwpt(self, iac, name, wptype, lat, lon, alt=-999., spd=-999., afterwp="", beforewp=""):
@@ -637,9 +665,6 @@ class Route(Replaceable):
 #        print ("spd = ",spd)
 #        print ("afterwp ="+afterwp)
 #        print
-        # For safety
-        self.nwp = len(self.wplat)
-
         name = name.upper().strip()
 
         wplat = lat
@@ -680,7 +705,6 @@ class Route(Replaceable):
                 self.insert_wpt_data(
                     wpidx, wprtename, wplat, wplon, wptype, alt, spd)
 
-                self.nwp += 1
                 if orig and self.iactwp >= 0:
                     self.iactwp += 1
                 elif not orig and self.iactwp < 0 and self.nwp == 1:
@@ -744,7 +768,6 @@ class Route(Replaceable):
                         False, wpidx, newname, wplat, wplon, wptype, alt, spd)
 
                 idx = wpidx
-                self.nwp += 1
 
             else:
                 idx = -1
@@ -920,83 +943,89 @@ class Route(Replaceable):
 
     def getnextwp(self):
         """Go to next waypoint and return data"""
+        return tuple(value[0] for value in Route.getnextwps([self]))
 
-        if self.flag_landed_runway:
-
-            # when landing, LNAV is switched off
-            lnavon = False
-
-            # no further waypoint
-            nextqdr = -999.
-
-            # and the aircraft just needs a fixed heading to
-            # remain on the runway
-            # syntax: HDG acid,hdg (deg,True)
-            name = self.wpname[self.iactwp]
-
-            # Change RW06,RWY18C,RWY24001 to resp. 06,18C,24
-            if "RWY" in name:
-                rwykey = name[8:10]
-            # also if it is only RW
-            else:
-                rwykey = name[7:9]
-
-            wphdg = bs.navdb.rwythresholds[name[:4]][rwykey][2]
-
-            # keep constant runway heading
-            stack.stack("HDG " + str(self.acid) + " " + str(wphdg))
-
-            # start decelerating
-            stack.stack("DELAY " + "10 " + "SPD " + str(self.acid) + " " + "10")
-
-            # delete aircraft
-            stack.stack("DELAY " + "42 " + "DEL " + str(self.acid))
+    @staticmethod
+    def getnextwps(routes):
+        """Go to next waypoint in each of the routes and return data
 
-            swlastwp = (self.iactwp == self.nwp - 1)
+           Returns the same data as getnextwp, as arrays with an element
+           for each route, gathered at once from the route store."""
+        store = Route.store
+        rows = array([route.row for route in routes], dtype=int)
+        landed = array([route.flag_landed_runway for route in routes], dtype=bool)
 
-            return self.wplat[self.iactwp],self.wplon[self.iactwp],   \
-                           self.wpalt[self.iactwp],self.wpspd[self.iactwp],   \
-                           self.wpxtoalt[self.iactwp],self.wptoalt[self.iactwp], \
-                           self.wpxtorta[self.iactwp], self.wptorta[self.iactwp], \
-                           lnavon,self.wpflyby[self.iactwp], \
-                           self.wpflyturn[self.iactwp],self.wpturnrad[self.iactwp],\
-                           self.wpturnspd[self.iactwp], \
-                           nextqdr, swlastwp
+        # When landed, LNAV is switched off and the aircraft keeps the
+        # runway heading
+        for j in flatnonzero(landed):
+            routes[j].stayonrunway()
 
         # Switch LNAV off when last waypoint has been passed
-        lnavon = self.iactwp < self.nwp -1
+        nwp = store.length[rows]
+        lnavon = ~landed & (store.iactwp[rows] < nwp - 1)
 
         # if LNAV on: increase counter
-        if lnavon:
-            self.iactwp += 1
+        store.iactwp[rows] += lnavon
+        iactwp = store.iactwp[rows]
 
         # Activate switch to indicate that this is the last waypoint (for lenient passing logic in actwp.Reached function)
-        swlastwp = (self.iactwp == self.nwp-1)
+        swlastwp = (iactwp == nwp - 1)
+
+        # Index in the waypoint arrays of the active waypoints
+        i = store.index(rows)
+        wpdata = store.data
 
-        nextqdr = self.getnextqdr()
+        # Direction of the next leg, no further waypoint when landed
+        nextqdr = full(len(rows), -999.)
+        hasnext = ~landed & (iactwp > -1) & (iactwp < nwp - 1)
+        inext = i[hasnext]
+        nextqdr[hasnext], _ = geo.qdrdist(wpdata['lat'][inext], wpdata['lon'][inext],
+                                          wpdata['lat'][inext + 1], wpdata['lon'][inext + 1])
 
         # in case that there is a runway, the aircraft should remain on it
         # instead of deviating to the airport centre
         # When there is a destination: current = runway, next  = Dest
         # Else: current = runway and this is also the last waypoint
-        if (self.wptype[self.iactwp] == 5 and
-                self.wpname[self.iactwp] == self.wpname[-1]) or \
-           (self.wptype[self.iactwp] == 5 and self.iactwp+1<self.nwp and
-                self.wptype[self.iactwp + 1] == 3):
+        for j in flatnonzero(~landed & (iactwp > -1) & (wpdata['type'][i] == 5)):
+            route = routes[j]
+            wptype, wpname = route.data('type'), route.data('name')
+            if wpname[iactwp[j]] == wpname[-1] or \
+                    (iactwp[j] + 1 < nwp[j] and wptype[iactwp[j] + 1] == 3):
+                route.flag_landed_runway = True
+
+        return wpdata['lat'][i], wpdata['lon'][i], \
+               wpdata['alt'][i], wpdata['spd'][i], \
+               wpdata['xtoalt'][i], wpdata['toalt'][i], \
+               wpdata['xtorta'][i], wpdata['torta'][i], \
+               lnavon, wpdata['flyby'][i], \
+               wpdata['flyturn'][i], wpdata['turnrad'][i], \
+               wpdata['turnspd'][i], \
+               nextqdr, swlastwp
 
-            self.flag_landed_runway = True
+    def stayonrunway(self):
+        """Keep a landed aircraft on the runway, and delete it after a while"""
+        # the aircraft just needs a fixed heading to
+        # remain on the runway
+        # syntax: HDG acid,hdg (deg,True)
+        name = self.wpname[self.iactwp]
+
+        # Change RW06,RWY18C,RWY24001 to resp. 06,18C,24
+        if "RWY" in name:
+            rwykey = name[8:10]
+        # also if it is only RW
+        else:
+            rwykey = name[7:9]
 
-        #print ("getnextwp:",self.wpname[self.iactwp],"   torta = ",self.wptorta[self.iactwp])
+        wphdg = bs.navdb.rwythresholds[name[:4]][rwykey][2]
 
+        # keep constant runway heading
+        stack.stack("HDG " + str(self.acid) + " " + str(wphdg))
 
-        return self.wplat[self.iactwp],self.wplon[self.iactwp],   \
-               self.wpalt[self.iactwp],self.wpspd[self.iactwp],   \
-               self.wpxtoalt[self.iactwp],self.wptoalt[self.iactwp],\
-               self.wpxtorta[self.iactwp],self.wptorta[self.iactwp],\
-               lnavon,self.wpflyby[self.iactwp], \
-               self.wpflyturn[self.iactwp], self.wpturnrad[self.iactwp], \
-               self.wpturnspd[self.iactwp], \
-               nextqdr, swlastwp
+        # start decelerating
+        stack.stack("DELAY " + "10 " + "SPD " + str(self.acid) + " " + "10")
+
+        # delete aircraft
+        stack.stack("DELAY " + "42 " + "DEL " + str(self.acid))
 
     def runactwpstack(self):
         for cmdline in self.wpstack[self.iactwp]:
@@ -1050,14 +1079,7 @@ class Route(Replaceable):
         if acrte.iactwp == wpidx and not wpidx == acrte.nwp - 1:
             acrte.direct(acidx, acrte.wpname[wpidx + 1])
 
-        acrte.nwp =acrte.nwp - 1
-        del acrte.wpname[wpidx]
-        del acrte.wplat[wpidx]
-        del acrte.wplon[wpidx]
-        del acrte.wpalt[wpidx]
-        del acrte.wpspd[wpidx]
-        del acrte.wprta[wpidx]
-        del acrte.wptype[wpidx]
+        acrte.store.delete(acrte.row, wpidx)
         if acrte.iactwp > wpidx:
             acrte.iactwp = max(0, acrte.iactwp - 1)
 
@@ -1198,133 +1220,86 @@ class Route(Replaceable):
                 lat = f*self.wplat[j]+(1.-f)*self.wplat[j+1]
                 lon = f*self.wplon[j]+(1.-f)*self.wplon[j+1]
 
-                self.wpname.insert(j,name[i])
-                self.wptype.insert(j,Route.calcwp)
-                self.wplat.insert(j,lat)
-                self.wplon.insert(j,lon)
-                self.wpalt.insert(j,alt[i])
-                self.wpspd.insert(j,-999.)
+                self.store.insert(self.row, j, name=name[i], type=Route.calcwp,
+                                  lat=lat, lon=lon, alt=alt[i], spd=-999.)
 
     def insertcalcwp(self, i, name):
         """Insert empty wp with no attributes at location i"""
 
-        self.wpname.insert(i,name)
-        self.wplat.insert(i,0.)
-        self.wplon.insert(i,0.)
-        self.wpalt.insert(i,-999.)
-        self.wpspd.insert(i,-999.)
-        self.wptype.insert(i,Route.calcwp)
+        self.store.insert(self.row, i, name=name, lat=0., lon=0., alt=-999.,
+                          spd=-999., type=Route.calcwp)
 
     def calcfp(self): # Current Flight Plan calculations, which actualize based on flight condition
-        """Do flight plan calculations"""
-#        self.delwpt("T/D")
-#        self.delwpt("T/C")
-
-        # Direction to waypoint
-        self.nwp = len(self.wpname)
-
-        # Create flight plan calculation table
-        self.wpdirfrom   = self.nwp*[0.]
-        self.wpdistto    = self.nwp*[0.]
-        self.wpialt      = self.nwp*[-1]
-        self.wptoalt     = self.nwp*[-999.]
-        self.wpxtoalt    = self.nwp*[1.]  # Avoid division by zero
-        self.wpirta      = self.nwp*[-1]
-        self.wptorta     = self.nwp*[-999.]
-        self.wpxtorta    = self.nwp*[1.]  #[m] Avoid division by zero
-
-        # No waypoints: make empty variables to be safe and return: nothing to do
-        if self.nwp==0:
+        """Do flight plan calculations, on the waypoint arrays of this route"""
+        nwp = self.nwp
+
+        # Reset flight plan calculation table
+        for name in ('dirfrom', 'distto', 'ialt', 'toalt', 'xtoalt', 'irta', 'torta', 'xtorta'):
+            self.data(name)[:] = RouteStore.fields[name][1]
+
+        # No waypoints: nothing to do
+        if nwp==0:
             return
 
         # Calculate lateral leg data
         # LNAV: Calculate leg distances and directions
-
-        for i in range(0, self.nwp - 1):
-            qdr,dist = geo.qdrdist(self.wplat[i]  ,self.wplon[i],
-                                self.wplat[i+1],self.wplon[i+1])
-            self.wpdirfrom[i] = qdr
-            self.wpdistto[i+1]  = dist #[nm]  distto is in nautical miles
-
-        if self.nwp>1:
-            self.wpdirfrom[-1] = self.wpdirfrom[-2]
+        wpdirfrom = self.data('dirfrom')
+        wpdistto  = self.data('distto')
+        if nwp>1:
+            wplat, wplon = self.data('lat'), self.data('lon')
+            qdr, dist = geo.qdrdist(wplat[:-1], wplon[:-1], wplat[1:], wplon[1:])
+            wpdirfrom[:-1] = qdr
+            wpdirfrom[-1]  = qdr[-1]
+            wpdistto[1:]   = dist #[nm]  distto is in nautical miles
+
+        # Distance [m] along the route from the first waypoint
+        xroute = cumsum(wpdistto)*nm
 
         # Calculate longitudinal leg data
         # VNAV: calc next altitude constraint: index, altitude and distance to it
-        ialt = -1     # index to waypoint with next altitude constraint
-        toalt = -999. # value of next altitude constraint
-        xtoalt = 0.   # distance to next altitude constraint from this wp
-        for i in range(self.nwp-1,-1,-1):
-
-            # waypoint with altitude constraint (dest of al specified)
-            if self.wptype[i]==Route.dest:
-                ialt   = i
-                toalt  = 0.
-                xtoalt = 0.                # [m]
-
-            elif self.wpalt[i] >= 0:
-                ialt   = i
-                toalt  = self.wpalt[i]
-                xtoalt = 0.                # [m]
-
-            # waypoint with no altitude constraint:keep counting
-            else:
-                if i!=self.nwp-1:
-                    xtoalt = xtoalt + self.wpdistto[i+1]*nm  # [m] xtoalt is in meters!
-                else:
-                    xtoalt = 0.0
-
-            self.wpialt[i]   = ialt
-            self.wptoalt[i]  = toalt   #[m]
-            self.wpxtoalt[i] = xtoalt  #[m]
+        # Waypoints with altitude constraint: destination or altitude specified
+        isdest = self.data('type')==Route.dest
+        wpalt  = self.data('alt')
+        ialt   = nextflagged(isdest + (wpalt>=0.))
+        wptoalt = self.data('toalt')
+        self.data('ialt')[:] = ialt
+        wptoalt[:] = where(ialt<0, -999., where(isdest[ialt], 0., wpalt[ialt]))  #[m]
+
+        # Distance to the constraint, or to the last waypoint when there is none
+        iend = where(ialt<0, nwp-1, ialt)
+        self.data('xtoalt')[:] = xroute[iend] - xroute  #[m]
 
         # RTA: calc next rta constraint: index, altitude and distance to it
         # If any RTA.
-        if any(array(self.wprta)>=0.0):
-            #print("Yes, I found RTAs")
-            irta = -1       # index of wp
-            torta = -999.   # next rta value
-            xtorta = 0.     # distance to next rta
-            for i in range(self.nwp - 1, -1, -1):
-
-                # waypoint with rta: reset counter, update rts
-                if self.wprta[i] >= 0:
-                    irta = i
-                    torta = self.wprta[i]
-                    xtorta = 0.  # [m]
-
-                # waypoint with no altitude constraint:keep counting
-                else:
-                    if i != self.nwp - 1:
-                        # No speed or rta constraint: add to xtorta
-                        if self.wpspd[i] <= 0.0:
-                            xtorta = xtorta + self.wpdistto[i + 1] * nm  # [m] xtoalt is in meters!
-                        else:
-                            # speed constraint on this leg: shift torta to account for this
-                            # altitude unknown
-                            if self.wptoalt[i] >0.:
-                                alt = toalt
-                            else:
-                                # TODO: current a/c altitude would be better guess, but not accessible here
-                                # as we do not know aircraft index for this route
-                                alt = 10000.*ft # default to minimize errors, when no alt constraints are present
-                            legtas = casormach2tas(self.wpspd[i],alt)
-                            #TODO: account for wind at this position vy adding wind vectors to waypoints?
-
-                            # xtorta stays the same! This leg will not be available for RTA scheduling, so distance
-                            # is not in xtorta. Therefore we need to subtract legtime to ignore this leg for the RTA
-                            # scheduling
-                            legtime = self.wpdistto[i+1]/legtas
-                            torta = torta - legtime
-                    else:
-                        xtorta = 0.0
-                        torta = -999.0
-
-                self.wpirta[i]   = irta
-                self.wptorta[i]  = torta  # [s]
-                self.wpxtorta[i] = xtorta  # [m]
-            #print("wpxtorta=",self.wpxtorta)
-            #print("wptorta=", self.wptorta)
+        wprta = self.data('rta')
+        if (wprta>=0.0).any():
+            irta = nextflagged(wprta>=0.)
+            iend = where(irta<0, nwp-1, irta)
+
+            # Legs without speed constraint count for the distance to the RTA.
+            # On legs with a speed constraint, the time on the leg is subtracted
+            # from torta instead, as these legs are not available for RTA scheduling
+            legdist = zeros(nwp)
+            legdist[:-1] = wpdistto[1:]*nm
+            wpspd  = self.data('spd')
+            spdleg = flatnonzero(wpspd[:-1]>0.)
+            legdist[spdleg] = 0.
+
+            # Altitude unknown: use the first altitude constraint, or a default
+            # to minimize errors when no alt constraints are present
+            # TODO: current a/c altitude would be better guess, but not accessible here
+            # as we do not know aircraft index for this route
+            legtime = zeros(nwp)
+            legtime[spdleg] = [wpdistto[i+1]/casormach2tas(wpspd[i], wptoalt[0] if wptoalt[i]>0. else 10000.*ft)
+                               for i in spdleg]
+
+            # Cumulative distance and time from the first waypoint
+            xcum = concatenate(([0.], cumsum(legdist[:-1])))
+            tcum = concatenate(([0.], cumsum(legtime[:-1])))
+
+            self.data('irta')[:]   = irta
+            self.data('torta')[:]  = where(irta<0, -999., wprta[irta]) - (tcum[iend] - tcum)  # [s]
+            self.data('xtorta')[:] = xcum[iend] - xcum  # [m]
 
     def findact(self,i):
         """ Find best default active waypoint.
@@ -1339,8 +1314,8 @@ class Route(Replaceable):
             return 0
 
         # Find closest
-        wplat  = array(self.wplat)
-        wplon  = array(self.wplon)
+        wplat  = self.data('lat')
+        wplon  = self.data('lon')
         dy = (wplat - bs.traf.lat[i])
         dx = (wplon - bs.traf.lon[i]) * bs.traf.coslat[i]
         dist2 = dx*dx + dy*dy
@@ -1394,9 +1369,17 @@ class Route(Replaceable):
     def getnextqdr(self):
         # get qdr for next leg
         if -1 < self.iactwp < self.nwp - 1:
-            nextqdr, dist = geo.qdrdist(\
-                        self.wplat[self.iactwp],  self.wplon[self.iactwp],\
-                        self.wplat[self.iactwp+1],self.wplon[self.iactwp+1])
+            i = self.store.index(self.row)  # Index in the waypoint arrays
+            wplat, wplon = self.store.data['lat'], self.store.data['lon']
+            nextqdr, dist = geo.qdrdist(wplat[i], wplon[i], wplat[i+1], wplon[i+1])
         else:
             nextqdr = -999.
         return nextqdr
+
+
+def nextflagged(flags):
+    """ Index of the first waypoint at or after each waypoint for which flags
+        is True, -1 when there is none. """
+    n = len(flags)
+    inext = minimum.accumulate(where(flags, arange(n), n)[::-1])[::-1]
+    return where(inext<n, inext, -1)
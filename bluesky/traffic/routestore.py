@@ -0,0 +1,292 @@
+''' Fleet-wide store of the waypoint data of all aircraft routes. '''
+from collections.abc import Sequence
+import numpy as np
+
+
+# Minimum number of waypoints reserved for a route
+MIN_ROUTE_CAPACITY = 8
+
+# Minimum size of the flat waypoint arrays
+MIN_STORE_SIZE = 1024
+
+
+class RouteStore:
+    ''' Waypoint data of all routes, in compressed sparse row (CSR) layout.
+
+        Each waypoint field is one flat, typed array. The waypoints of a
+        route (a row of the store) are a contiguous block of these arrays,
+        starting at offset[row], of which the first length[row] elements
+        are used. A route that outgrows its block (capacity[row]) is moved
+        to the end of the arrays, and the arrays are compacted when more
+        than half of their used size is taken by unused blocks.
+
+        Views on the waypoints of a route (see get) are only valid until
+        the next edit of a route. The version of a route is changed by each
+        edit, and is unique in the store. '''
+
+    # Waypoint fields: type and default value
+    fields = dict(
+        name=(object, ''),       # Waypoint name
+        type=(np.int8, 0),       # Waypoint type (see Route)
+        lat=(float, 0.0),        # [deg] Latitude
+        lon=(float, 0.0),        # [deg] Longitude
+        alt=(float, -999.),      # [m] Altitude constraint (<0: none)
+        spd=(float, -999.),      # [m/s] CAS or Mach constraint (<0: none)
+        rta=(float, -999.),      # [s] Required time of arrival (<0: none)
+        flyby=(bool, True),      # Flyby (True)/flyover (False) switch
+        flyturn=(bool, False),   # Flyturn switch
+        turnrad=(float, -999.),  # [nm] Turn radius (<0: not specified)
+        turnspd=(float, -999.),  # [m/s] Turn speed (<0: not specified)
+        stack=(object, ()),      # Stack commands issued when passing
+        # Flight plan calculations (see Route.calcfp)
+        dirfrom=(float, 0.0),    # [deg] Direction of the leg from the waypoint
+        distto=(float, 0.0),     # [nm] Length of the leg to the waypoint
+        ialt=(int, -1),          # Index of the next altitude constraint
+        toalt=(float, -999.),    # [m] Next altitude constraint
+        xtoalt=(float, 1.0),     # [m] Distance to the next altitude constraint
+        irta=(int, -1),          # Index of the next RTA
+        torta=(float, -999.),    # [s] Next RTA
+        xtorta=(float, 1.0))     # [m] Distance to the next RTA
+
+    def __init__(self):
+        self.data = {name: np.empty(0, dtype=dtype)
+                     for name, (dtype, _) in self.fields.items()}
+        self.size = 0       # Used size of the waypoint arrays
+        self.nunused = 0    # Size of the unused blocks in the used size
+
+        # Per route: offset, number of waypoints, reserved size, active
+        # waypoint and version
+        self.nrows = 0
+        self.offset = np.zeros(0, dtype=int)
+        self.length = np.zeros(0, dtype=int)
+        self.capacity = np.zeros(0, dtype=int)
+        self.iactwp = np.zeros(0, dtype=int)
+        self.version = np.zeros(0, dtype=int)
+        self.freerows = []
+        self.nedits = 0
+
+    def alloc(self):
+        ''' Add an empty route and return its row. '''
+        if self.freerows:
+            row = self.freerows.pop()
+        else:
+            row = self.nrows
+            self.nrows += 1
+            if self.nrows > len(self.offset):
+                size = max(64, 2 * self.nrows)
+                for name in ('offset', 'length', 'capacity', 'iactwp', 'version'):
+                    arr = np.zeros(size, dtype=int)
+                    arr[:row] = getattr(self, name)[:row]
+                    setattr(self, name, arr)
+        self.offset[row] = self.size
+        self.length[row] = self.capacity[row] = 0
+        self.iactwp[row] = -1
+        self.edited(row)
+        return row
+
+    def free(self, row):
+        ''' Remove the route in row. '''
+        self.clearobjects(self.offset[row], self.offset[row] + self.capacity[row])
+        self.nunused += self.capacity[row]
+        self.length[row] = self.capacity[row] = 0
+        self.iactwp[row] = -1
+        self.freerows.append(row)
+
+    def edited(self, row):
+        ''' Give route row a new version. '''
+        self.nedits += 1
+        self.version[row] = self.nedits
+
+    def get(self, row, name):
+        ''' Return a view on the values of field name of route row. '''
+        off = self.offset[row]
+        return self.data[name][off:off + self.length[row]]
+
+    def index(self, rows, iwp=None):
+        ''' Return the indices in the waypoint arrays of waypoint iwp
+            (default: the active waypoint) of routes rows. '''
+        return self.offset[rows] + (self.iactwp[rows] if iwp is None else iwp)
+
+    def insert(self, row, iwp, **values):
+        ''' Insert a waypoint before index iwp (like list.insert) in route
+            row. Fields without a value get their default value. '''
+        n = self.length[row]
+        iwp = min(max(0, n + iwp if iwp < 0 else iwp), n)
+        self.reserve(row, n + 1)
+        i0, i1 = self.offset[row] + iwp, self.offset[row] + n
+        for name, arr in self.data.items():
+            if i0 < i1:
+                arr[i0 + 1:i1 + 1] = arr[i0:i1]
+            arr[i0] = values.get(name, self.fields[name][1])
+        self.length[row] += 1
+        self.edited(row)
+
+    def set(self, row, iwp, **values):
+        ''' Set field values of waypoint iwp of route row. '''
+        i = self.offset[row] + (self.length[row] + iwp if iwp < 0 else iwp)
+        for name, value in values.items():
+            self.data[name][i] = value
+        self.edited(row)
+
+    def delete(self, row, iwp):
+        ''' Delete waypoint iwp from route row. '''
+        n = self.length[row]
+        iwp = n + iwp if iwp < 0 else iwp
+        i0, i1 = self.offset[row] + iwp, self.offset[row] + n
+        for arr in self.data.values():
+            arr[i0:i1 - 1] = arr[i0 + 1:i1]
+        self.clearobjects(i1 - 1, i1)
+        self.length[row] -= 1
+        self.edited(row)
+
+    def resize(self, row, n):
+        ''' Truncate route row, or extend it with default waypoints. '''
+        nwp = self.length[row]
+        self.reserve(row, n)
+        off = self.offset[row]
+        if n > nwp:
+            for name, arr in self.data.items():
+                value = self.fields[name][1]
+                if arr.dtype == object:
+                    for i in range(off + nwp, off + n):
+                        arr[i] = value
+                else:
+                    arr[off + nwp:off + n] = value
+        else:
+            self.clearobjects(off + n, off + nwp)
+        self.length[row] = n
+        self.edited(row)
+
+    def setcolumn(self, row, name, values):
+        ''' Set all values of field name of route row, the route is resized
+            to the number of values. '''
+        if len(values) != self.length[row]:
+            self.resize(row, len(values))
+        arr = self.get(row, name)
+        if arr.dtype == object:
+            for i, value in enumerate(values):
+                arr[i] = value
+        else:
+            arr[:] = values
+        self.edited(row)
+
+    def clearobjects(self, i0, i1):
+        ''' Release the objects referenced by unused object elements. '''
+        for arr in self.data.values():
+            if arr.dtype == object:
+                arr[i0:i1] = None
+
+    def reserve(self, row, n):
+        ''' Make room for n waypoints in route row. '''
+        off, cap = self.offset[row], self.capacity[row]
+        if n <= cap:
+            return
+        newcap = max(MIN_ROUTE_CAPACITY, n, 2 * cap)
+        if off + cap == self.size:
+            # Last block of the arrays: grow in place
+            self.grow(off + newcap)
+        else:
+            # Move the route to the end of the arrays
+            newoff = self.size
+            self.grow(newoff + newcap)
+            nwp = self.length[row]
+            for arr in self.data.values():
+                arr[newoff:newoff + nwp] = arr[off:off + nwp]
+            self.clearobjects(off, off + cap)
+            self.nunused += cap
+            self.offset[row] = newoff
+        self.capacity[row] = newcap
+        if self.nunused > self.size // 2:
+            self.compact()
+
+    def grow(self, size):
+        ''' Set the used size of the arrays, and enlarge them if necessary. '''
+        if size > len(self.data['lat']):
+            newsize = max(MIN_STORE_SIZE, size, len(self.data['lat']) * 3 // 2)
+            for name, arr in self.data.items():
+                self.data[name] = np.empty(newsize, dtype=arr.dtype)
+                self.data[name][:self.size] = arr[:self.size]
+        self.size = size
+
+    def compact(self):
+        ''' Remove the unused blocks from the arrays. '''
+        rows = np.flatnonzero(self.capacity[:self.nrows] > 0)
+        cap = self.capacity[rows]
+        newoff = np.cumsum(cap) - cap
+        size = int(cap.sum())
+        idx = np.repeat(self.offset[rows] - newoff, cap) + np.arange(size)
+        for name, arr in self.data.items():
+            self.data[name] = np.empty(len(arr), dtype=arr.dtype)
+            self.data[name][:size] = arr[idx]
+        self.offset[:self.nrows] = size
+        self.offset[rows] = newoff
+        self.size = size
+        self.nunused = 0
+
+
+class WaypointColumn(Sequence):
+    ''' List-like view on one waypoint field of a route in the store.
+
+        Indexing returns python values, and slicing returns lists, like the
+        waypoint lists that routes used to have. Use array for a view on
+        the values in the store. '''
+    __slots__ = ('store', 'row', 'name')
+
+    def __init__(self, store, row, name):
+        self.store = store
+        self.row = row
+        self.name = name
+
+    @property
+    def array(self):
+        return self.store.get(self.row, self.name)
+
+    def __len__(self):
+        return int(self.store.length[self.row])
+
+    def __getitem__(self, i):
+        value = self.array[i]
+        if isinstance(i, slice):
+            return value.tolist()
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __setitem__(self, i, value):
+        self.array[i] = value
+        self.store.edited(self.row)
+
+    def __iter__(self):
+        return iter(self.array.tolist())
+
+    def __contains__(self, value):
+        return value in self.array.tolist()
+
+    def index(self, value, *args):
+        return self.array.tolist().index(value, *args)
+
+    def count(self, value):
+        return self.array.tolist().count(value)
+
+    def __eq__(self, other):
+        if isinstance(other, (Sequence, np.ndarray)) and not isinstance(other, str):
+            return self.array.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.array, dtype=dtype)
+
+    def __repr__(self):
+        return repr(self.array.tolist())
+
+
+def column(name, doc=None):
+    ''' Route property with a list-like view on field name of the route's
+        waypoints. Assigning a sequence replaces all values of the field. '''
+    def fget(route):
+        return WaypointColumn(route.store, route.row, name)
+
+    def fset(route, values):
+        route.store.setcolumn(route.row, name, values)
+
+    return property(fget, fset, doc=doc)
@@ -1,3 +1,4 @@
+from functools import lru_cache
 import bluesky as bs
 import numpy as np
 from bluesky.tools import geo, aero
@@ -32,6 +33,71 @@ class TrackmilesCalculation():
         return self.curr_dtg_ref
 
 
+# Scalar (ISA) cas2tas, cached, as waypoint speed/altitude constraints often repeat
+cas2tas_cached = lru_cache(maxsize=4096)(aero.cas2tas)
+
+
+def constraint_tas(spd, alt, default):
+    """ TAS at the given speed/altitude constraints, or default when there
+        is no speed constraint (spd < 0). """
+    tas = np.array(default, dtype=float)
+    spec = np.flatnonzero(spd >= 0.)
+    tas.flat[spec] = [cas2tas_cached(float(s), float(a)) for s, a in
+                      zip(np.ravel(spd)[spec], np.ravel(alt)[spec])]
+    return tas
+
+
+class RouteDistances:
+    """ Cached remaining distance along a route (including the arcs to fly by
+        the waypoints) from each of its waypoints to the end of the route.
+        The distances are recalculated when the route has been edited, which
+        is detected with the version of the route in the route store. """
+    def __init__(self):
+        self.version = None
+        self.remaining = np.array([])
+        self.lastidx = dict()
+
+    def update(self, route):
+        """ Recalculate the distances when the route has changed. """
+        if route.version == self.version:
+            return
+        self.version = route.version
+
+        names = route.data('name')
+        nwp = len(names)
+        # Index of the (last) waypoint with each name, apart from the last waypoint
+        self.lastidx = {name: i for i, name in enumerate(names[:-1].tolist())}
+        self.remaining = np.zeros(max(0, nwp - 1))
+        if nwp < 2:
+            return
+
+        # Operate on the waypoint arrays of the route in the route store
+        lat, lon = route.data('lat'), route.data('lon')
+        qdr, section_distance = geo.kwikqdrdist(lat[:-1], lon[:-1], lat[1:], lon[1:])
+
+        # Distance before and after each intermediate waypoint to turn, and the turn arc
+        dir_in, dir_out = qdr[:-1], qdr[1:]
+        spd = route.data('spd')[1:-1]
+        alt = route.data('alt')[1:-1]
+        # XXX temporary, just to have a number when there are no constraints
+        wpt_tas = constraint_tas(np.where(alt < 0., -999., spd), alt, np.full(nwp - 2, 128.0))
+        turn_dist, turn_rad = calcturn(wpt_tas, 0.436, dir_in, dir_out, -999.)
+        arc_dist = turn_rad * np.radians(np.abs(degto180(dir_out % 360. - dir_in % 360.))) / 1852
+        turn_corr = arc_dist - 2 * turn_dist / 1852
+
+        # Remaining distance from waypoint j: sections j..nwp-2, and turns j+1..nwp-2
+        self.remaining = np.cumsum(section_distance[::-1])[::-1]
+        self.remaining[:-1] += np.cumsum(turn_corr[::-1])[::-1]
+
+    def get(self, route):
+        """ Remaining distance along the route from the active waypoint. """
+        self.update(route)
+        if route.nwp < 2:
+            return 0.0
+        j = self.lastidx.get(route.data('name')[route.iactwp])
+        return 0.0 if j is None else self.remaining[j]
+
+
 def get_hdg_changes(section_dir):
     hdg_change = []
     for i in range(1, len(section_dir)):
@@ -115,39 +181,29 @@ def calcturn(tas,bank,wpqdr,next_wpqdr,turnradnm=-999.):
 
 def get_dist_to_next_wpt_curve(traf, idx):
     #Distance to next waypoint including the arc to flyby the waypoint
+    #idx can be a single aircraft index, or an index array or slice
 
     #1. Get the distance from ownship to next waypoint
-    dist_to_next_wpt = geo.kwikdist(traf.lat[idx], traf.lon[idx], traf.actwp.lat[idx], traf.actwp.lon[idx])
+    brg, dist_to_next_wpt = geo.kwikqdrdist(traf.lat[idx], traf.lon[idx], traf.actwp.lat[idx], traf.actwp.lon[idx])
 
     #2. Get the arc along the waypoint and the distance before wpt when turn starts
     dir_out = np.where(traf.actwp.next_qdr[idx] < -900., traf.actwp.next_qdr[idx], traf.actwp.next_qdr[idx] % 360.)
-    brg = np.radians(geo.kwikqdrdist(traf.lat[idx], traf.lon[idx], traf.actwp.lat[idx], traf.actwp.lon[idx])[0])
-    hdg = np.radians(traf.hdg[idx])
-    wpt_tas = traf.tas[idx]
 
     spd_constr = traf.actwp.nextspd[idx]
     alt_constr = traf.actwp.nextaltco[idx]
     # If there is no speed constraint at the next waypoint, use current speed for best guess
-    if spd_constr >= 0.0:
-        wpt_tas = aero.cas2tas(spd_constr, alt_constr)
-    else:
-        wpt_tas = traf.tas[idx]
+    wpt_tas = constraint_tas(spd_constr, alt_constr, traf.tas[idx])
 
-    turn_dist_next, turn_rad_next = calcturn(wpt_tas, 0.436, np.degrees(brg), dir_out, -999.)
-    arc_dist_next = turn_rad_next * np.radians(np.abs(degto180(dir_out%360. - np.degrees(brg)%360.)))
+    turn_dist_next, turn_rad_next = calcturn(wpt_tas, 0.436, brg, dir_out, -999.)
+    arc_dist_next = turn_rad_next * np.radians(np.abs(degto180(dir_out%360. - brg%360.)))
 
     #3. Add together to get the required distance
 
     # if there is no next waypoint, dir_out is set to -999 and this give quirks when
     # calculating the final section of route, so account for that
-    if dir_out > -360.:
-        distance_to_next_incl_arc = dist_to_next_wpt - 2*(turn_dist_next / 1852) + arc_dist_next / 1852
-    else:
-        distance_to_next_incl_arc = dist_to_next_wpt
-
-    print("INFO: ", np.degrees(hdg), np.degrees(brg), dir_out, dist_to_next_wpt, turn_dist_next / 1852, arc_dist_next / 1852)
-
-    return distance_to_next_incl_arc
+    return np.where(dir_out > -360.,
+                    dist_to_next_wpt - 2*(turn_dist_next / 1852) + arc_dist_next / 1852,
+                    dist_to_next_wpt)
 
 def get_dist_to_next_wpt_straight(traf, idx):
     #Distance to next waypoint including the arc to flyby the waypoint
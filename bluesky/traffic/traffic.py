@@ -13,13 +13,14 @@ from random import randint
 import numpy as np
 
 import bluesky as bs
-from bluesky.core import Entity, timed_function
+from bluesky.core import Entity, profiler, timed_function
 from bluesky.stack import refdata
+from bluesky.stack import recorder
 from bluesky.stack.recorder import savecmd
-from bluesky.tools import geo, Functions
+from bluesky.tools import geo, Functions, windgrid
 from bluesky.tools.misc import latlon2txt, angleFromCoordinate, get_indices
 from bluesky.tools.aero import cas2tas, casormach2tas, fpm, kts, ft, g0, Rearth, nm, tas2cas,\
-                         vatmos,  vtas2cas, vtas2mach, vcasormach
+                         vatmos,  vtas2cas, vtas2mach, vcasormach, AtmosState
 
 
 from bluesky.traffic.asas import ConflictDetection, ConflictResolution
@@ -64,6 +65,7 @@ class Traffic(Entity):
         Traffic()            :  constructor
         reset()              :  Reset traffic database w.r.t a/c data
         create(acid,actype,aclat,aclon,achdg,acalt,acspd) : create aircraft
+        crebatch(acid,actype,aclat,aclon,achdg,acalt,acspd) : create a batch of aircraft
         delete(acid)         : delete an aircraft from traffic data
         deletall()           : delete all traffic
         update(sim)          : do a numerical integration step
@@ -82,16 +84,26 @@ class Traffic(Entity):
 
         self.ntraf = 0
 
+        # Index of each aircraft id in the traffic arrays (ids are unique)
+        self.idmap = dict()
+
         self.cond = Condition()  # Conditional commands list
         self.wind = WindSim()
         self.turbulence = Turbulence()
         self.translvl = 5000.*ft # [m] Default transition level
 
+        # Atmospheric state at the aircraft altitudes, computed once per update
+        self.atmos = AtmosState(np.array([]))
+
+        # Creation batches staged for a (timed) CREBATCH command
+        self.crebatches = dict()
+        self.ncrebatch = 0
+
         self.HighRes = False
         self.Wind_DB = ""
 
-        self.df_1 = ""
-        self.df_2 = ""
+        self.windgrid_1 = None
+        self.windgrid_2 = None
         self.HR_Loaded = False
         self.activate_HR = False
 
@@ -198,6 +210,11 @@ class Traffic(Entity):
         # This ensures that the traffic arrays (which size is dynamic)
         # are all reset as well, so all lat,lon,sdp etc but also objects adsb
         super().reset()
+        self.idmap.clear()
+        self.cond.reset()
+        self.atmos = AtmosState(np.array([]))
+        self.crebatches.clear()
+        self.ncrebatch = 0
 
         # reset performance model
         self.perf.reset()
@@ -238,7 +255,7 @@ class Traffic(Entity):
 
         if isinstance(acid, str):
             # Check if not already exist
-            if self.id.count(acid.upper()) > 0:
+            if acid.upper() in self.idmap:
                 return False, acid + " already exists."  # already exists do nothing
             acid = n * [acid]
 
@@ -264,6 +281,7 @@ class Traffic(Entity):
         # Aircraft Info
         self.id[-n:]   = acid
         self.type[-n:] = actype
+        self.idmap.update(zip(self.id[-n:], range(self.ntraf - n, self.ntraf)))
 
         # Positions
         self.lat[-n:]  = aclat
@@ -333,6 +351,8 @@ class Traffic(Entity):
 
         # Record as individual CRE commands for repeatability
         #print(self.ntraf-n,self.ntraf)
+        if recorder.savefile is None:
+            return
         for j in range(self.ntraf-n,self.ntraf):
             # Reconstruct CRE command
             line = "CRE "+",".join([self.id[j],self.type[j],
@@ -343,6 +363,77 @@ class Traffic(Entity):
             # So insert a dummy command to record the line
             savecmd("---",line)
 
+    def crebatch(self, acid, actype, aclat, aclon, achdg, acalt, acspd, source=None, ssr=None):
+        """ Create a batch of aircraft from column arrays, with one create(n)
+            for all traffic arrays.
+
+            Arguments (one value per aircraft):
+            - acid, actype: callsigns and aircraft types
+            - aclat, aclon, achdg: position [deg] and heading [deg]
+            - acalt, acspd: altitude [m] and CAS [m/s] or Mach
+            - source: optional data feed source ('' or None: simulated)
+            - ssr: optional SSR code (NaN: not set)
+
+            Aircraft that already exist are skipped, and a callsign that
+            occurs more than once is only created from its first entry.
+            Returns the number of created aircraft. """
+        acid = [str(name).upper() for name in acid]
+        first = dict()
+        for i, name in enumerate(acid):
+            first.setdefault(name, i)
+        idx = [i for i in first.values() if acid[i] not in self.idmap]
+        n = len(idx)
+        if n == 0:
+            return 0
+
+        i0 = self.ntraf
+        actype = list(actype)
+        self.cre([acid[i] for i in idx], [str(actype[i]).upper() for i in idx],
+                 np.array(aclat, dtype=float)[idx], np.array(aclon, dtype=float)[idx],
+                 np.array(achdg, dtype=float)[idx], np.array(acalt, dtype=float)[idx],
+                 np.array(acspd, dtype=float)[idx])
+
+        if source is not None:
+            source = list(source)
+            source = [source[i] or '' for i in idx]
+            ifeed = np.flatnonzero(source)
+            self.trafdatafeed.source[i0:] = source
+            self.trafdatafeed.datafeed[i0 + ifeed] = True
+            self.trafdatafeed.datafeedids += [self.id[i0 + i] for i in ifeed]
+
+        if ssr is not None:
+            ssr = np.array(ssr, dtype=float)[idx]
+            iset = np.flatnonzero(np.isfinite(ssr))
+            self.lvnlvars.ssr[i0 + iset] = ssr[iset]
+
+        # Record data feed and SSR settings as individual commands
+        if recorder.savefile is not None:
+            for j in range(i0, self.ntraf):
+                if self.trafdatafeed.datafeed[j]:
+                    savecmd("---", f"SETDATAFEED {self.id[j]} {self.trafdatafeed.source[j]}")
+                if ssr is not None and np.isfinite(ssr[j - i0]):
+                    savecmd("---", f"SSRCODE {self.id[j]} {self.lvnlvars.ssr[j]}")
+        return n
+
+    def stagebatch(self, acid, actype, aclat, aclon, achdg, acalt, acspd, source=None, ssr=None):
+        """ Stage a batch of aircraft for creation with a (timed) CREBATCH
+            command. Takes the same arguments as crebatch(), and returns
+            the name of the batch to pass to CREBATCH. """
+        self.ncrebatch += 1
+        name = f'BATCH{self.ncrebatch}'
+        self.crebatches[name] = dict(acid=acid, actype=actype, aclat=aclat,
+                                     aclon=aclon, achdg=achdg, acalt=acalt,
+                                     acspd=acspd, source=source, ssr=ssr)
+        return name
+
+    def crestaged(self, name):
+        """ CREBATCH command: create the aircraft of a staged batch. """
+        batch = self.crebatches.pop(name.upper(), None)
+        if batch is None:
+            return False, f"CREBATCH: No staged batch named {name}"
+        self.crebatch(**batch)
+        return True
+
     def creconfs(self, acid, actype, targetidx, dpsi, dcpa, tlosh, dH=None, tlosv=None, spd=None):
         ''' Create an aircraft in conflict with target aircraft.
 
@@ -424,9 +515,21 @@ class Traffic(Entity):
         if isinstance(idx, Collection):
             idx = np.sort(idx)
 
+        # Remove deleted aircraft from the id index
+        delidx = np.atleast_1d(np.arange(self.ntraf)[idx])
+        for i in delidx:
+            self.idmap.pop(self.id[i], None)
+
         # Call the actual delete function
         super().delete(idx)
 
+        # Remove and remap the conditional commands of aircraft
+        self.cond.delac(delidx)
+
+        # Aircraft after the first deleted aircraft have moved
+        start = np.min(delidx, initial=len(self.id))
+        self.idmap.update(zip(self.id[start:], range(start, len(self.id))))
+
         # Update number of aircraft
         self.ntraf = len(self.lat)
         return True
@@ -436,19 +539,27 @@ class Traffic(Entity):
         if self.ntraf == 0:
             return
         #---------- Atmosphere --------------------------------
-        self.p, self.rho, self.Temp = vatmos(self.alt)
+        # Computed once, and used by autopilot, performance and kinematics
+        t = profiler.tic()
+        self.atmos = AtmosState(self.alt)
+        self.p, self.rho, self.Temp = self.atmos.p, self.atmos.rho, self.atmos.T
 
         #---------- HighRes Meteo -----------------------------
         if self.HighRes == True:
             self.updateHighRes()
+        t = profiler.toc('traffic.atmos', t)
 
         #---------- ADSB Update -------------------------------
         self.adsb.update()
+        t = profiler.toc('traffic.adsb', t)
 
         #---------- Fly the Aircraft --------------------------
         self.ap.update()  # Autopilot logic
+        t = profiler.toc('traffic.ap', t)
         self.update_asas()  # Airborne Separation Assurance
+        t = profiler.toc('traffic.asas', t)
         self.aporasas.update()   # Decide to use autopilot or ASAS for commands
+        t = profiler.toc('traffic.aporasas', t)
 
         #---------- Performance Update ------------------------
         self.perf.update()
@@ -457,11 +568,13 @@ class Traffic(Entity):
         self.aporasas.tas, self.aporasas.vs, self.aporasas.alt = \
             self.perf.limits(self.aporasas.tas, self.aporasas.vs,
                              self.aporasas.alt, self.ax)
+        t = profiler.toc('traffic.perf', t)
 
         #---------- Kinematics --------------------------------
         self.update_airspeed()
         self.update_groundspeed()
         self.update_pos()
+        t = profiler.toc('traffic.kinematics', t)
 
         # --------- Update from data --------------------------
         self.trafdatafeed.update()
@@ -471,9 +584,11 @@ class Traffic(Entity):
 
         # Check whether new traffic state triggers conditional commands
         self.cond.update()
+        t = profiler.toc('traffic.cond', t)
 
         #---------- Aftermath ---------------------------------
         self.trails.update()
+        profiler.toc('traffic.trails', t)
 
     @timed_function(name='asas', dt=bs.settings.asas_dt, manual=True)
     def update_asas(self):
@@ -488,8 +603,8 @@ class Traffic(Entity):
         self.ax = need_ax * np.sign(delta_spd) * self.perf.axmax
         # Update velocities
         self.tas = np.where(need_ax, self.tas + self.ax * bs.sim.simdt, self.aporasas.tas)
-        self.cas = vtas2cas(self.tas, self.alt)
-        self.M = vtas2mach(self.tas, self.alt)
+        self.cas = vtas2cas(self.tas, self.atmos)
+        self.M = vtas2mach(self.tas, self.atmos)
 
         # Turning
         turnrate = np.degrees(g0 * np.tan(np.where(self.ap.turnphi>self.eps,self.ap.turnphi,self.ap.bankdef) \
@@ -556,18 +671,13 @@ class Traffic(Entity):
         """Find index of aircraft id"""
         if not isinstance(acid, str):
             # id2idx is called for multiple id's
-            # Fast way of finding indices of all ACID's in a given list
-            tmp = dict((v, i) for i, v in enumerate(self.id))
-            return [tmp.get(acidi, -1) for acidi in acid]
+            return [self.idmap.get(acidi, -1) for acidi in acid]
         else:
              # Catch last created id (* or # symbol)
             if acid in ('#', '*'):
                 return self.ntraf - 1
 
-            try:
-                return self.id.index(acid.upper())
-            except:
-                return -1
+            return self.idmap.get(acid.upper(), -1)
 
     def idselect2idx(self):
         """
@@ -581,10 +691,7 @@ class Traffic(Entity):
         """
 
         if self.id_select != '':
-            try:
-                return self.id.index(self.id_select.upper())
-            except:
-                return -1
+            return self.idmap.get(self.id_select.upper(), -1)
         else:
             return -1
 
@@ -641,7 +748,7 @@ class Traffic(Entity):
             Function:   Function that activates the high resolution meteo data mode.
             Args:
                 - self
-                - name: the name of the database in which the meteo data is stored
+                - name: the name of the database, or the .npz file, in which the meteo data is stored
                 - flag: the on/off switch
             Returns: -
 
@@ -651,6 +758,7 @@ class Traffic(Entity):
 
         self.HighRes = flag
         self.Wind_DB = name
+        self.windgrid_1 = self.windgrid_2 = None
         if self.HighRes:
             print("HighResolution Meteo mode has been initialised.")
             self.wind.winddim = 1
@@ -661,7 +769,7 @@ class Traffic(Entity):
 
     def updateHighRes(self):
         """
-            Function:   Updates the highres meteo data every minute, and loads the new data every 10 minutes
+            Function:   Updates the highres meteo data every 10 seconds, and loads the new data every 10 minutes
             Args:
                 - self
             Returns: -
@@ -673,26 +781,25 @@ class Traffic(Entity):
             """ Only goes here when 10 seconds have past. """
             if (str(bs.sim.utc)[17:] == "00" and str(bs.sim.utc)[15] == "0") or self.activate_HR == True:
                 """ Only goes here every 10 minutes, which is when the new weather data must be loaded. """
-                self.prev_timestamp, self.next_timestamp = Functions.utc2stamps(bs.sim.utc)
-                self.df_1 = Functions.query_DB_to_DF(self.Wind_DB,"SELECT * FROM " + self.Wind_DB + " WHERE timestamp_data = " + str(self.prev_timestamp))
-                self.df_2 = Functions.query_DB_to_DF(self.Wind_DB,"SELECT * FROM " + self.Wind_DB + " WHERE timestamp_data = " + str(self.next_timestamp))
+                prev_timestamp, next_timestamp = Functions.utc2stamps(bs.sim.utc)
+                # Reuse the snapshot that was already loaded as next snapshot of the previous period
+                if self.windgrid_2 is not None and prev_timestamp == self.next_timestamp:
+                    self.windgrid_1 = self.windgrid_2
+                else:
+                    self.windgrid_1 = windgrid.load(self.Wind_DB, prev_timestamp)
+                self.windgrid_2 = windgrid.load(self.Wind_DB, next_timestamp)
+                self.prev_timestamp, self.next_timestamp = prev_timestamp, next_timestamp
                 self.HR_Loaded = True
                 self.activate_HR = False
 
             if self.HR_Loaded:
-                base = floor(len(self.lat) * int(str(bs.sim.utc)[17:])/60)
-                top  = ceil(len(self.lat) * int(str(bs.sim.utc)[17:])/60) + ceil(len(self.lat) * 10/60)
-                if top >= len(self.lat):
-                    top -= 1
-                for idx in range(top - base):
-                    """ Fill the uwind and vwind variables. """
-                    timefrac = Functions.utc2frac(bs.sim.utc, self.prev_timestamp)
-                    if self.lat[idx + base] >= 49 and self.lat[idx + base] <= 55.9 and self.lon[idx + base] >= -1 and self.lon[idx + base] <= 9.9:
-                        value1 = Functions.find_datapoint_timeframe(self.df_1,[self.prev_timestamp, self.alt[idx + base] / 0.3048,self.lat[idx + base], self.lon[idx + base]])
-                        value2 = Functions.find_datapoint_timeframe(self.df_2,[self.next_timestamp, self.alt[idx + base] / 0.3048,self.lat[idx + base], self.lon[idx + base]])
-                        self.windnorth[idx + base] = Functions.time_interpolation(timefrac, value1[4], value2[4])
-                        self.windeast[idx + base] = Functions.time_interpolation(timefrac, value1[5], value2[5])
-
+                """ Fill the uwind and vwind variables of all aircraft within the meteo grid. """
+                timefrac = Functions.utc2frac(bs.sim.utc, self.prev_timestamp)
+                inside1, uwind1, vwind1 = self.windgrid_1.interpolate(self.lat, self.lon, self.alt / ft)
+                inside2, uwind2, vwind2 = self.windgrid_2.interpolate(self.lat, self.lon, self.alt / ft)
+                inside = inside1 & inside2
+                self.windnorth[inside] = Functions.time_interpolation(timefrac, uwind1, uwind2)[inside]
+                self.windeast[inside] = Functions.time_interpolation(timefrac, vwind1, vwind2)[inside]
 
     def setnoise(self, noise=None):
         """Noise (turbulence, ADBS-transmission noise, ADSB-truncated effect)"""
@@ -6,6 +6,105 @@ from bluesky import settings
 from bluesky.core import TrafficArrays
 
 
+# Register settings defaults
+settings.set_variable_defaults(trails_maxmem=50.0)
+
+# Minimum capacity of the trail segment store
+MIN_SEGMENTS = 1024
+
+
+class TrailSegments:
+    """
+    Circular store of trail segments (line pieces).
+
+    The store is grown (by doubling its capacity) until it reaches
+    maxsegments, after which the oldest segments are overwritten. Each
+    appended segment gets a sequence number, which is used to select
+    ranges of segments, like the segments added since a given moment.
+    """
+
+    fields = dict(lat0=float, lon0=float, lat1=float, lon1=float,
+                  time=float, colidx=np.uint8)
+
+    # Memory use of one segment [bytes]
+    segsize = sum(np.dtype(dtype).itemsize for dtype in fields.values())
+
+    def __init__(self, maxsegments):
+        self.maxsegments = max(1, int(maxsegments))
+        self.clear()
+
+    def clear(self):
+        """ Remove all segments. """
+        self.data = {name: np.empty(0, dtype=dtype)
+                     for name, dtype in self.fields.items()}
+        # Total number of appended segments: sequence number of the next one
+        self.nadded = 0
+
+    @property
+    def capacity(self):
+        return len(self.data['time'])
+
+    @property
+    def first(self):
+        """ Sequence number of the oldest stored segment. """
+        return max(0, self.nadded - self.capacity)
+
+    def append(self, **values):
+        """ Append segments, values are arrays or scalars per field. """
+        n = max(np.size(value) for value in values.values())
+        # Segments that don't fit in the store are never stored
+        nskip = max(0, n - self.maxsegments)
+        if nskip:
+            values = {name: value[nskip:] if np.size(value) > 1 else value
+                      for name, value in values.items()}
+            self.nadded += nskip
+            n -= nskip
+
+        # Grow the store. Because the store is only full (and wrapped)
+        # at its maximum capacity, segment i is still stored at position i.
+        if self.nadded + n > self.capacity and self.capacity < self.maxsegments:
+            capacity = min(self.maxsegments, max(MIN_SEGMENTS, 2 * (self.nadded + n)))
+            for name, arr in self.data.items():
+                self.data[name] = np.empty(capacity, dtype=arr.dtype)
+                self.data[name][:len(arr)] = arr
+
+        # Write the segments, wrapping around at the end of the store
+        i0 = self.nadded % self.capacity
+        n0 = min(n, self.capacity - i0)
+        for name, arr in self.data.items():
+            value = values[name]
+            if np.size(value) > 1:
+                arr[i0:i0 + n0] = value[:n0]
+                arr[:n - n0] = value[n0:]
+            else:
+                arr[i0:i0 + n0] = value
+                arr[:n - n0] = value
+        self.nadded += n
+
+    def keep(self, start=0, stop=None):
+        """ Only keep the segments with sequence numbers from start up to
+            stop. The kept segments are renumbered, starting at zero.
+            Returns the old sequence number of the first kept segment. """
+        start = max(start, self.first)
+        self.data = {name: self.get(name, start, stop).copy() for name in self.data}
+        self.nadded = self.capacity
+        return start
+
+    def get(self, name, start=0, stop=None):
+        """ Return the values of field name for the stored segments with
+            sequence numbers from start up to stop. This is a view on the
+            store, unless the segments wrap around its end. """
+        arr = self.data[name]
+        start = max(start, self.first)
+        stop = self.nadded if stop is None else min(stop, self.nadded)
+        if stop <= start:
+            return arr[:0]
+        i0, i1 = start % self.capacity, (stop - 1) % self.capacity + 1
+        if i0 < i1:
+            return arr[i0:i1]
+        return np.concatenate((arr[i0:], arr[:i1]))
+
+
 class Trails(TrafficArrays):
     """
     Traffic trails class definition    : Data for trails
@@ -15,6 +114,10 @@ class Trails(TrafficArrays):
 
     Members: see create
 
+    Trail segments are kept in a TrailSegments store, with a maximum memory
+    use of trails_maxmem [MB]. The foreground (lat0, ...), background
+    (bglat0, ...) and new (newlat0, ...) segments are ranges of this store.
+
     Created by  : Jacco M. Hoekstra
     """
 
@@ -34,162 +137,163 @@ class Trails(TrafficArrays):
         # Set default color to Blue
         self.defcolor = self.colorList['CYAN']
 
-        # Foreground data on line pieces
-        self.lat0 = np.array([])
-        self.lon0 = np.array([])
-        self.lat1 = np.array([])
-        self.lon1 = np.array([])
-        self.time = np.array([])
-        self.col  = []
-        self.fcol = np.array([])
-
-        # background copy of data
-        self.bglat0 = np.array([])
-        self.bglon0 = np.array([])
-        self.bglat1 = np.array([])
-        self.bglon1 = np.array([])
-        self.bgtime = np.array([])
-        self.bgcol = []
+        # Colour table, indexed by the colour index of aircraft and segments.
+        # The default colour has index 0 (the traffic array default).
+        self.colornames = ['CYAN'] + [name for name in self.colorList if name != 'CYAN']
+        self.coltable = np.array([self.colorList[name] for name in self.colornames])
+
+        # Store of all line pieces
+        self.segments = TrailSegments(settings.trails_maxmem * 1e6 / TrailSegments.segsize)
+
+        # Sequence numbers of the first foreground, and first new line piece
+        self.ifg = 0
+        self.inew = 0
 
         with self.settrafarrays():
-            self.accolor = []
+            self.accolidx = np.array([], dtype=np.uint8)
             self.lastlat = np.array([])
             self.lastlon = np.array([])
             self.lasttim = np.array([])
 
-        self.clearnew()
-
         return
 
     def create(self,n=1):
         super().create(n)
 
-        self.accolor[-1] = self.defcolor
-        self.lastlat[-1] = bs.traf.lat[-1]
-        self.lastlon[-1] = bs.traf.lon[-1]
+        self.lastlat[-n:] = bs.traf.lat[-n:]
+        self.lastlon[-n:] = bs.traf.lon[-n:]
 
     def update(self):
         self.acid    = bs.traf.id
         if not self.active:
-            self.lastlat = bs.traf.lat
-            self.lastlon = bs.traf.lon
+            self.lastlat[:] = bs.traf.lat
+            self.lastlon[:] = bs.traf.lon
             self.lasttim[:] = bs.sim.simt
             return
         """Add linepieces for trails based on traffic data"""
 
-        # Use temporary list/array for fast append
-        lstlat0 = []
-        lstlon0 = []
-        lstlat1 = []
-        lstlon1 = []
-        lsttime = []
-
         # Check for update
         delta = bs.sim.simt - self.lasttim
-        idxs = np.where(delta > self.dt)[0]
-
-        # Add all a/c which need the update
-        # if len(idxs)>0:
-        #     print "len(idxs)=",len(idxs)
-
-        for i in idxs:
-            # Add to lists
-            lstlat0.append(self.lastlat[i])
-            lstlon0.append(self.lastlon[i])
-            lstlat1.append(bs.traf.lat[i])
-            lstlon1.append(bs.traf.lon[i])
-            lsttime.append(bs.sim.simt)
-
-            if isinstance(self.col, np.ndarray):
-                # print type(trailcol[i])
-                # print trailcol[i]
-                # print "col type: ",type(self.col)
-                self.col = self.col.tolist()
-
-            type(self.col)
-            self.col.append(self.accolor[i])
-
-            # Update aircraft record
-            self.lastlat[i] = bs.traf.lat[i]
-            self.lastlon[i] = bs.traf.lon[i]
-            self.lasttim[i] = bs.sim.simt
-
-        # When a/c is no longer part of trail semgment,
-        # it is no longer a/c data => move to the GUI buffer (send or draw)
-        if self.pygame:
-            # Pygame: send to drawing buffer
-            self.lat0 = np.concatenate((self.lat0, np.array(lstlat0)))
-            self.lon0 = np.concatenate((self.lon0, np.array(lstlon0)))
-            self.lat1 = np.concatenate((self.lat1, np.array(lstlat1)))
-            self.lon1 = np.concatenate((self.lon1, np.array(lstlon1)))
-            self.time = np.concatenate((self.time, np.array(lsttime)))
-        else:
-            # QtGL: add to send buffer
-            self.newlat0.extend(lstlat0)
-            self.newlon0.extend(lstlon0)
-            self.newlat1.extend(lstlat1)
-            self.newlon1.extend(lstlon1)
-        # Update colours
-        self.fcol = (1. - np.minimum(self.tcol0, np.abs(bs.sim.simt - self.time)) / self.tcol0)
+        idxs = np.flatnonzero(delta > self.dt)
+        if len(idxs) == 0:
+            return
+
+        # Add line pieces of all a/c which need the update
+        self.segments.append(lat0=self.lastlat[idxs], lon0=self.lastlon[idxs],
+                             lat1=bs.traf.lat[idxs], lon1=bs.traf.lon[idxs],
+                             time=bs.sim.simt, colidx=self.accolidx[idxs])
+
+        # Update aircraft record
+        self.lastlat[idxs] = bs.traf.lat[idxs]
+        self.lastlon[idxs] = bs.traf.lon[idxs]
+        self.lasttim[idxs] = bs.sim.simt
 
         return
 
-    def buffer(self):
-        """Buffer trails: Move current stack to background """
+    # Aircraft colours
+    @property
+    def accolor(self):
+        return self.coltable[self.accolidx]
+
+    # Foreground data on line pieces (pygame)
+    @property
+    def lat0(self):
+        return self.segments.get('lat0', self.ifg)
+
+    @property
+    def lon0(self):
+        return self.segments.get('lon0', self.ifg)
+
+    @property
+    def lat1(self):
+        return self.segments.get('lat1', self.ifg)
+
+    @property
+    def lon1(self):
+        return self.segments.get('lon1', self.ifg)
+
+    @property
+    def time(self):
+        return self.segments.get('time', self.ifg)
+
+    @property
+    def col(self):
+        return self.coltable[self.segments.get('colidx', self.ifg)]
+
+    @property
+    def fcol(self):
+        return (1. - np.minimum(self.tcol0, np.abs(bs.sim.simt - self.time)) / self.tcol0)
 
-        self.bglat0 = np.append(self.bglat0, self.lat0)
-        self.bglon0 = np.append(self.bglon0, self.lon0)
-        self.bglat1 = np.append(self.bglat1, self.lat1)
-        self.bglon1 = np.append(self.bglon1, self.lon1)
-        self.bgtime = np.append(self.bgtime, self.time)
+    # Background data on line pieces (pygame)
+    @property
+    def bglat0(self):
+        return self.segments.get('lat0', stop=self.ifg)
 
-        # No color saved: Background: always 'old color' self.col0
-        if isinstance(self.bgcol, np.ndarray):
-            self.bgcol = self.bgcol.tolist()
-        if isinstance(self.col, np.ndarray):
-            self.col = self.col.tolist()
+    @property
+    def bglon0(self):
+        return self.segments.get('lon0', stop=self.ifg)
 
-        self.bgcol = self.bgcol + self.col
-        self.bgacid = self.bgacid + self.acid
+    @property
+    def bglat1(self):
+        return self.segments.get('lat1', stop=self.ifg)
 
-        self.clearfg()  # Clear foreground trails
+    @property
+    def bglon1(self):
+        return self.segments.get('lon1', stop=self.ifg)
+
+    @property
+    def bgtime(self):
+        return self.segments.get('time', stop=self.ifg)
+
+    @property
+    def bgcol(self):
+        return self.coltable[self.segments.get('colidx', stop=self.ifg)]
+
+    # New line pieces, to send to the QtGL gui. These are copies, because
+    # stream data is sent without copying, and the store is reused.
+    @property
+    def newlat0(self):
+        return self.segments.get('lat0', self.inew).copy()
+
+    @property
+    def newlon0(self):
+        return self.segments.get('lon0', self.inew).copy()
+
+    @property
+    def newlat1(self):
+        return self.segments.get('lat1', self.inew).copy()
+
+    @property
+    def newlon1(self):
+        return self.segments.get('lon1', self.inew).copy()
+
+    def buffer(self):
+        """Buffer trails: Move current stack to background """
+        self.ifg = self.segments.nadded
         return
 
     def clearnew(self):
         # Clear new lines pipeline used for QtGL
-        self.newlat0 = []
-        self.newlon0 = []
-        self.newlat1 = []
-        self.newlon1 = []
-
+        self.inew = self.segments.nadded
 
     def clearfg(self):  # Foreground
         """Clear trails foreground"""
-        self.lat0 = np.array([])
-        self.lon0 = np.array([])
-        self.lat1 = np.array([])
-        self.lon1 = np.array([])
-        self.time = np.array([])
-        self.col = np.array([])
+        offset = self.segments.keep(stop=self.ifg)
+        self.ifg = self.segments.nadded
+        self.inew = min(max(0, self.inew - offset), self.ifg)
         return
 
     def clearbg(self):  # Background
         """Clear trails background"""
-        self.bglat0 = np.array([])
-        self.bglon0 = np.array([])
-        self.bglat1 = np.array([])
-        self.bglon1 = np.array([])
-        self.bgtime = np.array([])
-        self.bgacid = []
+        offset = self.segments.keep(start=self.ifg)
+        self.inew = max(0, self.inew - offset)
+        self.ifg = 0
         return
 
     def clear(self):
         """Clear all data, Foreground and background"""
-        self.lastlon = np.array([])
-        self.lastlat = np.array([])
-        self.clearfg()
-        self.clearbg()
-        self.clearnew()
+        self.segments.clear()
+        self.ifg = self.inew = 0
         return
 
     def setTrails(self, *args):
@@ -225,7 +329,7 @@ class Trails(TrafficArrays):
 
     def changeTrailColor(self, color, idx):
         """Change color of aircraft trail"""
-        self.accolor[idx] = self.colorList[color]
+        self.accolidx[idx] = self.colornames.index(color)
         return
 
     def reset(self):
@@ -15,7 +15,8 @@ settings.set_variable_defaults(
     text_size=13,
     ac_size=16,
     asas_vmin=200.0,
-    asas_vmax=500.0
+    asas_vmax=500.0,
+    histsymb_max=8
 )
 
 palette.set_default_colours(
@@ -132,8 +133,8 @@ class Traffic(glh.RenderObject, layer=100):
         self.asasn.create(MAX_NAIRCRAFT * 24, glh.GLBuffer.StreamDraw)
         self.asase.create(MAX_NAIRCRAFT * 24, glh.GLBuffer.StreamDraw)
         self.rpz.create(MAX_NAIRCRAFT * 4, glh.GLBuffer.StreamDraw)
-        self.histsymblat.create(MAX_NAIRCRAFT * 16, glh.GLBuffer.StreamDraw)
-        self.histsymblon.create(MAX_NAIRCRAFT * 16, glh.GLBuffer.StreamDraw)
+        self.histsymblat.create(MAX_NAIRCRAFT * 4 * settings.histsymb_max, glh.GLBuffer.StreamDraw)
+        self.histsymblon.create(MAX_NAIRCRAFT * 4 * settings.histsymb_max, glh.GLBuffer.StreamDraw)
 
         # --------------- Label data ---------------
 
@@ -423,109 +424,43 @@ class Traffic(glh.RenderObject, layer=100):
                 self.asasn.update(np.array(data.asasn, dtype=np.float32))
                 self.asase.update(np.array(data.asase, dtype=np.float32))
 
+            # Only the first MAX_NAIRCRAFT aircraft are drawn
+            nac = min(naircraft, MAX_NAIRCRAFT)
+            acid = np.asarray(data.id[:nac], dtype=str)
+            inconf = np.asarray(data.inconf[:nac], dtype=bool)
+
             # CPA lines to indicate conflicts
             ncpalines   = np.count_nonzero(data.inconf)
             cpalines    = np.zeros(4 * ncpalines, dtype=np.float32)
             self.cpalines.set_vertex_count(2 * ncpalines)
-
-            # Labels
-            rawlabel    = ''
-            rawlabel_lvnl = ''
-            rawmlabel   = ''
-            rawssrlabel = ''
-
-            # Label position
-            if data.id != self.id_prev:
-                idchange = True
-                idcreate = np.setdiff1d(data.id, self.id_prev).tolist()
+            iconf = np.flatnonzero(inconf)
+            if len(iconf):
+                lat, lon = np.asarray(data.lat)[iconf], np.asarray(data.lon)[iconf]
+                dist = np.asarray(data.tcpamax)[iconf] * np.asarray(data.gs)[iconf] / nm
+                lat1, lon1 = geo.qdrpos(lat, lon, np.asarray(data.trk)[iconf], dist)
+                cpalines[:4 * len(iconf)] = np.column_stack((lat, lon, lat1, lon1)).ravel()
+
+            # Colours: conflict, selected aircraft, custom or default colour
+            color = np.empty((nac, 4), dtype=np.uint8)
+            color[:] = tuple(palette.aircraft) + (255,)
+            ingroup = np.asarray(data.ingroup[:nac], dtype=np.int64).view(np.uint64)
+            # In reverse order, so that the first matching group sets the colour
+            for groupmask, groupcolor in reversed(list(actdata.custgrclr.items())):
+                color[(ingroup & np.uint64(groupmask)) != 0, :3] = groupcolor
+            for custid, custcolor in actdata.custacclr.items():
+                color[acid == custid, :3] = custcolor
+            if actdata.atcmode != 'BLUESKY':
+                color[acid == console.Console._instance.id_select] = (218, 218, 0, 255)
+            color[inconf] = tuple(palette.conflict) + (255,)
+
+            # Aircraft selected to show SSD
+            selssd = np.zeros(naircraft, dtype=np.uint8)
+            if actdata.ssd_all:
+                selssd[:nac] = 255
             else:
-                idchange = False
-                idcreate = []
-            labelpos      = np.empty((min(naircraft, MAX_NAIRCRAFT), 2), dtype=np.float32)
-            leaderlinepos = np.empty((min(naircraft, MAX_NAIRCRAFT), 4), dtype=np.float32)
-
-            # Colors
-            color       = np.empty((min(naircraft, MAX_NAIRCRAFT), 4), dtype=np.uint8)
-
-            selssd      = np.zeros(naircraft, dtype=np.uint8)
-            confidx     = 0
-
-            # Loop over aircraft
-            zdata = zip(data.gs, data.id, data.inconf, data.ingroup, data.lat, data.lon, data.tcpamax, data.trk)
-            for i, (gs, acid, inconf, ingroup, lat, lon, tcpa, trk) in enumerate(zdata):
-                # Check for maximum aircraft
-                if i >= MAX_NAIRCRAFT:
-                    break
-
-                # Labels
-                if actdata.atcmode == 'BLUESKY':
-                    rawlabel += baselabel(actdata, data, i)
-                else:
-                    if actdata.atcmode == 'APP':
-                        label, mlabel, ssrlabel = applabel(actdata, data, i)
-                        rawlabel_lvnl += label
-                        rawmlabel     += mlabel
-                        rawssrlabel   += ssrlabel
-                    elif actdata.atcmode == 'ACC':
-                        label, mlabel, ssrlabel = acclabel(actdata, data, i)
-                        rawlabel_lvnl += label
-                        rawmlabel     += mlabel
-                        rawssrlabel   += ssrlabel
-                    elif actdata.atcmode == 'TWR':
-                        label, mlabel, ssrlabel = twrlabel(actdata, data, i)
-                        rawlabel_lvnl += label
-                        rawmlabel     += mlabel
-                        rawssrlabel   += ssrlabel
-
-                    # Label position
-                    if idchange:
-                        if acid in idcreate:
-                            labelpos[i] = [50, 0]
-                            leaderlinepos[i] = leaderline_vertices(actdata, 50, 0)
-
-                        else:
-                            i_prev = self.id_prev.index(acid)
-                            labelpos[i] = self.labelpos[i_prev]
-
-                            if data.tracklbl[i]:
-                                leaderlinepos[i] = leaderline_vertices(actdata, labelpos[i][0], labelpos[i][1])
-                            else:
-                                leaderlinepos[i] = [0, 0, 0, 0]
-                    else:
-                        labelpos[i] = self.labelpos[i]
-
-                        if data.tracklbl[i]:
-                            leaderlinepos[i] = leaderline_vertices(actdata, labelpos[i][0], labelpos[i][1])
-                        else:
-                            leaderlinepos[i] = [0, 0, 0, 0]
-
-                # Colours
-                if inconf:
-                    if actdata.ssd_conflicts:
-                        selssd[i] = 255
-                    color[i, :] = palette.conflict + (255,)
-                    lat1, lon1 = geo.qdrpos(lat, lon, trk, tcpa * gs / nm)
-                    cpalines[4 * confidx: 4 * confidx +
-                             4] = [lat, lon, lat1, lon1]
-                    confidx += 1
-                # Selected aircraft
-                elif actdata.atcmode != 'BLUESKY' and acid == console.Console._instance.id_select:
-                    rgb = (218, 218, 0) + (255,)
-                    color[i, :] = rgb
-                else:
-                    # Get custom color if available, else default
-                    rgb = palette.aircraft
-                    if ingroup:
-                        for groupmask, groupcolor in actdata.custgrclr.items():
-                            if ingroup & groupmask:
-                                rgb = groupcolor
-                                break
-                    rgb = actdata.custacclr.get(acid, rgb)
-                    color[i, :] = tuple(rgb) + (255,)
-
-                #  Check if aircraft is selected to show SSD
-                if actdata.ssd_all or acid in actdata.ssd_ownship:
-                    selssd[i] = 255
+                selssd[:nac][np.isin(acid, list(actdata.ssd_ownship))] = 255
+                if actdata.ssd_conflicts:
+                    selssd[:nac][inconf] = 255
 
             if len(actdata.ssd_ownship) > 0 or actdata.ssd_conflicts or actdata.ssd_all:
                 self.ssd.update(selssd=selssd)
@@ -535,16 +470,37 @@ class Traffic(glh.RenderObject, layer=100):
 
             # BlueSky default label (ATC mode BLUESKY)
             if actdata.atcmode == 'BLUESKY':
-                self.lbl.update(np.array(rawlabel.encode('utf8'), dtype=np.string_))
+                self.lbl.update(lblbuffer(baselabels(actdata, data, nac)))
             # LVNL labels
             else:
+                lvnllabels = {'APP': applabels, 'ACC': acclabels, 'TWR': twrlabels}.get(actdata.atcmode)
+                if lvnllabels is None:
+                    label = mlabel = ssrlabel = np.empty((nac, 0), dtype=np.uint32)
+                else:
+                    label, mlabel, ssrlabel = lvnllabels(actdata, data, nac)
                 # Update track label
-                self.lbl_lvnl.update(np.array(rawlabel_lvnl.encode('utf8'), dtype=np.string_))
+                self.lbl_lvnl.update(lblbuffer(label))
                 # Update SSR label
-                self.ssrlbl.update(np.array(rawssrlabel.encode('utf8'), dtype=np.string_))
+                self.ssrlbl.update(lblbuffer(ssrlabel))
                 # Update micro label
-                self.mlbl.update(np.array(rawmlabel.encode('utf8'), dtype=np.string_))
-                # Label position
+                self.mlbl.update(lblbuffer(mlabel))
+
+                # Label position: keep the position of existing aircraft
+                if data.id != self.id_prev:
+                    iprev = previous_slots(self.id_prev[:len(self.labelpos)], acid)
+                else:
+                    iprev = np.arange(nac)
+                created = iprev < 0
+                labelpos = np.empty((nac, 2), dtype=np.float32)
+                labelpos[created] = [50, 0]
+                labelpos[~created] = self.labelpos[iprev[~created]]
+
+                # Leader lines of created aircraft and aircraft with a track label
+                leaderlinepos = np.zeros((nac, 4), dtype=np.float32)
+                showline = created | np.asarray(data.tracklbl[:nac], dtype=bool)
+                leaderlinepos[showline] = leaderline_vertices(actdata, labelpos[showline, 0],
+                                                              labelpos[showline, 1])
+
                 self.labelpos = labelpos
                 self.id_prev = data.id
                 self.lbloffset.update(np.array(self.labelpos, dtype=np.float32))
@@ -718,276 +674,335 @@ Static functions
 """
 
 
-def baselabel(actdata, data, i):
+def baselabels(actdata, data, n):
     """
-    Function: Create base label
+    Function: Create base labels for all aircraft
     Args:
         actdata:    node data [class]
         data:       aircraft data [class]
-        i:          index for data [int]
+        n:          number of aircraft [int]
     Returns:
-        rawlabel:   label string [str]
-
-    Created by: Bob van Dillen
-    Date: 13-1-2022
+        label:      label characters [array (n, >= 24)]
     """
 
-    # Empty label
-    label = ''
+    # Line 1
+    fields = [lblfield(data.id[:n], 8)]
 
-    label += '%-8s' % data.id[i][:8]
     if actdata.show_lbl == 2:
-        if data.alt[i] <= data.translvl:
-            label += '%-5d' % int(data.alt[i] / ft + 0.5)
-        else:
-            label += 'FL%03d' % int(data.alt[i] / ft / 100. + 0.5)
-        vsarrow = 30 if data.vs[i] > 0.25 else 31 if data.vs[i] < -0.25 else 32
-        label += '%1s  %-8d' % (chr(vsarrow),
-                                int(data.cas[i] / kts + 0.5))
+        alt = np.asarray(data.alt[:n])
+        vs = np.asarray(data.vs[:n])
+        cas = np.asarray(data.cas[:n])
+
+        # Line 2: altitude (or flight level), vertical speed arrow
+        altft = np.trunc(alt / ft + 0.5).astype(np.int64)
+        fl = np.trunc(alt / ft / 100. + 0.5).astype(np.int64)
+        fields.append(lblselect([alt <= data.translvl], [lblint(altft, 5)],
+                                np.hstack([lbltext('FL', n), lblint(fl, 3, zeros=True)])))
+        fields.append(np.where(vs > 0.25, 30, np.where(vs < -0.25, 31, 32)).astype(np.uint32)[:, np.newaxis])
+        fields.append(lbltext('  ', n))
+
+        # Line 3: calibrated airspeed
+        fields.append(lblint(np.trunc(cas / kts + 0.5).astype(np.int64), 8))
     else:
-        label += 2*8*' '
-    return label
+        fields.append(lbltext(2*8*' ', n))
+
+    return np.hstack(fields)
 
 
-def applabel(actdata, data, i):
+def applabels(actdata, data, n):
     """
-    Function: Create approach label
+    Function: Create approach labels for all aircraft
     Args:
         actdata:    node data [class]
         data:       aircraft data [class]
-        i:          index for data [int]
+        n:          number of aircraft [int]
     Returns:
-        label:      track label string [str]
-        mlabel:     micro label string [str]
-        ssrlabel:   ssr label string [str]
-
-    Created by: Bob van Dillen
-    Date: 21-12-2021
+        label:      track label characters [array (n, 32)]
+        mlabel:     micro label characters [array (n, 3)]
+        ssrlabel:   ssr label characters [array (n, 21)]
     """
 
-    # Empty labels
-    label    = ''
-    mlabel   = ''
-    ssrlabel = ''
+    acid, alt, gs, uco, wtc, flighttype = lvnlcolumns(data, n)
+    below = alt < actdata.translvl
+    selalt = np.asarray(data.selalt[:n])
+    selhdg = np.asarray(data.selhdg[:n])
+    selspd = np.asarray(data.selspd[:n])
 
     # Track label
-    if data.tracklbl[i]:
+    label = np.hstack([
         # Line 1
-        label += '%-8s' % data.id[i][:8]
-
+        lblfield(acid, 8),
         # Line 2
-        label += '%-3s' % leading_zeros(data.alt[i]/ft/100)[-3:]
-        if data.alt[i] < actdata.translvl:
-            label += '%-1s' % 'A'
-        else:
-            label += '%-1s' % ' '
-        if data.uco[i] and data.selalt[i] != 0:
-            label += '%-3s' % leading_zeros(data.selalt[i]/ft/100)[-3:]
-        else:
-            label += '%-3s' % '   '
-        label += '%-1s' % ' '
-
+        lblzeros(alt/ft/100, last=True),
+        lblselect([below], [lbltext('A', n)], lbltext(' ', n)),
+        lblselect([uco & (selalt != 0)], [lblzeros(selalt/ft/100, last=True)], lbltext(3*' ', n)),
+        lbltext(' ', n),
         # Line 3
-        label += '%-4s' % str(data.type[i])[:4]
-        if data.uco[i] and data.selhdg[i] != 0:
-            label += '%-3s' % leading_zeros(data.selhdg[i])[:3]
-        elif data.flighttype[i] == 'INBOUND':
-            label += '%-3s' % data.arr[i].replace('ARTIP', 'ATP')[:3]
-        elif data.flighttype[i] == 'OUTBOUND':
-            label += '%-3s' % data.sid[i][:3]
-        else:
-            label += '%-3s' % '   '
-        label += '%-1s' % ' '
-
+        lblfield(data.type[:n], 4),
+        lblselect([uco & (selhdg != 0), flighttype == 'INBOUND', flighttype == 'OUTBOUND'],
+                  [lblzeros(selhdg),
+                   lblfield(lblmap(data.arr[:n], lambda arr: arr.replace('ARTIP', 'ATP')), 3),
+                   lblfield(data.sid[:n], 3)],
+                  lbltext(3*' ', n)),
+        lbltext(' ', n),
         # Line 4
-        label += '%-3s' % leading_zeros(data.gs[i]/kts)[:3]
-        #For ICAO WTC, only show WTC-cat when H or J
-        #Also, prepare for RECAT, with cat A through F
-        if data.wtc[i].upper() == 'H' or data.wtc[i].upper() == 'J' \
-                or data.wtc[i].upper() == 'A'\
-                or data.wtc[i].upper() == 'B'\
-                or data.wtc[i].upper() == 'C'\
-                or data.wtc[i].upper() == 'D'\
-                or data.wtc[i].upper() == 'E'\
-                or data.wtc[i].upper() == 'F':
-            label += '%-1s' % str(data.wtc[i])[:1]
-        else:
-            label += '%-1s' % ' '
-        if data.uco[i] and data.selspd[i] != 0:
-            label += '%-3s' % leading_zeros(data.selspd[i]/kts)[:3]
-        else:
-            label += '%-3s' % 'SPD'
-        label += '%-1s' % ' '
-    else:
-        label += 8*4*' '
+        lblzeros(gs/kts),
+        # For ICAO WTC, only show WTC-cat when H or J
+        # Also, prepare for RECAT, with cat A through F
+        lblselect([lblmap(wtc, lambda wtc: wtc.upper() in 'HJABCDEF' and len(wtc) == 1)], [lblfield(wtc, 1)], lbltext(' ', n)),
+        lblselect([uco & (selspd != 0)], [lblzeros(selspd/kts)], lbltext('SPD', n)),
+        lbltext(' ', n)])
+    label = lblselect([np.asarray(data.tracklbl[:n], dtype=bool)], [label], lbltext(8*4*' ', n))
 
     # Micro label
-    if data.mlbl[i]:
-        if data.flighttype[i].upper() == 'OUTBOUND':
-            mlabel += '  '+chr(30)
-        else:
-            mlabel += '%-3s' % data.rwy[i][:3]
-    else:
-        mlabel += 3*' '
+    mlbl = np.asarray(data.mlbl[:n], dtype=bool)
+    mlabel = lblselect([mlbl & lblmap(flighttype, lambda ftype: ftype.upper() == 'OUTBOUND'), mlbl],
+                       [lbltext('  '+chr(30), n), lblfield(data.rwy[:n], 3)],
+                       lbltext(3*' ', n))
 
-    # SSR label
-    ssrlbl = data.ssrlbl[i].split(';')
-    # Mode A
-    if 'A' in ssrlbl and data.ssr[i] != 0:
-        ssrlabel += '%-7s' % str(data.ssr[i])[:7]
-    else:
-        ssrlabel += 7*' '
-    # Mode C
-    if 'C' in ssrlbl:
-        ssrlabel += '%-3s' % leading_zeros(data.alt[i]/ft/100)[:3]
-        if data.alt[i] < actdata.translvl:
-            ssrlabel += '%-4s' % 'A   '
-        else:
-            ssrlabel += '%-4s' % '    '
-    else:
-        ssrlabel += 7*' '
-    # ACID
-    if 'ACID' in ssrlbl:
-        ssrlabel += '%-7s' % data.id[i][:7]
-    else:
-        ssrlabel += 7*' '
+    # SSR label: mode A, mode C, ACID
+    ssr = ssrfields(actdata, data, acid, alt)
+    ssrlabel = np.hstack([ssr['A'], ssr['C'], ssr['ACID']])
 
     return label, mlabel, ssrlabel
 
 
-def acclabel(actdata, data, i):
+def acclabels(actdata, data, n):
     """
-    Function: Create acc label
+    Function: Create acc labels for all aircraft
     Args:
         actdata:    node data [class]
         data:       aircraft data [class]
-        i:          index for data [int]
+        n:          number of aircraft [int]
     Returns:
-        label:      track label string [str]
-        mlabel:     micro label string [str]
-        ssrlabel:   ssr label string [str]
-
-    Created by: Bob van Dillen
-    Date: 21-12-2021
+        label:      track label characters [array (n, 32)]
+        mlabel:     micro label characters [array (n, 3)]
+        ssrlabel:   ssr label characters [array (n, 21)]
     """
 
-    # Empty labels
-    label    = ''
-    ssrlabel = ''
-    mlabel   = ''
+    acid, alt, gs, uco, wtc, flighttype = lvnlcolumns(data, n)
+    below = alt < actdata.translvl
+    selalt = np.asarray(data.selalt[:n])
+    selspd = np.asarray(data.selspd[:n])
 
     # Track label
-    if data.tracklbl[i]:
+    label = np.hstack([
         # Line 1
-        label += '%-8s' % data.id[i][:8]
-
+        lblfield(acid, 8),
         # Line 2
-        label += '%-3s' % leading_zeros(data.alt[i]/ft/100)[-3:]
-        if data.alt[i] < actdata.translvl:
-            label += '%-1s' % 'A'
-        else:
-            label += '%-1s' % ' '
-        if data.uco[i] and data.selalt[i] != 0:
-            label += '%-3s' % leading_zeros(data.selalt[i]/ft/100)[-3:]
-        else:
-            label += '%-3s' % '   '
-        label += '%-1s' % ' '
-
+        lblzeros(alt/ft/100, last=True),
+        lblselect([below], [lbltext('A', n)], lbltext(' ', n)),
+        lblselect([uco & (selalt != 0)], [lblzeros(selalt/ft/100, last=True)], lbltext(3*' ', n)),
+        lbltext(' ', n),
         # Line 3
-        label += '%-3s' % '...'
-        label += '%-1s' % ' '
-        label += '%-3s' % leading_zeros(data.gs[i]/kts)[:3]
-        if data.wtc[i].upper() == 'H' or data.wtc[i].upper() == 'J':
-            label += '%-1s' % str(data.wtc[i])[:1]
-        else:
-            label += '%-1s' % ' '
-
+        lbltext('... ', n),
+        lblzeros(gs/kts),
+        lblselect([lblmap(wtc, lambda wtc: wtc.upper() in ('H', 'J'))], [lblfield(wtc, 1)], lbltext(' ', n)),
         # Line 4
-        if data.uco[i] and data.selspd[i] != 0:
-            label += '%-1s' % 'I'
-            label += '%-3s' % leading_zeros(data.selspd[i]/kts)[:3]
-        else:
-            label += '%-4s' % '    '
-        label += '%-4s' % data.type[i][:4]
-    else:
-        label += 8*4*' '
+        lblselect([uco & (selspd != 0)],
+                  [np.hstack([lbltext('I', n), lblzeros(selspd/kts)])],
+                  lbltext(4*' ', n)),
+        lblfield(data.type[:n], 4)])
+    label = lblselect([np.asarray(data.tracklbl[:n], dtype=bool)], [label], lbltext(8*4*' ', n))
 
     # Micro label
-    if data.mlbl[i]:
-        if data.flighttype[i].upper() == 'INBOUND':
-            mlabel += '  '+chr(31)
-        else:
-            mlabel += 3*' '
-    else:
-        mlabel += 3*' '
+    mlbl = np.asarray(data.mlbl[:n], dtype=bool)
+    mlabel = lblselect([mlbl & lblmap(flighttype, lambda ftype: ftype.upper() == 'INBOUND')],
+                       [lbltext('  '+chr(31), n)], lbltext(3*' ', n))
 
-    # SSR label
-    ssrlbl = data.ssrlbl[i].split(';')
-    # ACID
-    if 'ACID' in ssrlbl:
-        ssrlabel += '%-7s' % data.id[i][:7]
-    else:
-        ssrlabel += 7*' '
-    # Mode A
-    if 'A' in ssrlbl and data.ssr[i] != 0:
-        ssrlabel += '%-7s' % str(data.ssr[i])[:7]
-    else:
-        ssrlabel += 7*' '
-    # Mode C
-    if 'C' in ssrlbl:
-        ssrlabel += '%-3s' % leading_zeros(data.alt[i]/ft/100)[:3]
-        if data.alt[i] < actdata.translvl:
-            ssrlabel += '%-4s' % 'A   '
-        else:
-            ssrlabel += '%-4s' % '    '
-    else:
-        ssrlabel += 7*' '
+    # SSR label: ACID, mode A, mode C
+    ssr = ssrfields(actdata, data, acid, alt)
+    ssrlabel = np.hstack([ssr['ACID'], ssr['A'], ssr['C']])
 
     return label, mlabel, ssrlabel
 
 
-def twrlabel(actdata, data, i):
+def twrlabels(actdata, data, n):
     """
-    Function: Create acc label
+    Function: Create tower labels for all aircraft
     Args:
-        actdata:    node data [dict]
-        data:       aircraft data [dict]
-        i:          index for data [int]
+        actdata:    node data [class]
+        data:       aircraft data [class]
+        n:          number of aircraft [int]
     Returns:
-        label:      track label string [str]
-        mlabel:     micro label string [str]
-        ssrlabel:   ssr label string [str]
-
-    Created by: Bob van Dillen
-    Date: 21-12-2021
+        label:      track label characters [array (n, 32) or (n, 40)]
+        mlabel:     micro label characters [array (n, 3)]
+        ssrlabel:   ssr label characters [array (n, 21)]
     """
 
-    # Empty label
-    label    = ''
-    mlabel   = ''
-    ssrlabel = ''
-
     # Line 1
-    label += '%-8s' % data.id[i][:8]
+    fields = [lblfield(data.id[:n], 8)]
     if actdata.show_lbl == 2:
+        flighttype = np.asarray(data.flighttype[:n], dtype=str)
         # Line 2
-        if data.flighttype[i] == "INBOUND":
-            label += 8*' '
-        else:
-            label += '%-5s' % data.sid[i][:5]
-            label += ' '
-            label += '%-2s' % data.rwy[i][-2:]
+        fields.append(lblselect([flighttype == 'INBOUND'], [lbltext(8*' ', n)],
+                                np.hstack([lblfield(data.sid[:n], 5), lbltext(' ', n),
+                                           lbltail(data.rwy[:n], 2)])))
         # Line 3
-        label += '%-8s' % data.type[i][:8]
+        fields.append(lblfield(data.type[:n], 8))
         # Line 4
-        label += 8*' '
+        fields.append(lbltext(8*' ', n))
     else:
-        label += 8*4*' '
+        fields.append(lbltext(8*4*' ', n))
 
-    mlabel += 3*1*' '
-    ssrlabel += 7*3*' '
+    return np.hstack(fields), lbltext(3*1*' ', n), lbltext(7*3*' ', n)
 
-    return label, mlabel, ssrlabel
+
+def lvnlcolumns(data, n):
+    """
+    Function: Get the aircraft data columns used in all LVNL labels
+    Args:
+        data:       aircraft data [class]
+        n:          number of aircraft [int]
+    Returns:
+        acid, alt, gs, uco, wtc, flighttype [arrays]
+    """
+
+    return np.asarray(data.id[:n], dtype=str), np.asarray(data.alt[:n]), np.asarray(data.gs[:n]), \
+        np.asarray(data.uco[:n], dtype=bool), np.asarray(data.wtc[:n], dtype=str), \
+        np.asarray(data.flighttype[:n], dtype=str)
+
+
+def ssrfields(actdata, data, acid, alt):
+    """
+    Function: Create the SSR label fields for all aircraft
+    Args:
+        actdata:    node data [class]
+        data:       aircraft data [class]
+        acid:       aircraft ids [array]
+        alt:        aircraft altitudes [array]
+    Returns:
+        fields:     mode A, mode C and ACID fields [dict of arrays (n, 7)]
+    """
+
+    n = len(acid)
+    ssr = np.asarray(data.ssr[:n])
+    blank = lbltext(7*' ', n)
+
+    # Aircraft that show an item in their SSR label
+    unique, inverse = np.unique(np.asarray(data.ssrlbl[:n], dtype=str), return_inverse=True)
+    items = [ssrlbl.split(';') for ssrlbl in unique]
+
+    def show(item):
+        return np.array([item in ssrlbl for ssrlbl in items], dtype=bool)[inverse]
+
+    modec = np.hstack([lblzeros(alt/ft/100),
+                       lblselect([alt < actdata.translvl], [lbltext('A   ', n)], lbltext(4*' ', n))])
+    return {'A': lblselect([show('A') & (ssr != 0)], [lblint(ssr, 7)[:, :7]], blank),
+            'C': lblselect([show('C')], [modec], blank),
+            'ACID': lblselect([show('ACID')], [lblfield(acid, 7)], blank)}
+
+
+def lblfield(values, width):
+    """
+    Function: Create a fixed-width label field for all aircraft, formatted as
+              '%-<width>s' % str(value)[:width]
+    Args:
+        values:     field value per aircraft [list, array]
+        width:      field width [int]
+    Returns:
+        field:      field characters (unicode code points) [array (n, width)]
+    """
+
+    field = np.asarray(values, dtype=str).astype(f'U{width}').view(np.uint32).reshape(-1, width)
+    # Pad with spaces
+    field[field == 0] = 32
+    return field
+
+
+def lbltail(values, width):
+    """
+    Function: Create a fixed-width label field of the last characters of each
+              value, formatted as '%-<width>s' % str(value)[-width:]
+    Args:
+        values:     field value per aircraft [list, array]
+        width:      field width [int]
+    Returns:
+        field:      field characters (unicode code points) [array (n, width)]
+    """
+
+    text = np.ascontiguousarray(np.asarray(values, dtype=str))
+    nchars = text.dtype.itemsize // 4
+    chars = text.view(np.uint32).reshape(-1, nchars)
+    start = np.maximum(np.count_nonzero(chars, axis=1) - width, 0)
+    idx = start[:, np.newaxis] + np.arange(width)
+    field = np.where(idx < nchars, chars[np.arange(len(chars))[:, np.newaxis], np.minimum(idx, nchars - 1)], 0)
+    field = field.astype(np.uint32)
+    field[field == 0] = 32
+    return field
+
+
+def lbltext(text, n):
+    """
+    Function: Create a label field with the same text for all aircraft
+    Args:
+        text:       field text [str]
+        n:          number of aircraft [int]
+    Returns:
+        field:      field characters (unicode code points) [array (n, len(text))]
+    """
+
+    return np.broadcast_to(np.array([ord(c) for c in text], dtype=np.uint32), (n, len(text)))
+
+
+def lblselect(condlist, fieldlist, default):
+    """
+    Function: Select label fields per aircraft (like np.select), the first
+              field of which the condition is True, or the default field.
+              Fields of different widths are padded with code 0 (no
+              character) to the widest field.
+    Args:
+        condlist:   conditions [list of arrays (n)]
+        fieldlist:  fields [list of arrays (n, width)]
+        default:    default field [array (n, width)]
+    Returns:
+        field:      selected field characters [array (n, width)]
+    """
+
+    width = max(field.shape[1] for field in fieldlist + [default])
+
+    def pad(field):
+        return np.pad(field, ((0, 0), (0, width - field.shape[1]))) if field.shape[1] < width else field
+
+    field = pad(default)
+    for cond, value in zip(reversed(condlist), reversed(fieldlist)):
+        field = np.where(np.asarray(cond)[:, np.newaxis], pad(value), field)
+    return field
+
+
+def lblbuffer(label):
+    """
+    Function: Convert the label characters of all aircraft to label buffer data
+    Args:
+        label:      label characters [array (n, width)], code 0 pads fields
+                    of variable width, and is left out
+    Returns:
+        buffer:     utf8-encoded labels of all aircraft [array (np.string_)]
+    """
+
+    chars = label[label != 0] if label.size and not label.all() else label.ravel()
+    if chars.size and np.max(chars) >= 128:
+        text = np.ascontiguousarray(chars, dtype=np.uint32).view(f'U{chars.size}')[0]
+        return np.array(text.encode('utf8'), dtype=np.string_)
+    return np.array(chars.astype(np.uint8).tobytes(), dtype=np.string_)
+
+
+def previous_slots(ids_prev, ids):
+    """
+    Function: Find the index of each aircraft in the previous aircraft data
+    Args:
+        ids_prev:   previous aircraft ids [list]
+        ids:        aircraft ids [array]
+    Returns:
+        idx:        index in ids_prev of each id, -1 for new aircraft [array]
+    """
+
+    prev = np.asarray(ids_prev, dtype=str)
+    if len(prev) == 0:
+        return np.full(len(ids), -1)
+    order = np.argsort(prev)
+    slots = order[np.minimum(np.searchsorted(prev, ids, sorter=order), len(prev) - 1)]
+    return np.where(prev[slots] == ids, slots, -1)
 
 
 def leading_zeros(number):
@@ -1012,14 +1027,105 @@ def leading_zeros(number):
         return str(round(number))
 
 
+def lblzeros(number, last=False):
+    """
+    Function: Create a label field with the first (or last) three characters
+              of leading_zeros(number) for all aircraft
+    Args:
+        number:     numbers to be displayed [array]
+        last:       use the last instead of the first three characters [bool]
+    Returns:
+        field:      field characters (unicode code points) [array (n, 3)]
+    """
+
+    number = np.maximum(np.asarray(number, dtype=float), 0.)
+    rounded = np.round(number).astype(np.int64)
+    if last:
+        return lbldigits(rounded, 3)
+
+    # Total number of characters: leading zeros and digits
+    nchars = np.where(number < 10, 3, np.where(number < 100, 2, 1))
+    power = 10
+    while power <= 10**18 and np.any(rounded >= power):
+        nchars += rounded >= power
+        power *= 10
+    return lbldigits(rounded // 10**(nchars - 3), 3)
+
+
+def lblint(number, width, zeros=False):
+    """
+    Function: Create a label field of integers for all aircraft, formatted
+              as '%-<width>d' % number, or as '%0<width>d' % number with
+              zeros=True. Like these formats, numbers that need more than
+              width characters are not truncated: the field is widened to
+              the longest number, and padded with code 0 (no character).
+    Args:
+        number:     numbers to be displayed [array (int)]
+        width:      minimum field width [int]
+        zeros:      pad with leading zeros instead of trailing spaces [bool]
+    Returns:
+        field:      field characters (unicode code points) [array (n, >= width)]
+    """
+
+    number = np.asarray(number, dtype=np.int64)
+    negative = number < 0
+    absnum = np.abs(number)
+    ndigits = np.ones(len(number), dtype=np.int64)
+    power = 10
+    while power <= 10**18 and np.any(absnum >= power):
+        ndigits += absnum >= power
+        power *= 10
+    if zeros:
+        ndigits = np.maximum(ndigits, width - negative)
+    fieldwidth = max(width, np.max(ndigits + negative)) if len(number) else width
+
+    # Index of the digit at each position, a minus sign goes before the digits
+    idigit = np.arange(fieldwidth) - negative[:, np.newaxis]
+    isdigit = (idigit >= 0) & (idigit < ndigits[:, np.newaxis])
+    digits = absnum[:, np.newaxis] // 10**np.maximum(ndigits[:, np.newaxis] - 1 - idigit, 0) % 10
+    field = np.where(isdigit, 48 + digits, np.where(np.arange(fieldwidth) < width, 32, 0))
+    field[:, 0] = np.where(negative, 45, field[:, 0])
+    return field.astype(np.uint32)
+
+
+def lbldigits(number, ndigits):
+    """
+    Function: Create a label field with the last digits of non-negative
+              integers, formatted as '%0<ndigits>d' % (number % 10**ndigits)
+    Args:
+        number:     numbers to be displayed [array (int)]
+        ndigits:    field width [int]
+    Returns:
+        field:      field characters (unicode code points) [array (n, ndigits)]
+    """
+
+    powers = 10**np.arange(ndigits - 1, -1, -1)
+    return (48 + np.asarray(number, dtype=np.int64)[:, np.newaxis] // powers % 10).astype(np.uint32)
+
+
+def lblmap(values, function):
+    """
+    Function: Apply a function to the unique values of a label column
+    Args:
+        values:     column values per aircraft [list, array]
+        function:   function of a single value
+    Returns:
+        result:     function result per aircraft [array]
+    """
+
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return np.array([function(value) for value in unique])[inverse]
+
+
 def leaderline_vertices(actdata, offsetx, offsety):
     """
     Function: Compute the vertices for the leader line
     Args:
         actdata:    node data [class]
-        offsetx:    label offset x pixel coordinates [int]
-        offsety:    label offset y pixel coordinates [int]
-    Returns: -
+        offsetx:    label offset x pixel coordinates [int, array]
+        offsety:    label offset y pixel coordinates [int, array]
+    Returns:
+        vertices:   leader line vertices [array (4) or (n, 4)]
 
     Created by: Bob van Dillen
     Date: 23-2-2022
@@ -1043,24 +1149,23 @@ def leaderline_vertices(actdata, offsetx, offsety):
 
     # Compute the angle
     angle = np.arctan2(offsety, offsetx)
-
-    # Label is on top of aircaft symbol
-    if -block_size[1] <= offsetx <= 0 and -text_height <= offsety <= 3*text_height:
-        vertices = [0, 0, 0, 0]
-    # Label is to the right of the aircraft symbol
-    elif offsetx >= 0:
-        vertices = [ac_size*np.cos(angle), ac_size*np.sin(angle), offsetx, offsety]
-    # Label is above the aircraft symbol
-    elif offsetx >= -block_size[1] and offsety >= 0:
-        vertices = [ac_size*np.cos(angle), ac_size*np.sin(angle), offsetx+0.5*block_size[1], offsety-3*text_height]
-    # Label is below the aircraft symbol
-    elif offsetx >= -block_size[1] and offsety <= 0:
-        vertices = [ac_size*np.cos(angle), ac_size*np.sin(angle), offsetx+0.5*block_size[1], offsety+text_height]
-    # Label is to the left of the aircraft sym
-    elif offsetx < 0:
-        vertices = [ac_size*np.cos(angle), ac_size*np.sin(angle), offsetx+block_size[1], offsety]
-    # For safety every other situation
-    else:
-        vertices = [0, 0, 0, 0]
-
-    return vertices
+    startx = ac_size*np.cos(angle).astype(float)
+    starty = ac_size*np.sin(angle).astype(float)
+    offsetx = np.asarray(offsetx, dtype=float)
+    offsety = np.asarray(offsety, dtype=float)
+    zero = np.zeros_like(offsetx)
+
+    # Label is on top of aircraft symbol, to the right, above, below, or to the
+    # left of the aircraft symbol, and for safety every other situation
+    onsymbol = (-block_size[1] <= offsetx) & (offsetx <= 0) & (-text_height <= offsety) & (offsety <= 3*text_height)
+    condlist = [onsymbol,
+                offsetx >= 0,
+                (offsetx >= -block_size[1]) & (offsety >= 0),
+                (offsetx >= -block_size[1]) & (offsety <= 0),
+                offsetx < 0]
+    endx = np.select(condlist, [zero, offsetx, offsetx+0.5*block_size[1], offsetx+0.5*block_size[1],
+                                offsetx+block_size[1]], zero)
+    endy = np.select(condlist, [zero, offsety, offsety-3*text_height, offsety+text_height, offsety], zero)
+    drawn = np.any(condlist[1:], axis=0) & ~onsymbol
+
+    return np.stack([np.where(drawn, startx, 0.), np.where(drawn, starty, 0.), endx, endy], axis=-1)
@@ -8,6 +8,7 @@ from bluesky.ui import palette
 from bluesky.ui.polytools import PolygonSet
 from bluesky.ui.qtgl.customevents import ACDataEvent, RouteDataEvent
 from bluesky.network.client import Client
+from bluesky.network.acdata import ACDataDecoder
 from bluesky.core import Signal
 from bluesky.tools.aero import ft
 from bluesky.tools import geo
@@ -30,6 +31,7 @@ class GuiClient(Client):
         self.timer.start(20)
         self.subscribe(b'SIMINFO')
         self.subscribe(b'TRAILS')
+        self.subscribe(b'PROFILE')
         self.subscribe(b'PLOT' + self.client_id)
         self.subscribe(b'ROUTEDATA' + self.client_id)
 
@@ -52,6 +54,10 @@ class GuiClient(Client):
         changed = ''
         actdata = self.get_nodedata(sender_id)
         if name == b'ACDATA':
+            # Apply the (delta-encoded) message to the complete aircraft state
+            data = actdata.acdecoder.decode(data)
+            if data is None:
+                return
             actdata.setacdata(data)
             changed = name.decode('utf8')
         elif name.startswith(b'ROUTEDATA'):
@@ -60,6 +66,9 @@ class GuiClient(Client):
         elif name == b'TRAILS':
             actdata.settrails(**data)
             changed = name.decode('utf8')
+        elif name == b'PROFILE':
+            actdata.profile = data
+            changed = name.decode('utf8')
 
         if sender_id == self.act and changed:
             self.actnodedata_changed.emit(sender_id, actdata, changed)
@@ -154,8 +163,12 @@ class nodeData:
 
         self.naircraft = 0
         self.acdata = ACDataEvent()
+        self.acdecoder = ACDataDecoder()
         self.routedata = RouteDataEvent()
 
+        # Profile statistics of the simulation update
+        self.profile = dict()
+
         # Per-scenario data
         self.clear_scen_data()
 
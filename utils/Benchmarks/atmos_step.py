@@ -0,0 +1,92 @@
+''' Benchmark of the atmosphere computations in a traffic update step.
+
+    Two cases are timed for n aircraft (default 10,000):
+    - The atmosphere and speed conversions of one step (traffic, autopilot,
+      OpenAP performance update and limits), once with the altitude passed
+      to each conversion (which recomputes the atmosphere every call), and
+      once with a single AtmosState per altitude set
+    - A complete Traffic.update() step, with the OpenAP performance model
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/atmos_step.py [n1 n2 ...] '''
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+from bluesky.core import simtime
+from bluesky.tools import aero
+from bluesky.traffic import Traffic
+from bluesky.traffic.performance.openap import thrust
+
+
+NTRAF = (10000,)
+
+
+def step_conversions(alt, intent_h, tas, vs, spd, bpr, thr0, phase, mmo, atmos=False):
+    ''' The atmosphere and speed conversions of one traffic update step.
+        When atmos is True, the state is computed once per altitude set. '''
+    h = aero.AtmosState(alt) if atmos else alt
+    hint = aero.AtmosState(intent_h) if atmos else intent_h
+
+    # Traffic.update
+    p, rho, T = aero.vatmos(h)
+    # Autopilot.update
+    aero.vcas2tas(spd, h)
+    aero.vcasormach2tas(spd, h)
+    aero.vcasormach2tas(spd, h)
+    # OpenAP update
+    aero.vdensity(h)
+    thrust.compute_max_thr_ratio(phase, bpr, tas, h, vs, thr0)
+    # OpenAP limits
+    cas = aero.vtas2cas(tas, hint)
+    tasl = aero.vcas2tas(cas, hint)
+    aero.vtas2mach(tasl, hint)
+    aero.vmach2tas(mmo, hint)
+    # Traffic.update_airspeed
+    aero.vtas2cas(tas, h)
+    aero.vtas2mach(tas, h)
+
+
+def main(*ntraf):
+    bs.settings.init(os.path.join('data', 'default.cfg'))
+    bs.traf = Traffic()
+    bs.sim = SimpleNamespace(simt=0.0, simdt=bs.settings.simdt)
+    rng = np.random.default_rng(1)
+    print(f'{"ntraf":>6} | {"conversions [ms]":>24} | {"Traffic.update [ms]":>20}')
+    print(f'{"":>6} | {"per call":>11} {"AtmosState":>12} |')
+    for n in ntraf or NTRAF:
+        alt = rng.uniform(0.0, 12000.0, n)
+        args = (alt, alt + rng.choice([-1000.0, 0.0, 1000.0], n),
+                rng.uniform(60.0, 250.0, n), rng.uniform(-10.0, 10.0, n),
+                rng.uniform(100.0, 180.0, n), np.full(n, 5.0), np.full(n, 1.2e5),
+                rng.integers(0, 7, n), np.full(n, 0.82))
+        number = max(1, 200000 // n)
+        tperh = 1e3 * timeit.timeit(lambda: step_conversions(*args), number=number) / number
+        tstate = 1e3 * timeit.timeit(lambda: step_conversions(*args, atmos=True),
+                                     number=number) / number
+
+        # Complete traffic update steps
+        simtime.reset()
+        bs.traf.reset()
+        bs.traf.cre([f'AC{i:05d}' for i in range(n)], 'A320',
+                    52.0 + rng.uniform(-2.0, 2.0, n), 4.0 + rng.uniform(-2.0, 2.0, n),
+                    rng.uniform(0.0, 360.0, n), rng.uniform(1000.0, 11000.0, n),
+                    rng.uniform(120.0, 250.0, n))
+
+        def step():
+            bs.sim.simt, bs.sim.simdt = simtime.step()
+            bs.traf.update()
+
+        for _ in range(20):
+            step()
+        nsteps = 200
+        tstep = 1e3 * timeit.timeit(step, number=nsteps) / nsteps
+        print(f'{n:6d} | {tperh:11.2f} {tstate:12.2f} | {tstep:20.2f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,69 @@
+''' Scaling benchmark of full-matrix (StateBased) and grid-based (StateBasedGrid)
+    conflict detection, from 100 to 20,000 aircraft.
+
+    Traffic is generated at constant density, so the number of conflicts per
+    aircraft is roughly independent of the number of aircraft.
+
+    Usage: python utils/Benchmarks/cd_scaling.py [maxmatrix]
+    where maxmatrix is the largest number of aircraft for which the full-matrix
+    method is also timed (default 5000, as memory grows quadratically). '''
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from bluesky.tools.aero import nm, ft
+from bluesky.traffic.asas import StateBased, StateBasedGrid
+
+
+# Number of aircraft per square degree
+DENSITY = 10.0
+NTRAF = (100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+
+
+def make_traffic(n, rng):
+    ''' Random traffic around 52N 4E at constant density. '''
+    size = 0.5 * np.sqrt(n / DENSITY)
+    return SimpleNamespace(
+        ntraf=n,
+        id=[f'AC{i:05d}' for i in range(n)],
+        lat=52.0 + rng.uniform(-size, size, n),
+        lon=4.0 + rng.uniform(-size, size, n) / np.cos(np.radians(52.0)),
+        trk=rng.uniform(0.0, 360.0, n),
+        gs=rng.uniform(100.0, 250.0, n),
+        alt=rng.uniform(1000.0, 12000.0, n),
+        vs=rng.choice([-10.0, 0.0, 0.0, 10.0], n))
+
+
+def timeit_detect(method, traf, number):
+    ''' Return the mean time per detect call in seconds. '''
+    rpz = np.full(traf.ntraf, 5.0 * nm)
+    hpz = np.full(traf.ntraf, 1000.0 * ft)
+    dtlook = np.full(traf.ntraf, 300.0)
+    res = method.detect(None, traf, traf, rpz, hpz, dtlook)
+    t = timeit.timeit(lambda: method.detect(None, traf, traf, rpz, hpz, dtlook),
+                      number=number)
+    return t / number, len(res[0])
+
+
+def main(maxmatrix=5000):
+    rng = np.random.default_rng(1)
+    print(f'{"ntraf":>8} {"conflicts":>10} {"StateBased [ms]":>16} '
+          f'{"StateBasedGrid [ms]":>20} {"speedup":>8}')
+    for n in NTRAF:
+        traf = make_traffic(n, rng)
+        number = max(1, 2000 // n)
+        tgrid, nconf = timeit_detect(StateBasedGrid, traf, number)
+        if n <= maxmatrix:
+            tfull, nconffull = timeit_detect(StateBased, traf, number)
+            assert nconf == nconffull
+            print(f'{n:8d} {nconf:10d} {1e3 * tfull:16.2f} {1e3 * tgrid:20.2f} '
+                  f'{tfull / tgrid:8.1f}')
+        else:
+            print(f'{n:8d} {nconf:10d} {"-":>16} {1e3 * tgrid:20.2f} {"-":>8}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,74 @@
+''' Microbenchmark of aircraft id lookups (Traffic.id2idx and misc.get_indices)
+    for increasing numbers of aircraft.
+
+    The id index maintained by Traffic is compared to the previous linear
+    implementations (list.index, a dict built per call, and an
+    items x n comparison matrix), which are included below for reference.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/id_lookup.py [n1 n2 ...] '''
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+from bluesky.traffic import Traffic
+from bluesky.tools import misc
+
+
+NTRAF = (100, 1000, 10000)
+# Number of ids in list lookups
+NLIST = 10
+
+
+def id2idx_linear(traf, acid):
+    ''' Previous single-id lookup. '''
+    try:
+        return traf.id.index(acid.upper())
+    except ValueError:
+        return -1
+
+
+def id2idx_dict(traf, acids):
+    ''' Previous list lookup. '''
+    tmp = dict((v, i) for i, v in enumerate(traf.id))
+    return [tmp.get(acid, -1) for acid in acids]
+
+
+def get_indices_matrix(arr, items):
+    ''' Previous get_indices. '''
+    return np.nonzero(np.array(items)[:, None] == arr)[1].astype(int)
+
+
+def timed(fun, number):
+    ''' Mean time per call in microseconds. '''
+    return 1e6 * timeit.timeit(fun, number=number) / number
+
+
+def main(*ntraf):
+    bs.settings.init(os.path.join('data', 'default.cfg'))
+    bs.traf = Traffic()
+    rng = np.random.default_rng(1)
+    print(f'{"ntraf":>6} | {"id2idx(id) [us]":>22} | {"id2idx(list) [us]":>22} | '
+          f'{"get_indices [us]":>22}')
+    print(f'{"":>6} | {"old":>10} {"new":>11} | {"old":>10} {"new":>11} | '
+          f'{"old":>10} {"new":>11}')
+    for n in ntraf or NTRAF:
+        bs.traf.reset()
+        bs.traf.cre([f'AC{i:05d}' for i in range(n)], 'A320', 52.0, 4.0, 90.0, 3000.0, 150.0)
+        acid = bs.traf.id[int(rng.integers(n))]
+        acids = [bs.traf.id[i] for i in rng.integers(0, n, NLIST)]
+        number = 2000
+
+        print(f'{n:6d} | {timed(lambda: id2idx_linear(bs.traf, acid), number):10.2f} '
+              f'{timed(lambda: bs.traf.id2idx(acid), number):11.2f} | '
+              f'{timed(lambda: id2idx_dict(bs.traf, acids), number // 10):10.2f} '
+              f'{timed(lambda: bs.traf.id2idx(acids), number):11.2f} | '
+              f'{timed(lambda: get_indices_matrix(bs.traf.id, acids), number // 10):10.2f} '
+              f'{timed(lambda: misc.get_indices(bs.traf.id, acids), number):11.2f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,88 @@
+''' Benchmark of the creation of aircraft with mixed types, using the OpenAP
+    performance model and its per-type coefficient table.
+
+    n aircraft (default 10,000) of 50 different types (OpenAP types,
+    synonyms and unknown types) are created in two ways:
+    - One batch, with a single Traffic.crebatch() call
+    - One cre() call per aircraft type
+    For both, the total time and the time spent in OpenAP.create are shown.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/openap_create.py [n1 n2 ...] '''
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+from bluesky.traffic import Traffic
+
+
+NTRAF = (10000,)
+NTYPES = 50
+
+
+def timed(fun, timer):
+    ''' Wrap fun to add its run time to timer[0]. '''
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        fun(*args, **kwargs)
+        timer[0] += time.perf_counter() - t0
+    return wrapper
+
+
+def main(*ntraf):
+    bs.settings.init(os.path.join('data', 'default.cfg'))
+    bs.traf = Traffic()
+    bs.sim = SimpleNamespace(simt=0.0, simdt=bs.settings.simdt)
+    bs.scr = SimpleNamespace(echo=lambda *args, **kwargs: None)
+
+    coeff = bs.traf.perf.coeff
+    t0 = time.perf_counter()
+    coeff._build_table()
+    print(f'Coefficient table: {len(coeff.table)} types, built in '
+          f'{1e3 * (time.perf_counter() - t0):.1f} ms')
+
+    tperf = [0.0]
+    bs.traf.perf.create = timed(bs.traf.perf.create, tperf)
+
+    rng = np.random.default_rng(1)
+    names = sorted(coeff.typecode)
+    types = rng.choice(names, NTYPES - 2, replace=False).tolist() + ['XXXX', 'YYYY']
+    print(f'{"ntraf":>6} | {"batch [ms]":>10} {"OpenAP":>8} | {"per type [ms]":>13} {"OpenAP":>8}')
+    for n in ntraf or NTRAF:
+        acid = [f'AC{i:05d}' for i in range(n)]
+        actype = rng.choice(types, n).tolist()
+        args = (52.0 + rng.uniform(-2.0, 2.0, n), 4.0 + rng.uniform(-2.0, 2.0, n),
+                rng.uniform(0.0, 360.0, n), rng.uniform(1000.0, 11000.0, n),
+                rng.uniform(120.0, 250.0, n))
+
+        # One batch
+        bs.traf.reset()
+        tperf[0] = 0.0
+        t0 = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            bs.traf.crebatch(acid, actype, *args)
+        tbatch, tbatchperf = time.perf_counter() - t0, tperf[0]
+
+        # One create per type
+        bs.traf.reset()
+        tperf[0] = 0.0
+        actype = np.array(actype)
+        t0 = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            for name in types:
+                idx = np.flatnonzero(actype == name)
+                bs.traf.cre([acid[i] for i in idx], name, *(arg[idx] for arg in args))
+        ttype, ttypeperf = time.perf_counter() - t0, tperf[0]
+
+        print(f'{n:6d} | {1e3 * tbatch:10.1f} {1e3 * tbatchperf:8.1f} | '
+              f'{1e3 * ttype:13.1f} {1e3 * ttypeperf:8.1f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
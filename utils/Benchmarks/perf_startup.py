@@ -0,0 +1,66 @@
+''' Benchmark of loading the performance coefficient databases, with and
+    without the binary coefficient cache.
+
+    For the OpenAP database (and the BADA database, when it is installed in
+    perf_path_bada), the load time is shown:
+    - cold: parsing the database files, and writing the cache
+    - warm: reading the cache
+    The cache files are written to a temporary cache folder.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/perf_startup.py [nrepeat] '''
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+
+
+NREPEAT = 5
+
+
+def timeload(load, nrepeat):
+    ''' Returns the cold and (best) warm load time in ms. '''
+    with redirect_stdout(StringIO()):
+        t0 = time.perf_counter()
+        load()
+        tcold = time.perf_counter() - t0
+        twarm = []
+        for _ in range(nrepeat):
+            t0 = time.perf_counter()
+            load()
+            twarm.append(time.perf_counter() - t0)
+    return 1e3 * tcold, 1e3 * min(twarm)
+
+
+def main(nrepeat=NREPEAT):
+    bs.settings.init(os.path.join('data', 'default.cfg'))
+    from bluesky.traffic.performance.openap import coeff
+    try:
+        from bluesky.traffic.performance.bada import coeff_bada
+    except ImportError:
+        coeff_bada = None
+
+    def load_bada():
+        coeff_bada.synonyms.clear()
+        coeff_bada.accoeffs.clear()
+        return coeff_bada.init(bs.settings.perf_path_bada)
+
+    print(f'{"database":>9} | {"cold [ms]":>10} {"warm [ms]":>10}')
+    with tempfile.TemporaryDirectory() as cache_path:
+        bs.settings.cache_path = cache_path
+        tcold, twarm = timeload(coeff.Coefficient, nrepeat)
+        print(f'{"OpenAP":>9} | {tcold:10.1f} {twarm:10.1f}')
+        if coeff_bada is not None:
+            tcold, twarm = timeload(load_bada, nrepeat)
+            print(f'{"BADA":>9} | {tcold:10.1f} {twarm:10.1f}')
+        else:
+            print(f'{"BADA":>9} | not found in {bs.settings.perf_path_bada}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
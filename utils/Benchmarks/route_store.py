@@ -0,0 +1,103 @@
+''' Memory and step-time benchmark of aircraft routes.
+
+    For n aircraft (default 1,000 and 10,000) a route of 30 waypoints, with
+    some altitude/speed constraints and RTAs, is created. Shown are:
+    - mem: the memory allocated for the routes [MB]
+    - build: time to create the routes, and calculate their flight plans [s]
+    - calcfp: time of one flight plan calculation of each route [s]
+    - trackmiles: time to get the remaining route distance of all aircraft
+      with unchanged routes, which is done every simulation step [ms]
+    - nextwp: time of one waypoint switch (getnextwp), for each route [s]
+
+    Only the Route API is used, so the benchmark can be used to compare
+    route implementations.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/route_store.py [n1 n2 ...] '''
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+
+
+NTRAF = (1000, 10000)
+NWP = 30
+
+
+def create_routes(n):
+    ''' Create n routes of NWP waypoints. '''
+    from bluesky.traffic.route import Route
+    rng = np.random.default_rng(1)
+    routes = []
+    for i in range(n):
+        route = Route(f'AC{i:06d}')
+        lat = 52.0 + np.cumsum(rng.uniform(-0.2, 0.2, NWP))
+        lon = 4.0 + np.cumsum(rng.uniform(0.0, 0.3, NWP))
+        alt = np.where(rng.random(NWP) < 0.3, rng.uniform(1000., 10000., NWP), -999.)
+        spd = np.where(rng.random(NWP) < 0.2, rng.uniform(120., 150., NWP), -999.)
+        for j in range(NWP):
+            route.addwpt_data(False, j, f'WP{i:06d}{j:02d}', float(lat[j]), float(lon[j]),
+                              Route.wplatlon, float(alt[j]), float(spd[j]))
+        if i % 10 == 0:
+            route.wprta[NWP - 5] = 3600.0
+        route.iactwp = 0
+        route.calcfp()
+        routes.append(route)
+    return routes
+
+
+def bench(n):
+    ''' Returns memory use [MB], and the times of the route operations. '''
+    from bluesky.traffic.trackmiles_calc import RouteDistances
+    # Memory use, traced in a separate run as tracing slows down the build
+    gc.collect()
+    tracemalloc.start()
+    routes = create_routes(n)
+    mem = tracemalloc.get_traced_memory()[0] * 1e-6
+    tracemalloc.stop()
+    del routes
+    gc.collect()
+
+    t0 = time.perf_counter()
+    routes = create_routes(n)
+    tbuild = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for route in routes:
+        route.calcfp()
+    tcalcfp = time.perf_counter() - t0
+
+    routedist = [RouteDistances() for _ in routes]
+    for dist, route in zip(routedist, routes):
+        dist.get(route)
+    t0 = time.perf_counter()
+    for dist, route in zip(routedist, routes):
+        dist.get(route)
+    ttrackmiles = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for route in routes:
+        route.getnextwp()
+    tnextwp = time.perf_counter() - t0
+    return mem, tbuild, tcalcfp, ttrackmiles, tnextwp
+
+
+def main(*ntraf):
+    bs.settings.init(os.path.join('data', 'default.cfg'))
+    bs.traf = SimpleNamespace(id=[])
+    print(f'{"ntraf":>6} | {"mem [MB]":>8} {"build [s]":>9} {"calcfp [s]":>10} '
+          f'{"trackmiles [ms]":>15} {"nextwp [s]":>10}')
+    for n in ntraf or NTRAF:
+        mem, tbuild, tcalcfp, ttrackmiles, tnextwp = bench(n)
+        print(f'{n:6d} | {mem:8.1f} {tbuild:9.2f} {tcalcfp:10.3f} '
+              f'{ttrackmiles * 1e3:15.1f} {tnextwp:10.3f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,93 @@
+''' Load-time benchmark of scenario files: parsing the scenario text
+    (simstack.readscn) compared to loading a compiled scenario
+    (simstack.loadscn), both when it still has to be compiled and cached,
+    and when it is loaded from the cache.
+
+    A scenario with n aircraft is generated in a temporary folder, with a
+    CRE, a number of waypoints and some altitude/speed commands for each
+    aircraft.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/scn_load.py [n1 n2 ...] '''
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+from bluesky.stack import simstack
+from bluesky.stack.stackbase import Stack, add_scencmds
+
+
+NTRAF = (1000, 10000, 50000)
+NWPT = 8
+
+
+def tim2txt(t):
+    return f'{int(t // 3600):02d}:{int(t // 60 % 60):02d}:{t % 60:05.2f}'
+
+
+def genscn(fname, n):
+    ''' Generate a scenario with n aircraft. Returns the number of lines. '''
+    rng = np.random.default_rng(1)
+    nlines = 0
+    with open(fname, 'w') as f:
+        f.write('# Generated load-time benchmark scenario\n')
+        for i, t in enumerate(np.sort(rng.uniform(0.0, 4 * 3600.0, n))):
+            acid = f'AC{i:05d}'
+            lat, lon = rng.uniform(51.0, 53.0), rng.uniform(3.0, 6.0)
+            lines = [f'CRE {acid},A320,{lat:.5f},{lon:.5f},{rng.uniform(0, 360):.1f},'
+                     f'FL{rng.integers(100, 360)},250']
+            lines += [f'ADDWPT {acid} {lat + 0.1 * j:.5f} {lon + 0.1 * j:.5f} '
+                      f'FL{rng.integers(100, 360)} 250' for j in range(NWPT)]
+            lines += [f'{acid} LNAV ON', f'{acid} VNAV ON']
+            for line in lines:
+                f.write(f'{tim2txt(t)}>{line}\n')
+            for dt in (300.0, 600.0):
+                f.write(f'{tim2txt(t + dt)}>ALT {acid} FL{rng.integers(100, 360)}\n')
+            nlines += len(lines) + 2
+    return nlines
+
+
+def timed(fun):
+    t0 = time.perf_counter()
+    fun()
+    return time.perf_counter() - t0
+
+
+def load_text(fname):
+    ''' Previous IC loading: parse the text, and add it to the stack. '''
+    Stack.reset()
+    cmdtimes, cmdlines = zip(*simstack.readscn(fname))
+    add_scencmds(cmdtimes, cmdlines)
+
+
+def load_compiled(fname):
+    ''' IC loading of a compiled scenario. '''
+    Stack.reset()
+    cmdtimes, cmdlines, cmdacids = simstack.loadscn(fname)
+    add_scencmds(cmdtimes, cmdlines, cmdacids)
+
+
+def main(*ntraf):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bs.settings.scenario_path = tmpdir
+        bs.settings.cache_path = tmpdir
+        print(f'{"ntraf":>6} {"lines":>8} | {"parse [s]":>10} {"IC text [s]":>12} | '
+              f'{"compile [s]":>12} {"cached [s]":>11} {"IC cached [s]":>14}')
+        for n in ntraf or NTRAF:
+            fname = os.path.join(tmpdir, f'bench{n}.scn')
+            nlines = genscn(fname, n)
+            tparse = timed(lambda: list(simstack.readscn(fname)))
+            ttext = timed(lambda: load_text(fname))
+            tcompile = timed(lambda: simstack.loadscn(fname))
+            tcached = timed(lambda: simstack.loadscn(fname))
+            tiC = timed(lambda: load_compiled(fname))
+            print(f'{n:6d} {nlines:8d} | {tparse:10.3f} {ttext:12.3f} | '
+                  f'{tcompile:12.3f} {tcached:11.3f} {tiC:14.3f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
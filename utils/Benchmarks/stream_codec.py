@@ -0,0 +1,114 @@
+''' Benchmark of the stream message throughput for ACDATA-sized messages.
+
+    ACDATA keyframes for n aircraft (default 1,000 and 10,000) are sent
+    from a PUB socket (like Node.send_stream) to a SUB socket in a receiving
+    thread (like Client.receive), over a local tcp connection. Two codecs
+    are timed:
+    - msgpack: one msgpack frame, with array data copied into it
+    - frames: a msgpack frame with metadata and small arrays, and one
+      zero-copy frame per large array (npcodec.encode_frames/decode_frames)
+    Shown are the messages per second, and the array data throughput.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/stream_codec.py [n1 n2 ...] '''
+import os
+import sys
+import threading
+import time
+import msgpack
+import numpy as np
+import zmq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from bluesky.network.acdata import ACDataEncoder
+from bluesky.network.npcodec import encode_ndarray, decode_ndarray, \
+    encode_frames, decode_frames
+
+
+NTRAF = (1000, 10000)
+NCOLS = 25
+DURATION = 2.0
+ADDRESS = 'tcp://127.0.0.1:{}'
+
+
+def acdata(n):
+    ''' Return an ACDATA keyframe message for n aircraft. '''
+    rng = np.random.default_rng(1)
+    cols = {f'col{i}': rng.uniform(0.0, 1000.0, n) for i in range(NCOLS)}
+    cols['inconf'] = rng.random(n) > 0.5
+    other = dict(simt=0.0, translvl=5000.0)
+    return ACDataEncoder().encode([f'AC{i:05d}' for i in range(n)], cols, other)
+
+
+def send_msgpack(sock, data):
+    sock.send_multipart([b'ACDATA', msgpack.packb(data, default=encode_ndarray, use_bin_type=True)])
+
+
+def recv_msgpack(sock):
+    msg = sock.recv_multipart()
+    return msgpack.unpackb(msg[1], object_hook=decode_ndarray, raw=False)
+
+
+def send_frames(sock, data):
+    sock.send_multipart([b'ACDATA'] + encode_frames(data), copy=False)
+
+
+def recv_frames(sock):
+    msg = sock.recv_multipart(copy=False)
+    return decode_frames(msg[1:])
+
+
+def throughput(data, send, recv):
+    ''' Returns the number of messages per second sent from a PUB to a SUB
+        socket, including encoding and decoding. '''
+    ctx = zmq.Context.instance()
+    pub = ctx.socket(zmq.PUB)
+    port = pub.bind_to_random_port('tcp://127.0.0.1')
+    sub = ctx.socket(zmq.SUB)
+    sub.setsockopt(zmq.SUBSCRIBE, b'')
+    sub.setsockopt(zmq.RCVHWM, 0)
+    pub.setsockopt(zmq.SNDHWM, 0)
+    sub.connect(ADDRESS.format(port))
+
+    nrecv = [0]
+    def receive():
+        while True:
+            if recv(sub).get('ntraf') is None:
+                break
+            nrecv[0] += 1
+
+    # Wait for the subscription to arrive
+    while not sub.poll(10):
+        pub.send_multipart([b'SYNC', msgpack.packb(dict(ntraf=0))])
+    while sub.poll(10):
+        sub.recv_multipart()
+
+    thread = threading.Thread(target=receive)
+    thread.start()
+    nsent = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < DURATION:
+        send(pub, data)
+        nsent += 1
+    send(pub, dict())
+    thread.join()
+    dt = time.perf_counter() - t0
+    pub.close()
+    sub.close()
+    return nrecv[0] / dt
+
+
+def main(*ntraf):
+    print(f'{"ntraf":>6} | {"msgpack [msg/s]":>15} {"[MB/s]":>8} | '
+          f'{"frames [msg/s]":>14} {"[MB/s]":>8}')
+    for n in ntraf or NTRAF:
+        data = acdata(n)
+        nbytes = sum(v.nbytes for v in data['cols'].values() if isinstance(v, np.ndarray))
+        rpack = throughput(data, send_msgpack, recv_msgpack)
+        rframes = throughput(data, send_frames, recv_frames)
+        print(f'{n:6d} | {rpack:15.0f} {rpack * nbytes * 1e-6:8.0f} | '
+              f'{rframes:14.0f} {rframes * nbytes * 1e-6:8.0f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
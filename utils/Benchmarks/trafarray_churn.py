@@ -0,0 +1,81 @@
+''' Create/delete churn benchmark of the default and buffered storage modes of
+    TrafficArrays (setting trafarray_buffered), using the complete Traffic
+    object tree (Traffic, Autopilot, ActiveWaypoint, ADSB, ConflictDetection,
+    the LVNL variables, etc.).
+
+    Two cases are timed:
+    - Sequential creation of n aircraft, one at a time (like a scenario or
+      live feed creating aircraft with individual CRE commands)
+    - Churn: 1000 cycles of creating one aircraft and deleting a random one,
+      with n aircraft in the simulation. The creation and deletion times
+      are also reported separately.
+
+    Usage (from the BlueSky root folder):
+        python utils/Benchmarks/trafarray_churn.py [n1 n2 ...] '''
+import os
+import sys
+import time
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import bluesky as bs
+from bluesky.traffic import Traffic
+
+
+NTRAF = (1000, 2000, 5000)
+NCHURN = 1000
+
+
+def count_arrays(obj):
+    ''' Count the number of traffic arrays and lists in obj and its children. '''
+    return len(obj._ArrVars) + len(obj._LstVars) + \
+        sum(count_arrays(child) for child in obj._children)
+
+
+def create_one(traf, i):
+    traf.cre(f'AC{i:06d}', 'A320', 52.0 + 1e-4 * (i % 1000), 4.0, 90.0, 3000.0, 150.0)
+
+
+def bench(traf, n, buffered):
+    ''' Returns time of sequential creation, churn, and the creation and
+        deletion part of the churn in seconds. '''
+    bs.settings.trafarray_buffered = buffered
+    traf.reset()
+    t0 = time.perf_counter()
+    for i in range(n):
+        create_one(traf, i)
+    tcre = time.perf_counter() - t0
+
+    rng = np.random.default_rng(1)
+    tchcre = tchdel = 0.0
+    for i in range(n, n + NCHURN):
+        t0 = time.perf_counter()
+        create_one(traf, i)
+        t1 = time.perf_counter()
+        traf.delete(int(rng.integers(0, traf.ntraf)))
+        t2 = time.perf_counter()
+        tchcre += t1 - t0
+        tchdel += t2 - t1
+    return tcre, tchcre + tchdel, tchcre, tchdel
+
+
+def main(*ntraf):
+    bs.settings.init(os.path.join('data', 'default.cfg'))
+    bs.sim = SimpleNamespace(simt=0.0, simdt=bs.settings.simdt)
+    bs.traf = Traffic()
+    print(f'Traffic tree: {count_arrays(bs.traf)} traffic arrays/lists in '
+          f'{", ".join(type(c).__name__ for c in bs.traf._children)}')
+    print(f'{"ntraf":>6} {"mode":>9} {"create n [s]":>13} {"per a/c [ms]":>13} '
+          f'{"churn [s]":>10} {"per cycle [ms]":>15} {"create [ms]":>12} {"delete [ms]":>12}')
+    for n in ntraf or NTRAF:
+        for buffered in (False, True):
+            tcre, tchurn, tchcre, tchdel = bench(bs.traf, n, buffered)
+            print(f'{n:6d} {"buffered" if buffered else "default":>9} '
+                  f'{tcre:13.2f} {1e3 * tcre / n:13.3f} '
+                  f'{tchurn:10.2f} {1e3 * tchurn / NCHURN:15.3f} '
+                  f'{1e3 * tchcre / NCHURN:12.3f} {1e3 * tchdel / NCHURN:12.3f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
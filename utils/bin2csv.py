@@ -0,0 +1,14 @@
+''' Convert binary BlueSky logs (logger FORMAT=BIN) to the CSV log layout.
+
+    Usage (from the BlueSky root folder):
+        python utils/bin2csv.py logfile.bin [logfile2.bin ...] '''
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bluesky.tools.datalog import bin2csv
+
+
+if __name__ == '__main__':
+    for fname in sys.argv[1:]:
+        print(f'{fname} -> {bin2csv(fname)}')